@@ -0,0 +1,141 @@
+import heapq
+
+###
+# Shortest path searches that are bounded by a cutoff distance, using a bucket
+# queue instead of a single binary heap.
+#
+# Tentative distances are quantized into buckets of a fixed width, and buckets
+# are settled in order.  If the bucket width is no wider than the shortest edge
+# (Dinitz's condition), relaxing a node can never put a label in the bucket
+# being settled, so every label in a bucket is already final and the bucket is
+# scanned as a plain list (Dial's algorithm).  Otherwise a bucket is heapified
+# when it is reached and labels that fall into it are pushed onto its small
+# heap.  Either way the distances returned are exact rather than rounded to the
+# bucket width: quantization only changes the order of work, never the results,
+# so band counts are identical to a plain Dijkstra search.
+#
+# Because searches never go past the cutoff, the number of buckets is at most
+# cutoff / bucketWidth.  Every bucket up to the last label is visited, empty or
+# not, so the default width is clamped to keep that at most MAX_BUCKETS: one
+# very short edge (e.g. a sliver from digitizing) would otherwise make a search
+# step through millions of empty buckets.
+###
+class BoundedShortestPath(object):
+  # The number of buckets that the default width is clamped to.
+  MAX_BUCKETS = 4096
+
+  ###
+  # Initialize the kernel.
+  # @param adjacency An array, indexed by node, of (neighbor, length) arrays
+  #        (see NetworkGraph.getAdjacency).  Lengths must be nonnegative.
+  # @param bucketWidth The width of each bucket (optional).  Defaults to the
+  #        shortest positive edge length, but no less than the longest search
+  #        over MAX_BUCKETS.
+  # @param cutoff The longest search (optional).  Defaults to the total edge
+  #        length, which no shortest path is longer than.
+  ###
+  def __init__(self, adjacency, bucketWidth=None, cutoff=None):
+    lengths   = [length for neighbors in adjacency for neighbor, length in neighbors]
+    minLength = min(lengths or [1.0])
+
+    if bucketWidth is None:
+      positive    = [length for length in lengths if length > 0]
+      span        = cutoff if cutoff is not None else sum(positive) / 2.0
+      bucketWidth = max(min(positive or [1.0]), float(span) / self.MAX_BUCKETS)
+
+    if bucketWidth <= 0:
+      raise ValueError("The bucket width must be greater than 0.")
+
+    self._adjacency   = adjacency
+    self._bucketWidth = float(bucketWidth)
+    self._unordered   = self._bucketWidth <= minLength
+
+  # Get the bucket width.
+  def getBucketWidth(self):
+    return self._bucketWidth
+
+  # Check if buckets are scanned without ordering (Dial's algorithm).
+  def isUnordered(self):
+    return self._unordered
+
+  ###
+  # Find the distance to every node within the cutoff.  Returns a dictionary
+  # of node -> distance.
+  # @param seeds An array of (node, distance) tuples to start from.  A point
+  #        that lies on an edge seeds both of the edge's nodes.
+  # @param cutoff The maximum distance to search (optional).
+  # @param prune A function(node, distance) that returns True if the search
+  #        should not continue past a node (optional).  The node's own distance
+  #        is still returned.  Used to cut off frontiers that can't lead to a
+  #        target within the cutoff (see LandmarkBounds).
+  ###
+  def search(self, seeds, cutoff=None, prune=None):
+    adjacency = self._adjacency
+    width     = self._bucketWidth
+    unordered = self._unordered
+    inf       = float("inf")
+    limit     = inf if cutoff is None else cutoff
+    best      = {}
+    buckets   = {}
+
+    # Seeds don't follow Dinitz's condition (two seeds can be close together),
+    # so the first bucket is always ordered.
+    for node, dist in seeds:
+      if dist <= limit and dist < best.get(node, inf):
+        best[node] = dist
+        buckets.setdefault(int(dist / width), []).append((dist, node))
+
+    if len(buckets) == 0:
+      return best
+
+    bucketNum = min(buckets)
+    firstNum  = bucketNum
+    lastNum   = max(buckets)
+
+    while bucketNum <= lastNum:
+      bucket = buckets.pop(bucketNum, None)
+
+      if bucket is not None:
+        ordered = not unordered or bucketNum == firstNum
+
+        if ordered:
+          heapq.heapify(bucket)
+          labels = self._drain(bucket)
+        else:
+          labels = bucket
+
+        for dist, node in labels:
+          # Stale label (a shorter one was found after this one was queued).
+          if dist > best[node]:
+            continue
+
+          if prune is not None and prune(node, dist):
+            continue
+
+          for neighbor, length in adjacency[node]:
+            newDist = dist + length
+
+            if newDist <= limit and newDist < best.get(neighbor, inf):
+              best[neighbor] = newDist
+              newNum         = int(newDist / width)
+
+              if newNum == bucketNum and ordered:
+                heapq.heappush(bucket, (newDist, neighbor))
+              elif newNum == bucketNum:
+                bucket.append((newDist, neighbor))
+              else:
+                if newNum in buckets:
+                  buckets[newNum].append((newDist, neighbor))
+                else:
+                  buckets[newNum] = [(newDist, neighbor)]
+                  if newNum > lastNum:
+                    lastNum = newNum
+
+      bucketNum += 1
+
+    return best
+
+  # Pop labels from a heap until it's empty (the heap may grow while draining).
+  def _drain(self, heap):
+    while heap:
+      yield heapq.heappop(heap)
@@ -0,0 +1,104 @@
+import heapq
+import unittest
+
+from random import Random
+from bounded_shortest_path import BoundedShortestPath
+
+class BoundedShortestPathSuite(unittest.TestCase):
+  # Random grid with uneven edge lengths.
+  def getGrid(self, size, seed):
+    rand      = Random(seed)
+    adjacency = [[] for i in range(0, size * size)]
+
+    for row in range(0, size):
+      for col in range(0, size):
+        node = row * size + col
+        if col + 1 < size:
+          length = rand.uniform(0.1, 30)
+          adjacency[node].append((node + 1, length))
+          adjacency[node + 1].append((node, length))
+        if row + 1 < size:
+          length = rand.uniform(0.1, 30)
+          adjacency[node].append((node + size, length))
+          adjacency[node + size].append((node, length))
+
+    return adjacency
+
+  # Plain binary heap Dijkstra for comparison.
+  def dijkstra(self, adjacency, seeds, cutoff):
+    best  = {}
+    queue = [(dist, node) for node, dist in seeds]
+    heapq.heapify(queue)
+
+    while queue:
+      dist, node = heapq.heappop(queue)
+      if node in best or dist > cutoff:
+        continue
+      best[node] = dist
+      for neighbor, length in adjacency[node]:
+        if neighbor not in best:
+          heapq.heappush(queue, (dist + length, neighbor))
+
+    return best
+
+  # Distances are exact regardless of the bucket width.
+  def test_matches_dijkstra(self):
+    adjacency = self.getGrid(25, 7)
+
+    for width in (None, 0.05, 0.5, 7, 100):
+      kernel = BoundedShortestPath(adjacency, width)
+
+      for cutoff in (15, 120, 10000):
+        self.assertEqual(kernel.search([(0, 0)], cutoff), self.dijkstra(adjacency, [(0, 0)], cutoff))
+
+      # Several seeds (e.g. a point in the middle of an edge).
+      seeds = [(312, 4.5), (313, 2.25)]
+      self.assertEqual(kernel.search(seeds, 80), self.dijkstra(adjacency, seeds, 80))
+
+  # Buckets are only scanned without ordering if no edge is shorter than the
+  # bucket width.
+  def test_bucket_width(self):
+    adjacency = [[(1, 2)], [(0, 2), (2, 3)], [(1, 3)]]
+    self.assertEqual(BoundedShortestPath(adjacency).getBucketWidth(), 2)
+    self.assertTrue(BoundedShortestPath(adjacency).isUnordered())
+    self.assertTrue(BoundedShortestPath(adjacency, 1.5).isUnordered())
+    self.assertFalse(BoundedShortestPath(adjacency, 2.5).isUnordered())
+
+    # Zero length edges always need ordering.
+    adjacency = [[(1, 0)], [(0, 0)]]
+    self.assertEqual(BoundedShortestPath(adjacency).getBucketWidth(), 1)
+    self.assertFalse(BoundedShortestPath(adjacency).isUnordered())
+    self.assertEqual(BoundedShortestPath(adjacency).search([(0, 0)]), {0: 0, 1: 0})
+
+  # A very short edge doesn't make the buckets narrower than the longest
+  # search over MAX_BUCKETS, and the distances stay exact.
+  def test_clamped_width(self):
+    adjacency = self.getGrid(25, 7)
+    adjacency[0].append((1, 1e-9))
+    adjacency[1].append((0, 1e-9))
+    maxWidth  = 10000.0 / BoundedShortestPath.MAX_BUCKETS
+
+    self.assertAlmostEqual(BoundedShortestPath(adjacency, None, 10000).getBucketWidth(), maxWidth)
+    self.assertFalse(BoundedShortestPath(adjacency, None, 10000).isUnordered())
+    self.assertAlmostEqual(BoundedShortestPath(adjacency, None, 1).getBucketWidth(), 1.0 / BoundedShortestPath.MAX_BUCKETS)
+
+    # Without a cutoff, the total edge length is the longest search.
+    total = sum(length for neighbors in adjacency for neighbor, length in neighbors) / 2.0
+    self.assertAlmostEqual(BoundedShortestPath(adjacency).getBucketWidth(), total / BoundedShortestPath.MAX_BUCKETS)
+
+    kernel = BoundedShortestPath(adjacency, None, 120)
+    self.assertEqual(kernel.search([(0, 0)], 120), self.dijkstra(adjacency, [(0, 0)], 120))
+
+    # An explicit width isn't clamped.
+    self.assertEqual(BoundedShortestPath(adjacency, 1e-6).getBucketWidth(), 1e-6)
+
+  # Unbounded search reaches the whole component.
+  def test_no_cutoff(self):
+    adjacency = [[(1, 2)], [(0, 2), (2, 3)], [(1, 3)], []]
+    kernel    = BoundedShortestPath(adjacency, 1)
+    self.assertEqual(kernel.search([(0, 0)]), {0: 0, 1: 2, 2: 5})
+    self.assertEqual(kernel.search([(0, 6)], 5), {})
+
+  # The bucket width must be positive.
+  def test_bad_width(self):
+    self.assertRaises(ValueError, BoundedShortestPath, [], 0)
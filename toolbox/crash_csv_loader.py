@@ -0,0 +1,390 @@
+import array
+import csv
+import hashlib
+import io
+import json
+import operator
+import os
+import re
+import sys
+
+from collections import OrderedDict
+
+###
+# A columnar loader for crash CSV files (e.g. statewide collision exports).
+#
+# Only the requested columns are converted, into typed arrays: DOUBLE columns
+# into array("d"), LONG columns into 64-bit array("q") (array("l") on Python 2,
+# which is 32-bit on Windows), and TEXT columns into lists of strings.  LONG
+# values that don't fit are errors.  Filters are applied as each row is
+# parsed, so rows that don't match are never converted past the filter
+# columns.  The parsed columns are stored in a binary sidecar file in the cache
+# directory, keyed by the CSV's path, size, and modification time, the
+# columns, and the filters, so the next load of the same columns only reads
+# the arrays back from disk.
+#
+# Filters are (column, operator, value) tuples, e.g. ("YEAR_", "==", 2011) or
+# ("CRASHSEV", "in", ["1", "2"]).  The values are compared with the converted
+# column values.  As in SQL, an empty numeric field (NULL_LONG or NaN) never
+# matches a filter, not even != or not in.  Filters can be parsed from text
+# with parseFilters.
+###
+class CrashCSVLoader(object):
+  # The version of the sidecar file format.
+  FORMAT_VERSION = 2
+
+  # The value of empty LONG fields (empty DOUBLE fields are NaN).
+  NULL_LONG = -2147483648
+
+  # The array type codes of the numeric column types.
+  TYPE_CODES = {"DOUBLE": "d", "LONG": "q" if sys.version_info[0] >= 3 else "l"}
+
+  # The range of LONG values.
+  LONG_BITS = array.array(TYPE_CODES["LONG"]).itemsize * 8
+  LONG_MIN  = -2 ** (LONG_BITS - 1)
+  LONG_MAX  = 2 ** (LONG_BITS - 1) - 1
+
+  # The filter operators.
+  OPERATORS = {
+    "==":     operator.eq,
+    "!=":     operator.ne,
+    "<":      operator.lt,
+    "<=":     operator.le,
+    ">":      operator.gt,
+    ">=":     operator.ge,
+    "in":     lambda value, values: value in values,
+    "not in": lambda value, values: value not in values}
+
+  ###
+  # Initialize the loader.
+  # @param cacheDir The directory where the sidecar files are stored (e.g.
+  #        under KFunctionHelper.getCacheDirectory).
+  # @param encoding The encoding of the CSV files.
+  ###
+  def __init__(self, cacheDir, encoding="utf-8"):
+    self._cacheDir = cacheDir
+    self._encoding = encoding
+
+  # Get the cache directory.
+  def getCacheDirectory(self):
+    return self._cacheDir
+
+  ###
+  # Check the columns and filters, and get the columns as an array of (name,
+  # type) tuples.
+  ###
+  def _getColumnSpec(self, columns, filters):
+    if isinstance(columns, dict):
+      columns = list(columns.items())
+
+    columnTypes = dict(columns)
+
+    for name, colType in columns:
+      if colType not in ("DOUBLE", "LONG", "TEXT"):
+        raise ValueError("Unknown column type for {0}: {1}".format(name, colType))
+
+    for column, opName, value in filters:
+      if column not in columnTypes:
+        raise ValueError("Filter column {0} is not one of the loaded columns.".format(column))
+      if opName not in self.OPERATORS:
+        raise ValueError("Unknown filter operator: {0}".format(opName))
+
+    return list(columns)
+
+  # Get a filter as part of a cache key (sets are sorted, since their order
+  # isn't the same from run to run).
+  def _getFilterKey(self, csvFilter):
+    column, opName, value = csvFilter
+
+    if isinstance(value, (set, frozenset)):
+      value = sorted(value)
+    return [column, opName, value]
+
+  ###
+  # Get the path of the sidecar file for a load.
+  # @param csvPath The path of the CSV file.
+  # @param columns An array of (name, type) tuples, or an OrderedDict.
+  # @param filters An array of (column, operator, value) tuples (optional).
+  ###
+  def getCachePath(self, csvPath, columns, filters=None):
+    filters  = list(filters or [])
+    columns  = self._getColumnSpec(columns, filters)
+    stat     = os.stat(csvPath)
+    parts    = [os.path.normcase(os.path.abspath(csvPath)), stat.st_size, int(stat.st_mtime * 1000),
+      columns, [self._getFilterKey(csvFilter) for csvFilter in filters], self._encoding, self.FORMAT_VERSION]
+    key      = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    return os.path.join(self._cacheDir, "{0}.{1}.columns".format(os.path.basename(csvPath), key[:16]))
+
+  ###
+  # Load columns of a CSV file.  Returns an OrderedDict of column name ->
+  # typed array, in the order of the columns.
+  # @param csvPath The path of the CSV file.
+  # @param columns An array of (name, type) tuples, or an OrderedDict.  The
+  #        types are DOUBLE, LONG, or TEXT.
+  # @param filters An array of (column, operator, value) tuples (optional).
+  #        Only the rows that match all the filters are loaded.
+  # @param useCache Whether or not to read and write the sidecar file.
+  ###
+  def load(self, csvPath, columns, filters=None, useCache=True):
+    filters = list(filters or [])
+    columns = self._getColumnSpec(columns, filters)
+
+    if useCache:
+      cachePath = self.getCachePath(csvPath, columns, filters)
+      loaded    = self._readCache(cachePath, columns)
+
+      if loaded is not None:
+        return loaded
+
+    loaded = self._parse(csvPath, columns, filters)
+
+    if useCache:
+      self._writeCache(cachePath, columns, loaded)
+
+    return loaded
+
+  # Open a CSV file for the csv module.
+  def _openCSV(self, csvPath):
+    if sys.version_info[0] < 3:
+      return open(csvPath, "rb")
+    return io.open(csvPath, "r", newline="", encoding=self._encoding)
+
+  # Get the function that checks if a converted value of a column is null.
+  def _getNullCheck(self, colType):
+    if colType == "DOUBLE":
+      return lambda value: value != value
+    elif colType == "LONG":
+      nullLong = self.NULL_LONG
+      return lambda value: value == nullLong
+    return lambda value: False
+
+  # Get the function that converts a field of a column.
+  def _getConverter(self, name, colType):
+    if colType == "DOUBLE":
+      nan = float("nan")
+      return lambda field: float(field) if field != "" else nan
+    elif colType == "LONG":
+      nullLong = self.NULL_LONG
+      longMin  = self.LONG_MIN
+      longMax  = self.LONG_MAX
+
+      def convertLong(field):
+        if field == "":
+          return nullLong
+
+        value = int(field)
+        if value < longMin or value > longMax:
+          raise ValueError("Value {0} of column {1} doesn't fit in a {2}-bit LONG.".format(
+            value, name, self.LONG_BITS))
+        return value
+
+      return convertLong
+    return lambda field: field
+
+  # Parse the columns out of a CSV file, one row at a time.
+  def _parse(self, csvPath, columns, filters):
+    with self._openCSV(csvPath) as csvFile:
+      reader = csv.reader(csvFile)
+      header = next(reader, [])
+
+      for name, colType in columns:
+        if name not in header:
+          raise ValueError("Column {0} is not in {1}.".format(name, csvPath))
+
+      # Each column's field index, converter, and output array.  The filter
+      # columns are converted first so that the other columns of rejected rows
+      # are skipped.
+      filterCols = set(csvFilter[0] for csvFilter in filters)
+      colTypes   = dict(columns)
+      ordered    = [name for name, colType in columns if name in filterCols] + \
+        [name for name, colType in columns if name not in filterCols]
+      fieldNums  = [header.index(name) for name in ordered]
+      converters = [self._getConverter(name, colTypes[name]) for name in ordered]
+      checks     = [(ordered.index(column), self.OPERATORS[opName], value, self._getNullCheck(colTypes[column]))
+        for column, opName, value in filters]
+      numFilter  = len(filterCols)
+      numCols    = len(ordered)
+      outputs    = [self._createColumn(colTypes[name]) for name in ordered]
+
+      for row in reader:
+        if len(row) < len(header):
+          row = row + [""] * (len(header) - len(row))
+
+        values = [converters[colNum](row[fieldNums[colNum]]) for colNum in range(0, numFilter)]
+
+        matches = True
+        for colNum, compare, value, isNull in checks:
+          if isNull(values[colNum]) or not compare(values[colNum], value):
+            matches = False
+            break
+
+        if not matches:
+          continue
+
+        for colNum in range(numFilter, numCols):
+          values.append(converters[colNum](row[fieldNums[colNum]]))
+
+        for colNum in range(0, numCols):
+          outputs[colNum].append(values[colNum])
+
+    byName = dict(zip(ordered, outputs))
+    return self._ordered(columns, byName)
+
+  # Create an empty column of a type.
+  def _createColumn(self, colType):
+    if colType in self.TYPE_CODES:
+      return array.array(self.TYPE_CODES[colType])
+    return []
+
+  # Put the columns in an OrderedDict, in the requested order.
+  def _ordered(self, columns, byName):
+    return OrderedDict((name, byName[name]) for name, colType in columns)
+
+  ###
+  # Read the columns from a sidecar file.  Returns None if there isn't one, or
+  # if it can't be used (e.g. it was written on a platform with different
+  # array sizes).
+  ###
+  def _readCache(self, cachePath, columns):
+    if not os.path.isfile(cachePath):
+      return None
+
+    with open(cachePath, "rb") as cacheFile:
+      header = json.loads(cacheFile.readline().decode("utf-8"))
+
+      if header["version"] != self.FORMAT_VERSION or header["columns"] != [list(col) for col in columns]:
+        return None
+
+      byName  = {}
+      numRows = header["numRows"]
+
+      for name, colType in columns:
+        if colType in self.TYPE_CODES:
+          column = array.array(self.TYPE_CODES[colType])
+
+          if column.itemsize != header["itemSizes"][colType]:
+            return None
+
+          # The arrays are written in the native byte order.
+          column.fromfile(cacheFile, numRows)
+        else:
+          blob   = cacheFile.read(header["textSizes"][name])
+          column = self._splitText(blob, numRows)
+
+        byName[name] = column
+
+    return self._ordered(columns, byName)
+
+  # Split a NUL separated block of text back into its values.
+  def _splitText(self, blob, numRows):
+    if numRows == 0:
+      return []
+    if sys.version_info[0] >= 3:
+      blob = blob.decode("utf-8")
+    return blob.split("\0")
+
+  # Join the values of a text column into a NUL separated block.  (The csv
+  # module doesn't allow NUL characters in fields.)
+  def _joinText(self, values):
+    blob = "\0".join(values)
+    if sys.version_info[0] >= 3:
+      blob = blob.encode("utf-8")
+    return blob
+
+  # Write the columns to a sidecar file.
+  def _writeCache(self, cachePath, columns, loaded):
+    cacheDir = os.path.dirname(cachePath)
+    if not os.path.isdir(cacheDir):
+      os.makedirs(cacheDir)
+
+    numRows   = len(loaded[columns[0][0]]) if len(columns) != 0 else 0
+    textBlobs = dict((name, self._joinText(loaded[name])) for name, colType in columns if colType == "TEXT")
+    header    = {
+      "version":   self.FORMAT_VERSION,
+      "columns":   [list(col) for col in columns],
+      "numRows":   numRows,
+      "itemSizes": dict((colType, array.array(typeCode).itemsize) for colType, typeCode in self.TYPE_CODES.items()),
+      "textSizes": dict((name, len(blob)) for name, blob in textBlobs.items())}
+
+    # Write to a temporary file first so that a failed run doesn't leave a
+    # partial sidecar behind.
+    tmpPath = "{0}.{1}.tmp".format(cachePath, os.getpid())
+
+    with open(tmpPath, "wb") as cacheFile:
+      cacheFile.write((json.dumps(header) + "\n").encode("utf-8"))
+
+      for name, colType in columns:
+        if colType in self.TYPE_CODES:
+          loaded[name].tofile(cacheFile)
+        else:
+          cacheFile.write(textBlobs[name])
+
+    if os.path.exists(cachePath):
+      os.remove(cachePath)
+    os.rename(tmpPath, cachePath)
+
+  ###
+  # Get the points of loaded columns as (ID, x, y) tuples, skipping points
+  # without coordinates (e.g. to snap them to a NetworkGraph).
+  # @param loaded The columns returned by load.
+  # @param idColumn The name of the ID column (e.g. CASEID).
+  # @param xColumn The name of the x coordinate column (e.g. POINT_X).
+  # @param yColumn The name of the y coordinate column (e.g. POINT_Y).
+  ###
+  @staticmethod
+  def getPoints(loaded, idColumn="CASEID", xColumn="POINT_X", yColumn="POINT_Y"):
+    return [(pointID, x, y) for pointID, x, y in zip(loaded[idColumn], loaded[xColumn], loaded[yColumn])
+      if x == x and y == y]
+
+  ###
+  # Parse filters from text, e.g. "YEAR_ == 2011; CRASHSEV in 1, 2".  Filters
+  # are separated by semicolons, and the values of "in" and "not in" by commas.
+  # A column is LONG if all of its values are integers, DOUBLE if they are
+  # numbers, and TEXT otherwise (or if any are quoted).  Returns the filter
+  # columns as an array of (name, type) tuples, and the filters.
+  # @param text The filters (optional).
+  ###
+  @staticmethod
+  def parseFilters(text):
+    columns = OrderedDict()
+    filters = []
+
+    for clause in (text or "").split(";"):
+      if clause.strip() == "":
+        continue
+
+      match = re.match(r"^\s*(\w+)\s*(==|!=|<=|>=|<|>|\bnot\s+in\b|\bin\b)\s*(.*?)\s*$", clause)
+      if match is None:
+        raise ValueError("Filter {0} is not of the form <column> <operator> <value>.".format(clause.strip()))
+
+      column = match.group(1)
+      opName = " ".join(match.group(2).split())
+      fields = match.group(3).split(",") if opName in ("in", "not in") else [match.group(3)]
+      fields = [field.strip() for field in fields]
+      quoted = [len(field) >= 2 and field[0] == field[-1] and field[0] in "'\"" for field in fields]
+      fields = [field[1:-1] if isQuoted else field for field, isQuoted in zip(fields, quoted)]
+
+      colType = "TEXT" if any(quoted) or "" in fields else CrashCSVLoader._getValueType(fields)
+      if columns.get(column, colType) != colType:
+        raise ValueError("Filter column {0} is compared with values of different types.".format(column))
+      columns[column] = colType
+
+      values = [float(field) if colType == "DOUBLE" else int(field) if colType == "LONG" else field
+        for field in fields]
+      filters.append((column, opName, values if opName in ("in", "not in") else values[0]))
+
+    return (list(columns.items()), filters)
+
+  # Get the column type of filter values: LONG, DOUBLE, or TEXT.
+  @staticmethod
+  def _getValueType(fields):
+    for colType, convert in (("LONG", int), ("DOUBLE", float)):
+      try:
+        for field in fields:
+          convert(field)
+        return colType
+      except ValueError:
+        pass
+
+    return "TEXT"
@@ -0,0 +1,143 @@
+import csv
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from crash_csv_loader import CrashCSVLoader
+
+class CrashCSVLoaderSuite(unittest.TestCase):
+  COLLISIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scratch", "collision data",
+    "Collisions.csv")
+
+  COLUMNS = [("CASEID", "LONG"), ("POINT_X", "DOUBLE"), ("POINT_Y", "DOUBLE"), ("YEAR_", "LONG"),
+    ("CRASHSEV", "TEXT"), ("DATE_", "TEXT")]
+
+  def setUp(self):
+    self.cacheDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.cacheDir)
+
+  # Read the rows of a CSV file as dictionaries with the csv module.
+  def readRows(self, csvPath):
+    with open(csvPath, "r") as csvFile:
+      return list(csv.DictReader(csvFile))
+
+  # Write a small CSV file.
+  def writeCSV(self, name, lines):
+    csvPath = os.path.join(self.cacheDir, name)
+
+    with open(csvPath, "w") as csvFile:
+      csvFile.write("\n".join(lines) + "\n")
+    return csvPath
+
+  # The columns match the csv module's values, converted to their types.
+  def test_load(self):
+    loaded = CrashCSVLoader(self.cacheDir).load(self.COLLISIONS, self.COLUMNS)
+    rows   = self.readRows(self.COLLISIONS)
+
+    self.assertEqual(list(loaded.keys()), [name for name, colType in self.COLUMNS])
+    self.assertEqual(list(loaded["CASEID"]), [int(row["CASEID"]) for row in rows])
+    self.assertEqual(list(loaded["POINT_X"]), [float(row["POINT_X"]) for row in rows])
+    self.assertEqual(loaded["CRASHSEV"], [row["CRASHSEV"] for row in rows])
+    self.assertEqual(loaded["POINT_Y"].typecode, "d")
+
+  # Only the rows that match all the filters are loaded.
+  def test_filters(self):
+    filters = [("CRASHSEV", "in", set(["1", "2"])), ("DATE_", "<", "2011-07-01")]
+    loaded  = CrashCSVLoader(self.cacheDir).load(self.COLLISIONS, self.COLUMNS, filters)
+    rows    = [row for row in self.readRows(self.COLLISIONS)
+      if row["CRASHSEV"] in ("1", "2") and row["DATE_"] < "2011-07-01"]
+
+    self.assertTrue(0 < len(rows) < len(self.readRows(self.COLLISIONS)))
+    self.assertEqual(list(loaded["CASEID"]), [int(row["CASEID"]) for row in rows])
+    self.assertEqual(loaded["DATE_"], [row["DATE_"] for row in rows])
+
+  # The second load is read from the sidecar file, and gives the same columns.
+  def test_cache(self):
+    loader    = CrashCSVLoader(self.cacheDir)
+    cachePath = loader.getCachePath(self.COLLISIONS, self.COLUMNS, [("YEAR_", "==", 2011)])
+
+    self.assertFalse(os.path.exists(cachePath))
+    parsed = loader.load(self.COLLISIONS, self.COLUMNS, [("YEAR_", "==", 2011)])
+    self.assertTrue(os.path.exists(cachePath))
+
+    cached = loader.load(self.COLLISIONS, self.COLUMNS, [("YEAR_", "==", 2011)])
+    self.assertEqual(cached, parsed)
+    self.assertNotEqual(loader.getCachePath(self.COLLISIONS, self.COLUMNS), cachePath)
+
+  # Empty fields are NaN or NULL_LONG, and a changed file isn't read from a
+  # stale sidecar.
+  def test_empty_fields(self):
+    csvPath = self.writeCSV("small.csv", ["ID,X,NAME", "1,2.5,a", "2,,", ",3,c"])
+    columns = [("ID", "LONG"), ("X", "DOUBLE"), ("NAME", "TEXT")]
+    loader  = CrashCSVLoader(self.cacheDir)
+
+    for i in range(0, 2):
+      loaded = loader.load(csvPath, columns)
+      self.assertEqual(list(loaded["ID"]), [1, 2, CrashCSVLoader.NULL_LONG])
+      self.assertTrue(math.isnan(loaded["X"][1]))
+      self.assertEqual(loaded["NAME"], ["a", "", "c"])
+
+    self.writeCSV("small.csv", ["ID,X,NAME", "7,1,b", "8,2,c", "9,3,d", "10,4,e"])
+    os.utime(csvPath, (0, 0))
+    self.assertEqual(list(loader.load(csvPath, columns)["ID"]), [7, 8, 9, 10])
+
+  # Empty numeric fields don't match any filter, even != and not in.
+  def test_null_filters(self):
+    csvPath = self.writeCSV("years.csv", ["ID,YEAR_,X", "1,2010,1.5", "2,,", "3,2012,2.5"])
+    columns = [("ID", "LONG"), ("YEAR_", "LONG"), ("X", "DOUBLE")]
+    loader  = CrashCSVLoader(self.cacheDir)
+
+    for csvFilter, ids in ((("YEAR_", "<", 2011), [1]), (("YEAR_", "!=", 2012), [1]),
+      (("YEAR_", "not in", [2010]), [3]), (("X", "!=", 1.5), [3]), (("X", "not in", [2.5]), [1])):
+      self.assertEqual(list(loader.load(csvPath, columns, [csvFilter])["ID"]), ids)
+
+  # Points without coordinates are skipped.
+  def test_points(self):
+    csvPath = self.writeCSV("points.csv", ["CASEID,POINT_X,POINT_Y", "1,2,3", "2,,", "3,4,5"])
+    loaded  = CrashCSVLoader(self.cacheDir).load(csvPath, [("CASEID", "LONG"), ("POINT_X", "DOUBLE"),
+      ("POINT_Y", "DOUBLE")])
+
+    self.assertEqual(CrashCSVLoader.getPoints(loaded), [(1, 2.0, 3.0), (3, 4.0, 5.0)])
+
+  # LONG columns hold 64-bit IDs where the platform allows, and values out of
+  # range are errors rather than overflowing.
+  def test_long_range(self):
+    csvPath = self.writeCSV("ids.csv", ["ID", str(CrashCSVLoader.LONG_MAX), str(CrashCSVLoader.LONG_MIN + 1)])
+    loader  = CrashCSVLoader(self.cacheDir)
+
+    self.assertEqual(list(loader.load(csvPath, [("ID", "LONG")])["ID"]),
+      [CrashCSVLoader.LONG_MAX, CrashCSVLoader.LONG_MIN + 1])
+    self.assertTrue(CrashCSVLoader.LONG_BITS >= 32)
+
+    self.writeCSV("ids.csv", ["ID", str(CrashCSVLoader.LONG_MAX + 1)])
+    self.assertRaises(ValueError, loader.load, csvPath, [("ID", "LONG")])
+
+  # Filters are parsed from text, with column types from their values.
+  def test_parse_filters(self):
+    columns, filters = CrashCSVLoader.parseFilters("YEAR_ == 2011; CRASHSEV in 1, 2; DATE_ < 2011-07-01;"
+      "LOCATION not in '1942', 1943; POINT_X>=-117.5")
+
+    self.assertEqual(columns, [("YEAR_", "LONG"), ("CRASHSEV", "LONG"), ("DATE_", "TEXT"), ("LOCATION", "TEXT"),
+      ("POINT_X", "DOUBLE")])
+    self.assertEqual(filters, [("YEAR_", "==", 2011), ("CRASHSEV", "in", [1, 2]), ("DATE_", "<", "2011-07-01"),
+      ("LOCATION", "not in", ["1942", "1943"]), ("POINT_X", ">=", -117.5)])
+    self.assertEqual(CrashCSVLoader.parseFilters(None), ([], []))
+
+    self.assertRaises(ValueError, CrashCSVLoader.parseFilters, "YEAR_ = 2011")
+    self.assertRaises(ValueError, CrashCSVLoader.parseFilters, "YEAR_ == 2011; YEAR_ == recent")
+
+  # Unknown columns and filter operators are errors.
+  def test_errors(self):
+    loader = CrashCSVLoader(self.cacheDir)
+
+    self.assertRaises(ValueError, loader.load, self.COLLISIONS, [("NOT_A_COLUMN", "TEXT")])
+    self.assertRaises(ValueError, loader.load, self.COLLISIONS, [("CASEID", "SHORT")])
+    self.assertRaises(ValueError, loader.load, self.COLLISIONS, self.COLUMNS, [("CASEID", "~", 1)])
+    self.assertRaises(ValueError, loader.load, self.COLLISIONS, self.COLUMNS, [("KILLED", "==", 1)])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,175 @@
+import arcpy
+import os
+import k_function_helper
+import crash_csv_loader
+
+from arcpy import env
+
+# ArcMap caching prevention.
+k_function_helper = reload(k_function_helper)
+crash_csv_loader  = reload(crash_csv_loader)
+
+from k_function_helper import KFunctionHelper
+from crash_csv_loader  import CrashCSVLoader
+
+class CrashCSVPoints(object):
+  ###
+  # Initialize the tool.
+  ###
+  def __init__(self):
+    self.label              = "Crash CSV To Points"
+    self.description        = "Loads the crashes in a CSV file (e.g. a statewide collision export) that match a filter into a point feature class.  The columns are cached, so loading other crashes from the same file is fast."
+    self.canRunInBackground = False
+    env.overwriteOutput     = True
+    self.kfHelper           = KFunctionHelper()
+
+  ###
+  # Get input from the users.
+  ###
+  def getParameterInfo(self):
+    # Input CSV file.
+    csvFile = arcpy.Parameter(
+      displayName="Input Crash CSV File",
+      name="csv_file",
+      datatype="DEFile",
+      parameterType="Required",
+      direction="Input")
+    csvFile.filter.list = ["csv", "txt"]
+
+    # ID column.
+    idColumn = arcpy.Parameter(
+      displayName="Crash ID Column",
+      name="id_column",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    idColumn.value = "CASEID"
+
+    # X coordinate column.
+    xColumn = arcpy.Parameter(
+      displayName="X Coordinate Column",
+      name="x_column",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    xColumn.value = "POINT_X"
+
+    # Y coordinate column.
+    yColumn = arcpy.Parameter(
+      displayName="Y Coordinate Column",
+      name="y_column",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    yColumn.value = "POINT_Y"
+
+    # Filter, e.g. YEAR_ == 2011; CRASHSEV in 1, 2.
+    csvFilter = arcpy.Parameter(
+      displayName="Filter (e.g. YEAR_ == 2011; CRASHSEV in 1, 2)",
+      name="filter",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+
+    # Coordinate system of the coordinates.
+    coordSys = arcpy.Parameter(
+      displayName="Coordinate System of the Coordinates",
+      name="coordinate_system",
+      datatype="GPSpatialReference",
+      parameterType="Required",
+      direction="Input")
+    coordSys.value = 4326
+
+    # Output location.
+    outLoc = arcpy.Parameter(
+      displayName="Output Location (Database Path)",
+      name="out_location",
+      datatype="DEWorkspace",
+      parameterType="Required",
+      direction="Input")
+    outLoc.value = arcpy.env.workspace
+
+    # Output points.
+    outFCName = arcpy.Parameter(
+      displayName="Output Crash Points Feature Class",
+      name="output_points_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outFCName.value = "Crashes"
+
+    return [csvFile, idColumn, xColumn, yColumn, csvFilter, coordSys, outLoc, outFCName]
+
+  ###
+  # Check if the tool is available for use.
+  ###
+  def isLicensed(self):
+    return True
+
+  ###
+  # Set parameter defaults.
+  ###
+  def updateParameters(self, parameters):
+    return
+
+  ###
+  # If any fields are invalid, show an appropriate error message.
+  ###
+  def updateMessages(self, parameters):
+    try:
+      CrashCSVLoader.parseFilters(parameters[4].valueAsText)
+      parameters[4].clearMessage()
+    except ValueError as error:
+      parameters[4].setErrorMessage(str(error))
+
+  ###
+  # Execute the tool.
+  ###
+  def execute(self, parameters, messages):
+    csvPath    = parameters[0].valueAsText
+    idColumn   = parameters[1].valueAsText
+    xColumn    = parameters[2].valueAsText
+    yColumn    = parameters[3].valueAsText
+    filterText = parameters[4].valueAsText
+    coordSys   = parameters[5].value
+    outLoc     = parameters[6].valueAsText
+    outFCName  = parameters[7].valueAsText
+    outFCPath  = os.path.join(outLoc, outFCName)
+    loader     = CrashCSVLoader(os.path.join(self.kfHelper.getCacheDirectory(), "crash_csv"))
+
+    messages.addMessage("\nInput crash CSV file: {0}".format(csvPath))
+    messages.addMessage("Crash ID column: {0}".format(idColumn))
+    messages.addMessage("X coordinate column: {0}".format(xColumn))
+    messages.addMessage("Y coordinate column: {0}".format(yColumn))
+    messages.addMessage("Filter: {0}".format(filterText))
+    messages.addMessage("Coordinate system of the coordinates: {0}".format(coordSys.name))
+    messages.addMessage("Output location (database path): {0}".format(outLoc))
+    messages.addMessage("Output crash points feature class: {0}\n".format(outFCName))
+
+    # Only the ID, the coordinates, and the filter columns are parsed.
+    filterCols, filters = CrashCSVLoader.parseFilters(filterText)
+    columns             = [(idColumn, "LONG"), (xColumn, "DOUBLE"), (yColumn, "DOUBLE")]
+    columns            += [column for column in filterCols if column[0] not in (idColumn, xColumn, yColumn)]
+    cached              = os.path.isfile(loader.getCachePath(csvPath, columns, filters))
+    loaded              = loader.load(csvPath, columns, filters)
+    located             = CrashCSVLoader.getPoints(loaded, idColumn, xColumn, yColumn)
+
+    # Crashes without an ID can't be told apart, so they aren't loaded.
+    points = [point for point in located if point[0] != CrashCSVLoader.NULL_LONG]
+
+    messages.addMessage("Crashes matching the filter: {0}{1}".format(len(loaded[idColumn]),
+      " (cached)" if cached else ""))
+    messages.addMessage("Crashes without coordinates: {0}".format(len(loaded[idColumn]) - len(located)))
+    messages.addMessage("Crashes without an ID: {0}".format(len(located) - len(points)))
+
+    # Geodatabase LONG fields are 32-bit (the smallest value is NULL_LONG, and
+    # those rows are dropped above), so larger IDs are stored as doubles
+    # (which are exact up to 2^53).
+    idType = "LONG" if all(-2147483647 <= pointID <= 2147483647 for pointID, x, y in points) else "DOUBLE"
+
+    arcpy.CreateFeatureclass_management(outLoc, outFCName, "POINT", spatial_reference=coordSys)
+    arcpy.AddField_management(outFCPath, idColumn, idType)
+
+    with arcpy.da.InsertCursor(outFCPath, ["SHAPE@XY", idColumn]) as cursor:
+      for pointID, x, y in points:
+        cursor.insertRow([(x, y), pointID])
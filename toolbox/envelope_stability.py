@@ -0,0 +1,104 @@
+from network_k_analysis import NetworkKAnalysis
+
+###
+# A diagnostic of how stable the confidence envelopes are with fewer
+# permutations.
+#
+# The envelope from the first n permutations is compared to the envelope from
+# all of them, for increasing n.  The change is relative to the width of the
+# full envelope, per distance band, so 0.1 means that some bound of the smaller
+# envelope is off by 10% of the envelope's width.  If the change is already
+# small at n permutations, about n permutations are enough for stable envelopes.
+#
+# This only holds for independent permutations ("Random" sampling).  With
+# variance reduction (see RandomPointSampler), the permutations are generated
+# as one batch, and the first n of them aren't a stratified sample on their
+# own, so no checkpoints are compared.
+###
+class EnvelopeStability(object):
+  # The permutation counts that are compared (the tools' choices, and some in
+  # between).
+  CHECKPOINTS = (9, 19, 49, 99, 199, 499, 999)
+
+  ###
+  # Initialize the diagnostic.
+  # @param confInterval The confidence interval (e.g. .95).
+  # @param netKCalculations The network K calculations, observed first (see
+  #        NetworkKAnalysis).
+  # @param samplingMethod How the random points were generated: one of
+  #        RandomPointSampler.SAMPLING_METHODS (optional).
+  ###
+  def __init__(self, confInterval, netKCalculations, samplingMethod="Random"):
+    self._confInterval     = confInterval
+    self._netKCalculations = netKCalculations
+    self._numPerms         = len(netKCalculations) - 1
+    self._samplingMethod   = samplingMethod or "Random"
+
+  # Get the number of permutations.
+  def getNumberOfPermutations(self):
+    return self._numPerms
+
+  # Check if a prefix of the permutations is a sample on its own (see above).
+  def hasCheckpoints(self):
+    return self._samplingMethod == "Random"
+
+  # Get the lower and upper point counts of an envelope.
+  def _getBounds(self, netKAn):
+    return ([band["count"] for band in netKAn.getLowerConfidenceEnvelope()],
+      [band["count"] for band in netKAn.getUpperConfidenceEnvelope()])
+
+  ###
+  # Compare the envelopes at each checkpoint below the number of permutations
+  # to the full envelope.  Returns an array of dictionaries with numPerms,
+  # maxChange (the largest change of a bound relative to the envelope's width,
+  # over all the distance bands), and meanChange (the mean over the bands).
+  ###
+  def getStability(self):
+    if self._numPerms < 2 or not self.hasCheckpoints():
+      return []
+
+    fullLower, fullUpper = self._getBounds(NetworkKAnalysis(self._confInterval, self._netKCalculations))
+    stability            = []
+
+    for numPerms in self.CHECKPOINTS:
+      if numPerms >= self._numPerms:
+        break
+
+      lower, upper = self._getBounds(NetworkKAnalysis(self._confInterval, self._netKCalculations[:numPerms + 1]))
+      changes      = []
+
+      for bandNum in range(0, len(fullLower)):
+        # A band with a zero-width envelope is compared in point counts.
+        width = max(fullUpper[bandNum] - fullLower[bandNum], 1)
+        changes.append(max(abs(lower[bandNum] - fullLower[bandNum]),
+          abs(upper[bandNum] - fullUpper[bandNum])) / float(width))
+
+      stability.append({
+        "numPerms":   numPerms,
+        "maxChange":  max(changes) if len(changes) != 0 else 0.0,
+        "meanChange": sum(changes) / len(changes) if len(changes) != 0 else 0.0})
+
+    return stability
+
+  ###
+  # Get the diagnostic as lines of text for the tool messages (none if there
+  # are too few permutations to compare).
+  ###
+  def getSummary(self):
+    stability = self.getStability()
+
+    if not self.hasCheckpoints() and self._numPerms > self.CHECKPOINTS[0]:
+      return ["Envelope stability isn't reported for {0} sampling: part of a batch isn't a "
+        "{0} sample.".format(self._samplingMethod)]
+
+    if len(stability) == 0:
+      return []
+
+    lines = ["Envelope stability ({0:.0f}% envelope, relative to {1} permutations):".format(
+      self._confInterval * 100, self._numPerms)]
+
+    for checkpoint in stability:
+      lines.append("  {0:>4d} permutations: max change {1:.3f}, mean change {2:.3f}".format(
+        checkpoint["numPerms"], checkpoint["maxChange"], checkpoint["meanChange"]))
+
+    return lines
@@ -0,0 +1,53 @@
+import unittest
+
+from random import Random
+from envelope_stability import EnvelopeStability
+
+class EnvelopeStabilitySuite(unittest.TestCase):
+  # Random network K calculations (observed first).
+  def getNetKCalculations(self, numPerms, rand):
+    return [[{"distanceBand": band * 100, "count": rand.randint(0, 50) + band * 10} for band in range(0, 4)]
+      for i in range(0, numPerms + 1)]
+
+  # The envelopes at each checkpoint are compared to the full envelope.
+  def test_stability(self):
+    stability = EnvelopeStability(.95, self.getNetKCalculations(199, Random(1))).getStability()
+
+    self.assertEqual([checkpoint["numPerms"] for checkpoint in stability], [9, 19, 49, 99])
+    for checkpoint in stability:
+      self.assertTrue(0 <= checkpoint["meanChange"] <= checkpoint["maxChange"])
+
+  # Identical permutations are perfectly stable.
+  def test_identical(self):
+    netKCalculations = [[{"distanceBand": 0, "count": 5}, {"distanceBand": 100, "count": 9}]] * 100
+
+    for checkpoint in EnvelopeStability(.95, netKCalculations).getStability():
+      self.assertEqual(checkpoint["maxChange"], 0.0)
+
+  # There is nothing to compare with few permutations.
+  def test_summary(self):
+    self.assertEqual(EnvelopeStability(.95, self.getNetKCalculations(9, Random(2))).getSummary(), [])
+    self.assertEqual(EnvelopeStability(.95, self.getNetKCalculations(0, Random(2))).getSummary(), [])
+
+    lines = EnvelopeStability(.95, self.getNetKCalculations(99, Random(2))).getSummary()
+    self.assertEqual(len(lines), 4)
+    self.assertTrue(lines[0].startswith("Envelope stability (95% envelope"))
+
+  # The first permutations of a stratified batch aren't a stratified sample,
+  # so only the full batch is reported.
+  def test_batch_sampling(self):
+    netKCalculations = self.getNetKCalculations(199, Random(3))
+
+    for method in ("Stratified", "Quasi-random"):
+      stability = EnvelopeStability(.95, netKCalculations, method)
+
+      self.assertFalse(stability.hasCheckpoints())
+      self.assertEqual(stability.getStability(), [])
+      self.assertEqual(len(stability.getSummary()), 1)
+      self.assertTrue(method in stability.getSummary()[0])
+
+    self.assertEqual(EnvelopeStability(.95, self.getNetKCalculations(9, Random(3)), "Stratified").getSummary(), [])
+    self.assertEqual(len(EnvelopeStability(.95, netKCalculations, None).getStability()), 4)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,96 @@
+import math
+
+###
+# Finds the pairs of points that are within a straight-line radius of each
+# other.  The network distance between two points is never shorter than the
+# straight-line distance between them, so a pair that is farther apart than the
+# radius is guaranteed to be beyond the cutoff and never needs to be solved.
+#
+# Points are hashed into a uniform grid with cells that are as wide as the
+# radius, so only the 3x3 block of cells around a point has to be checked.
+###
+class EuclideanPairFilter(object):
+  ###
+  # Initialize the filter.
+  # @param radius The straight-line search radius (e.g. the cutoff distance).
+  ###
+  def __init__(self, radius):
+    self._radius = radius
+
+    # A zero radius only matches coincident points, but the cells still need
+    # a size.
+    if radius > 0:
+      self._cellSize = float(radius)
+    else:
+      self._cellSize = 1.0
+
+  # Get the search radius.
+  def getRadius(self):
+    return self._radius
+
+  # Get the grid cell that a coordinate falls in.
+  def _getCell(self, x, y):
+    return (int(math.floor(x / self._cellSize)), int(math.floor(y / self._cellSize)))
+
+  ###
+  # Hash an array of points into the grid.
+  # @param points An array of (id, x, y) tuples.
+  ###
+  def _buildGrid(self, points):
+    grid = {}
+
+    for point in points:
+      cell = self._getCell(point[1], point[2])
+      if cell in grid:
+        grid[cell].append(point)
+      else:
+        grid[cell] = [point]
+
+    return grid
+
+  ###
+  # Get all the (source ID, destination ID) pairs that are within the radius.
+  # @param srcPoints An array of (id, x, y) tuples.
+  # @param destPoints An array of (id, x, y) tuples.
+  # @param excludeSelf If True, a point is not paired with itself (for global
+  #        analysis, where the sources and destinations are the same points).
+  ###
+  def getCandidatePairs(self, srcPoints, destPoints, excludeSelf=False):
+    grid    = self._buildGrid(destPoints)
+    radSq   = self._radius * self._radius
+    pairs   = []
+
+    for srcID, srcX, srcY in srcPoints:
+      cellX, cellY = self._getCell(srcX, srcY)
+
+      for offX in (-1, 0, 1):
+        for offY in (-1, 0, 1):
+          for destID, destX, destY in grid.get((cellX + offX, cellY + offY), ()):
+            if excludeSelf and srcID == destID:
+              continue
+
+            dX = destX - srcX
+            dY = destY - srcY
+
+            if dX * dX + dY * dY <= radSq:
+              pairs.append((srcID, destID))
+
+    return pairs
+
+  ###
+  # Get the IDs of the source points and destination points that take part in
+  # at least one candidate pair.  Any other point is farther than the radius
+  # from every point in the other set.
+  # @param srcPoints An array of (id, x, y) tuples.
+  # @param destPoints An array of (id, x, y) tuples.
+  # @param excludeSelf See getCandidatePairs.
+  ###
+  def getCandidateIDs(self, srcPoints, destPoints, excludeSelf=False):
+    srcIDs  = set()
+    destIDs = set()
+
+    for srcID, destID in self.getCandidatePairs(srcPoints, destPoints, excludeSelf):
+      srcIDs.add(srcID)
+      destIDs.add(destID)
+
+    return (srcIDs, destIDs)
@@ -0,0 +1,62 @@
+import unittest
+
+from random import Random
+from euclidean_pair_filter import EuclideanPairFilter
+
+class EuclideanPairFilterSuite(unittest.TestCase):
+  # Brute force version of the filter for comparison.
+  def getPairs(self, srcPoints, destPoints, radius, excludeSelf):
+    pairs = []
+    for srcID, srcX, srcY in srcPoints:
+      for destID, destX, destY in destPoints:
+        if excludeSelf and srcID == destID:
+          continue
+        if (destX - srcX) ** 2 + (destY - srcY) ** 2 <= radius ** 2:
+          pairs.append((srcID, destID))
+    return sorted(pairs)
+
+  # Points on a line.
+  def test_candidate_pairs(self):
+    points = [(1, 0, 0), (2, 3, 0), (3, 5, 0), (4, 20, 0)]
+    epf    = EuclideanPairFilter(3)
+
+    self.assertEqual(epf.getRadius(), 3)
+    self.assertEqual(sorted(epf.getCandidatePairs(points, points, True)),
+      [(1, 2), (2, 1), (2, 3), (3, 2)])
+
+    # Without excluding self, each point is paired with itself.
+    self.assertEqual(len(epf.getCandidatePairs(points, points)), 8)
+
+  # Point 4 has no neighbors, so it's dropped.
+  def test_candidate_ids(self):
+    points = [(1, 0, 0), (2, 3, 0), (3, 5, 0), (4, 20, 0)]
+    epf    = EuclideanPairFilter(3)
+
+    srcIDs, destIDs = epf.getCandidateIDs(points, points, True)
+    self.assertEqual(srcIDs,  set([1, 2, 3]))
+    self.assertEqual(destIDs, set([1, 2, 3]))
+
+    # Cross: only the bridge near the crashes is kept.
+    bridges = [(1, 0, 0), (2, 100, 100)]
+    srcIDs, destIDs = epf.getCandidateIDs(bridges, points)
+    self.assertEqual(srcIDs,  set([1]))
+    self.assertEqual(destIDs, set([1, 2]))
+
+  # A zero radius only matches coincident points.
+  def test_zero_radius(self):
+    points = [(1, 2, 2), (2, 2, 2), (3, 2.5, 2)]
+    epf    = EuclideanPairFilter(0)
+    self.assertEqual(sorted(epf.getCandidatePairs(points, points, True)), [(1, 2), (2, 1)])
+
+  # Random points (including negative coordinates) match a brute force search.
+  def test_matches_brute_force(self):
+    rand    = Random(42)
+    srcPts  = [(i, rand.uniform(-500, 500), rand.uniform(-500, 500)) for i in range(150)]
+    destPts = [(i, rand.uniform(-500, 500), rand.uniform(-500, 500)) for i in range(200)]
+
+    for radius in (10, 75, 240):
+      epf = EuclideanPairFilter(radius)
+      self.assertEqual(sorted(epf.getCandidatePairs(srcPts, destPts)),
+        self.getPairs(srcPts, destPts, radius, False))
+      self.assertEqual(sorted(epf.getCandidatePairs(srcPts, srcPts, True)),
+        self.getPairs(srcPts, srcPts, radius, True))
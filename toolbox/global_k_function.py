@@ -1,277 +1,550 @@
-import arcpy
-import os
-import network_k_calculation
-import k_function_helper
-import random_odcm_permutations_svc
-import global_k_function_svc
-
-from arcpy import env
-
-# ArcMap caching prevention.
-network_k_calculation        = reload(network_k_calculation)
-k_function_helper            = reload(k_function_helper)
-random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
-global_k_function_svc        = reload(global_k_function_svc)
-
-from network_k_calculation        import NetworkKCalculation
-from k_function_helper            import KFunctionHelper
-from random_odcm_permutations_svc import RandomODCMPermutationsSvc
-from global_k_function_svc        import GlobalKFunctionSvc
-
-class GlobalKFunction(object):
-  ###
-  # Initialize the tool.
-  ###
-  def __init__(self):
-    self.label              = "Global K Function"
-    self.description        = "Uses a Global Network K Function to analyze clustering and dispersion trends in a set of crash points."
-    self.canRunInBackground = False
-    env.overwriteOutput     = True
-    self.kfHelper           = KFunctionHelper()
-  
-  ###
-  # Get input from the users.
-  ###
-  def getParameterInfo(self):
-    # Input origin features.
-    points = arcpy.Parameter(
-      displayName="Input Points Feature Dataset",
-      name="points",
-      datatype="Feature Class",
-      parameterType="Required",
-      direction="Input")
-    points.filter.list = ["Point"]
-
-    # Network dataset.
-    networkDataset = arcpy.Parameter(
-      displayName="Input Network Dataset",
-      name = "network_dataset",
-      datatype="Network Dataset Layer",
-      parameterType="Required",
-      direction="Input")
-
-    # Number of distance increments.
-    numBands = arcpy.Parameter(
-      displayName="Input Number of Distance Bands",
-      name="num_dist_bands",
-      datatype="Long",
-      parameterType="Optional",
-      direction="Input")
-
-    # Beginning distance.
-    begDist = arcpy.Parameter(
-      displayName="Input Beginning Distance",
-      name="beginning_distance",
-      datatype="Double",
-      parameterType="Required",
-      direction="Input")
-    begDist.value = 0
-
-    # Distance increment.
-    distInc = arcpy.Parameter(
-      displayName="Input Distance Increment",
-      name="distance_increment",
-      datatype="Double",
-      parameterType="Required",
-      direction="Input")
-    distInc.value = 1000
-
-    # Snap distance.
-    snapDist = arcpy.Parameter(
-      displayName="Input Snap Distance",
-      name="snap_distance",
-      datatype="Double",
-      parameterType="Required",
-      direction="Input")
-    snapDist.value = 25
-
-    # Output location.
-    outNetKLoc = arcpy.Parameter(
-      displayName="Output Location (Database Path)",
-      name="out_location",
-      datatype="DEWorkspace",
-      parameterType="Required",
-      direction="Input")
-    outNetKLoc.value = arcpy.env.workspace
-
-    # The raw ODCM data.
-    outRawODCMFCName = arcpy.Parameter(
-      displayName="Raw ODCM Data Table",
-      name = "output_raw_odcm_feature_class",
-      datatype="GPString",
-      parameterType="Required",
-      direction="Output")
-    outRawODCMFCName.value = "Global_K_Raw_ODCM_Data"
-
-    # The raw data feature class (e.g. observed and random point computations).
-    outRawFCName = arcpy.Parameter(
-      displayName="Raw Global-K Data Table (Raw Analysis Data)",
-      name = "output_raw_analysis_feature_class",
-      datatype="GPString",
-      parameterType="Required",
-      direction="Output")
-    outRawFCName.value = "Global_K_Raw_Analysis_Data"
-
-    # The analysis feature class.
-    outAnlFCName = arcpy.Parameter(
-      displayName="Global-K Summary Data (Plottable Data)",
-      name = "output_analysis_feature_class",
-      datatype="GPString",
-      parameterType="Required",
-      direction="Output")
-    outAnlFCName.value = "Global_K_Summary_Data"
-
-    # Confidence envelope (number of permutations).
-    numPerms = arcpy.Parameter(
-      displayName="Number of Random Point Permutations",
-      name = "num_permutations",
-      datatype="GPString",
-      parameterType="Required",
-      direction="Input")
-    permKeys             = self.kfHelper.getPermutationSelection().keys()
-    numPerms.filter.list = permKeys
-    numPerms.value       = permKeys[0]
-
-    # Projected coordinate system.
-    outCoordSys = arcpy.Parameter(
-      displayName="Output Network Dataset Length Projected Coordinate System",
-      name="coordinate_system",
-      datatype="GPSpatialReference",
-      parameterType="Optional",
-      direction="Input")
- 
-    # Number of points field.
-    numPointsFieldName = arcpy.Parameter(
-      displayName="Number of Points Field",
-      name = "num_points_field",
-      datatype="GPString",
-      parameterType="Optional",
-      direction="Input")
-   
-    return [points, networkDataset, numBands, begDist, distInc, snapDist,
-      outNetKLoc, outRawODCMFCName, outRawFCName, outAnlFCName, numPerms,
-      outCoordSys, numPointsFieldName]
-
-  ###
-  # Check if the tool is available for use.
-  ###
-  def isLicensed(self):
-    # Network Analyst tools must be available.
-    return arcpy.CheckExtension("Network") == "Available"
-
-  ###
-  # Set parameter defaults.
-  ###
-  def updateParameters(self, parameters):
-    networkDataset = parameters[1].value
-    outCoordSys    = parameters[11].value
-
-    # Default the coordinate system.
-    if networkDataset is not None and outCoordSys is None:
-      ndDesc = arcpy.Describe(networkDataset)
-      # If the network dataset's coordinate system is a projected one,
-      # use its coordinate system as the defualt.
-      if (ndDesc.spatialReference.projectionName != "" and
-        ndDesc.spatialReference.linearUnitName == "Meter" and
-        ndDesc.spatialReference.factoryCode != 0):
-        parameters[11].value = ndDesc.spatialReference.factoryCode
-
-    # Set the source of the fields (the network dataset).
-    if networkDataset is not None:
-      parameters[12].filter.list = self.kfHelper.getEdgeSourceFieldNames(networkDataset)
-
-  ###
-  # If any fields are invalid, show an appropriate error message.
-  ###
-  def updateMessages(self, parameters):
-    outCoordSys = parameters[11].value
-
-    if outCoordSys is not None:
-      if outCoordSys.projectionName == "":
-        parameters[11].setErrorMessage("Output coordinate system must be a projected coordinate system.")
-      elif outCoordSys.linearUnitName != "Meter":
-        parameters[11].setErrorMessage("Output coordinate system must have a linear unit code of 'Meter.'")
-      else:
-        parameters[11].clearMessage()
-
-  ###
-  # Execute the tool.
-  ###
-  def execute(self, parameters, messages):
-    points             = parameters[0].valueAsText
-    networkDataset     = parameters[1].valueAsText
-    numBands           = parameters[2].value
-    begDist            = parameters[3].value
-    distInc            = parameters[4].value
-    snapDist           = parameters[5].value
-    outNetKLoc         = parameters[6].valueAsText
-    outRawODCMFCName   = parameters[7].valueAsText
-    outRawFCName       = parameters[8].valueAsText
-    outAnlFCName       = parameters[9].valueAsText
-    numPermsDesc       = parameters[10].valueAsText
-    numPerms           = self.kfHelper.getPermutationSelection()[numPermsDesc]
-    outCoordSys        = parameters[11].value
-    numPointsFieldName = parameters[12].value
-    ndDesc             = arcpy.Describe(networkDataset)
-    gkfSvc             = GlobalKFunctionSvc()
-
-    # Refer to the note in the NetworkDatasetLength tool.
-    if outCoordSys is None:
-      outCoordSys = ndDesc.spatialReference
-
-    messages.addMessage("\nOrigin points: {0}".format(points))
-    messages.addMessage("Network dataset: {0}".format(networkDataset))
-    messages.addMessage("Number of distance bands: {0}".format(numBands))
-    messages.addMessage("Beginning distance: {0}".format(begDist))
-    messages.addMessage("Distance increment: {0}".format(distInc))
-    messages.addMessage("Snap distance: {0}".format(snapDist))
-    messages.addMessage("Output location (database path): {0}".format(outNetKLoc))
-    messages.addMessage("Raw ODCM data table: {0}".format(outRawODCMFCName))
-    messages.addMessage("Raw global-K data table (raw analysis data): {0}".format(outRawFCName))
-    messages.addMessage("Global-K summary data (plottable data): {0}".format(outAnlFCName))
-    messages.addMessage("Number of random permutations: {0}".format(numPerms))
-    messages.addMessage("Network dataset length projected coordinate system: {0}".format(outCoordSys.name))
-    messages.addMessage("Number of Points Field Name: {0}\n".format(numPointsFieldName))
-
-    # Calculate the length of the network.
-    networkLength = self.kfHelper.calculateLength(networkDataset, outCoordSys)
-    messages.addMessage("Total network length: {0}".format(networkLength))
-
-    # Count the number of crashes.
-    numPoints = self.kfHelper.countNumberOfFeatures(os.path.join(outNetKLoc, points))
-
-    # Set up a cutoff lenght for the ODCM data if possible.  (Optimization.)
-    cutoff = gkfSvc.getCutoff(numBands, distInc, begDist)
-
-    # The results of all the calculations end up here.
-    netKCalculations = []
-
-    # Use a mutable container for the number of bands so that the below callback
-    # can write to it.  The "nonlocal" keyword not available in Python 2.x.
-    numBandsCont = [numBands]
-
-    # Callback function that does the Network K calculation on an OD cost matrix.    
-    def doNetKCalc(odDists, iteration):
-      # Do the actual network k-function calculation.
-      netKCalc = NetworkKCalculation(networkLength, numPoints, odDists, begDist, distInc, numBandsCont[0])
-      netKCalculations.append(netKCalc.getDistanceBands())
-
-      # If the user did not specifiy a number of distance bands explicitly,
-      # store the number of bands.  It's computed from the observed data.
-      if numBandsCont[0] is None:
-        numBandsCont[0] = netKCalc.getNumberOfDistanceBands()
-
-    # Generate the ODCM permutations, including the ODCM for the observed data.
-    # doNetKCalc is called on each iteration.
-    randODCMPermSvc = RandomODCMPermutationsSvc()
-    randODCMPermSvc.generateODCMPermutations("Global Analysis",
-      points, points, networkDataset, snapDist, cutoff, outNetKLoc,
-      outRawODCMFCName, numPerms, outCoordSys, numPointsFieldName, messages, doNetKCalc)
-
-    # Store the raw analysis data.
-    messages.addMessage("Writing raw analysis data.")
-    gkfSvc.writeRawAnalysisData(outNetKLoc, outRawFCName, netKCalculations)
-
-    # Analyze the data and store the results.
-    messages.addMessage("Analyzing data.")
-    gkfSvc.writeAnalysisSummaryData(numPerms, netKCalculations, outNetKLoc, outAnlFCName)
+import arcpy
+import os
+import network_k_calculation
+import k_function_helper
+import random_odcm_permutations_svc
+import global_k_function_svc
+import null_distribution_cache
+import incremental_observed_svc
+import stage_profiler
+import envelope_stability
+import multi_type_k_calculation
+import local_k_calculation
+import local_k_envelope
+import permutation_bands
+
+from arcpy import env
+from random import Random
+
+# ArcMap caching prevention.
+network_k_calculation        = reload(network_k_calculation)
+k_function_helper            = reload(k_function_helper)
+random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
+global_k_function_svc        = reload(global_k_function_svc)
+null_distribution_cache      = reload(null_distribution_cache)
+incremental_observed_svc     = reload(incremental_observed_svc)
+stage_profiler               = reload(stage_profiler)
+envelope_stability           = reload(envelope_stability)
+multi_type_k_calculation     = reload(multi_type_k_calculation)
+local_k_calculation          = reload(local_k_calculation)
+local_k_envelope             = reload(local_k_envelope)
+permutation_bands            = reload(permutation_bands)
+
+from network_k_calculation        import NetworkKCalculation
+from k_function_helper            import KFunctionHelper
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+from global_k_function_svc        import GlobalKFunctionSvc
+from null_distribution_cache      import NullDistributionCache
+from incremental_observed_svc     import IncrementalObservedSvc
+from stage_profiler               import StageProfiler
+from envelope_stability           import EnvelopeStability
+from multi_type_k_calculation     import MultiTypeKCalculation
+from local_k_calculation          import LocalKCalculation
+from local_k_envelope             import LocalKEnvelope
+from permutation_bands            import PermutationBands
+
+class GlobalKFunction(object):
+  ###
+  # Initialize the tool.
+  ###
+  def __init__(self):
+    self.label              = "Global K Function"
+    self.description        = "Uses a Global Network K Function to analyze clustering and dispersion trends in a set of crash points."
+    self.canRunInBackground = False
+    env.overwriteOutput     = True
+    self.kfHelper           = KFunctionHelper()
+  
+  ###
+  # Get input from the users.
+  ###
+  def getParameterInfo(self):
+    # Input origin features.
+    points = arcpy.Parameter(
+      displayName="Input Points Feature Dataset",
+      name="points",
+      datatype="Feature Class",
+      parameterType="Required",
+      direction="Input")
+    points.filter.list = ["Point"]
+
+    # Network dataset.
+    networkDataset = arcpy.Parameter(
+      displayName="Input Network Dataset",
+      name = "network_dataset",
+      datatype="Network Dataset Layer",
+      parameterType="Required",
+      direction="Input")
+
+    # Number of distance increments.
+    numBands = arcpy.Parameter(
+      displayName="Input Number of Distance Bands",
+      name="num_dist_bands",
+      datatype="Long",
+      parameterType="Optional",
+      direction="Input")
+
+    # Beginning distance.
+    begDist = arcpy.Parameter(
+      displayName="Input Beginning Distance",
+      name="beginning_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    begDist.value = 0
+
+    # Distance increment.
+    distInc = arcpy.Parameter(
+      displayName="Input Distance Increment",
+      name="distance_increment",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    distInc.value = 1000
+
+    # Snap distance.
+    snapDist = arcpy.Parameter(
+      displayName="Input Snap Distance",
+      name="snap_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    snapDist.value = 25
+
+    # Output location.
+    outNetKLoc = arcpy.Parameter(
+      displayName="Output Location (Database Path)",
+      name="out_location",
+      datatype="DEWorkspace",
+      parameterType="Required",
+      direction="Input")
+    outNetKLoc.value = arcpy.env.workspace
+
+    # The raw ODCM data.
+    outRawODCMFCName = arcpy.Parameter(
+      displayName="Raw ODCM Data Table",
+      name = "output_raw_odcm_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outRawODCMFCName.value = "Global_K_Raw_ODCM_Data"
+
+    # The raw data feature class (e.g. observed and random point computations).
+    outRawFCName = arcpy.Parameter(
+      displayName="Raw Global-K Data Table (Raw Analysis Data)",
+      name = "output_raw_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outRawFCName.value = "Global_K_Raw_Analysis_Data"
+
+    # The analysis feature class.
+    outAnlFCName = arcpy.Parameter(
+      displayName="Global-K Summary Data (Plottable Data)",
+      name = "output_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outAnlFCName.value = "Global_K_Summary_Data"
+
+    # Confidence envelope (number of permutations).
+    numPerms = arcpy.Parameter(
+      displayName="Number of Random Point Permutations",
+      name = "num_permutations",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    permKeys             = list(self.kfHelper.getPermutationSelection().keys())
+    numPerms.filter.list = permKeys
+    numPerms.value       = permKeys[0]
+
+    # Projected coordinate system.
+    outCoordSys = arcpy.Parameter(
+      displayName="Output Network Dataset Length Projected Coordinate System",
+      name="coordinate_system",
+      datatype="GPSpatialReference",
+      parameterType="Optional",
+      direction="Input")
+ 
+    # Number of points field.
+    numPointsFieldName = arcpy.Parameter(
+      displayName="Number of Points Field",
+      name = "num_points_field",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+
+    # Reuse random point permutations from earlier runs.
+    useNullCache = arcpy.Parameter(
+      displayName="Reuse Cached Random Point Permutations",
+      name = "use_null_cache",
+      datatype="GPBoolean",
+      parameterType="Optional",
+      direction="Input")
+    useNullCache.value = False
+
+    # Random seed.
+    seed = arcpy.Parameter(
+      displayName="Random Seed",
+      name = "random_seed",
+      datatype="GPLong",
+      parameterType="Optional",
+      direction="Input")
+
+    # Field that uniquely identifies each point (e.g. CASEID).
+    pointIDFieldName = arcpy.Parameter(
+      displayName="Point ID Field",
+      name = "point_id_field",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+
+    # Observed distances from earlier runs, keyed by point ID.
+    observedStoreName = arcpy.Parameter(
+      displayName="Observed ODCM Store Table",
+      name = "observed_odcm_store",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+
+    # How the random points are generated.  Stratified and quasi-random
+    # sampling give stable envelopes with fewer permutations.
+    samplingMethod = arcpy.Parameter(
+      displayName="Random Point Sampling",
+      name = "random_point_sampling",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+    samplingMethod.filter.list = self.kfHelper.getSamplingMethods()
+    samplingMethod.value       = samplingMethod.filter.list[0]
+
+    # Category field (e.g. crash severity) for a multi-type analysis: a K
+    # function for each category and pair of categories.
+    categoryFieldName = arcpy.Parameter(
+      displayName="Category Field (Multi-Type Analysis)",
+      name = "category_field",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+
+    # The local K table (optional): each point's neighbor count per band.
+    outLocalFCName = arcpy.Parameter(
+      displayName="Local-K Data Table (Points x Bands)",
+      name = "output_local_k_table",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Output")
+   
+    return [points, networkDataset, numBands, begDist, distInc, snapDist,
+      outNetKLoc, outRawODCMFCName, outRawFCName, outAnlFCName, numPerms,
+      outCoordSys, numPointsFieldName, useNullCache, seed, pointIDFieldName,
+      observedStoreName, samplingMethod, categoryFieldName, outLocalFCName]
+
+  ###
+  # Check if the tool is available for use.
+  ###
+  def isLicensed(self):
+    # Network Analyst tools must be available.
+    return arcpy.CheckExtension("Network") == "Available"
+
+  ###
+  # Set parameter defaults.
+  ###
+  def updateParameters(self, parameters):
+    points         = parameters[0].value
+    networkDataset = parameters[1].value
+    outCoordSys    = parameters[11].value
+
+    # Default the coordinate system.
+    if networkDataset is not None and outCoordSys is None:
+      ndDesc = arcpy.Describe(networkDataset)
+      # If the network dataset's coordinate system is a projected one,
+      # use its coordinate system as the defualt.
+      if (ndDesc.spatialReference.projectionName != "" and
+        ndDesc.spatialReference.linearUnitName == "Meter" and
+        ndDesc.spatialReference.factoryCode != 0):
+        parameters[11].value = ndDesc.spatialReference.factoryCode
+
+    # Set the source of the fields (the network dataset).
+    if networkDataset is not None:
+      parameters[12].filter.list = self.kfHelper.getEdgeSourceFieldNames(networkDataset)
+
+    # Set the source of the point ID and category fields (the points).
+    if points is not None:
+      parameters[15].filter.list = self.kfHelper.getPointIDFieldNames(points)
+      parameters[18].filter.list = self.kfHelper.getPointIDFieldNames(points)
+
+  ###
+  # If any fields are invalid, show an appropriate error message.
+  ###
+  def updateMessages(self, parameters):
+    outCoordSys = parameters[11].value
+
+    if outCoordSys is not None:
+      if outCoordSys.projectionName == "":
+        parameters[11].setErrorMessage("Output coordinate system must be a projected coordinate system.")
+      elif outCoordSys.linearUnitName != "Meter":
+        parameters[11].setErrorMessage("Output coordinate system must have a linear unit code of 'Meter.'")
+      else:
+        parameters[11].clearMessage()
+
+    # Cached permutations are looked up by seed.
+    if parameters[13].value and parameters[14].value is None:
+      parameters[14].setErrorMessage("A random seed is required to reuse cached random point permutations.")
+    else:
+      parameters[14].clearMessage()
+
+    # The observed store is keyed by point ID.
+    if parameters[16].value and not parameters[15].value:
+      parameters[15].setErrorMessage("A point ID field is required to use an observed ODCM store.")
+    else:
+      parameters[15].clearMessage()
+
+  ###
+  # Execute the tool.
+  ###
+  def execute(self, parameters, messages):
+    points             = parameters[0].valueAsText
+    networkDataset     = parameters[1].valueAsText
+    numBands           = parameters[2].value
+    begDist            = parameters[3].value
+    distInc            = parameters[4].value
+    snapDist           = parameters[5].value
+    outNetKLoc         = parameters[6].valueAsText
+    outRawODCMFCName   = parameters[7].valueAsText
+    outRawFCName       = parameters[8].valueAsText
+    outAnlFCName       = parameters[9].valueAsText
+    numPermsDesc       = parameters[10].valueAsText
+    numPerms           = self.kfHelper.getPermutationSelection()[numPermsDesc]
+    outCoordSys        = parameters[11].value
+    numPointsFieldName = parameters[12].value
+    useNullCache       = parameters[13].value
+    seed               = parameters[14].value
+    pointIDFieldName   = parameters[15].value
+    observedStoreName  = parameters[16].value
+    samplingMethod     = parameters[17].value or "Random"
+    categoryFieldName  = parameters[18].value
+    outLocalFCName     = parameters[19].value
+    ndDesc             = arcpy.Describe(networkDataset)
+    gkfSvc             = GlobalKFunctionSvc()
+    profiler           = StageProfiler(self.kfHelper.isMemoryTracingEnabled())
+
+    # Refer to the note in the NetworkDatasetLength tool.
+    if outCoordSys is None:
+      outCoordSys = ndDesc.spatialReference
+
+    messages.addMessage("\nOrigin points: {0}".format(points))
+    messages.addMessage("Network dataset: {0}".format(networkDataset))
+    messages.addMessage("Number of distance bands: {0}".format(numBands))
+    messages.addMessage("Beginning distance: {0}".format(begDist))
+    messages.addMessage("Distance increment: {0}".format(distInc))
+    messages.addMessage("Snap distance: {0}".format(snapDist))
+    messages.addMessage("Output location (database path): {0}".format(outNetKLoc))
+    messages.addMessage("Raw ODCM data table: {0}".format(outRawODCMFCName))
+    messages.addMessage("Raw global-K data table (raw analysis data): {0}".format(outRawFCName))
+    messages.addMessage("Global-K summary data (plottable data): {0}".format(outAnlFCName))
+    messages.addMessage("Number of random permutations: {0}".format(numPerms))
+    messages.addMessage("Network dataset length projected coordinate system: {0}".format(outCoordSys.name))
+    messages.addMessage("Number of Points Field Name: {0}".format(numPointsFieldName))
+    messages.addMessage("Reuse cached random point permutations: {0}".format(useNullCache))
+    messages.addMessage("Random seed: {0}".format(seed))
+    messages.addMessage("Point ID field: {0}".format(pointIDFieldName))
+    messages.addMessage("Observed ODCM store table: {0}".format(observedStoreName))
+    messages.addMessage("Random point sampling: {0}".format(samplingMethod))
+    messages.addMessage("Category field: {0}".format(categoryFieldName))
+    messages.addMessage("Local-K data table: {0}\n".format(outLocalFCName))
+
+    # Calculate the length of the network.
+    with profiler.span("network_length"):
+      networkLength = self.kfHelper.calculateLength(networkDataset, outCoordSys)
+    messages.addMessage("Total network length: {0}".format(networkLength))
+
+    # Count the number of crashes.
+    numPoints = self.kfHelper.countNumberOfFeatures(os.path.join(outNetKLoc, points))
+
+    # Set up a cutoff lenght for the ODCM data if possible.  (Optimization.)
+    cutoff = gkfSvc.getCutoff(numBands, distInc, begDist)
+
+    # Random point permutations don't depend on the observed points, so they
+    # can be reused from an earlier run with the same network, number of
+    # points, weighting field, and seed.  Only the missing permutations are
+    # generated.
+    nullCache   = None
+    cachedHists = []
+    newHists    = []
+
+    # Cached permutations don't have the random categories of a multi-type
+    # analysis, or the local counts of the random points.
+    if useNullCache and (categoryFieldName or outLocalFCName):
+      messages.addMessage("Cached random point permutations are not used in a multi-type or local analysis.")
+      useNullCache = False
+
+    if useNullCache:
+      nullCache = NullDistributionCache(os.path.join(self.kfHelper.getCacheDirectory(), "null_distributions"))
+
+      if nullCache.isAligned(begDist, distInc):
+        # The weighting field's values can change without the edges changing.
+        fieldChecksum = None
+        if numPointsFieldName:
+          fieldChecksum = self.kfHelper.getFieldChecksum(networkDataset, numPointsFieldName)
+
+        nullKey     = nullCache.getKey(self.kfHelper.getNetworkFingerprint(networkDataset),
+          numPoints, numPointsFieldName, seed, snapDist, samplingMethod, outCoordSys.exportToString(),
+          fieldChecksum)
+        cachedHists = nullCache.load(nullKey, cutoff)[:numPerms]
+        messages.addMessage("Cached random point permutations: {0}".format(len(cachedHists)))
+      else:
+        messages.addMessage("The beginning distance and distance increment must be multiples of {0} to reuse cached permutations.".format(
+          nullCache.getResolution()))
+        nullCache = None
+
+    # The observed distances can be updated from an earlier run, in which case
+    # only the pairs that involve added or removed points are solved.  With a
+    # fixed number of bands, the band counts are stored too, and only the
+    # changed pairs are counted.
+    observedDists = None
+    observedBands = None
+
+    if pointIDFieldName and observedStoreName:
+      incObsSvc = IncrementalObservedSvc(profiler)
+      bands     = None
+
+      if numBands is not None:
+        bands = PermutationBands("NETWORK", networkLength, numPoints, begDist, distInc, numBands)
+
+      with profiler.span("observed_store"):
+        observedDists, observedBands = incObsSvc.calculateObservedDistances(
+          os.path.join(outNetKLoc, points), pointIDFieldName, outNetKLoc, observedStoreName,
+          networkDataset, snapDist, cutoff, outCoordSys, messages, bands)
+
+    # The results of all the calculations end up here.
+    netKCalculations = []
+
+    # In a multi-type analysis, the K functions of each category and pair of
+    # categories are counted from the same OD cost matrix as all the points.
+    # The random points are labeled with a random shuffle of the observed
+    # categories.
+    multiTypeCalcs = None
+
+    if categoryFieldName:
+      labels         = gkfSvc.readCategories(os.path.join(outNetKLoc, points), categoryFieldName)
+      catCounts      = MultiTypeKCalculation.countCategories(labels)
+      catList        = [labels[oid] for oid in sorted(labels.keys())]
+      labelRand      = Random(seed)
+      multiTypeCalcs = []
+
+      for category in MultiTypeKCalculation.sortCategories(catCounts.keys()):
+        messages.addMessage("Category {0}: {1} points".format(category, catCounts[category]))
+
+    # The local K counts of the observed points, and the envelopes of the
+    # random points' counts around each observed point.  (Containers so that
+    # the callbacks can set them.)
+    localKCont = [None, None]
+
+    if outLocalFCName:
+      pointIDs = gkfSvc.readPointIDs(os.path.join(outNetKLoc, points))
+
+    # Use a mutable container for the number of bands so that the below callback
+    # can write to it.  The "nonlocal" keyword not available in Python 2.x.
+    numBandsCont = [numBands]
+
+    # Callback function that does the Network K calculation on an OD cost matrix.    
+    def doNetKCalc(odDists, iteration):
+      # Do the actual network k-function calculation.  The observed data's
+      # bands may have been counted incrementally from the observed store.
+      if iteration == 0 and observedBands is not None:
+        netKCalculations.append(observedBands)
+      else:
+        with profiler.span("band_counting"):
+          netKCalc = NetworkKCalculation(networkLength, numPoints, odDists, begDist, distInc, numBandsCont[0])
+        netKCalculations.append(netKCalc.getDistanceBands())
+
+        # If the user did not specifiy a number of distance bands explicitly,
+        # store the number of bands.  It's computed from the observed data.
+        if numBandsCont[0] is None:
+          numBandsCont[0] = netKCalc.getNumberOfDistanceBands()
+
+      if multiTypeCalcs is not None:
+        with profiler.span("multi_type_counting"):
+          if iteration == 0:
+            iterLabels = labels
+          else:
+            randIDs    = set(odDist["OriginID"] for odDist in odDists)
+            randIDs.update(odDist["DestinationID"] for odDist in odDists)
+            iterLabels = MultiTypeKCalculation.assignRandomLabels(randIDs, catList, labelRand)
+
+          multiTypeCalcs.append(MultiTypeKCalculation(networkLength, catCounts, iterLabels,
+            odDists, begDist, distInc, numBandsCont[0]))
+
+      if outLocalFCName:
+        with profiler.span("local_counting"):
+          if iteration == 0:
+            localKCont[0] = LocalKCalculation(odDists, begDist, distInc, numBandsCont[0], pointIDs)
+            localKCont[1] = LocalKEnvelope(numBandsCont[0], pointIDs, numPoints)
+
+      if iteration == 0:
+        # The cached permutations come right after the observed data.
+        for hist in cachedHists:
+          netKCalculations.append(nullCache.getDistanceBands(hist, networkLength,
+            numPoints, begDist, distInc, numBandsCont[0]))
+      elif nullCache is not None:
+        with profiler.span("null_cache"):
+          newHists.append(nullCache.getHistogram(odDists))
+
+    # Callback function that counts the random points around each observed
+    # point in a permutation (odDists is from the observed points to the
+    # random points, so no pair is a point and itself).
+    def doLocalKCalc(odDists, iteration, numRandPoints):
+      with profiler.span("local_counting"):
+        localKCont[1].addPermutation(LocalKCalculation(odDists, begDist, distInc, numBandsCont[0],
+          pointIDs, False), numRandPoints)
+
+    # The permutations can be computed by workers (see PermutationWorkQueue),
+    # which only count the distance bands.  The multi-type, local, and cached
+    # counts need the distances themselves.
+    def getBands():
+      return PermutationBands("NETWORK", networkLength, numPoints, begDist, distInc, numBandsCont[0])
+
+    def addBands(distBands, iteration):
+      netKCalculations.append(distBands)
+
+    if multiTypeCalcs is not None or outLocalFCName or nullCache is not None:
+      getBands = None
+
+    # Generate the ODCM permutations, including the ODCM for the observed data.
+    # doNetKCalc is called on each iteration.
+    randODCMPermSvc = RandomODCMPermutationsSvc(profiler)
+    randODCMPermSvc.generateODCMPermutations("Global Analysis",
+      points, points, networkDataset, snapDist, cutoff, outNetKLoc,
+      outRawODCMFCName, numPerms, outCoordSys, numPointsFieldName, messages, doNetKCalc,
+      seed, len(cachedHists) + 1, observedDists, samplingMethod, getBands, addBands,
+      points if outLocalFCName else None, doLocalKCalc)
+
+    # Store the new permutations for later runs.  (Cached permutations are not
+    # in the raw ODCM data table.)
+    if len(newHists) != 0:
+      messages.addMessage("Caching random point permutations.")
+      nullCache.save(nullKey, cutoff, cachedHists + newHists)
+
+    # Store the raw analysis data.
+    messages.addMessage("Writing raw analysis data.")
+    with profiler.span("write_raw_analysis"):
+      gkfSvc.writeRawAnalysisData(outNetKLoc, outRawFCName, netKCalculations, multiTypeCalcs)
+
+    # Analyze the data and store the results.
+    messages.addMessage("Analyzing data.")
+    with profiler.span("analysis_summary"):
+      gkfSvc.writeAnalysisSummaryData(numPerms, netKCalculations, outNetKLoc, outAnlFCName,
+        multiTypeCalcs)
+
+    # Store the local K table.
+    if outLocalFCName:
+      messages.addMessage("Writing local-K data.")
+      with profiler.span("write_local_k"):
+        gkfSvc.writeLocalKData(numPerms, localKCont[0], localKCont[1], outNetKLoc, outLocalFCName)
+
+    # Show how stable the confidence envelope is with fewer permutations.
+    for line in EnvelopeStability(.95, netKCalculations, samplingMethod).getSummary():
+      messages.addMessage(line)
+
+    # Write the time spent in each stage next to the output tables.
+    messages.addMessage("Profile report: {0}".format(profiler.writeReport(outNetKLoc, outAnlFCName)[0]))
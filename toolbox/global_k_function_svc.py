@@ -1,91 +1,195 @@
-import arcpy
-import os
-import network_k_calculation
-import network_k_analysis
-import k_function_helper
-import random_odcm_permutations_svc
-
-from arcpy import env
-
-# ArcMap caching prevention.
-network_k_calculation        = reload(network_k_calculation)
-network_k_analysis           = reload(network_k_analysis)
-k_function_helper            = reload(k_function_helper)
-random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
-
-from network_k_calculation        import NetworkKCalculation
-from network_k_analysis           import NetworkKAnalysis
-from k_function_helper            import KFunctionHelper
-from random_odcm_permutations_svc import RandomODCMPermutationsSvc
-
-class GlobalKFunctionSvc(object):
-  ###
-  # Initialize the service (stateless).
-  ###
-  def __init__(self):
-    self.kfHelper = KFunctionHelper()
-
-  ###
-  # Create a cutoff distance for the ODCM permutations if possible.
-  # @param numBands The number of distance bands (if available).
-  # @param distInc The distance increment between each band.
-  # @oparam begDist The beginning distance.
-  ###
-  def getCutoff(self, numBands, distInc, begDist):
-    if numBands is not None:
-      return numBands * distInc + begDist
-    else:
-      return None
-
-  ###
-  # Write the raw analysis data.
-  ###
-  def writeRawAnalysisData(self, outNetKLoc, outRawFCName, netKCalculations):
-    # Write the distance bands to a table.  The 0th iteration is the observed
-    # data.  Subsequent iterations are the uniform point data.
-    outRawFCFullPath = os.path.join(outNetKLoc, outRawFCName)
-    arcpy.CreateTable_management(outNetKLoc, outRawFCName)
-
-    arcpy.AddField_management(outRawFCFullPath, "Iteration_Number", "LONG")
-    arcpy.AddField_management(outRawFCFullPath, "Distance_Band",    "DOUBLE")
-    arcpy.AddField_management(outRawFCFullPath, "Point_Count",      "DOUBLE")
-    arcpy.AddField_management(outRawFCFullPath, "K_Function",       "DOUBLE")
-
-    with arcpy.da.InsertCursor(outRawFCFullPath,
-      ["Iteration_Number", "Distance_Band", "Point_Count", "K_Function"]) as cursor:
-      for netKNum in range(0, len(netKCalculations)):
-        for distBand in netKCalculations[netKNum]:
-          cursor.insertRow([netKNum, distBand["distanceBand"], distBand["count"], distBand["KFunction"]])
-
-  ###
-  # Perform the summary analysis and write the summary data.
-  ###
-  def writeAnalysisSummaryData(self, numPerms, netKCalculations, outNetKLoc, outAnlFCName):
-    # Analyze the network k results (generate plottable output).
-    # No confidence intervals are computed if there are no random permutations.
-    if numPerms != 0:
-      netKAn_95 = NetworkKAnalysis(.95, netKCalculations)
-      netKAn_90 = NetworkKAnalysis(.90, netKCalculations)
-
-    # Write the analysis data to a table.
-    outAnlFCFullPath = os.path.join(outNetKLoc, outAnlFCName)
-    arcpy.CreateTable_management(outNetKLoc, outAnlFCName)
-    arcpy.AddField_management(outAnlFCFullPath, "Description",   "TEXT")
-    arcpy.AddField_management(outAnlFCFullPath, "Distance_Band", "DOUBLE")
-    arcpy.AddField_management(outAnlFCFullPath, "Point_Count",   "DOUBLE")
-    arcpy.AddField_management(outAnlFCFullPath, "K_Function",    "DOUBLE")
-
-    with arcpy.da.InsertCursor(outAnlFCFullPath,
-      ["Description", "Distance_Band", "Point_Count", "K_Function"]) as cursor:
-      self._writeAnalysis(cursor, netKCalculations[0], "Observed")
-
-      if numPerms != 0:
-        self._writeAnalysis(cursor, netKAn_95.getLowerConfidenceEnvelope(), "2.5% Lower Bound")
-        self._writeAnalysis(cursor, netKAn_95.getUpperConfidenceEnvelope(), "2.5% Upper Bound")
-        self._writeAnalysis(cursor, netKAn_90.getLowerConfidenceEnvelope(), "5% Lower Bound")
-        self._writeAnalysis(cursor, netKAn_90.getUpperConfidenceEnvelope(), "5% Upper Bound")
-
-  # Write the analysis data in distBands using cursor.
-  def _writeAnalysis(self, cursor, distBands, description):
-    for distBand in distBands:
-      cursor.insertRow([description, distBand["distanceBand"], distBand["count"], distBand["KFunction"]])
+import arcpy
+import os
+import network_k_calculation
+import network_k_analysis
+import k_function_helper
+import random_odcm_permutations_svc
+import multi_type_k_calculation
+
+from arcpy import env
+
+# ArcMap caching prevention.
+network_k_calculation        = reload(network_k_calculation)
+network_k_analysis           = reload(network_k_analysis)
+k_function_helper            = reload(k_function_helper)
+random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
+multi_type_k_calculation     = reload(multi_type_k_calculation)
+
+from network_k_calculation        import NetworkKCalculation
+from network_k_analysis           import NetworkKAnalysis
+from k_function_helper            import KFunctionHelper
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+from multi_type_k_calculation     import MultiTypeKCalculation
+
+class GlobalKFunctionSvc(object):
+  ###
+  # Initialize the service (stateless).
+  ###
+  def __init__(self):
+    self.kfHelper = KFunctionHelper()
+
+  ###
+  # Create a cutoff distance for the ODCM permutations if possible.
+  # @param numBands The number of distance bands (if available).
+  # @param distInc The distance increment between each band.
+  # @oparam begDist The beginning distance.
+  ###
+  def getCutoff(self, numBands, distInc, begDist):
+    if numBands is not None:
+      return numBands * distInc + begDist
+    else:
+      return None
+
+  ###
+  # Read the category of each point for a multi-type analysis.  Returns a
+  # dictionary of categories keyed by ObjectID (the IDs of the OD distances).
+  # @param points The points.
+  # @param categoryFieldName The name of the category field.
+  ###
+  def readCategories(self, points, categoryFieldName):
+    with arcpy.da.SearchCursor(points, ["OID@", categoryFieldName]) as cursor:
+      return dict((row[0], row[1]) for row in cursor)
+
+  ###
+  # Read the ObjectIDs of the points (the IDs of the OD distances).
+  # @param points The points.
+  ###
+  def readPointIDs(self, points):
+    with arcpy.da.SearchCursor(points, ["OID@"]) as cursor:
+      return [row[0] for row in cursor]
+
+  ###
+  # Get the K function curves to write.  Returns an array of (category,
+  # netKCalculations) tuples: just the calculations of all the points, or for a
+  # multi-type analysis, all the points then each category and category pair.
+  # @param netKCalculations The network K calculations of all the points.
+  # @param multiTypeCalcs The MultiTypeKCalculation of each iteration (optional).
+  ###
+  def getCurves(self, netKCalculations, multiTypeCalcs=None):
+    if multiTypeCalcs is None:
+      return [(None, netKCalculations)]
+
+    curves = [("All", netKCalculations)]
+
+    for pair in multiTypeCalcs[0].getCategoryPairs():
+      curves.append((MultiTypeKCalculation.getPairDescription(pair),
+        [multiTypeCalc.getDistanceBands(pair) for multiTypeCalc in multiTypeCalcs]))
+
+    return curves
+
+  # Add the category field to a table of a multi-type analysis.  Returns the
+  # leading fields of the table's rows.
+  def _addCategoryField(self, tableFullPath, multiTypeCalcs):
+    if multiTypeCalcs is None:
+      return []
+
+    arcpy.AddField_management(tableFullPath, "Category", "TEXT")
+    return ["Category"]
+
+  ###
+  # Write the raw analysis data.  A multi-type analysis has a Category field.
+  ###
+  def writeRawAnalysisData(self, outNetKLoc, outRawFCName, netKCalculations, multiTypeCalcs=None):
+    # Write the distance bands to a table.  The 0th iteration is the observed
+    # data.  Subsequent iterations are the uniform point data.
+    outRawFCFullPath = os.path.join(outNetKLoc, outRawFCName)
+    arcpy.CreateTable_management(outNetKLoc, outRawFCName)
+
+    fields = self._addCategoryField(outRawFCFullPath, multiTypeCalcs)
+    arcpy.AddField_management(outRawFCFullPath, "Iteration_Number", "LONG")
+    arcpy.AddField_management(outRawFCFullPath, "Distance_Band",    "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "Point_Count",      "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "K_Function",       "DOUBLE")
+
+    with arcpy.da.InsertCursor(outRawFCFullPath,
+      fields + ["Iteration_Number", "Distance_Band", "Point_Count", "K_Function"]) as cursor:
+      for category, calculations in self.getCurves(netKCalculations, multiTypeCalcs):
+        prefix = [category] if len(fields) != 0 else []
+
+        for netKNum in range(0, len(calculations)):
+          for distBand in calculations[netKNum]:
+            cursor.insertRow(prefix + [netKNum, distBand["distanceBand"], distBand["count"], distBand["KFunction"]])
+
+  ###
+  # Perform the summary analysis and write the summary data.  A multi-type
+  # analysis has a Category field, and an envelope for each category.
+  ###
+  def writeAnalysisSummaryData(self, numPerms, netKCalculations, outNetKLoc, outAnlFCName, multiTypeCalcs=None):
+    # Write the analysis data to a table.
+    outAnlFCFullPath = os.path.join(outNetKLoc, outAnlFCName)
+    arcpy.CreateTable_management(outNetKLoc, outAnlFCName)
+    fields = self._addCategoryField(outAnlFCFullPath, multiTypeCalcs)
+    arcpy.AddField_management(outAnlFCFullPath, "Description",   "TEXT")
+    arcpy.AddField_management(outAnlFCFullPath, "Distance_Band", "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "Point_Count",   "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "K_Function",    "DOUBLE")
+
+    with arcpy.da.InsertCursor(outAnlFCFullPath,
+      fields + ["Description", "Distance_Band", "Point_Count", "K_Function"]) as cursor:
+      for category, calculations in self.getCurves(netKCalculations, multiTypeCalcs):
+        prefix = [category] if len(fields) != 0 else []
+
+        self._writeAnalysis(cursor, calculations[0], "Observed", prefix)
+
+        # Analyze the network k results (generate plottable output).  No
+        # confidence intervals are computed if there are no random permutations.
+        if numPerms != 0:
+          netKAn_95 = NetworkKAnalysis(.95, calculations)
+          netKAn_90 = NetworkKAnalysis(.90, calculations)
+
+          self._writeAnalysis(cursor, netKAn_95.getLowerConfidenceEnvelope(), "2.5% Lower Bound", prefix)
+          self._writeAnalysis(cursor, netKAn_95.getUpperConfidenceEnvelope(), "2.5% Upper Bound", prefix)
+          self._writeAnalysis(cursor, netKAn_90.getLowerConfidenceEnvelope(), "5% Lower Bound", prefix)
+          self._writeAnalysis(cursor, netKAn_90.getUpperConfidenceEnvelope(), "5% Upper Bound", prefix)
+
+  # Write the analysis data in distBands using cursor.  Each row starts with
+  # prefix (e.g. the category).
+  def _writeAnalysis(self, cursor, distBands, description, prefix=[]):
+    for distBand in distBands:
+      cursor.insertRow(prefix + [description, distBand["distanceBand"], distBand["count"], distBand["KFunction"]])
+
+  ###
+  # Write the local K data: a points x bands table.  Each observed point has a
+  # row with its cumulative neighbor count in each band (Band_1, Band_2, ...),
+  # and the number of bands where the count is above the point's own 2.5% upper
+  # bound.  The point's bounds follow as rows with its point ID.
+  # @param numPerms The number of permutations.
+  # @param localKCalc The LocalKCalculation of the observed points.
+  # @param localKEnv The LocalKEnvelope of the random points around each
+  #        observed point.
+  # @param outNetKLoc The output location.
+  # @param outLocalFCName The name of the table.
+  ###
+  def writeLocalKData(self, numPerms, localKCalc, localKEnv, outNetKLoc, outLocalFCName):
+    outLocalFCFullPath = os.path.join(outNetKLoc, outLocalFCName)
+    bandFields         = []
+    arcpy.CreateTable_management(outNetKLoc, outLocalFCName)
+    arcpy.AddField_management(outLocalFCFullPath, "Description", "TEXT")
+    arcpy.AddField_management(outLocalFCFullPath, "Point_ID",    "LONG")
+
+    for bandNum, bandDist in enumerate(localKCalc.getBandDistances()):
+      bandFields.append("Band_{0}".format(bandNum + 1))
+      arcpy.AddField_management(outLocalFCFullPath, bandFields[-1], "DOUBLE",
+        field_alias="Distance {0}".format(bandDist))
+
+    arcpy.AddField_management(outLocalFCFullPath, "Clustered_Bands", "LONG")
+
+    with arcpy.da.InsertCursor(outLocalFCFullPath,
+      ["Description", "Point_ID"] + bandFields + ["Clustered_Bands"]) as cursor:
+      for pointID, counts in localKCalc.getCountTable():
+        # No confidence intervals are computed if there are no random permutations.
+        if numPerms == 0:
+          cursor.insertRow(["Observed", pointID] + counts + [None])
+          continue
+
+        bounds = [
+          ("2.5% Lower Bound", localKEnv.getLowerConfidenceEnvelope(pointID, .95)),
+          ("2.5% Upper Bound", localKEnv.getUpperConfidenceEnvelope(pointID, .95)),
+          ("5% Lower Bound",   localKEnv.getLowerConfidenceEnvelope(pointID, .90)),
+          ("5% Upper Bound",   localKEnv.getUpperConfidenceEnvelope(pointID, .90))]
+        clustered = len([count for count, upper in zip(counts, bounds[1][1]) if count > upper])
+
+        cursor.insertRow(["Observed", pointID] + counts + [clustered])
+
+        for description, boundCounts in bounds:
+          cursor.insertRow([description, pointID] + boundCounts + [None])
@@ -0,0 +1,373 @@
+import arcpy
+import os
+import hashlib
+import json
+import k_function_helper
+import random_odcm_permutations_svc
+
+# ArcMap caching prevention.
+k_function_helper            = reload(k_function_helper)
+random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
+
+from k_function_helper            import KFunctionHelper
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+
+###
+# Incremental updates of the observed OD cost matrix.
+#
+# When crashes are appended to a dataset, only the pairs that involve the new
+# (or removed) crashes change.  The observed distances are kept in a store
+# that is keyed by a point ID field (e.g. CASEID) rather than by ObjectID, so
+# that it survives reloading the points.  On the next run the added and removed
+# IDs are found by comparing the points to the store, and only the rows and
+# columns of the changed points are solved.  A point whose ID is in the store
+# but whose coordinates differ (e.g. a geocoding fix) has moved, and it is
+# treated as removed and then added.
+#
+# Only the rows of the changed points are deleted from and appended to the
+# store, so updating it doesn't rewrite the pairs that are kept.
+#
+# The store is three tables in the output database:
+#   <store>         Origin_Key, Destination_Key, Total_Length
+#   <store>_Points  Point_Key, Point_X, Point_Y, Cutoff, Settings_Key
+#   <store>_Bands   Band_Settings, Band_Number, Point_Count
+# The points table records every point (including points with no partner
+# within the cutoff) and its coordinates, the cutoff the store was solved with,
+# and a key of the network, snap distance, and coordinate system.  A store that
+# doesn't match is recomputed.  The bands table has the band counts of the stored distances, so
+# that only the changed pairs are counted on the next run (see PermutationBands).
+# It's deleted whenever the distances change, and written after them.
+###
+class IncrementalObservedSvc:
+  ###
+  # Initialize the service.
+  # @param profiler A StageProfiler that the time spent solving is recorded in
+  #        (optional).
+  ###
+  def __init__(self, profiler=None):
+    self.kfHelper        = KFunctionHelper()
+    self.randODCMPermSvc = RandomODCMPermutationsSvc(profiler)
+
+  ###
+  # Get the name of the store's point table.
+  # @param storeName The name of the store.
+  ###
+  def getPointsTableName(self, storeName):
+    return "{0}_Points".format(storeName)
+
+  ###
+  # Get the name of the store's band counts table.
+  # @param storeName The name of the store.
+  ###
+  def getBandsTableName(self, storeName):
+    return "{0}_Bands".format(storeName)
+
+  ###
+  # Get the band settings that stored counts must match: everything but the
+  # network length and the number of points, which the counts don't depend on.
+  # @param bands A PermutationBands.
+  ###
+  def _getBandSettings(self, bands):
+    settings = bands.toJSON()
+    return json.dumps([settings["calcType"], settings["begDist"], settings["distInc"], settings["numBands"]])
+
+  ###
+  # Get a key of the settings that the stored distances depend on.
+  # @param networkDataset The network dataset.
+  # @param snapDist The snap distance.
+  # @param outCoordSys The coordinate system of the points.
+  ###
+  def getSettingsKey(self, networkDataset, snapDist, outCoordSys):
+    parts = [self.kfHelper.getNetworkFingerprint(networkDataset), snapDist, outCoordSys.exportToString()]
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+  ###
+  # Read the point IDs and coordinates.  Returns a dictionary of ObjectID ->
+  # (ID (as a string), (x, y)).
+  # @param points The points.
+  # @param idField The name of the ID field.
+  # @param outCoordSys The coordinate system to project the points into.
+  ###
+  def readPointKeys(self, points, idField, outCoordSys):
+    with arcpy.da.SearchCursor(in_table=points, field_names=["OID@", idField, "SHAPE@XY"],
+      spatial_reference=outCoordSys) as cursor:
+      return dict((row[0], (str(row[1]), tuple(row[2]))) for row in cursor)
+
+  ###
+  # Read a store.  Returns a tuple of (point locations, OD distances), where
+  # the point locations are a dictionary of ID -> (x, y) and the OriginID and
+  # DestinationID of each distance are point IDs, or None if there is no usable
+  # store.
+  # @param storeLoc The database that holds the store.
+  # @param storeName The name of the store.
+  # @param cutoff The cutoff distance (None means no cutoff).
+  # @param settingsKey The key from getSettingsKey.
+  ###
+  def readStore(self, storeLoc, storeName, cutoff, settingsKey):
+    storePath  = os.path.join(storeLoc, storeName)
+    pointsPath = os.path.join(storeLoc, self.getPointsTableName(storeName))
+    pointLocs  = {}
+
+    if not arcpy.Exists(storePath) or not arcpy.Exists(pointsPath):
+      return None
+
+    with arcpy.da.SearchCursor(in_table=pointsPath,
+      field_names=["Point_Key", "Point_X", "Point_Y", "Cutoff", "Settings_Key"]) as cursor:
+      for row in cursor:
+        # A store that was solved with a shorter cutoff is missing pairs.
+        if row[4] != settingsKey or (row[3] is not None and (cutoff is None or row[3] < cutoff)):
+          return None
+        pointLocs[row[0]] = (row[1], row[2])
+
+    with arcpy.da.SearchCursor(in_table=storePath,
+      field_names=["Origin_Key", "Destination_Key", "Total_Length"]) as cursor:
+      odDists = [{"Total_Length": row[2], "OriginID": row[0], "DestinationID": row[1]} for row in cursor]
+
+    return (pointLocs, odDists)
+
+  ###
+  # Write a store, replacing the existing one.
+  # @param storeLoc The database to write the store to.
+  # @param storeName The name of the store.
+  # @param pointLocs A dictionary of ID -> (x, y) of all the points.
+  # @param odDists The OD distances, keyed by point ID.
+  # @param cutoff The cutoff distance (None means no cutoff).
+  # @param settingsKey The key from getSettingsKey.
+  ###
+  def writeStore(self, storeLoc, storeName, pointLocs, odDists, cutoff, settingsKey):
+    storePath  = os.path.join(storeLoc, storeName)
+    pointsName = self.getPointsTableName(storeName)
+    pointsPath = os.path.join(storeLoc, pointsName)
+
+    arcpy.CreateTable_management(storeLoc, storeName)
+    arcpy.AddField_management(storePath, "Origin_Key",      "TEXT")
+    arcpy.AddField_management(storePath, "Destination_Key", "TEXT")
+    arcpy.AddField_management(storePath, "Total_Length",    "DOUBLE")
+
+    arcpy.CreateTable_management(storeLoc, pointsName)
+    arcpy.AddField_management(pointsPath, "Point_Key",    "TEXT")
+    arcpy.AddField_management(pointsPath, "Point_X",      "DOUBLE")
+    arcpy.AddField_management(pointsPath, "Point_Y",      "DOUBLE")
+    arcpy.AddField_management(pointsPath, "Cutoff",       "DOUBLE")
+    arcpy.AddField_management(pointsPath, "Settings_Key", "TEXT")
+
+    self.updateStore(storeLoc, storeName, set(), pointLocs, odDists, cutoff, settingsKey)
+
+  ###
+  # Update a store in place: the rows of the removed points are deleted and
+  # the rows of the added points are appended, so only the changed rows are
+  # written.
+  # @param storeLoc The database that holds the store.
+  # @param storeName The name of the store.
+  # @param removedKeys The IDs of the removed points.
+  # @param addedLocs A dictionary of ID -> (x, y) of the added points.
+  # @param addedDists The OD distances of the added points, keyed by point ID.
+  # @param cutoff The cutoff distance (None means no cutoff).
+  # @param settingsKey The key from getSettingsKey.
+  ###
+  def updateStore(self, storeLoc, storeName, removedKeys, addedLocs, addedDists, cutoff, settingsKey):
+    storePath  = os.path.join(storeLoc, storeName)
+    pointsPath = os.path.join(storeLoc, self.getPointsTableName(storeName))
+    bandsPath  = os.path.join(storeLoc, self.getBandsTableName(storeName))
+
+    # The band counts are of the old distances.
+    if arcpy.Exists(bandsPath):
+      arcpy.Delete_management(bandsPath)
+
+    if len(removedKeys) != 0:
+      keyList = ",".join("'{0}'".format(key.replace("'", "''")) for key in sorted(removedKeys))
+      where   = """{0} IN ({2}) OR {1} IN ({2})""".format(
+        arcpy.AddFieldDelimiters(storePath, "Origin_Key"),
+        arcpy.AddFieldDelimiters(storePath, "Destination_Key"), keyList)
+
+      with arcpy.da.UpdateCursor(storePath, ["Origin_Key"], where) as cursor:
+        for row in cursor:
+          cursor.deleteRow()
+
+    # The added pairs were solved with this run's cutoff, which may be shorter
+    # than the store's, so the kept points are marked with it too.
+    with arcpy.da.UpdateCursor(pointsPath, ["Point_Key", "Cutoff"]) as cursor:
+      for row in cursor:
+        if row[0] in removedKeys:
+          cursor.deleteRow()
+        elif row[1] != cutoff:
+          cursor.updateRow([row[0], cutoff])
+
+    with arcpy.da.InsertCursor(storePath, ["Origin_Key", "Destination_Key", "Total_Length"]) as cursor:
+      for odDist in addedDists:
+        cursor.insertRow([odDist["OriginID"], odDist["DestinationID"], odDist["Total_Length"]])
+
+    with arcpy.da.InsertCursor(pointsPath, ["Point_Key", "Point_X", "Point_Y", "Cutoff", "Settings_Key"]) as cursor:
+      for pointKey in sorted(addedLocs):
+        cursor.insertRow([pointKey, addedLocs[pointKey][0], addedLocs[pointKey][1], cutoff, settingsKey])
+
+  ###
+  # Read the stored band counts.  Returns an array of counts, or None if there
+  # are none for the band settings.
+  # @param storeLoc The database that holds the store.
+  # @param storeName The name of the store.
+  # @param bands The PermutationBands that the counts must be counted with.
+  ###
+  def readBandCounts(self, storeLoc, storeName, bands):
+    bandsPath = os.path.join(storeLoc, self.getBandsTableName(storeName))
+    settings  = self._getBandSettings(bands)
+
+    if not arcpy.Exists(bandsPath):
+      return None
+
+    with arcpy.da.SearchCursor(in_table=bandsPath,
+      field_names=["Band_Settings", "Band_Number", "Point_Count"]) as cursor:
+      rows = sorted((row[1], row[2]) for row in cursor if row[0] == settings)
+
+    if [row[0] for row in rows] != list(range(0, bands.getNumberOfDistanceBands())):
+      return None
+
+    return [row[1] for row in rows]
+
+  ###
+  # Write the band counts of the stored distances, replacing any that are
+  # there.
+  # @param storeLoc The database that holds the store.
+  # @param storeName The name of the store.
+  # @param bands The PermutationBands that the counts were counted with.
+  # @param counts The array of counts.
+  ###
+  def writeBandCounts(self, storeLoc, storeName, bands, counts):
+    bandsName = self.getBandsTableName(storeName)
+    bandsPath = os.path.join(storeLoc, bandsName)
+    settings  = self._getBandSettings(bands)
+
+    arcpy.CreateTable_management(storeLoc, bandsName)
+    arcpy.AddField_management(bandsPath, "Band_Settings", "TEXT")
+    arcpy.AddField_management(bandsPath, "Band_Number",   "LONG")
+    arcpy.AddField_management(bandsPath, "Point_Count",   "LONG")
+
+    with arcpy.da.InsertCursor(bandsPath, ["Band_Settings", "Band_Number", "Point_Count"]) as cursor:
+      for bandNum, count in enumerate(counts):
+        cursor.insertRow([settings, bandNum, count])
+
+  ###
+  # Re-key OD distances from one set of IDs to another.
+  # @param odDists The OD distances.
+  # @param idMap A dictionary of old ID -> new ID.
+  ###
+  def _mapDistances(self, odDists, idMap):
+    return [{"Total_Length": odDist["Total_Length"], "OriginID": idMap[odDist["OriginID"]],
+      "DestinationID": idMap[odDist["DestinationID"]]} for odDist in odDists]
+
+  ###
+  # Solve the distances between the added points and all the points, in both
+  # directions.  The OriginID and DestinationID of each distance are ObjectIDs.
+  # @param points The points.
+  # @param addedOIDs The sorted ObjectIDs of the added points.
+  # @param restOIDs The sorted ObjectIDs of the other points.
+  # @param networkDataset The network dataset to use for the ODCMs.
+  # @param snapDist The snap distance.
+  # @param cutoff The cutoff distance (optional).
+  # @param outCoordSys The coordinate system to project the points into.
+  ###
+  def _calculateChangedDistances(self, points, addedOIDs, restOIDs, networkDataset, snapDist, cutoff, outCoordSys):
+    svc = self.randODCMPermSvc
+
+    # Added points to every point (excluding each point to itself).
+    odDists = svc.calculateDistances(networkDataset, points, points, snapDist, cutoff, outCoordSys, addedOIDs)
+
+    # The other points to the added points.
+    if len(restOIDs) != 0:
+      odDists.extend(svc.calculateDistances(networkDataset, points, points, snapDist, cutoff, outCoordSys,
+        restOIDs, addedOIDs))
+
+    return odDists
+
+  ###
+  # Calculate the observed distances, reusing the store from an earlier run if
+  # there is one, then update the store.  Returns a tuple of (odDists,
+  # distBands).  The OriginID and DestinationID of odDists are ObjectIDs, as
+  # from RandomODCMPermutationsSvc.  distBands are the distance bands of
+  # odDists if bands is given (otherwise None).  With a store, they're the
+  # stored counts plus the counts of the added pairs, less the counts of the
+  # removed pairs.
+  # @param points The points.
+  # @param idField The name of a field that uniquely identifies each point
+  #        (e.g. CASEID).
+  # @param storeLoc The database that holds the store.
+  # @param storeName The name of the store.
+  # @param networkDataset The network dataset to use for the ODCMs.
+  # @param snapDist The snap distance.
+  # @param cutoff The cutoff distance (optional).
+  # @param outCoordSys The coordinate system to project the points into.
+  # @param messages A messages instance with addMessage() implemented.
+  # @param bands The PermutationBands to count the distances with (optional).
+  ###
+  def calculateObservedDistances(self, points, idField, storeLoc, storeName,
+    networkDataset, snapDist, cutoff, outCoordSys, messages, bands=None):
+    settingsKey = self.getSettingsKey(networkDataset, snapDist, outCoordSys)
+    oidPoints   = self.readPointKeys(points, idField, outCoordSys)
+    oidKeys     = dict((oid, point[0]) for oid, point in oidPoints.items())
+    keyOIDs     = dict((key, oid) for oid, key in oidKeys.items())
+    pointLocs   = dict(oidPoints.values())
+    pointKeys   = set(keyOIDs)
+    store       = self.readStore(storeLoc, storeName, cutoff, settingsKey)
+    isUnique    = len(keyOIDs) == len(oidKeys)
+
+    if not isUnique:
+      messages.addMessage("The values in {0} are not unique.  Solving all points.".format(idField))
+      store = None
+
+    if store is None:
+      messages.addMessage("No usable observed ODCM store.  Solving all points.")
+      odDists = self.randODCMPermSvc.calculateDistances(networkDataset, points, points,
+        snapDist, cutoff, outCoordSys)
+      counts  = bands.count(odDists) if bands is not None else None
+
+      if isUnique:
+        self.writeStore(storeLoc, storeName, pointLocs, self._mapDistances(odDists, oidKeys),
+          cutoff, settingsKey)
+        if bands is not None:
+          self.writeBandCounts(storeLoc, storeName, bands, counts)
+
+      return (odDists, bands.getDistanceBands(counts) if bands is not None else None)
+
+    # A moved point's pairs are all stale, so it's removed and then added.
+    prevLocs, prevDists = store
+    prevKeys    = set(prevLocs)
+    movedKeys   = set(key for key in pointKeys & prevKeys if pointLocs[key] != prevLocs[key])
+    addedKeys   = (pointKeys - prevKeys) | movedKeys
+    removedKeys = (prevKeys - pointKeys) | movedKeys
+    isChanged   = len(addedKeys) != 0 or len(removedKeys) != 0
+    messages.addMessage("Added points: {0}.  Removed points: {1}.  Moved points: {2}.".format(
+      len(addedKeys) - len(movedKeys), len(removedKeys) - len(movedKeys), len(movedKeys)))
+
+    removedDists = [odDist for odDist in prevDists
+      if odDist["OriginID"] in removedKeys or odDist["DestinationID"] in removedKeys]
+    addedDists   = []
+
+    if len(addedKeys) != 0:
+      addedOIDs  = sorted(keyOIDs[key] for key in addedKeys)
+      restOIDs   = sorted(keyOIDs[key] for key in pointKeys - addedKeys)
+      addedDists = self._mapDistances(self._calculateChangedDistances(points, addedOIDs, restOIDs,
+        networkDataset, snapDist, cutoff, outCoordSys), oidKeys)
+
+    keyDists = [odDist for odDist in prevDists
+      if odDist["OriginID"] not in removedKeys and odDist["DestinationID"] not in removedKeys]
+    keyDists.extend(addedDists)
+
+    # The counts are cumulative sums over the pairs, so the changed pairs'
+    # counts are applied to the stored counts.
+    counts     = None
+    prevCounts = self.readBandCounts(storeLoc, storeName, bands) if bands is not None else None
+
+    if bands is not None:
+      if prevCounts is not None:
+        counts = [prevCount + addedCount - removedCount for prevCount, addedCount, removedCount in
+          zip(prevCounts, bands.count(addedDists), bands.count(removedDists))]
+      else:
+        counts = bands.count(keyDists)
+
+    if isChanged:
+      self.updateStore(storeLoc, storeName, removedKeys, dict((key, pointLocs[key]) for key in addedKeys),
+        addedDists, cutoff, settingsKey)
+    if bands is not None and (isChanged or prevCounts is None):
+      self.writeBandCounts(storeLoc, storeName, bands, counts)
+
+    return (self._mapDistances(keyDists, keyOIDs), bands.getDistanceBands(counts) if bands is not None else None)
@@ -0,0 +1,198 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline"))
+
+from offline_runner import OfflineRunner
+from synthetic_network import SyntheticNetwork
+from incremental_observed_svc import IncrementalObservedSvc
+from network_k_calculation import NetworkKCalculation
+from permutation_bands import PermutationBands
+
+import arcpy
+
+class IncrementalObservedSvcSuite(unittest.TestCase):
+  def setUp(self):
+    self.tempDir   = tempfile.mkdtemp()
+    self.cacheDir  = os.environ.get("CRASH_ANALYSIS_CACHE_DIR")
+    self.runner    = OfflineRunner(os.path.join(self.tempDir, "offline.gdb"))
+    self.synNet    = SyntheticNetwork(5)
+    self.lines     = self.synNet.makeGrid(5, 5)
+    self.graph     = self.synNet.makeGraph(self.lines)
+    self.locations = self.synNet.makeUniformPoints(self.graph, 12)
+    self.network   = self.runner.createNetworkDataset("Grid_ND", self.lines)
+    self.points    = self.runner.createPoints("Crashes",
+      [self.graph.getLocationCoordinates(loc) for loc in self.locations])
+    self.spatRef   = arcpy.SpatialReference(26911)
+    self.netLen    = self.graph.getTotalLength()
+    self.svc       = IncrementalObservedSvc()
+
+    os.environ["CRASH_ANALYSIS_CACHE_DIR"] = os.path.join(self.tempDir, "cache")
+
+    # Each point gets a case ID.
+    arcpy.AddField_management(self.points, "CASEID", "LONG")
+    with arcpy.da.UpdateCursor(self.points, ["OID@", "CASEID"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([row[0], 1000 + row[0]])
+
+  def tearDown(self):
+    if self.cacheDir is None:
+      del os.environ["CRASH_ANALYSIS_CACHE_DIR"]
+    else:
+      os.environ["CRASH_ANALYSIS_CACHE_DIR"] = self.cacheDir
+
+    shutil.rmtree(self.tempDir)
+
+  # Get the distance bands of the points.
+  def getBands(self, numPoints):
+    return PermutationBands("NETWORK", self.netLen, numPoints, 0, 100, 6)
+
+  # Calculate the observed distances.  Returns a tuple of (odDists, distBands,
+  # messages).
+  def calculate(self, numPoints, snapDist=1, cutoff=None):
+    messages      = arcpy.Messages()
+    odDists, dist = self.svc.calculateObservedDistances(self.points, "CASEID", self.runner.getWorkspace(),
+      "Observed", self.network, snapDist, cutoff, self.spatRef, messages, self.getBands(numPoints))
+
+    return (odDists, dist, [message for severity, message in messages.messages])
+
+  # Check the distances and the bands against a full solve.
+  def assertFullSolve(self, odDists, distBands, numPoints):
+    fullDists, fullBands = IncrementalObservedSvc().calculateObservedDistances(self.points, "CASEID",
+      self.runner.getWorkspace(), "Full", self.network, 1, None, self.spatRef, arcpy.Messages(),
+      self.getBands(numPoints))
+    netKCalc = NetworkKCalculation(self.netLen, numPoints, fullDists, 0, 100, 6)
+
+    def key(odDist):
+      return (odDist["OriginID"], odDist["DestinationID"])
+
+    self.assertEqual(sorted(map(key, odDists)), sorted(map(key, fullDists)))
+    self.assertEqual([distBand["count"] for distBand in distBands],
+      [distBand["count"] for distBand in netKCalc.getDistanceBands()])
+    self.assertEqual(distBands, fullBands)
+
+  # Delete points by case ID.
+  def deletePoints(self, caseIDs):
+    with arcpy.da.UpdateCursor(self.points, ["CASEID"]) as cursor:
+      for row in cursor:
+        if row[0] in caseIDs:
+          cursor.deleteRow()
+
+  # A second identical run reuses the store, even though it's in the same
+  # database as the network.
+  def test_reuse(self):
+    odDists, distBands, messages = self.calculate(12)
+    self.assertIn("No usable observed ODCM store.  Solving all points.", messages)
+    self.assertFullSolve(odDists, distBands, 12)
+
+    again, againBands, messages = self.calculate(12)
+    self.assertIn("Added points: 0.  Removed points: 0.  Moved points: 0.", messages)
+    self.assertEqual(againBands, distBands)
+    self.assertEqual(len(again), len(odDists))
+
+  # Added points are solved against the others, and their pairs are added to
+  # the stored counts.
+  def test_added(self):
+    self.calculate(12)
+
+    with arcpy.da.InsertCursor(self.points, ["SHAPE@XY", "CASEID"]) as cursor:
+      for i, loc in enumerate(self.synNet.makeUniformPoints(self.graph, 3)):
+        cursor.insertRow([self.graph.getLocationCoordinates(loc), 2000 + i])
+
+    odDists, distBands, messages = self.calculate(15)
+    self.assertIn("Added points: 3.  Removed points: 0.  Moved points: 0.", messages)
+    self.assertFullSolve(odDists, distBands, 15)
+
+  # The pairs of removed points are removed from the stored counts.
+  def test_removed(self):
+    self.calculate(12)
+    self.deletePoints(set([1001, 1005, 1009]))
+
+    odDists, distBands, messages = self.calculate(9)
+    self.assertIn("Added points: 0.  Removed points: 3.  Moved points: 0.", messages)
+    self.assertFullSolve(odDists, distBands, 9)
+
+  # Only the rows of the changed points are written to the store.
+  def test_delta_writes(self):
+    self.calculate(12)
+    self.deletePoints(set([1003]))
+
+    with arcpy.da.InsertCursor(self.points, ["SHAPE@XY", "CASEID"]) as cursor:
+      cursor.insertRow([self.graph.getLocationCoordinates(self.synNet.makeUniformPoints(self.graph, 1)[0]), 2000])
+
+    created  = []
+    inserted = []
+    createTable  = arcpy.CreateTable_management
+    insertCursor = arcpy.da.InsertCursor
+
+    def recordCreate(outPath, outName, *args, **kwargs):
+      created.append(outName)
+      return createTable(outPath, outName, *args, **kwargs)
+
+    def recordInsert(inTable, fieldNames):
+      cursor    = insertCursor(inTable, fieldNames)
+      insertRow = cursor.insertRow
+
+      def recordRow(row):
+        inserted.append((os.path.basename(str(inTable)), list(row)))
+        return insertRow(row)
+
+      cursor.insertRow = recordRow
+      return cursor
+
+    arcpy.CreateTable_management = recordCreate
+    arcpy.da.InsertCursor        = recordInsert
+
+    try:
+      odDists, distBands, messages = self.calculate(12)
+    finally:
+      arcpy.CreateTable_management = createTable
+      arcpy.da.InsertCursor        = insertCursor
+
+    self.assertIn("Added points: 1.  Removed points: 1.  Moved points: 0.", messages)
+    self.assertEqual(created, ["Observed_Bands"])
+    self.assertEqual([row[0] for table, row in inserted if table == "Observed_Points"], ["2000"])
+
+    # Only the pairs of the added point are appended.
+    pairs = [row for table, row in inserted if table == "Observed"]
+    self.assertNotEqual(pairs, [])
+    self.assertTrue(all("2000" in row[0:2] for row in pairs))
+    self.assertFullSolve(odDists, distBands, 12)
+
+  # A point that keeps its ID but moves has its pairs solved again.
+  def test_moved(self):
+    self.calculate(12)
+
+    moved = dict(zip([1002, 1007], self.synNet.makeUniformPoints(self.graph, 2)))
+    with arcpy.da.UpdateCursor(self.points, ["SHAPE@XY", "CASEID"]) as cursor:
+      for row in cursor:
+        if row[1] in moved:
+          cursor.updateRow([self.graph.getLocationCoordinates(moved[row[1]]), row[1]])
+
+    odDists, distBands, messages = self.calculate(12)
+    self.assertIn("Added points: 0.  Removed points: 0.  Moved points: 2.", messages)
+    self.assertFullSolve(odDists, distBands, 12)
+
+  # A store solved with other settings isn't used.
+  def test_invalidated(self):
+    self.calculate(12)
+
+    odDists, distBands, messages = self.calculate(12, snapDist=2)
+    self.assertIn("No usable observed ODCM store.  Solving all points.", messages)
+
+    # Counts of other bands aren't used either.
+    bands = PermutationBands("NETWORK", self.netLen, 12, 0, 50, 6)
+    self.assertEqual(self.svc.readBandCounts(self.runner.getWorkspace(), "Observed", bands), None)
+    self.assertEqual(len(self.svc.readBandCounts(self.runner.getWorkspace(), "Observed", self.getBands(12))), 6)
+
+    # A store with a shorter cutoff is missing pairs.
+    self.calculate(12, cutoff=200)
+    odDists, distBands, messages = self.calculate(12)
+    self.assertIn("No usable observed ODCM store.  Solving all points.", messages)
+    self.assertFullSolve(odDists, distBands, 12)
+
+if __name__ == "__main__":
+  unittest.main()
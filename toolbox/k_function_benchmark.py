@@ -0,0 +1,208 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from local_odcm_solver     import LocalODCMSolver
+from network_k_analysis    import NetworkKAnalysis
+from network_k_calculation import NetworkKCalculation
+from random_point_sampler  import RandomPointSampler
+from synthetic_network     import SyntheticNetwork
+
+###
+# Benchmarks the K function stages on synthetic networks and crash sets, and
+# reports the timings as JSON so that they can be compared between versions.
+#
+# Each case is a network (a Manhattan grid, a random planar network, or a CSV
+# edge list) and a crash set (uniform or clustered).  The stages are:
+#   random_points     Generating a set of random points on the network.
+#   distances         Solving the OD cost matrix of the observed crashes.
+#   band_counting     Counting the distance bands (NetworkKCalculation).
+#   envelope_analysis Computing the confidence envelopes (NetworkKAnalysis).
+#
+# Usage (from the toolbox directory):
+#   python k_function_benchmark.py --network grid:100 --network planar:100 \
+#     --points 100,1000,10000 --distribution uniform,clustered --output results.json
+###
+class KFunctionBenchmark(object):
+  ###
+  # Initialize the benchmark.
+  # @param seed The random seed, so runs are comparable.
+  # @param repeats The number of times each stage is timed (the fastest run
+  #        is reported).
+  # @param numPerms The number of random permutations for the envelopes.
+  # @param begDist The beginning distance.
+  # @param distInc The distance increment.
+  # @param numBands The number of distance bands.  The ODCM cutoff is the last
+  #        band.
+  ###
+  def __init__(self, seed=0, repeats=3, numPerms=9, begDist=0.0, distInc=100.0, numBands=10):
+    self._seed     = seed
+    self._repeats  = repeats
+    self._numPerms = numPerms
+    self._begDist  = begDist
+    self._distInc  = distInc
+    self._numBands = numBands
+
+  # Get the ODCM cutoff, the same as the tools' (see GlobalKFunctionSvc).
+  def getCutoff(self):
+    return self._numBands * self._distInc + self._begDist
+
+  ###
+  # Make the lines of a network from a description: "grid:N" (an N x N grid),
+  # "planar:N" (an N x N random planar network), or "csv:PATH" (an edge list).
+  # @param description The network description.
+  ###
+  def makeNetwork(self, description):
+    netType, arg = description.split(":", 1)
+    synNet       = SyntheticNetwork(self._seed)
+
+    if netType == "grid":
+      return synNet.makeGrid(int(arg), int(arg))
+    if netType == "planar":
+      return synNet.makeRandomPlanar(int(arg), int(arg))
+    if netType == "csv":
+      return synNet.readLines(arg)
+
+    raise ValueError("Unknown network type: {0}".format(netType))
+
+  ###
+  # Time a function.  Returns a tuple of (result, an array of run times).
+  # @param func The function to time (no arguments).
+  ###
+  def _time(self, func):
+    runs = []
+
+    for i in range(0, self._repeats):
+      start  = timeit.default_timer()
+      result = func()
+      runs.append(timeit.default_timer() - start)
+
+    return (result, runs)
+
+  ###
+  # Run the stages on one network and crash set.  Returns an array of results,
+  # one per stage.
+  # @param graph A NetworkGraph.
+  # @param networkName The network description.
+  # @param distribution Either uniform or clustered.
+  # @param numPoints The number of crashes.
+  ###
+  def runCase(self, graph, networkName, distribution, numPoints):
+    synNet  = SyntheticNetwork(self._seed)
+    netLen  = graph.getTotalLength()
+    solver  = LocalODCMSolver(graph)
+    cutoff  = self.getCutoff()
+    lengths = [graph.getEdgeLength(edgeID) for edgeID in range(0, graph.getNumberOfEdges())]
+    timings = []
+
+    if distribution == "clustered":
+      points = synNet.makeClusteredPoints(graph, numPoints, max(1, numPoints // 100), self._distInc * 5)
+    else:
+      points = synNet.makeUniformPoints(graph, numPoints)
+    points = list(enumerate(points))
+
+    # Random points for one permutation.
+    sampler = RandomPointSampler(lengths, None, synNet.getRandom())
+    randPoints, runs = self._time(lambda: sampler.sample(numPoints))
+    timings.append(("random_points", runs, len(randPoints)))
+
+    # The observed OD cost matrix.
+    odDists, runs = self._time(lambda: solver.solve(points, points, cutoff, True))
+    timings.append(("distances", runs, len(odDists)))
+
+    # The observed distance bands.
+    netKCalc, runs = self._time(lambda: NetworkKCalculation(netLen, numPoints, odDists,
+      self._begDist, self._distInc, self._numBands))
+    timings.append(("band_counting", runs, len(odDists)))
+
+    # The envelopes, from random permutations (the permutations themselves are
+    # not timed).
+    netKCalculations = [netKCalc.getDistanceBands()]
+    for i in range(0, self._numPerms):
+      permPoints = list(enumerate(sampler.sample(numPoints)))
+      permDists  = solver.solve(permPoints, permPoints, cutoff, True)
+      netKCalculations.append(NetworkKCalculation(netLen, numPoints, permDists,
+        self._begDist, self._distInc, self._numBands).getDistanceBands())
+
+    analysis, runs = self._time(lambda: NetworkKAnalysis(.95, netKCalculations))
+    timings.append(("envelope_analysis", runs, len(netKCalculations)))
+
+    return [{
+      "network":       networkName,
+      "numNodes":      graph.getNumberOfNodes(),
+      "numEdges":      graph.getNumberOfEdges(),
+      "networkLength": netLen,
+      "distribution":  distribution,
+      "numPoints":     numPoints,
+      "stage":         stage,
+      "numItems":      numItems,
+      "seconds":       min(runs),
+      "runs":          runs} for stage, runs, numItems in timings]
+
+  ###
+  # Run every combination of networks, crash distributions, and sizes.
+  # Returns a dictionary that can be written as JSON.
+  # @param networks An array of network descriptions (see makeNetwork).
+  # @param distributions An array of distributions (uniform, clustered).
+  # @param sizes An array of crash counts.
+  # @param messages A function(message) for progress output (optional).
+  ###
+  def run(self, networks, distributions, sizes, messages=None):
+    results = []
+
+    for networkName in networks:
+      graph = SyntheticNetwork(self._seed).makeGraph(self.makeNetwork(networkName))
+
+      for distribution in distributions:
+        for numPoints in sizes:
+          if messages is not None:
+            messages("{0}, {1}, {2} points".format(networkName, distribution, numPoints))
+          results.extend(self.runCase(graph, networkName, distribution, numPoints))
+
+    return {
+      "timestamp":       time.strftime("%Y-%m-%dT%H:%M:%S"),
+      "python":          platform.python_version(),
+      "platform":        platform.platform(),
+      "seed":            self._seed,
+      "repeats":         self._repeats,
+      "numPermutations": self._numPerms,
+      "cutoff":          self.getCutoff(),
+      "results":         results}
+
+###
+# Parse the command line and run the benchmark.
+###
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Benchmark the K function stages.")
+  parser.add_argument("--network", action="append", default=None,
+    help="grid:N, planar:N, or csv:PATH (repeatable).  Default: grid:50 and planar:50.")
+  parser.add_argument("--points", default="100,1000",
+    help="Comma-separated crash counts (e.g. 100,1000,10000,50000).")
+  parser.add_argument("--distribution", default="uniform,clustered",
+    help="Comma-separated crash distributions (uniform, clustered).")
+  parser.add_argument("--permutations",       type=int,   default=9)
+  parser.add_argument("--repeats",            type=int,   default=3)
+  parser.add_argument("--seed",               type=int,   default=0)
+  parser.add_argument("--distance-increment", type=float, default=100.0)
+  parser.add_argument("--bands",              type=int,   default=10)
+  parser.add_argument("--output", help="Write the JSON results here instead of to stdout.")
+  args = parser.parse_args(argv)
+
+  benchmark = KFunctionBenchmark(args.seed, args.repeats, args.permutations, 0.0,
+    args.distance_increment, args.bands)
+  report    = benchmark.run(args.network or ["grid:50", "planar:50"],
+    args.distribution.split(","), [int(size) for size in args.points.split(",")],
+    lambda message: sys.stderr.write(message + "\n"))
+
+  if args.output:
+    with open(args.output, "w") as outFile:
+      json.dump(report, outFile, indent=2, sort_keys=True)
+  else:
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+  main()
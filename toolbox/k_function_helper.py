@@ -1,143 +1,709 @@
-import arcpy
-import os
-
-from collections import OrderedDict
-
-###
-# Helper functions that are shared by the various types of K functions.
-###
-class KFunctionHelper(object):
-  ###
-  # Initialize the helper class.
-  ###
-  def __init__(self):
-    self.permutations = OrderedDict([
-      ("0 Permutations (No Confidence Envelope)", 0),
-      ("9 Permutations", 9),
-      ("99 Permutations", 99),
-      ("999 Permutations", 999)])
-
-    self.analysisTypes = OrderedDict([
-      ("Global Analysis", "GLOBAL"),
-      ("Cross Analysis",  "CROSS")])
-
-    self.caToolsImported = False
-
-  # Helper function to import the crash analysis toolbox.
-  def _importCAToolbox(self):
-    if not self.caToolsImported:
-      # The Network Dataset Length and Generate Random Points tools are used.
-      # Import the toolbox.  It's is in the Crash Analysis Toolbox (this tool's
-      # toolbox).
-      toolboxPath     = os.path.dirname(os.path.abspath(__file__))
-      toolboxName     = "Crash Analysis Toolbox.pyt"
-      toolboxFullPath = os.path.join(toolboxPath, toolboxName)
-      arcpy.ImportToolbox(toolboxFullPath)
-
-      self.caToolsImported = True
-
-  ###
-  # Get a map of selectable permutation numbers.
-  ###
-  def getPermutationSelection(self):
-    return self.permutations
-
-  ###
-  # Get a map of analysis types.
-  ###
-  def getAnalysisTypeSelection(self):
-    return self.analysisTypes
-
-  ###
-  # Calculate the length of networkDataset and return it.
-  # @param networkDataset A network dataset which the points are on.
-  # @param outCoordSys The output coordinate system.  Expected to be projected.
-  ###
-  def calculateLength(self, networkDataset, outCoordSys):
-    ndDesc = arcpy.Describe(networkDataset)
-    wsPath = arcpy.env.workspace
-
-    # The length will get stored in a temporary table.
-    lenTblName     = "TEMP_LENGTH_{0}".format(ndDesc.baseName)
-    lenTblFullPath = os.path.join(wsPath, lenTblName)
-    self._importCAToolbox()
-    arcpy.NetworkDatasetLength_crashAnalysis(networkDataset, outCoordSys, wsPath, lenTblName)
-
-    # Pull the length from the temporary length table.
-    networkLength = 0
-    with arcpy.da.SearchCursor(in_table=lenTblFullPath, field_names=["Network_Dataset_Length"]) as cursor:
-      for row in cursor:
-        networkLength += row[0]
-
-    # Delete the temporary network length storage.
-    arcpy.Delete_management(lenTblFullPath)
-
-    return networkLength
-
-  ###
-  # Add random points to the network dataset and return the points table.
-  # @param networkDataset A network dataset which the points are on.
-  # @param outCoordSys The output coordinate system.  Expected to be projected.
-  # @param numPoints The number of points to add.
-  # @param numPointsFieldName The name of a field in the network dataset's edge
-  #        sources from which the number of points should be derived.
-  ###
-  def generateRandomPoints(self, networkDataset, outCoordSys, numPoints, numPointsFieldName):
-    ndDesc = arcpy.Describe(networkDataset)
-    wsPath = arcpy.env.workspace
-
-    randPtsFCName   = "TEMP_RANDOM_POINTS_{0}".format(ndDesc.baseName)
-    randPtsFullPath = os.path.join(wsPath, randPtsFCName)
-    self._importCAToolbox()
-
-    if numPointsFieldName:
-      arcpy.NetworkDatasetRandomPoints_crashAnalysis(network_dataset=networkDataset,
-        out_location=wsPath, output_point_feature_class=randPtsFCName, use_field=True,
-        num_points_field=numPointsFieldName)
-    else:
-      arcpy.NetworkDatasetRandomPoints_crashAnalysis(network_dataset=networkDataset,
-        out_location=wsPath, output_point_feature_class=randPtsFCName, use_field=False,
-        num_points=numPoints)
-
-    return randPtsFullPath
-
-  ###
-  # Calculate the number features in a feature class.
-  # @param fcPath The full path to a feature class.
-  ###
-  def countNumberOfFeatures(self, fcPath):
-    result = arcpy.GetCount_management(fcPath)
-    return int(result.getOutput(0))
-
-  ###
-  # Get the full path of a network datasource's edge source (the first source).
-  # @param networkDataset A network dataset.
-  ###
-  def getEdgeSourcePath(self, networkDataset):
-    ndDesc = arcpy.Describe(networkDataset)
-    return os.path.join(ndDesc.path, ndDesc.edgeSources[0].name)
-
-  ###
-  # Get the number of edge sources in a network dataset.
-  # @param networkDataset A network dataset.
-  ###
-  def getNumEdgeSources(self, networkDataset):
-    ndDesc      = arcpy.Describe(networkDataset)
-    edgeSources = ndDesc.edgeSources
-    return len(edgeSources)
-
-  ###
-  # Get an array of field names from a network dataset's first edge source.
-  # Only numeric fields are considered.
-  # @param networkDataset A network dataset.
-  ###
-  def getEdgeSourceFieldNames(self, networkDataset):
-    esFullPath  = self.getEdgeSourcePath(networkDataset)
-    esDesc      = arcpy.Describe(esFullPath)
-    fieldsNames = []
-
-    for field in esDesc.fields:
-      if field.type == "Integer" or field.type == "SmallInteger" or field.type == "Double" or field.type == "Single":
-        fieldsNames.append(field.name)
-
-    return fieldsNames
\ No newline at end of file
+import arcpy
+import hashlib
+import os
+import random_point_sampler
+import network_length_cache
+import line_length_engine
+import network_graph
+import shapefile_reader
+import temp_namespace
+import scratch_workspace
+import observed_odcm_cache
+
+from collections import OrderedDict
+
+# ArcMap caching prevention.
+random_point_sampler = reload(random_point_sampler)
+network_length_cache = reload(network_length_cache)
+line_length_engine   = reload(line_length_engine)
+network_graph        = reload(network_graph)
+shapefile_reader     = reload(shapefile_reader)
+temp_namespace       = reload(temp_namespace)
+scratch_workspace    = reload(scratch_workspace)
+observed_odcm_cache  = reload(observed_odcm_cache)
+
+from random_point_sampler import RandomPointSampler
+from network_length_cache import NetworkLengthCache
+from line_length_engine   import LineLengthEngine
+from network_graph        import NetworkGraph
+from shapefile_reader     import ShapefileReader
+from temp_namespace       import TempNamespace
+from scratch_workspace    import ScratchWorkspace
+from observed_odcm_cache  import ObservedODCMCache
+
+###
+# Helper functions that are shared by the various types of K functions.
+###
+class KFunctionHelper(object):
+  ###
+  # Initialize the helper class.
+  # @param tempNS The TempNamespace that temporary datasets are named in
+  #        (optional).  Defaults to a new namespace.
+  ###
+  def __init__(self, tempNS=None):
+    self.tempNS = tempNS if tempNS is not None else TempNamespace()
+
+    self.permutations = OrderedDict([
+      ("0 Permutations (No Confidence Envelope)", 0),
+      ("9 Permutations", 9),
+      ("99 Permutations", 99),
+      ("999 Permutations", 999)])
+
+    self.analysisTypes = OrderedDict([
+      ("Global Analysis", "GLOBAL"),
+      ("Cross Analysis",  "CROSS")])
+
+    self.caToolsImported = False
+
+    # Network fingerprints, by catalog path (see getNetworkFingerprint).
+    self._fingerprints = {}
+
+  # Get the ways of generating random points (see RandomPointSampler).
+  def getSamplingMethods(self):
+    return RandomPointSampler.SAMPLING_METHODS
+
+  # Helper function to import the crash analysis toolbox.
+  def _importCAToolbox(self):
+    if not self.caToolsImported:
+      # The Generate Random Points tool is used.
+      # Import the toolbox.  It's is in the Crash Analysis Toolbox (this tool's
+      # toolbox).
+      toolboxPath     = os.path.dirname(os.path.abspath(__file__))
+      toolboxName     = "Crash Analysis Toolbox.pyt"
+      toolboxFullPath = os.path.join(toolboxPath, toolboxName)
+      arcpy.ImportToolbox(toolboxFullPath)
+
+      self.caToolsImported = True
+
+  ###
+  # Get a map of selectable permutation numbers.
+  ###
+  def getPermutationSelection(self):
+    return self.permutations
+
+  ###
+  # Get a map of analysis types.
+  ###
+  def getAnalysisTypeSelection(self):
+    return self.analysisTypes
+
+  ###
+  # Calculate the length of networkDataset and return it.  Lengths are cached
+  # between runs (see NetworkLengthCache), and only recalculated when the
+  # network's edges change.
+  # @param networkDataset A network dataset which the points are on.
+  # @param outCoordSys The output coordinate system.  Expected to be projected.
+  ###
+  def calculateLength(self, networkDataset, outCoordSys):
+    ndDesc = arcpy.Describe(networkDataset)
+
+    if outCoordSys is None:
+      outCoordSys = ndDesc.spatialReference
+
+    lengthCache   = NetworkLengthCache(self.getCacheDirectory())
+    key           = lengthCache.getKey(ndDesc.catalogPath, self.getNetworkFingerprint(networkDataset),
+      outCoordSys.exportToString())
+    networkLength = lengthCache.load(key)
+
+    if networkLength is None:
+      networkLength = sum(self.getEdgeSourceLengths(networkDataset, outCoordSys))
+      lengthCache.save(key, networkLength)
+
+    return networkLength
+
+  ###
+  # Get the length of each of a network dataset's edge sources, in the order
+  # of ndDesc.edgeSources.  The edge sources are measured from their WKB (see
+  # LineLengthEngine), and nothing is written to disk.
+  # @param networkDataset A network dataset.
+  # @param outCoordSys The coordinate system to measure the lengths in.
+  ###
+  def getEdgeSourceLengths(self, networkDataset, outCoordSys):
+    ndDesc    = arcpy.Describe(networkDataset)
+    edgePaths = [os.path.join(ndDesc.path, edgeSource.name) for edgeSource in ndDesc.edgeSources]
+
+    return LineLengthEngine().measureSources(edgePaths,
+      lambda edgePath: self._measureEdgeSource(edgePath, outCoordSys))
+
+  ###
+  # Build an in-memory graph of a network dataset's edges (see NetworkGraph).
+  # Each part of each edge becomes an edge of the graph, connected at its end
+  # points, with its length as its cost (see getNetworkGraphLimitations).
+  # Shapefile edge sources that don't need projecting are read directly (see
+  # ShapefileReader) rather than through a cursor.
+  # @param networkDataset A network dataset.
+  # @param outCoordSys The coordinate system of the graph (optional).
+  #        Defaults to the network dataset's.
+  ###
+  def getNetworkGraph(self, networkDataset, outCoordSys=None):
+    ndDesc = arcpy.Describe(networkDataset)
+    graph  = NetworkGraph()
+
+    if outCoordSys is None:
+      outCoordSys = ndDesc.spatialReference
+
+    for edgeSource in ndDesc.edgeSources:
+      edgePath = os.path.join(ndDesc.path, edgeSource.name)
+
+      if os.path.isfile(edgePath + ".shp") and arcpy.Describe(edgePath).spatialReference.name == outCoordSys.name:
+        with ShapefileReader(edgePath + ".shp") as reader:
+          parts = reader.getLineParts()
+      else:
+        parts = []
+        with arcpy.da.SearchCursor(edgePath, ["SHAPE@WKB"], spatial_reference=outCoordSys) as cursor:
+          for row in cursor:
+            if row[0] is not None:
+              parts.extend(LineLengthEngine.readWKB(row[0]))
+
+      for coords in parts:
+        graph.addLine(list(zip(coords[0::2], coords[1::2])))
+
+    return graph
+
+  ###
+  # Get the ways that a network dataset's distances can differ from those of
+  # its graph (see getNetworkGraph): the graph connects edges only at their
+  # end points, costs them by their length, and has no turns or elevations.
+  # Returns an array of descriptions, empty if the network dataset has none of
+  # these.  Properties that Describe doesn't have are taken to match.
+  # @param networkDataset A network dataset.
+  ###
+  def getNetworkGraphLimitations(self, networkDataset):
+    ndDesc      = arcpy.Describe(networkDataset)
+    limitations = []
+
+    for edgeSource in ndDesc.edgeSources:
+      if "AnyVertex" in str(getattr(edgeSource, "connectivityPolicies", "")):
+        limitations.append("Edge source {0} has any vertex connectivity.".format(edgeSource.name))
+
+    if str(getattr(ndDesc, "elevationModel", "None")) not in ("None", ""):
+      limitations.append("The network dataset has elevations ({0}).".format(ndDesc.elevationModel))
+
+    if getattr(ndDesc, "supportsTurns", False) and len(getattr(ndDesc, "turnSources", [])) != 0:
+      limitations.append("The network dataset has turns.")
+
+    costs = [attribute.name.lower() for attribute in getattr(ndDesc, "attributes", [])
+      if attribute.usageType == "Cost"]
+    if len(costs) != 0 and "length" not in costs:
+      limitations.append("The network dataset has no Length cost attribute.")
+
+    return limitations
+
+  ###
+  # Read the ObjectID and coordinates of each point: (ObjectID, (x, y)) tuples,
+  # with None for null shapes.  Shapefiles that don't need projecting are read
+  # directly (see ShapefileReader), where the ObjectIDs are the record numbers
+  # and deleted records are skipped, rather than through a cursor.
+  # @param points The points.
+  # @param spatialReference The spatial reference to read the points in.
+  ###
+  def _readPointRows(self, points, spatialReference):
+    if str(points).lower().endswith(".shp") and os.path.isfile(points) and \
+      arcpy.Describe(points).spatialReference.name == spatialReference.name:
+      with ShapefileReader(points) as reader:
+        coords  = reader.getPointCoordinates()
+        deleted = set(reader.getDeletedRecords())
+
+        for recordNum in range(0, reader.getNumberOfRecords()):
+          if recordNum not in deleted:
+            x, y = coords[recordNum * 2], coords[recordNum * 2 + 1]
+            yield (recordNum, (x, y) if x == x else None)
+    else:
+      with arcpy.da.SearchCursor(points, ["OID@", "SHAPE@XY"], spatial_reference=spatialReference) as cursor:
+        for row in cursor:
+          yield row
+
+  ###
+  # Snap points to a network graph.  Returns an array of (ObjectID, location)
+  # tuples (see NetworkGraph), and the number of points that are not within
+  # the snap distance of the network.
+  # @param points The points.
+  # @param graph A NetworkGraph of the network dataset (see getNetworkGraph).
+  # @param spatialReference The graph's spatial reference.
+  # @param snapDist The snap distance.
+  ###
+  def snapPoints(self, points, graph, spatialReference, snapDist):
+    locations = []
+    numMissed = 0
+
+    for row in self._readPointRows(points, spatialReference):
+      location = graph.snapPoint(row[1][0], row[1][1], snapDist) if row[1] is not None else None
+
+      if location is None:
+        numMissed += 1
+      else:
+        locations.append((row[0], location))
+
+    return (locations, numMissed)
+
+  ###
+  # Get the length of an edge source.
+  # @param edgePath The full path of the edge source.
+  # @param outCoordSys The coordinate system to measure the length in.
+  ###
+  def _measureEdgeSource(self, edgePath, outCoordSys):
+    edgeSR = arcpy.Describe(edgePath).spatialReference
+    length = 0.0
+
+    if edgeSR.name == outCoordSys.name:
+      # No reason to project because the coordinate system is not changing.
+      with arcpy.da.SearchCursor(in_table=edgePath, field_names=["SHAPE@LENGTH"]) as cursor:
+        for row in cursor:
+          length += row[0] or 0.0
+    elif edgeSR.type == "Geographic" and outCoordSys.type == "Projected":
+      # Longitude/latitude edges are measured on the ellipsoid (in meters)
+      # rather than projected.
+      with arcpy.da.SearchCursor(in_table=edgePath, field_names=["SHAPE@WKB"]) as cursor:
+        for row in cursor:
+          if row[0] is not None:
+            length += LineLengthEngine.getGeodesicLength(LineLengthEngine.readWKB(row[0]),
+              edgeSR.semiMajorAxis, edgeSR.flattening)
+
+      length /= outCoordSys.metersPerUnit
+    else:
+      # The cursor projects the edges as they are read.
+      with arcpy.da.SearchCursor(in_table=edgePath, field_names=["SHAPE@WKB"],
+        spatial_reference=outCoordSys) as cursor:
+        for row in cursor:
+          if row[0] is not None:
+            length += LineLengthEngine.getPlanarLength(LineLengthEngine.readWKB(row[0]))
+
+    return length
+
+  ###
+  # Add random points to the network dataset and return the points table.
+  # @param networkDataset A network dataset which the points are on.
+  # @param outCoordSys The output coordinate system.  Expected to be projected.
+  # @param numPoints The number of points to add.
+  # @param numPointsFieldName The name of a field in the network dataset's edge
+  #        sources from which the number of points should be derived.
+  # @param iteration The permutation number (optional).  If given, it's part of
+  #        the table name, so the points of several permutations can exist at
+  #        once.
+  ###
+  def generateRandomPoints(self, networkDataset, outCoordSys, numPoints, numPointsFieldName, iteration=None):
+    ndDesc = arcpy.Describe(networkDataset)
+
+    # The number of points from a field isn't known ahead of time.
+    wsPath = self.getScratchWorkspace().choose(
+      ScratchWorkspace.estimatePointBytes(None if numPointsFieldName else numPoints))
+
+    randPtsBase     = "RANDOM_POINTS_{0}".format(ndDesc.baseName)
+    if iteration is not None:
+      randPtsBase   = "{0}_{1}".format(randPtsBase, iteration)
+    randPtsFullPath = self.tempNS.getPath(wsPath, randPtsBase)
+    randPtsFCName   = os.path.basename(randPtsFullPath)
+    self._importCAToolbox()
+
+    if numPointsFieldName:
+      arcpy.NetworkDatasetRandomPoints_crashAnalysis(network_dataset=networkDataset,
+        out_location=wsPath, output_point_feature_class=randPtsFCName, use_field=True,
+        num_points_field=numPointsFieldName)
+    else:
+      arcpy.NetworkDatasetRandomPoints_crashAnalysis(network_dataset=networkDataset,
+        out_location=wsPath, output_point_feature_class=randPtsFCName, use_field=False,
+        num_points=numPoints)
+
+    return randPtsFullPath
+
+  ###
+  # Generate the random points of many permutations at once, in one table with
+  # an Iteration_Number field (see getRandomPointLayer).  The edge sources are
+  # read once, rather than once per permutation by generateRandomPoints.  The
+  # points are placed like the Create Random Points tool places them: uniformly
+  # along the network, or a number of points on each edge from a field.
+  # @param networkDataset A network dataset which the points are on.
+  # @param numPoints The number of points in each permutation.
+  # @param numPointsFieldName The name of a field in the network dataset's edge
+  #        source from which the number of points should be derived.
+  # @param iterations An array of permutation numbers.
+  # @param seed A random seed (optional).  If given, permutation i is generated
+  #        with seed + i (or, with variance reduction, the batch with seed).
+  # @param samplingMethod One of RandomPointSampler.SAMPLING_METHODS.  With
+  #        Stratified or Quasi-random, the permutations are generated together
+  #        so that they cover the network evenly.
+  ###
+  def generateRandomPointBatch(self, networkDataset, numPoints, numPointsFieldName, iterations, seed=None,
+    samplingMethod="Random"):
+    ndDesc = arcpy.Describe(networkDataset)
+    wsPath = self.getScratchWorkspace().choose(
+      ScratchWorkspace.estimatePointBytes(None if numPointsFieldName else numPoints * len(iterations)))
+
+    batchFullPath = self.tempNS.getPath(wsPath, "RANDOM_POINTS_{0}_BATCH".format(ndDesc.baseName))
+    batchFCName   = os.path.basename(batchFullPath)
+
+    # A field can only be used with a single edge source.
+    if numPointsFieldName:
+      edgePaths  = [self.getEdgeSourcePath(networkDataset)]
+      fieldNames = ["SHAPE@", numPointsFieldName]
+    else:
+      edgePaths  = [os.path.join(ndDesc.path, edgeSource.name) for edgeSource in ndDesc.edgeSources]
+      fieldNames = ["SHAPE@"]
+
+    edges  = []
+    counts = []
+
+    for edgePath in edgePaths:
+      with arcpy.da.SearchCursor(edgePath, fieldNames) as cursor:
+        for row in cursor:
+          if row[0] is not None:
+            edges.append(row[0])
+
+            if numPointsFieldName:
+              counts.append(int(row[1] or 0))
+
+    sampler = RandomPointSampler([edge.length for edge in edges])
+
+    arcpy.CreateFeatureclass_management(out_path=wsPath, out_name=batchFCName,
+      geometry_type="POINT", spatial_reference=ndDesc.spatialReference)
+    arcpy.AddField_management(batchFullPath, "Iteration_Number", "LONG")
+
+    with arcpy.da.InsertCursor(batchFullPath, ["SHAPE@", "Iteration_Number"]) as cursor:
+      if samplingMethod == "Random":
+        for iteration in iterations:
+          if seed is not None:
+            sampler.seed(seed + iteration)
+
+          if numPointsFieldName:
+            points = sampler.sampleCounts(counts)
+          else:
+            points = sampler.sample(numPoints)
+
+          for edgeID, offset in points:
+            cursor.insertRow([edges[edgeID].positionAlongLine(offset), iteration])
+      else:
+        iterations = list(iterations)
+
+        if seed is not None:
+          sampler.seed(seed)
+
+        if numPointsFieldName:
+          points = sampler.sampleCountsBatch(counts, len(iterations), samplingMethod)
+        else:
+          points = sampler.sampleBatch(numPoints, len(iterations), samplingMethod)
+
+        for permNum, edgeID, offset in points:
+          cursor.insertRow([edges[edgeID].positionAlongLine(offset), iterations[permNum]])
+
+    # Each permutation's points are selected by iteration number.  (In-memory
+    # tables aren't indexed.)
+    if wsPath != ScratchWorkspace.MEMORY:
+      arcpy.AddIndex_management(batchFullPath, ["Iteration_Number"], "Iteration_Number_Idx")
+
+    return batchFullPath
+
+  ###
+  # Make a layer of one permutation's points from a batch (see
+  # generateRandomPointBatch).
+  # @param batchPoints The batch of random points.
+  # @param iteration The permutation number.
+  ###
+  def getRandomPointLayer(self, batchPoints, iteration):
+    layerName = self.tempNS.getName("RANDOM_POINTS_LAYER_{0}".format(iteration))
+    where     = "{0} = {1}".format(arcpy.AddFieldDelimiters(batchPoints, "Iteration_Number"), iteration)
+
+    arcpy.MakeFeatureLayer_management(batchPoints, layerName, where)
+    return layerName
+
+  ###
+  # Delete a temporary dataset or layer (see TempNamespace) and stop tracking
+  # it.
+  # @param name The name or full path of the dataset.
+  ###
+  def deleteTempDataset(self, name):
+    arcpy.Delete_management(name)
+    self.tempNS.release(name)
+
+  ###
+  # Delete the temporary datasets and layers that are left in the namespace,
+  # e.g. after a failure.  Returns the names that couldn't be deleted.
+  ###
+  def deleteTempDatasets(self):
+    return self.tempNS.cleanUp(arcpy.Exists, arcpy.Delete_management)
+
+  ###
+  # Calculate the number features in a feature class.
+  # @param fcPath The full path to a feature class.
+  ###
+  def countNumberOfFeatures(self, fcPath):
+    result = arcpy.GetCount_management(fcPath)
+    return int(result.getOutput(0))
+
+  ###
+  # Get the full path of a network datasource's edge source (the first source).
+  # @param networkDataset A network dataset.
+  ###
+  def getEdgeSourcePath(self, networkDataset):
+    ndDesc = arcpy.Describe(networkDataset)
+    return os.path.join(ndDesc.path, ndDesc.edgeSources[0].name)
+
+  ###
+  # Get the number of edge sources in a network dataset.
+  # @param networkDataset A network dataset.
+  ###
+  def getNumEdgeSources(self, networkDataset):
+    ndDesc      = arcpy.Describe(networkDataset)
+    edgeSources = ndDesc.edgeSources
+    return len(edgeSources)
+
+  ###
+  # Get an array of field names from a network dataset's first edge source.
+  # Only numeric fields are considered.
+  # @param networkDataset A network dataset.
+  ###
+  def getEdgeSourceFieldNames(self, networkDataset):
+    esFullPath  = self.getEdgeSourcePath(networkDataset)
+    esDesc      = arcpy.Describe(esFullPath)
+    fieldsNames = []
+
+    for field in esDesc.fields:
+      if field.type == "Integer" or field.type == "SmallInteger" or field.type == "Double" or field.type == "Single":
+        fieldsNames.append(field.name)
+
+    return fieldsNames
+
+  ###
+  # Get an array of field names from a point feature class that can be used to
+  # identify each point (e.g. CASEID).  Integer and text fields are considered.
+  # @param points A point feature class.
+  ###
+  def getPointIDFieldNames(self, points):
+    pointsDesc  = arcpy.Describe(points)
+    fieldsNames = []
+
+    for field in pointsDesc.fields:
+      if field.type == "Integer" or field.type == "SmallInteger" or field.type == "String":
+        fieldsNames.append(field.name)
+
+    return fieldsNames
+
+  ###
+  # Get an array of field names from a point feature class that can hold a
+  # date or a time of day (e.g. DATE_ and TIME_).  Date, integer, and text
+  # fields are considered.
+  # @param points A point feature class.
+  ###
+  def getTimeFieldNames(self, points):
+    pointsDesc  = arcpy.Describe(points)
+    fieldsNames = []
+
+    for field in pointsDesc.fields:
+      if field.type == "Date" or field.type == "Integer" or field.type == "SmallInteger" or field.type == "String":
+        fieldsNames.append(field.name)
+
+    return fieldsNames
+
+  ###
+  # Get the directory where the toolbox keeps caches that persist between runs.
+  # Set the CRASH_ANALYSIS_CACHE_DIR environment variable to override it.
+  ###
+  def getCacheDirectory(self):
+    cacheDir = os.environ.get("CRASH_ANALYSIS_CACHE_DIR")
+
+    if not cacheDir:
+      cacheDir = os.path.join(os.path.expanduser("~"), ".crash_analysis_toolbox")
+
+    return cacheDir
+
+  ###
+  # Get the scratch workspace chooser for intermediate datasets (see
+  # ScratchWorkspace).  Set the CRASH_ANALYSIS_SCRATCH environment variable to
+  # auto (the default), memory, disk (the scratch geodatabase), or workspace,
+  # and CRASH_ANALYSIS_SCRATCH_MEMORY_MB to the most that auto puts in memory.
+  ###
+  def getScratchWorkspace(self):
+    mode     = os.environ.get("CRASH_ANALYSIS_SCRATCH", "auto")
+    budgetMB = float(os.environ.get("CRASH_ANALYSIS_SCRATCH_MEMORY_MB", "256"))
+
+    return ScratchWorkspace(arcpy.env.scratchGDB, arcpy.env.workspace, mode, budgetMB * 1024 * 1024)
+
+  ###
+  # Get the cache of observed OD cost matrices (see ObservedODCMCache).  It's
+  # off unless the CRASH_ANALYSIS_OBSERVED_CACHE_MB environment variable is set
+  # to its disk budget (e.g. 512).
+  ###
+  def getObservedODCMCache(self):
+    budgetMB = float(os.environ.get("CRASH_ANALYSIS_OBSERVED_CACHE_MB", "0"))
+
+    return ObservedODCMCache(os.path.join(self.getCacheDirectory(), "observed_odcm"), int(budgetMB * 1024 * 1024))
+
+  ###
+  # Check if the stage profiler should trace memory (see StageProfiler).  Set
+  # the CRASH_ANALYSIS_TRACE_MEMORY environment variable to 1 to turn it on.
+  ###
+  def isMemoryTracingEnabled(self):
+    return os.environ.get("CRASH_ANALYSIS_TRACE_MEMORY", "0") == "1"
+
+  ###
+  # Check if the permutations should be pipelined (see PermutationPipeline).
+  # Set the CRASH_ANALYSIS_PIPELINE environment variable to 1 to turn it on.
+  ###
+  def isPipelineEnabled(self):
+    return os.environ.get("CRASH_ANALYSIS_PIPELINE", "0") == "1"
+
+  ###
+  # Check if the permutations should be solved on an in-memory graph of the
+  # network's edges when it gives the same distances as the network dataset
+  # (see RandomODCMPermutationsSvc._getLocalSolver).  Set the
+  # CRASH_ANALYSIS_LOCAL_SOLVER environment variable to 1 to turn it on.
+  ###
+  def isLocalSolverEnabled(self):
+    return os.environ.get("CRASH_ANALYSIS_LOCAL_SOLVER", "0") == "1"
+
+  ###
+  # Get the number of landmarks that the local solver's searches are pruned
+  # with (see LandmarkBounds).  Set the CRASH_ANALYSIS_LANDMARKS environment
+  # variable to change it, or to 0 to turn pruning off.
+  ###
+  def getNumberOfLandmarks(self):
+    return int(os.environ.get("CRASH_ANALYSIS_LANDMARKS", "16"))
+
+  ###
+  # Check if the random points of all the permutations should be generated at
+  # once (see generateRandomPointBatch).  Set the CRASH_ANALYSIS_BATCH_POINTS
+  # environment variable to 1 to turn it on.
+  ###
+  def isRandomPointBatchEnabled(self):
+    return os.environ.get("CRASH_ANALYSIS_BATCH_POINTS", "0") == "1"
+
+  ###
+  # Get the spool directory of the permutation work queue (see
+  # PermutationWorkQueue), or None if the permutations are computed in this
+  # process.  Set the CRASH_ANALYSIS_WORK_QUEUE environment variable to a
+  # directory that the workers (see permutation_worker.py) can reach.
+  ###
+  def getWorkQueueDirectory(self):
+    return os.environ.get("CRASH_ANALYSIS_WORK_QUEUE") or None
+
+  # Forget the fingerprints, e.g. in a worker that outlives a run.
+  def clearNetworkFingerprints(self):
+    self._fingerprints = {}
+
+  ###
+  # Check if network fingerprints should hash the edges' geometry (see
+  # getNetworkFingerprint).  This reads every edge on every run, so it's off
+  # unless the CRASH_ANALYSIS_GEOMETRY_CHECKSUM environment variable is 1.
+  ###
+  def isGeometryChecksumEnabled(self):
+    return os.environ.get("CRASH_ANALYSIS_GEOMETRY_CHECKSUM", "0") == "1"
+
+  ###
+  # Get the modification stamp of a dataset, without reading it.  A shapefile,
+  # or a dataset stored in its own directory, has its own files, so their
+  # sizes and modification times are used.  Otherwise (e.g. a feature class in
+  # a file geodatabase, where the files of all the datasets are in one
+  # directory) the newest modification time in the workspace is used, so
+  # writing other datasets to the workspace changes the stamp too.
+  # @param path The full path to a dataset.
+  ###
+  def _getModificationStamp(self, path):
+    shpFiles = [path + extension for extension in (".shp", ".shx", ".dbf")]
+
+    if os.path.isfile(shpFiles[0]):
+      return [(os.path.getsize(filePath), os.path.getmtime(filePath))
+        for filePath in shpFiles if os.path.isfile(filePath)]
+
+    if os.path.isdir(path):
+      return [(name, os.path.getsize(os.path.join(path, name)), os.path.getmtime(os.path.join(path, name)))
+        for name in sorted(os.listdir(path)) if os.path.isfile(os.path.join(path, name))]
+
+    # The dataset is in a workspace (and maybe a feature dataset).
+    workspace = os.path.dirname(path)
+    while workspace != os.path.dirname(workspace) and not os.path.isdir(workspace):
+      workspace = os.path.dirname(workspace)
+
+    if not os.path.isdir(workspace):
+      return None
+
+    return max([os.path.getmtime(os.path.join(workspace, name)) for name in os.listdir(workspace)] or [None])
+
+  ###
+  # Get a checksum of a feature class's geometry: its ObjectIDs and shapes
+  # are read and hashed (see isGeometryChecksumEnabled).
+  # @param fcPath The full path to a feature class.
+  ###
+  def _getGeometryChecksum(self, fcPath):
+    hasher = hashlib.sha1()
+
+    with arcpy.da.SearchCursor(in_table=fcPath, field_names=["OID@", "SHAPE@WKB"]) as cursor:
+      for row in cursor:
+        hasher.update(str(row[0]).encode("utf-8"))
+        if row[1] is not None:
+          hasher.update(bytes(row[1]))
+
+    return hasher.hexdigest()
+
+  ###
+  # Get a checksum of the values of a field of a network dataset's edge source
+  # (e.g. the weighting field of the random points, see
+  # generateRandomPointBatch), from each edge's ObjectID and value.  Unlike
+  # the network fingerprint, this reads the edges.
+  # @param networkDataset A network dataset.
+  # @param fieldName The name of a field of the (first) edge source.
+  ###
+  def getFieldChecksum(self, networkDataset, fieldName):
+    hasher = hashlib.sha1()
+
+    with arcpy.da.SearchCursor(self.getEdgeSourcePath(networkDataset), ["OID@", fieldName]) as cursor:
+      for row in cursor:
+        hasher.update(repr(tuple(row)).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+  ###
+  # Get the settings of a network dataset that its distances depend on, as
+  # described by Describe: its attributes (e.g. the cost and restrictions),
+  # the connectivity and elevation fields of its sources, its elevation model,
+  # and its turns.  Properties that Describe doesn't have are left out.
+  # @param ndDesc The Describe object of a network dataset.
+  ###
+  def _getNetworkSettings(self, ndDesc):
+    def getProperties(item, names):
+      return [(name, str(getattr(item, name))) for name in names if hasattr(item, name)]
+
+    settings = getProperties(ndDesc, ["elevationModel", "supportsTurns", "networkType"])
+
+    for attribute in getattr(ndDesc, "attributes", []):
+      settings.append(getProperties(attribute, ["name", "usageType", "dataType", "units", "useByDefault"]))
+
+    for source in list(ndDesc.edgeSources) + list(getattr(ndDesc, "junctionSources", [])) + \
+      list(getattr(ndDesc, "turnSources", [])):
+      settings.append(getProperties(source, ["name", "sourceType", "connectivityPolicies",
+        "connectivityGroupNames", "fromElevationFieldName", "toElevationFieldName", "elevationFieldName"]))
+
+    return settings
+
+  ###
+  # Get a fingerprint of a network dataset that changes when it or its edge
+  # sources change.  It's made from the path, settings (see
+  # _getNetworkSettings), and modification stamp (see _getModificationStamp)
+  # of the network dataset, and the path, feature count, extent, and
+  # modification stamp of each edge source, none of which read the edges.  A
+  # network dataset that's rebuilt with other settings has another
+  # fingerprint.  Optionally, a geometry checksum of each edge source is
+  # added (see isGeometryChecksumEnabled).  Fingerprints are kept for the life
+  # of the helper (e.g. one tool run).
+  # @param networkDataset A network dataset.
+  ###
+  def getNetworkFingerprint(self, networkDataset):
+    ndDesc = arcpy.Describe(networkDataset)
+
+    if ndDesc.catalogPath in self._fingerprints:
+      return self._fingerprints[ndDesc.catalogPath]
+
+    parts = [ndDesc.catalogPath, self._getNetworkSettings(ndDesc), self._getModificationStamp(ndDesc.catalogPath)]
+
+    for edgeSource in ndDesc.edgeSources:
+      edgePath = os.path.join(ndDesc.path, edgeSource.name)
+      extent   = arcpy.Describe(edgePath).extent
+
+      parts.append(edgePath)
+      parts.append(self.countNumberOfFeatures(edgePath))
+      parts.append((extent.XMin, extent.YMin, extent.XMax, extent.YMax))
+      parts.append(self._getModificationStamp(edgePath))
+
+      if self.isGeometryChecksumEnabled() and not os.path.isfile(edgePath + ".shp"):
+        parts.append(self._getGeometryChecksum(edgePath))
+
+    self._fingerprints[ndDesc.catalogPath] = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return self._fingerprints[ndDesc.catalogPath]
@@ -1,29 +1,138 @@
-import time
-
-###
-# Basic timer for reporting ETA.
-###
-class KFunctionTimer(object):
-  ###
-  # Initialize the timer.
-  # @param numIterations The total number of iterations (for eta calculation).
-  ###
-  def __init__(self, numPerms):
-    self.numPerms  = numPerms
-    self.startTime = time.time()
-    self.iteration = 0
-
-  # Get the elapsed time as a formatted string hh:mm:ss.
-  def getElapsedTime(self):
-    timeDelta = time.time() - self.startTime
-    return time.strftime("%H:%M:%S", time.gmtime(timeDelta))
-
-  # Get the estimated time remaining.
-  def getETA(self):
-    timeDelta = time.time() - self.startTime
-    eta       = timeDelta / self.iteration * (self.numPerms - self.iteration)
-    return time.strftime("%H:%M:%S", time.gmtime(eta))
-
-  # Increment the current iteration.
-  def increment(self):
-    self.iteration += 1
\ No newline at end of file
+import threading
+import timeit
+
+###
+# Progress and ETA for the random permutations.
+#
+# The time per permutation is an exponentially weighted moving average of
+# the time between completed permutations, so the estimate follows changes in
+# speed (e.g. a warm cache) and isn't skewed by setup work done before
+# start().  Because it's the time between completions, it's also right when
+# several workers complete permutations concurrently.  The timer is thread
+# safe.
+###
+class KFunctionTimer(object):
+  ###
+  # Initialize the timer.
+  # @param numPerms The total number of permutations (for the ETA).
+  # @param smoothing The weight of the newest permutation time in the moving
+  #        average, from 0 to 1.
+  # @param reportInterval The minimum number of seconds between progress
+  #        reports (see shouldReport).
+  # @param clock A function that returns the time in seconds (optional, for
+  #        testing).
+  ###
+  def __init__(self, numPerms, smoothing=0.3, reportInterval=5.0, clock=None):
+    self.numPerms        = numPerms
+    self.iteration       = 0
+    self._smoothing      = smoothing
+    self._reportInterval = reportInterval
+    self._clock          = clock or timeit.default_timer
+    self._lock           = threading.Lock()
+    self._numPairs       = 0
+    self._iterTime       = None
+    self._lastReport     = None
+    self.start()
+
+  ###
+  # Start (or restart) timing.  Call this after any setup so that the setup
+  # isn't counted as permutation time.
+  ###
+  def start(self):
+    with self._lock:
+      self.startTime   = self._clock()
+      self._lastTime   = self.startTime
+      self._lastReport = None
+
+  ###
+  # Count a completed permutation.
+  # @param numPairs The number of OD pairs in the permutation (optional, for
+  #        the throughput).
+  ###
+  def increment(self, numPairs=0):
+    with self._lock:
+      now            = self._clock()
+      duration       = now - self._lastTime
+      self._lastTime = now
+
+      self.iteration += 1
+      self._numPairs += numPairs
+
+      if self._iterTime is None:
+        self._iterTime = duration
+      else:
+        self._iterTime = self._smoothing * duration + (1 - self._smoothing) * self._iterTime
+
+  # Get the elapsed time since start() in seconds.
+  def getElapsedSeconds(self):
+    return self._clock() - self.startTime
+
+  # Get the elapsed time as a formatted string hh:mm:ss.
+  def getElapsedTime(self):
+    return self.formatTime(self.getElapsedSeconds())
+
+  # Get the smoothed time per permutation in seconds, or None before the
+  # first permutation is complete.
+  def getIterationTime(self):
+    with self._lock:
+      return self._iterTime
+
+  # Get the estimated time remaining in seconds, or None before the first
+  # permutation is complete.
+  def getETASeconds(self):
+    with self._lock:
+      if self._iterTime is None:
+        return None
+      return self._iterTime * max(self.numPerms - self.iteration, 0)
+
+  # Get the estimated time remaining as a formatted string hh:mm:ss.
+  def getETA(self):
+    return self.formatTime(self.getETASeconds())
+
+  # Get the number of OD pairs solved per second since start().
+  def getPairsPerSecond(self):
+    elapsed = self.getElapsedSeconds()
+    return self._numPairs / elapsed if elapsed > 0 else 0.0
+
+  # Get the number of permutations completed per minute since start().
+  def getPermutationsPerMinute(self):
+    elapsed = self.getElapsedSeconds()
+    return self.iteration * 60.0 / elapsed if elapsed > 0 else 0.0
+
+  ###
+  # Check if progress should be reported, so that the geoprocessing window
+  # isn't flooded with messages.  True for the first and last permutations,
+  # and at most once per report interval in between.  A True result counts as
+  # a report.
+  ###
+  def shouldReport(self):
+    with self._lock:
+      now = self._clock()
+
+      if self._lastReport is None or self.iteration >= self.numPerms or \
+        now - self._lastReport >= self._reportInterval:
+        self._lastReport = now
+        return True
+
+      return False
+
+  ###
+  # Get a progress message.
+  # @param iteration The number of the permutation that completed.
+  ###
+  def getProgressMessage(self, iteration):
+    return "Iteration {0} complete.  Elapsed time: {1}s.  ETA: {2}s.  ({3:.1f} permutations/minute, {4:.0f} pairs/second)".format(
+      iteration, self.getElapsedTime(), self.getETA(), self.getPermutationsPerMinute(), self.getPairsPerSecond())
+
+  ###
+  # Format a number of seconds as hh:mm:ss (hours can exceed 24), or
+  # --:--:-- if unknown.
+  # @param seconds The number of seconds, or None.
+  ###
+  @staticmethod
+  def formatTime(seconds):
+    if seconds is None:
+      return "--:--:--"
+
+    seconds = int(round(seconds))
+    return "{0:02d}:{1:02d}:{2:02d}".format(seconds // 3600, seconds % 3600 // 60, seconds % 60)
@@ -0,0 +1,92 @@
+import threading
+import unittest
+
+from k_function_timer import KFunctionTimer
+
+# A clock that only moves when told to.
+class Clock(object):
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self):
+    return self.now
+
+class KFunctionTimerSuite(unittest.TestCase):
+  # Setup before start() isn't counted.
+  def test_start(self):
+    clock = Clock()
+    timer = KFunctionTimer(10, clock=clock)
+
+    clock.now += 500
+    timer.start()
+    clock.now += 10
+    timer.increment()
+
+    self.assertEqual(timer.getElapsedTime(), "00:00:10")
+    self.assertEqual(timer.getIterationTime(), 10)
+    self.assertEqual(timer.getETASeconds(), 90)
+
+  # There is no ETA before the first permutation.
+  def test_no_iterations(self):
+    timer = KFunctionTimer(10, clock=Clock())
+
+    self.assertEqual(timer.getETASeconds(), None)
+    self.assertEqual(timer.getETA(), "--:--:--")
+    self.assertEqual(timer.getPairsPerSecond(), 0.0)
+    self.assertEqual(timer.getPermutationsPerMinute(), 0.0)
+
+  # The permutation time is a moving average that follows changes in speed.
+  def test_moving_average(self):
+    clock = Clock()
+    timer = KFunctionTimer(100, 0.5, clock=clock)
+
+    for duration in (10, 10, 2, 2, 2, 2):
+      clock.now += duration
+      timer.increment(1000)
+
+    self.assertAlmostEqual(timer.getIterationTime(), 2.5)
+    self.assertAlmostEqual(timer.getETASeconds(), 2.5 * 94)
+    self.assertAlmostEqual(timer.getPairsPerSecond(), 6000 / 28.0)
+    self.assertAlmostEqual(timer.getPermutationsPerMinute(), 6 * 60 / 28.0)
+
+  # Reports are throttled, except for the first and last permutations.
+  def test_should_report(self):
+    clock   = Clock()
+    timer   = KFunctionTimer(10, reportInterval=5, clock=clock)
+    reports = []
+
+    for i in range(1, 11):
+      clock.now += 2
+      timer.increment()
+      if timer.shouldReport():
+        reports.append(i)
+
+    self.assertEqual(reports, [1, 4, 7, 10])
+
+  # Times are formatted as hh:mm:ss, including over a day.
+  def test_format_time(self):
+    self.assertEqual(KFunctionTimer.formatTime(0),          "00:00:00")
+    self.assertEqual(KFunctionTimer.formatTime(3661.4),     "01:01:01")
+    self.assertEqual(KFunctionTimer.formatTime(90000),      "25:00:00")
+    self.assertEqual(KFunctionTimer.formatTime(None),       "--:--:--")
+
+  # Workers can count permutations concurrently.
+  def test_threads(self):
+    timer = KFunctionTimer(400)
+
+    def work():
+      for i in range(0, 100):
+        timer.increment(3)
+
+    workers = [threading.Thread(target=work) for i in range(0, 4)]
+    for worker in workers:
+      worker.start()
+    for worker in workers:
+      worker.join()
+
+    self.assertEqual(timer.iteration, 400)
+    self.assertEqual(timer.getETASeconds(), 0)
+    self.assertTrue("Iteration 400 complete." in timer.getProgressMessage(400))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,152 @@
+from array import array
+from bounded_shortest_path import BoundedShortestPath
+
+###
+# Landmark (ALT) lower bounds on network distance.
+#
+# The distance from a few landmark nodes to every node is computed once.  By the
+# triangle inequality, for any landmark L the network distance between a and b
+# is at least |d(L, a) - d(L, b)|, so the largest of these over all landmarks is
+# a lower bound.  Unlike the straight-line bound, this one "knows" about rivers
+# and freeways: two points on either side of a river with a single crossing
+# far away get a large bound from a landmark on either bank.
+#
+# Landmarks are picked by farthest-point selection, which spreads them around
+# the edges of the network where the bounds are tightest.
+###
+class LandmarkBounds(object):
+  ###
+  # Select the landmarks and compute their distances.
+  # @param graph A NetworkGraph.
+  # @param numLandmarks The number of landmarks (a few dozen is typical).
+  # @param kernel A BoundedShortestPath over the graph (optional).
+  ###
+  def __init__(self, graph, numLandmarks, kernel=None):
+    if kernel is None:
+      kernel = BoundedShortestPath(graph.getAdjacency())
+
+    self._graph     = graph
+    self._kernel    = kernel
+    self._landmarks = []
+    self._dists     = []
+
+    numNodes = graph.getNumberOfNodes()
+    if numNodes == 0:
+      return
+
+    # Start from the node that is farthest from node 0, then repeatedly add the
+    # node that is farthest from all of the landmarks so far.  Nodes that are
+    # unreachable from every landmark (other components) are picked first.
+    minDists = self._getDistances(0)
+    numLandmarks = min(numLandmarks, numNodes)
+
+    while len(self._landmarks) < numLandmarks:
+      landmark = max(range(0, numNodes), key=lambda node: minDists[node])
+
+      if landmark in self._landmarks:
+        break
+
+      dists = self._getDistances(landmark)
+      self._landmarks.append(landmark)
+      self._dists.append(dists)
+
+      for node in range(0, numNodes):
+        if dists[node] < minDists[node] or len(self._landmarks) == 1:
+          minDists[node] = dists[node]
+
+  # Get the distance from a node to every node (infinity if unreachable).
+  def _getDistances(self, node):
+    dists = array("d", [float("inf")]) * self._graph.getNumberOfNodes()
+
+    for reached, dist in self._kernel.search([(node, 0)]).items():
+      dists[reached] = dist
+
+    return dists
+
+  # Get the landmark nodes.
+  def getLandmarks(self):
+    return self._landmarks
+
+  ###
+  # Get the distance from each landmark to a location.
+  # @param location An (edgeID, offset) tuple.
+  ###
+  def getLocationVector(self, location):
+    (fromNode, fromDist), (toNode, toDist) = self._graph.getLocationSeeds(location)
+    return tuple(min(dists[fromNode] + fromDist, dists[toNode] + toDist) for dists in self._dists)
+
+  ###
+  # Get a lower bound on the network distance between two locations.
+  # @param vectorA The landmark vector of the first location (see
+  #        getLocationVector).
+  # @param vectorB The landmark vector of the second location.
+  ###
+  def getLowerBound(self, vectorA, vectorB):
+    bound = 0.0
+
+    for distA, distB in zip(vectorA, vectorB):
+      # If both are unreachable from the landmark the difference is NaN, which
+      # gives no information and is skipped by the comparison.  If only one is,
+      # the locations are in different components and the bound is infinite.
+      diff = abs(distA - distB)
+      if diff > bound:
+        bound = diff
+
+    return bound
+
+  ###
+  # Get the range of landmark distances spanned by a set of target locations,
+  # for use with getFrontierBound.
+  # @param vectors The landmark vectors of the targets.
+  ###
+  def getTargetRanges(self, vectors):
+    return [(min(column), max(column)) for column in zip(*vectors)]
+
+  ###
+  # Pick the landmarks that give the largest bounds from a location to a set
+  # of targets.  Checking a few active landmarks per search keeps the cost of
+  # getFrontierBound down.
+  # @param vector The landmark vector of the location.
+  # @param ranges The target ranges from getTargetRanges.
+  # @param numActive The number of landmarks to pick.
+  ###
+  def getActiveLandmarks(self, vector, ranges, numActive):
+    gaps = []
+
+    for lmNum in range(0, len(ranges)):
+      low, high = ranges[lmNum]
+      dist      = vector[lmNum]
+      gaps.append((max(low - dist, dist - high, 0), lmNum))
+
+    # Unreachable landmarks give NaN gaps; sort those last.
+    gaps.sort(key=lambda gap: -gap[0] if gap[0] == gap[0] else 0)
+    return [lmNum for gap, lmNum in gaps[:numActive]]
+
+  ###
+  # Get a lower bound on the network distance from a node to the closest of a
+  # set of targets.
+  # @param node A node.
+  # @param ranges The target ranges from getTargetRanges.
+  # @param active The landmarks to use (optional).  Defaults to all of them.
+  ###
+  def getFrontierBound(self, node, ranges, active=None):
+    bound = 0.0
+
+    if active is None:
+      active = range(0, len(self._dists))
+
+    for lmNum in active:
+      dist      = self._dists[lmNum][node]
+      low, high = ranges[lmNum]
+
+      if dist < low:
+        gap = low - dist
+      elif dist > high:
+        gap = dist - high
+      else:
+        continue
+
+      if gap > bound:
+        bound = gap
+
+    return bound
@@ -0,0 +1,67 @@
+import unittest
+
+from random import Random
+from network_graph import NetworkGraph
+from landmark_bounds import LandmarkBounds
+from local_odcm_solver import LocalODCMSolver
+
+class LandmarkBoundsSuite(unittest.TestCase):
+  # Two 10 x 10 grids with 100 m blocks on either bank of a 50 m river.  The
+  # only bridge is at the far east end.
+  def getRiverGraph(self):
+    lines = []
+    for bank in (0, 1050):
+      for i in range(0, 10):
+        for j in range(0, 9):
+          lines.append([(j * 100, bank + i * 100), ((j + 1) * 100, bank + i * 100)])
+          lines.append([(i * 100, bank + j * 100), (i * 100, bank + (j + 1) * 100)])
+    lines.append([(900, 900), (900, 1050)])
+    return NetworkGraph.fromLines(lines)
+
+  # Get random points on the network.
+  def getPoints(self, graph, num, seed):
+    rand = Random(seed)
+    return [(i, graph.snapPoint(rand.uniform(0, 900), rand.choice([rand.uniform(0, 900), rand.uniform(1050, 1950)]), 1000))
+      for i in range(0, num)]
+
+  # The bounds never exceed the true distance, and are tight across the river.
+  def test_lower_bound(self):
+    graph  = self.getRiverGraph()
+    lmb    = LandmarkBounds(graph, 8)
+    points = self.getPoints(graph, 40, 1)
+    dists  = LocalODCMSolver(graph).solve(points, points, excludeSelf=True)
+    locs   = dict(points)
+
+    self.assertEqual(len(lmb.getLandmarks()), 8)
+    self.assertEqual(len(set(lmb.getLandmarks())), 8)
+
+    for odDist in dists:
+      bound = lmb.getLowerBound(lmb.getLocationVector(locs[odDist["OriginID"]]),
+        lmb.getLocationVector(locs[odDist["DestinationID"]]))
+      self.assertTrue(bound <= odDist["Total_Length"] + 1e-9)
+
+    # Straight across the river at the west end is 150 m as the crow flies,
+    # but 2 * 900 + 150 on the network.
+    south = lmb.getLocationVector(graph.snapPoint(0, 900, 1))
+    north = lmb.getLocationVector(graph.snapPoint(0, 1050, 1))
+    self.assertTrue(lmb.getLowerBound(south, north) > 1000)
+
+  # Pruned solves give the same distances as unpruned solves.
+  def test_pruned_solve(self):
+    graph   = self.getRiverGraph()
+    points  = self.getPoints(graph, 60, 2)
+    plain   = LocalODCMSolver(graph)
+    pruned  = LocalODCMSolver(graph, landmarks=LandmarkBounds(graph, 12))
+
+    for cutoff in (150, 400, 1200):
+      self.assertEqual(pruned.solve(points, points, cutoff, True), plain.solve(points, points, cutoff, True))
+      self.assertEqual(pruned.solve(points[:5], points, cutoff), plain.solve(points[:5], points, cutoff))
+
+  # Disconnected components are infinitely far apart.
+  def test_components(self):
+    graph = NetworkGraph.fromLines([[(0, 0), (10, 0)], [(100, 0), (110, 0)]])
+    lmb   = LandmarkBounds(graph, 4)
+    pts   = [(1, (0, 5)), (2, (1, 5))]
+
+    self.assertEqual(lmb.getLowerBound(lmb.getLocationVector((0, 5)), lmb.getLocationVector((1, 5))), float("inf"))
+    self.assertEqual(LocalODCMSolver(graph, landmarks=lmb).solve(pts, pts, 1000, True), [])
@@ -0,0 +1,132 @@
+import math
+import struct
+
+###
+# Measures the total length of lines from their vertex coordinates.
+#
+# Lines are read in bulk as well-known binary (WKB, e.g. the SHAPE@WKB cursor
+# token) and unpacked with struct, without creating a geometry object per
+# vertex.  Planar lengths are the sum of the segment lengths.  Geodesic lengths
+# (for longitude/latitude coordinates) are measured on the ellipsoid, so lines
+# in a geographic coordinate system don't need to be projected first.
+###
+class LineLengthEngine(object):
+  # WKB geometry types.
+  WKB_LINESTRING      = 2
+  WKB_MULTILINESTRING = 5
+
+  ###
+  # Unpack the parts of a WKB LineString or MultiLineString.  Returns an array
+  # of parts, each a flat array of coordinates x1, y1, x2, y2, ...  Z and M
+  # values are dropped.
+  # @param wkb The WKB (bytes, bytearray, or buffer).
+  ###
+  @staticmethod
+  def readWKB(wkb):
+    parts = []
+    LineLengthEngine._readGeometry(bytes(wkb), 0, parts)
+    return parts
+
+  ###
+  # Read one WKB geometry into parts.  Returns the offset after the geometry.
+  # @param wkb The WKB bytes.
+  # @param offset The offset of the geometry.
+  # @param parts An array that the parts are added to.
+  ###
+  @staticmethod
+  def _readGeometry(wkb, offset, parts):
+    order    = "<" if bytearray(wkb[offset:offset + 1])[0] == 1 else ">"
+    wkbType, = struct.unpack_from(order + "I", wkb, offset + 1)
+    offset  += 5
+
+    # Both ISO (1000s) and extended (high bit flags) WKB mark Z and M values.
+    numDims  = 2
+    if wkbType & 0x80000000:
+      numDims += 1
+    if wkbType & 0x40000000:
+      numDims += 1
+
+    wkbType  = wkbType & 0xFFFF
+    numDims += {0: 0, 1: 1, 2: 1, 3: 2}.get(wkbType // 1000, 0)
+    wkbType  = wkbType % 1000
+
+    if wkbType == LineLengthEngine.WKB_LINESTRING:
+      numPoints, = struct.unpack_from(order + "I", wkb, offset)
+      offset    += 4
+      coords     = struct.unpack_from("{0}{1}d".format(order, numPoints * numDims), wkb, offset)
+      offset    += 8 * numPoints * numDims
+
+      if numDims == 2:
+        parts.append(coords)
+      else:
+        parts.append([coord for i in range(0, len(coords), numDims) for coord in coords[i:i + 2]])
+    elif wkbType == LineLengthEngine.WKB_MULTILINESTRING:
+      numLines, = struct.unpack_from(order + "I", wkb, offset)
+      offset   += 4
+
+      for i in range(0, numLines):
+        offset = LineLengthEngine._readGeometry(wkb, offset, parts)
+    else:
+      raise ValueError("Unsupported WKB geometry type: {0}".format(wkbType))
+
+    return offset
+
+  ###
+  # Get the planar length of some parts.
+  # @param parts An array of parts (see readWKB).
+  ###
+  @staticmethod
+  def getPlanarLength(parts):
+    length = 0.0
+
+    for coords in parts:
+      xs = coords[0::2]
+      ys = coords[1::2]
+
+      for x1, y1, x2, y2 in zip(xs, ys, xs[1:], ys[1:]):
+        length += math.hypot(x2 - x1, y2 - y1)
+
+    return length
+
+  ###
+  # Get the geodesic length of some parts in longitude/latitude degrees, in
+  # the units of the semi-major axis.  Each segment is measured with the
+  # meridional and prime vertical radii of curvature at its mid-latitude, which
+  # is accurate to well under a millimeter for segments as short as network
+  # edges (a few kilometers).
+  # @param parts An array of parts (see readWKB).
+  # @param semiMajorAxis The ellipsoid's semi-major axis (e.g. 6378137 meters
+  #        for WGS 84).
+  # @param flattening The ellipsoid's flattening (e.g. 1 / 298.257223563).
+  ###
+  @staticmethod
+  def getGeodesicLength(parts, semiMajorAxis, flattening):
+    eccSq  = flattening * (2 - flattening)
+    toRad  = math.pi / 180.0
+    length = 0.0
+
+    for coords in parts:
+      lons = coords[0::2]
+      lats = coords[1::2]
+
+      for lon1, lat1, lon2, lat2 in zip(lons, lats, lons[1:], lats[1:]):
+        midLat   = (lat1 + lat2) * 0.5 * toRad
+        sinSq    = math.sin(midLat) ** 2
+        denom    = 1 - eccSq * sinSq
+        primeRad = semiMajorAxis / math.sqrt(denom)
+        merRad   = semiMajorAxis * (1 - eccSq) / (denom * math.sqrt(denom))
+        dx       = primeRad * math.cos(midLat) * (lon2 - lon1) * toRad
+        dy       = merRad * (lat2 - lat1) * toRad
+        length  += math.hypot(dx, dy)
+
+    return length
+
+  ###
+  # Measure several sources, one after the other on the calling thread (arcpy
+  # cursors aren't safe on other threads).  Returns the lengths in the order
+  # of the sources.
+  # @param sources An array of sources (e.g. edge source paths).
+  # @param measure A function(source) that returns the source's length.
+  ###
+  def measureSources(self, sources, measure):
+    return [measure(source) for source in sources]
@@ -0,0 +1,89 @@
+import math
+import struct
+import threading
+import unittest
+
+from line_length_engine import LineLengthEngine
+
+# WGS 84.
+SEMI_MAJOR = 6378137.0
+FLATTENING = 1 / 298.257223563
+
+# Pack a MultiLineString as WKB.
+def toWKB(parts, byteOrder="<", numDims=2):
+  order = 1 if byteOrder == "<" else 0
+  wkb   = struct.pack(byteOrder + "BII", order, 5, len(parts))
+
+  for part in parts:
+    coords = []
+    for x, y in part:
+      coords.extend([x, y] + [0.0] * (numDims - 2))
+
+    wkbType = 2 if numDims == 2 else 3002
+    wkb    += struct.pack(byteOrder + "BII", order, wkbType, len(part))
+    wkb    += struct.pack("{0}{1}d".format(byteOrder, len(coords)), *coords)
+
+  return bytearray(wkb)
+
+class LineLengthEngineSuite(unittest.TestCase):
+  # WKB lines are unpacked into flat coordinate arrays, in either byte order
+  # and with or without Z and M values.
+  def test_read_wkb(self):
+    parts = [[(0, 0), (3, 4)], [(10, 10), (10, 12), (11, 12)]]
+
+    for byteOrder in ("<", ">"):
+      for numDims in (2, 4):
+        self.assertEqual([list(coords) for coords in LineLengthEngine.readWKB(toWKB(parts, byteOrder, numDims))],
+          [[0, 0, 3, 4], [10, 10, 10, 12, 11, 12]])
+
+    single = bytearray(struct.pack("<BII4d", 1, 2, 2, 0, 0, 1, 1))
+    self.assertEqual([list(coords) for coords in LineLengthEngine.readWKB(single)], [[0, 0, 1, 1]])
+
+    with self.assertRaises(ValueError):
+      LineLengthEngine.readWKB(bytearray(struct.pack("<BIdd", 1, 1, 0, 0)))
+
+  # Planar lengths sum the segments of each part (parts aren't joined).
+  def test_planar(self):
+    parts = LineLengthEngine.readWKB(toWKB([[(0, 0), (3, 4)], [(10, 10), (10, 12), (11, 12)]]))
+    self.assertAlmostEqual(LineLengthEngine.getPlanarLength(parts), 8.0)
+    self.assertEqual(LineLengthEngine.getPlanarLength([]), 0.0)
+
+  # Geodesic lengths match known distances on the WGS 84 ellipsoid.
+  def test_geodesic(self):
+    # A minute of arc along the equator, and along a meridian at 45 degrees.
+    equator  = [[0, 0, 1 / 60.0, 0]]
+    meridian = [[0, 44.9916666667, 0, 45.0083333333]]
+
+    self.assertAlmostEqual(LineLengthEngine.getGeodesicLength(equator, SEMI_MAJOR, FLATTENING), 1855.325, 2)
+    self.assertAlmostEqual(LineLengthEngine.getGeodesicLength(meridian, SEMI_MAJOR, FLATTENING), 1852.196, 2)
+
+    # A longer line made of short segments matches the length of a degree of
+    # longitude at 60 degrees (55800.0 m).
+    parallel = [[coord for i in range(0, 101) for coord in (i / 100.0, 60.0)]]
+    self.assertTrue(abs(LineLengthEngine.getGeodesicLength(parallel, SEMI_MAJOR, FLATTENING) - 55800.0) < 1.0)
+
+  # Sources are measured on the calling thread, and the lengths keep their
+  # order.
+  def test_measure_sources(self):
+    threads = set()
+
+    def measure(source):
+      threads.add(threading.current_thread().ident)
+      return float(source * 2)
+
+    self.assertEqual(LineLengthEngine().measureSources(range(0, 10), measure), [float(i * 2) for i in range(0, 10)])
+    self.assertEqual(threads, set([threading.current_thread().ident]))
+    self.assertEqual(LineLengthEngine().measureSources([], measure), [])
+
+  # An error in any source is raised.
+  def test_measure_error(self):
+    def measure(source):
+      if source == 3:
+        raise ValueError("Bad edge source.")
+      return 1.0
+
+    with self.assertRaises(ValueError):
+      LineLengthEngine().measureSources(range(0, 6), measure)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,104 @@
+import bisect
+import math
+
+###
+# Local network K: for each origin point, the cumulative number of neighbors
+# within each distance band.
+#
+# The counts come from the same OD distances as NetworkKCalculation, grouped
+# by OriginID.  The distances are counted in one pass into a flat points x
+# bands array (the row of each origin is looked up once per distance), and the
+# rows are accumulated into cumulative counts in a second pass over the array.
+###
+class LocalKCalculation(object):
+  ###
+  # Initialize the calculator.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  # @param begDist The distance to begin calculating (the first distance band).
+  # @param distInc The amount to increment each distance band.
+  # @param numBands The number of distance bands (optional).
+  # @param pointIDs The IDs of all the points (optional).  Points without any
+  #        distances (e.g. beyond the cutoff) get a row of zeros.
+  # @param excludeSelf If True, the distance from a point to the destination
+  #        with the same ID is not counted.  False when the destinations are
+  #        other points (e.g. random points, see LocalKEnvelope).
+  ###
+  def __init__(self, odDists, begDist, distInc, numBands, pointIDs=None, excludeSelf=True):
+    self._begDist     = begDist
+    self._distInc     = distInc
+    self._numBands    = numBands
+    self._excludeSelf = excludeSelf
+
+    # If the user doesn't specify the number of distance bands then calculate it.
+    if self._numBands is None:
+      maxLen         = max([odDist["Total_Length"] for odDist in odDists] or [begDist])
+      self._numBands = int(math.ceil((maxLen - self._begDist) / self._distInc + 1))
+
+    # The band distances are accumulated the same way as NetworkKCalculation's
+    # so that the counts match exactly.
+    self._bandDists = []
+    curDist         = begDist
+    for bandNum in range(0, self._numBands):
+      self._bandDists.append(curDist)
+      curDist += distInc
+
+    # The row of each point, in order of ID.
+    if pointIDs is None:
+      pointIDs = set(odDist["OriginID"] for odDist in odDists)
+    self._pointIDs = sorted(pointIDs)
+    self._rows     = dict((pointID, rowNum) for rowNum, pointID in enumerate(self._pointIDs))
+    self._counts   = self._countDistanceBands(odDists)
+
+  # Count the neighbors of each origin in each band (cumulative), in a flat
+  # array of rows.
+  def _countDistanceBands(self, odDists):
+    numBands = self._numBands
+    counts   = [0] * (len(self._pointIDs) * numBands)
+
+    if numBands == 0:
+      return counts
+
+    lastDist  = self._bandDists[-1]
+    bandDists = self._bandDists
+    rows      = self._rows
+
+    for odDist in odDists:
+      length = odDist["Total_Length"]
+      row    = rows.get(odDist["OriginID"])
+
+      if length <= lastDist and row is not None and \
+        not (self._excludeSelf and odDist["OriginID"] == odDist["DestinationID"]):
+        counts[row * numBands + bisect.bisect_left(bandDists, length)] += 1
+
+    for countNum in range(0, len(counts)):
+      if countNum % numBands != 0:
+        counts[countNum] += counts[countNum - 1]
+
+    return counts
+
+  # Get the number of distance bands.
+  def getNumberOfDistanceBands(self):
+    return self._numBands
+
+  # Get the distance of each band.
+  def getBandDistances(self):
+    return list(self._bandDists)
+
+  # Get the point IDs, in order.
+  def getPointIDs(self):
+    return list(self._pointIDs)
+
+  ###
+  # Get the cumulative neighbor counts of a point, one per band.
+  # @param pointID The point's ID.
+  ###
+  def getCounts(self, pointID):
+    start = self._rows[pointID] * self._numBands
+    return self._counts[start:start + self._numBands]
+
+  ###
+  # Get the points x bands table: an array of (pointID, counts) tuples, in
+  # order of point ID.
+  ###
+  def getCountTable(self):
+    return [(pointID, self.getCounts(pointID)) for pointID in self._pointIDs]
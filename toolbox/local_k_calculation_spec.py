@@ -0,0 +1,53 @@
+import unittest
+
+from random import Random
+from local_k_calculation import LocalKCalculation
+from network_k_calculation import NetworkKCalculation
+
+class LocalKCalculationSuite(unittest.TestCase):
+  # Random points on a line with their pairwise distances.
+  def getPoints(self, rand, numPoints):
+    positions = dict((pointID, rand.uniform(0, 100)) for pointID in range(1, numPoints + 1))
+    odDists   = []
+
+    for origID in positions:
+      for destID in positions:
+        if origID != destID:
+          odDists.append({"OriginID": origID, "DestinationID": destID,
+            "Total_Length": abs(positions[origID] - positions[destID])})
+
+    return odDists
+
+  # Trivial network.
+  def test_trivial_network(self):
+    odDists = [
+      {'Total_Length': 2, 'DestinationID': 1, 'OriginID': 2},
+      {'Total_Length': 3, 'DestinationID': 1, 'OriginID': 3},
+      {'Total_Length': 2, 'DestinationID': 2, 'OriginID': 1},
+      {'Total_Length': 0, 'DestinationID': 2, 'OriginID': 3},
+      {'Total_Length': 3, 'DestinationID': 3, 'OriginID': 1},
+      {'Total_Length': 0, 'DestinationID': 3, 'OriginID': 2}]
+
+    lkc = LocalKCalculation(odDists, 1, 1, None, [1, 2, 3, 4])
+
+    self.assertEqual(lkc.getNumberOfDistanceBands(), 3)
+    self.assertEqual(lkc.getBandDistances(), [1, 2, 3])
+    self.assertEqual(lkc.getCountTable(), [
+      (1, [0, 1, 2]),
+      (2, [1, 2, 2]),
+      (3, [1, 1, 2]),
+      (4, [0, 0, 0])])
+
+  # The local counts add up to the global counts.
+  def test_sums_to_global(self):
+    odDists = self.getPoints(Random(11), 30)
+    lkc     = LocalKCalculation(odDists, 0, 5, 12)
+    nkc     = NetworkKCalculation(100.0, 30, odDists, 0, 5, 12)
+    table   = lkc.getCountTable()
+
+    self.assertEqual(len(table), 30)
+    self.assertEqual([sum(counts[bandNum] for pointID, counts in table) for bandNum in range(0, 12)],
+      [band["count"] for band in nkc.getDistanceBands()])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,98 @@
+import math
+
+###
+# Confidence envelopes of local network K counts, one per observed point.
+#
+# The local count of a point depends on where it is (a point in the middle of
+# the network has more network around it than one at a dead end), so each
+# observed point is compared to its own null distribution: in each
+# permutation, the number of random points within each distance band of the
+# observed point's location.  The envelope of a point is from its numPerms
+# counts.  The counts are small integers, so only a histogram of them is kept
+# per point and band rather than every count.
+#
+# An observed point has numPoints - 1 neighbors, but a permutation can have a
+# different number of random points (e.g. when the number of random points on
+# each edge comes from a field), so each permutation's counts are scaled by
+# (numPoints - 1) / (the number of random points in the permutation).  The
+# histograms are of the scaled counts.
+###
+class LocalKEnvelope(object):
+  ###
+  # Initialize the envelope.
+  # @param numBands The number of distance bands.
+  # @param pointIDs The IDs of the observed points.
+  # @param numPoints The number of observed points.
+  ###
+  def __init__(self, numBands, pointIDs, numPoints):
+    self._numBands   = numBands
+    self._pointIDs   = sorted(pointIDs)
+    self._numPoints  = numPoints
+    self._histograms = dict((pointID, [{} for bandNum in range(0, numBands)]) for pointID in self._pointIDs)
+    self._numPerms   = 0
+
+  ###
+  # Add the counts of a permutation's random points around each observed
+  # point.
+  # @param localKCalc A LocalKCalculation of the distances from the observed
+  #        points (OriginID) to the random points (DestinationID), with all the
+  #        observed points' IDs.
+  # @param numRandPoints The number of random points in the permutation
+  #        (optional).  Defaults to the number of observed points.
+  ###
+  def addPermutation(self, localKCalc, numRandPoints=None):
+    if numRandPoints is None:
+      numRandPoints = self._numPoints
+
+    scale = (self._numPoints - 1) / float(numRandPoints) if numRandPoints > 0 else 0.0
+
+    for pointID in self._pointIDs:
+      for histogram, count in zip(self._histograms[pointID], localKCalc.getCounts(pointID)):
+        scaled            = count * scale
+        histogram[scaled] = histogram.get(scaled, 0) + 1
+
+    self._numPerms += 1
+
+  # Get the number of permutations.
+  def getNumberOfPermutations(self):
+    return self._numPerms
+
+  # Get the observed point IDs, in order.
+  def getPointIDs(self):
+    return list(self._pointIDs)
+
+  # Get the scaled count at an index of the sorted counts of a point's band.
+  def _getSortedCount(self, histogram, index):
+    seen = 0
+
+    for count in sorted(histogram.keys()):
+      seen += histogram[count]
+      if index < seen:
+        return count
+
+  # Get the sorted indices of the bottom and top of an envelope (the same
+  # convention as NetworkKAnalysis).
+  def _getIndices(self, confInterval):
+    envSize = int(round(self._numPerms * confInterval))
+    onTop   = int(math.ceil((self._numPerms - envSize) / 2.0))
+    onBot   = int(math.floor((self._numPerms - envSize) / 2.0))
+
+    return (onBot, self._numPerms - onTop - 1)
+
+  ###
+  # Get the lower bound of each band of a point.
+  # @param pointID The observed point's ID.
+  # @param confInterval The confidence interval (e.g. .95).
+  ###
+  def getLowerConfidenceEnvelope(self, pointID, confInterval):
+    index = self._getIndices(confInterval)[0]
+    return [self._getSortedCount(histogram, index) for histogram in self._histograms[pointID]]
+
+  ###
+  # Get the upper bound of each band of a point.
+  # @param pointID The observed point's ID.
+  # @param confInterval The confidence interval (e.g. .95).
+  ###
+  def getUpperConfidenceEnvelope(self, pointID, confInterval):
+    index = self._getIndices(confInterval)[1]
+    return [self._getSortedCount(histogram, index) for histogram in self._histograms[pointID]]
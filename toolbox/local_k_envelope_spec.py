@@ -0,0 +1,53 @@
+import unittest
+
+from local_k_calculation import LocalKCalculation
+from local_k_envelope import LocalKEnvelope
+
+class LocalKEnvelopeSuite(unittest.TestCase):
+  # Each observed point's bounds are quantiles of the counts of random points
+  # around its own location.
+  def test_bounds(self):
+    envelope = LocalKEnvelope(2, [1, 2], 11)
+
+    # Point 1 has perm random points within 1 in permutation perm, and point 2
+    # always has 2 within 1 and 4 within 2.  A random point with the same ID
+    # as an observed point is still counted.
+    for perm in range(0, 10):
+      odDists  = [{"OriginID": 1, "DestinationID": dest, "Total_Length": 1} for dest in range(1, perm + 1)]
+      odDists += [{"OriginID": 2, "DestinationID": dest, "Total_Length": 1 + dest // 3} for dest in range(1, 5)]
+      envelope.addPermutation(LocalKCalculation(odDists, 1, 1, 2, [1, 2], False))
+
+    self.assertEqual(envelope.getNumberOfPermutations(), 10)
+    self.assertEqual(envelope.getPointIDs(), [1, 2])
+
+    # The bounds are scaled by 10 / 11 (11 random points, 10 neighbors).
+    scale = 10 / 11.0
+    self.assertEqual(envelope.getLowerConfidenceEnvelope(1, .8), [1 * scale, 1 * scale])
+    self.assertEqual(envelope.getUpperConfidenceEnvelope(1, .8), [8 * scale, 8 * scale])
+    self.assertEqual(envelope.getLowerConfidenceEnvelope(2, .95), [2 * scale, 4 * scale])
+    self.assertEqual(envelope.getUpperConfidenceEnvelope(2, .95), [2 * scale, 4 * scale])
+
+  # Each permutation is scaled by its own number of random points (e.g. from
+  # a field), not the number of observed points.
+  def test_random_point_counts(self):
+    envelope = LocalKEnvelope(1, [1], 5)
+    odDists  = [{"OriginID": 1, "DestinationID": dest, "Total_Length": 1} for dest in range(1, 5)]
+
+    for numRandPoints in (8, 16, None):
+      envelope.addPermutation(LocalKCalculation(odDists, 1, 1, 1, [1], False), numRandPoints)
+
+    # 4 random points within 1, scaled by 4 / 8, 4 / 16, and 4 / 5.
+    self.assertEqual(envelope.getLowerConfidenceEnvelope(1, 1), [4 * 4 / 16.0])
+    self.assertEqual(envelope.getUpperConfidenceEnvelope(1, .34), [4 * 4 / 8.0])
+    self.assertEqual(envelope.getUpperConfidenceEnvelope(1, 1), [4 * 4 / 5.0])
+
+  # The observed points' own distances exclude themselves; the distances to
+  # random points don't.
+  def test_exclude_self(self):
+    odDists = [{"OriginID": 1, "DestinationID": 1, "Total_Length": 0}]
+
+    self.assertEqual(LocalKCalculation(odDists, 1, 1, 1, [1]).getCounts(1), [0])
+    self.assertEqual(LocalKCalculation(odDists, 1, 1, 1, [1], False).getCounts(1), [1])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,168 @@
+from bounded_shortest_path import BoundedShortestPath
+from euclidean_pair_filter import EuclideanPairFilter
+
+###
+# Solves OD cost matrices on an in-memory NetworkGraph.  The results have the
+# same form as the distances read from an ArcGIS OD Cost Matrix (an array of
+# dictionaries with Total_Length, OriginID, and DestinationID keys), so they
+# can be handed straight to NetworkKCalculation and CrossKCalculation.
+#
+# One bounded search is run from each origin (a shortest path tree, which is
+# also what cross-K and network density need), and only the destinations on
+# edges that the search reached are examined.
+#
+# If landmarks are given (see LandmarkBounds), pairs that are within the cutoff
+# as the crow flies but whose landmark bound is beyond it are skipped, an origin
+# with no destinations left is not searched at all, and each search stops
+# expanding nodes that can't reach any of the remaining destinations within the
+# cutoff.
+###
+class LocalODCMSolver(object):
+  ###
+  # Initialize the solver.
+  # @param graph A NetworkGraph.
+  # @param bucketWidth The bucket width of the shortest path kernel (optional,
+  #        see BoundedShortestPath).
+  # @param landmarks A LandmarkBounds instance over the graph (optional).
+  # @param cutoff The longest cutoff that will be solved (optional), which the
+  #        default bucket width is clamped by (see BoundedShortestPath).
+  ###
+  def __init__(self, graph, bucketWidth=None, landmarks=None, cutoff=None):
+    self._graph     = graph
+    self._kernel    = BoundedShortestPath(graph.getAdjacency(), bucketWidth, cutoff)
+    self._landmarks = landmarks
+
+  # Get the network.
+  def getGraph(self):
+    return self._graph
+
+  # Get the shortest path kernel.
+  def getKernel(self):
+    return self._kernel
+
+  # Get the landmark bounds, or None.
+  def getLandmarks(self):
+    return self._landmarks
+
+  ###
+  # Index the destinations by the nodes at each end of their edges.
+  # @param destinations An array of (id, location) tuples.
+  ###
+  def _indexDestinations(self, destinations):
+    byNode = {}
+    byEdge = {}
+
+    for destID, location in destinations:
+      edgeID, offset = location
+      fromNode, toNode, length, vertices = self._graph.getEdge(edgeID)
+
+      byNode.setdefault(fromNode, []).append((destID, edgeID, offset))
+      byNode.setdefault(toNode,   []).append((destID, edgeID, length - offset))
+      byEdge.setdefault(edgeID,   []).append((destID, offset))
+
+    return (byNode, byEdge)
+
+  ###
+  # Find the distance from one origin to each destination within the cutoff.
+  # Returns a dictionary of destination ID -> distance.
+  # @param location The (edgeID, offset) location of the origin.
+  # @param destIndex The destination index from _indexDestinations.
+  # @param cutoff The cutoff distance (optional).
+  # @param prune A prune function for the search (optional).
+  ###
+  def _solveOrigin(self, location, destIndex, cutoff, prune=None):
+    byNode, byEdge = destIndex
+    limit          = float("inf") if cutoff is None else cutoff
+    nodeDists      = self._kernel.search(self._graph.getLocationSeeds(location), cutoff, prune)
+    destDists      = {}
+
+    # Destinations are reached through either end of their edge.
+    for node, nodeDist in nodeDists.items():
+      for destID, edgeID, destOffset in byNode.get(node, ()):
+        dist = nodeDist + destOffset
+        if dist <= limit and dist < destDists.get(destID, float("inf")):
+          destDists[destID] = dist
+
+    # Destinations on the same edge as the origin can be reached directly.
+    for destID, destOffset in byEdge.get(location[0], ()):
+      dist = abs(destOffset - location[1])
+      if dist <= limit and dist < destDists.get(destID, float("inf")):
+        destDists[destID] = dist
+
+    return destDists
+
+  ###
+  # Solve the OD cost matrix.
+  # @param origins An array of (id, location) tuples.
+  # @param destinations An array of (id, location) tuples.
+  # @param cutoff The cutoff distance (optional).
+  # @param excludeSelf If True, the distance from a point to the destination with
+  #        the same ID is excluded (for global analysis).
+  ###
+  def solve(self, origins, destinations, cutoff=None, excludeSelf=False):
+    if self._landmarks is not None and cutoff is not None:
+      return self._solvePruned(origins, destinations, cutoff, excludeSelf)
+
+    destIndex = self._indexDestinations(destinations)
+    odDists   = []
+
+    for originID, location in origins:
+      destDists = self._solveOrigin(location, destIndex, cutoff)
+
+      for destID in sorted(destDists):
+        if excludeSelf and destID == originID:
+          continue
+        odDists.append({"Total_Length": destDists[destID], "OriginID": originID, "DestinationID": destID})
+
+    return odDists
+
+  ###
+  # Solve the OD cost matrix using the landmark lower bounds.  See solve.
+  ###
+  def _solvePruned(self, origins, destinations, cutoff, excludeSelf):
+    landmarks = self._landmarks
+    graph     = self._graph
+    odDists   = []
+
+    # Locations are on the network, so the straight-line distance between them
+    # is a lower bound too, and a cheap one to check first.
+    originPts  = [(i, ) + graph.getLocationCoordinates(origins[i][1]) for i in range(0, len(origins))]
+    destPts    = [(i, ) + graph.getLocationCoordinates(destinations[i][1]) for i in range(0, len(destinations))]
+    candidates = {}
+
+    for originNum, destNum in EuclideanPairFilter(cutoff).getCandidatePairs(originPts, destPts):
+      if not excludeSelf or origins[originNum][0] != destinations[destNum][0]:
+        candidates.setdefault(originNum, []).append(destNum)
+
+    destIndex   = self._indexDestinations(destinations)
+    destVectors = {}
+
+    for originNum in sorted(candidates):
+      originID, location = origins[originNum]
+      originVector       = landmarks.getLocationVector(location)
+      targets            = set()
+      vectors            = []
+
+      for destNum in candidates[originNum]:
+        if destNum not in destVectors:
+          destVectors[destNum] = landmarks.getLocationVector(destinations[destNum][1])
+
+        if landmarks.getLowerBound(originVector, destVectors[destNum]) <= cutoff:
+          targets.add(destinations[destNum][0])
+          vectors.append(destVectors[destNum])
+
+      if len(targets) == 0:
+        continue
+
+      # A node can be left unexpanded if even the closest target is beyond the
+      # cutoff from it.
+      ranges    = landmarks.getTargetRanges(vectors)
+      active    = landmarks.getActiveLandmarks(originVector, ranges, 4)
+      prune     = lambda node, dist: dist + landmarks.getFrontierBound(node, ranges, active) > cutoff
+      destDists = self._solveOrigin(location, destIndex, cutoff, prune)
+
+      for destID in sorted(destDists):
+        if destID in targets:
+          odDists.append({"Total_Length": destDists[destID], "OriginID": originID, "DestinationID": destID})
+
+    return odDists
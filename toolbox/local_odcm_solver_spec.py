@@ -0,0 +1,48 @@
+import unittest
+
+from network_graph import NetworkGraph
+from local_odcm_solver import LocalODCMSolver
+
+class LocalODCMSolverSuite(unittest.TestCase):
+  # A 3 x 1 ladder:
+  #
+  # (0,10)--(10,10)--(20,10)
+  #   |        |        |
+  # (0,0)----(10,0)---(20,0)
+  def getGraph(self):
+    return NetworkGraph.fromLines([
+      [(0, 0), (10, 0)], [(10, 0), (20, 0)],
+      [(0, 10), (10, 10)], [(10, 10), (20, 10)],
+      [(0, 0), (0, 10)], [(10, 0), (10, 10)], [(20, 0), (20, 10)]])
+
+  # Get a dictionary of (origin, destination) -> distance.
+  def getDists(self, odDists):
+    return dict(((od["OriginID"], od["DestinationID"]), od["Total_Length"]) for od in odDists)
+
+  # Global analysis on a few points.
+  def test_global(self):
+    graph  = self.getGraph()
+    points = [(1, graph.snapPoint(2, 0, 1)), (2, graph.snapPoint(18, 10, 1)), (3, graph.snapPoint(5, 0, 1))]
+    solver = LocalODCMSolver(graph)
+    dists  = self.getDists(solver.solve(points, points, excludeSelf=True))
+
+    self.assertEqual(len(dists), 6)
+    self.assertEqual(dists[(1, 3)], 3)
+    self.assertEqual(dists[(3, 1)], 3)
+    self.assertEqual(dists[(1, 2)], 26)
+    self.assertEqual(dists[(2, 3)], 23)
+
+    # The cutoff removes the long pairs.
+    dists = self.getDists(solver.solve(points, points, 10, True))
+    self.assertEqual(sorted(dists), [(1, 3), (3, 1)])
+
+  # Cross analysis, with points on the same edge and on different edges.
+  def test_cross(self):
+    graph   = self.getGraph()
+    bridges = [(10, graph.snapPoint(10, 5, 1))]
+    crashes = [(1, graph.snapPoint(10, 8, 1)), (2, graph.snapPoint(0, 5, 1)), (3, graph.snapPoint(15, 10, 1))]
+    dists   = self.getDists(LocalODCMSolver(graph, 2).solve(bridges, crashes))
+
+    self.assertEqual(dists[(10, 1)], 3)
+    self.assertEqual(dists[(10, 2)], 20)
+    self.assertEqual(dists[(10, 3)], 10)
@@ -0,0 +1,188 @@
+import bisect
+import math
+
+###
+# Multi-type network K functions, from one OD cost matrix of all the points.
+#
+# Each point has a category (e.g. a crash severity).  For each category, and
+# for each pair of categories, the distances between the points of those
+# categories are counted in cumulative distance bands, like
+# NetworkKCalculation does for all the points.  The distances are counted in a
+# single pass: each point's category is looked up once, and each distance
+# adds to the histogram of its category pair.
+#
+#   K(a)    = netLen / (n_a * (n_a - 1)) * pairs of a points within d
+#   K(a, b) = netLen / (n_a * n_b)       * pairs of an a and a b point within d
+#
+# For random permutations, the random points are labeled with a random
+# shuffle of the observed categories (see assignRandomLabels), so each
+# category's random points are a random pattern with the observed number of
+# points, and all the categories share one OD cost matrix.
+###
+class MultiTypeKCalculation(object):
+  ###
+  # Initialize the calculator.
+  # @param netLen The length of the network.
+  # @param numPoints A dictionary of the number of points in each category.
+  # @param labels A dictionary of the category of each point, keyed by point
+  #        ID (the OriginID and DestinationID of the distances).  Points that
+  #        aren't labeled are ignored.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  # @param begDist The distance to begin calculating (the first distance band).
+  # @param distInc The amount to increment each distance band.
+  # @param numBands The number of distance bands (optional).
+  ###
+  def __init__(self, netLen, numPoints, labels, odDists, begDist, distInc, numBands):
+    self._netLen     = netLen
+    self._numPoints  = numPoints
+    self._categories = self.sortCategories(numPoints.keys())
+    self._begDist    = begDist
+    self._distInc    = distInc
+    self._numBands   = numBands
+
+    # If the user doesn't specify the number of distance bands then calculate it.
+    if self._numBands is None:
+      maxLen         = max([odDist["Total_Length"] for odDist in odDists] or [begDist])
+      self._numBands = int(math.ceil((maxLen - self._begDist) / self._distInc + 1))
+
+    # The band distances are accumulated the same way as NetworkKCalculation's
+    # so that the counts match exactly.
+    self._bandDists = []
+    curDist         = begDist
+    for bandNum in range(0, self._numBands):
+      self._bandDists.append(curDist)
+      curDist += distInc
+
+    self._counts = self._countDistanceBands(labels, odDists)
+
+  ###
+  # Sort categories for display (they may be a mix of numbers and text).
+  # @param categories The categories.
+  ###
+  @staticmethod
+  def sortCategories(categories):
+    return sorted(categories, key=lambda category: (str(type(category)), category))
+
+  ###
+  # Count the points in each category.
+  # @param labels A dictionary of the category of each point.
+  ###
+  @staticmethod
+  def countCategories(labels):
+    numPoints = {}
+
+    for category in labels.values():
+      numPoints[category] = numPoints.get(category, 0) + 1
+
+    return numPoints
+
+  ###
+  # Label random points with a random shuffle of the observed categories.
+  # Returns a dictionary of the category of each point.
+  # @param pointIDs The IDs of the random points.
+  # @param categories An array with the category of each observed point.
+  # @param rand A random.Random instance.
+  ###
+  @staticmethod
+  def assignRandomLabels(pointIDs, categories, rand):
+    pointIDs = sorted(pointIDs)
+    shuffled = []
+
+    # If there are more random points than observed points (e.g. points from a
+    # field), the categories are drawn again in the same proportions.
+    while len(shuffled) < len(pointIDs):
+      categories = list(categories)
+      rand.shuffle(categories)
+      shuffled.extend(categories)
+
+    return dict(zip(pointIDs, shuffled))
+
+  # Count the distances of each category pair in each band (cumulative).
+  def _countDistanceBands(self, labels, odDists):
+    catIndex = dict((category, catNum) for catNum, category in enumerate(self._categories))
+    numCats  = len(self._categories)
+    lastDist = self._bandDists[-1] if self._numBands != 0 else None
+    counts   = [[0] * self._numBands for pairNum in range(0, numCats * numCats)]
+    pointCat = dict((pointID, catIndex[category]) for pointID, category in labels.items()
+      if category in catIndex)
+
+    for odDist in odDists:
+      length = odDist["Total_Length"]
+
+      if lastDist is None or length > lastDist:
+        continue
+
+      origCat = pointCat.get(odDist["OriginID"])
+      destCat = pointCat.get(odDist["DestinationID"])
+
+      if origCat is None or destCat is None:
+        continue
+
+      # The first band that the distance is counted in.
+      counts[origCat * numCats + destCat][bisect.bisect_left(self._bandDists, length)] += 1
+
+    for pairCounts in counts:
+      for bandNum in range(1, self._numBands):
+        pairCounts[bandNum] += pairCounts[bandNum - 1]
+
+    return counts
+
+  # Get the categories, sorted.
+  def getCategories(self):
+    return list(self._categories)
+
+  # Get the number of distance bands.
+  def getNumberOfDistanceBands(self):
+    return self._numBands
+
+  ###
+  # Get the category pairs that K functions are calculated for: each category
+  # on its own, then each pair of different categories.  Returns an array of
+  # (category, category) tuples.
+  ###
+  def getCategoryPairs(self):
+    pairs = [(category, category) for category in self._categories]
+
+    for catNum, category in enumerate(self._categories):
+      for other in self._categories[catNum + 1:]:
+        pairs.append((category, other))
+
+    return pairs
+
+  ###
+  # Describe a category pair, e.g. "2" or "2 x 4".
+  # @param pair A (category, category) tuple.
+  ###
+  @staticmethod
+  def getPairDescription(pair):
+    if pair[0] == pair[1]:
+      return str(pair[0])
+    return "{0} x {1}".format(pair[0], pair[1])
+
+  ###
+  # Get the distance bands of a category pair, in the same form as
+  # NetworkKCalculation.getDistanceBands().  For two different categories the
+  # distances in both directions are counted, once per pair of points.
+  # @param pair A (category, category) tuple.
+  ###
+  def getDistanceBands(self, pair):
+    numCats = len(self._categories)
+    catA    = self._categories.index(pair[0])
+    catB    = self._categories.index(pair[1])
+    numA    = self._numPoints[pair[0]]
+    numB    = self._numPoints[pair[1]]
+
+    if catA == catB:
+      counts   = self._counts[catA * numCats + catA]
+      numPairs = numA * (numA - 1)
+    else:
+      # The OD cost matrix has both directions of each pair, so the mean of
+      # the two directions counts each pair once.
+      counts   = [(countAB + countBA) / 2.0 for countAB, countBA in
+        zip(self._counts[catA * numCats + catB], self._counts[catB * numCats + catA])]
+      numPairs = numA * numB
+
+    density = self._netLen / float(numPairs) if numPairs > 0 else 0.0
+
+    return [{"distanceBand": bandDist, "count": count, "KFunction": count * density}
+      for bandDist, count in zip(self._bandDists, counts)]
@@ -0,0 +1,94 @@
+import unittest
+
+from random import Random
+from multi_type_k_calculation import MultiTypeKCalculation
+from network_k_calculation import NetworkKCalculation
+
+class MultiTypeKCalculationSuite(unittest.TestCase):
+  # Random points on a line with their pairwise distances.
+  def getPoints(self, rand, numPoints):
+    positions = dict((pointID, rand.uniform(0, 100)) for pointID in range(1, numPoints + 1))
+    odDists   = []
+
+    for origID in positions:
+      for destID in positions:
+        if origID != destID:
+          odDists.append({"OriginID": origID, "DestinationID": destID,
+            "Total_Length": abs(positions[origID] - positions[destID])})
+
+    return odDists
+
+  # Trivial network: two categories.
+  def test_trivial_network(self):
+    odDists = [
+      {'Total_Length': 2, 'DestinationID': 1, 'OriginID': 2},
+      {'Total_Length': 3, 'DestinationID': 1, 'OriginID': 3},
+      {'Total_Length': 2, 'DestinationID': 2, 'OriginID': 1},
+      {'Total_Length': 0, 'DestinationID': 2, 'OriginID': 3},
+      {'Total_Length': 3, 'DestinationID': 3, 'OriginID': 1},
+      {'Total_Length': 0, 'DestinationID': 3, 'OriginID': 2}]
+    labels  = {1: "A", 2: "B", 3: "B"}
+
+    mtkc = MultiTypeKCalculation(14, MultiTypeKCalculation.countCategories(labels),
+      labels, odDists, 1, 1, None)
+
+    self.assertEqual(mtkc.getCategories(), ["A", "B"])
+    self.assertEqual(mtkc.getNumberOfDistanceBands(), 3)
+    self.assertEqual(mtkc.getCategoryPairs(), [("A", "A"), ("B", "B"), ("A", "B")])
+    self.assertEqual(MultiTypeKCalculation.getPairDescription(("A", "B")), "A x B")
+    self.assertEqual(MultiTypeKCalculation.getPairDescription(("B", "B")), "B")
+
+    # The B points are 0 apart.
+    bands = mtkc.getDistanceBands(("B", "B"))
+    self.assertEqual([band["distanceBand"] for band in bands], [1, 2, 3])
+    self.assertEqual([band["count"] for band in bands], [2, 2, 2])
+    self.assertEqual(bands[0]["KFunction"], 2 * 14 / 2.0)
+
+    # A is 2 and 3 from the B points.
+    bands = mtkc.getDistanceBands(("A", "B"))
+    self.assertEqual([band["count"] for band in bands], [0, 1, 2])
+    self.assertEqual(bands[2]["KFunction"], 2 * 14 / 2.0)
+
+    # A single point has no pairs.
+    self.assertEqual([band["KFunction"] for band in mtkc.getDistanceBands(("A", "A"))], [0, 0, 0])
+
+  # Each category's K function matches a K function of its points alone.
+  def test_matches_network_k(self):
+    rand    = Random(7)
+    odDists = self.getPoints(rand, 40)
+    labels  = dict((pointID, rand.choice([1, 2, "x"])) for pointID in range(1, 41))
+    counts  = MultiTypeKCalculation.countCategories(labels)
+    mtkc    = MultiTypeKCalculation(250.0, counts, labels, odDists, 0, 2.5, 20)
+
+    self.assertEqual(mtkc.getCategories(), [1, 2, "x"])
+
+    for category in mtkc.getCategories():
+      catDists = [odDist for odDist in odDists
+        if labels[odDist["OriginID"]] == category and labels[odDist["DestinationID"]] == category]
+      nkc      = NetworkKCalculation(250.0, counts[category], catDists, 0, 2.5, 20)
+
+      self.assertEqual(mtkc.getDistanceBands((category, category)), nkc.getDistanceBands())
+
+    # The cross K counts each pair of an a and a b point once.
+    for bandNum, band in enumerate(mtkc.getDistanceBands((1, 2))):
+      count = len([odDist for odDist in odDists if labels[odDist["OriginID"]] == 1 and
+        labels[odDist["DestinationID"]] == 2 and odDist["Total_Length"] <= band["distanceBand"]])
+
+      self.assertEqual(band["count"], count)
+      self.assertAlmostEqual(band["KFunction"], count * 250.0 / (counts[1] * counts[2]))
+
+  # Random labels keep the observed category counts.
+  def test_random_labels(self):
+    categories = ["A"] * 3 + ["B"] * 5
+    labels     = MultiTypeKCalculation.assignRandomLabels(range(10, 18), categories, Random(1))
+
+    self.assertEqual(sorted(labels.keys()), list(range(10, 18)))
+    self.assertEqual(MultiTypeKCalculation.countCategories(labels), {"A": 3, "B": 5})
+    self.assertEqual(labels, MultiTypeKCalculation.assignRandomLabels(range(10, 18), categories, Random(1)))
+
+    # With more random points, the categories are drawn again.
+    labels = MultiTypeKCalculation.assignRandomLabels(range(0, 16), categories, Random(1))
+    self.assertEqual(MultiTypeKCalculation.countCategories(labels), {"A": 6, "B": 10})
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,163 @@
+import bisect
+import heapq
+import math
+
+###
+# Network nearest neighbor distances (for the network G and F functions).
+#
+# Rather than solving an OD cost matrix (all the pairs), one shortest path
+# search is run from all the sources at once.  Each node is labeled with the
+# distance to its nearest sources, and keeps the labels of up to numLabels
+# different sources: one for the nearest source to other points, or two for
+# the nearest other point of the same set (a point's own label is skipped).
+# Each node is settled at most numLabels times, so the search takes
+# O(numLabels * E log V) time regardless of the number of points.
+#
+# A point is reached from the nodes at either end of its edge, or directly
+# from the sources on the same edge (found by bisection on their offsets).
+###
+class NearestNeighborCalculation(object):
+  ###
+  # Initialize the calculator.
+  # @param graph A NetworkGraph.
+  ###
+  def __init__(self, graph):
+    self._graph = graph
+
+  # Get the network.
+  def getGraph(self):
+    return self._graph
+
+  ###
+  # Label each node with its nearest sources.  Returns an array, indexed by
+  # node, of (distance, sourceID) arrays in order of distance.
+  # @param sources An array of (id, location) tuples.
+  # @param numLabels The number of different sources to keep per node.
+  # @param cutoff The cutoff distance (optional).
+  ###
+  def _labelNodes(self, sources, numLabels, cutoff):
+    adjacency = self._graph.getAdjacency()
+    limit     = float("inf") if cutoff is None else cutoff
+    labels    = [[] for node in range(0, len(adjacency))]
+    heap      = []
+
+    for sourceID, location in sources:
+      for node, dist in self._graph.getLocationSeeds(location):
+        if dist <= limit:
+          heap.append((dist, node, sourceID))
+    heapq.heapify(heap)
+
+    while heap:
+      dist, node, sourceID = heapq.heappop(heap)
+      nodeLabels           = labels[node]
+
+      if len(nodeLabels) >= numLabels or sourceID in [label[1] for label in nodeLabels]:
+        continue
+
+      nodeLabels.append((dist, sourceID))
+
+      for neighbor, length in adjacency[node]:
+        newDist        = dist + length
+        neighborLabels = labels[neighbor]
+
+        if newDist <= limit and len(neighborLabels) < numLabels and \
+          sourceID not in [label[1] for label in neighborLabels]:
+          heapq.heappush(heap, (newDist, neighbor, sourceID))
+
+    return labels
+
+  # Index the sources by edge: (sorted offsets, IDs) per edge.
+  def _indexSources(self, sources):
+    byEdge = {}
+
+    for sourceID, location in sources:
+      byEdge.setdefault(location[0], []).append((location[1], sourceID))
+
+    return dict((edgeID, ([offset for offset, sourceID in sorted(onEdge)],
+      [sourceID for offset, sourceID in sorted(onEdge)])) for edgeID, onEdge in byEdge.items())
+
+  # Get the distance to the nearest source on the same edge as a location,
+  # other than excludeID.
+  def _getNearestOnEdge(self, location, sourceIndex, excludeID):
+    offsets, sourceIDs = sourceIndex.get(location[0], ([], []))
+    pointNum           = bisect.bisect_left(offsets, location[1])
+    nearest            = float("inf")
+
+    # Look outward on each side, skipping the point itself.
+    for step in (-1, 1):
+      neighborNum = pointNum if step == 1 else pointNum - 1
+
+      while 0 <= neighborNum < len(offsets):
+        if sourceIDs[neighborNum] != excludeID:
+          nearest = min(nearest, abs(offsets[neighborNum] - location[1]))
+          break
+        neighborNum += step
+
+    return nearest
+
+  ###
+  # Find the network distance from each target to its nearest source.  Returns
+  # a dictionary of target ID -> distance (None if there's no source within
+  # the cutoff).
+  # @param targets An array of (id, location) tuples.
+  # @param sources An array of (id, location) tuples (optional).  If None, the
+  #        targets are the sources, and each target's nearest other target is
+  #        found (a target's own ID is never its nearest neighbor).
+  # @param cutoff The cutoff distance (optional).
+  ###
+  def getNearestDistances(self, targets, sources=None, cutoff=None):
+    excludeSelf = sources is None
+    sources     = targets if excludeSelf else sources
+    labels      = self._labelNodes(sources, 2 if excludeSelf else 1, cutoff)
+    sourceIndex = self._indexSources(sources)
+    limit       = float("inf") if cutoff is None else cutoff
+    nearest     = {}
+
+    for targetID, location in targets:
+      excludeID = targetID if excludeSelf else None
+      best      = self._getNearestOnEdge(location, sourceIndex, excludeID)
+
+      for node, seedDist in self._graph.getLocationSeeds(location):
+        for dist, sourceID in labels[node]:
+          if sourceID != excludeID:
+            best = min(best, dist + seedDist)
+            break
+
+      nearest[targetID] = best if best <= limit else None
+
+    return nearest
+
+  ###
+  # Get the cumulative distribution of nearest neighbor distances (the G or F
+  # function): an array of dictionaries with distanceBand, count (the number
+  # of points whose nearest neighbor is within the band), and proportion.
+  # @param nearestDists A dictionary of nearest distances (see
+  #        getNearestDistances).
+  # @param begDist The distance to begin calculating (the first distance band).
+  # @param distInc The amount to increment each distance band.
+  # @param numBands The number of distance bands (optional).
+  ###
+  @staticmethod
+  def getDistanceBands(nearestDists, begDist, distInc, numBands):
+    dists = sorted(dist for dist in nearestDists.values() if dist is not None)
+
+    # If the user doesn't specify the number of distance bands then calculate it.
+    if numBands is None:
+      maxLen   = dists[-1] if len(dists) != 0 else begDist
+      numBands = int(math.ceil((maxLen - begDist) / distInc + 1))
+
+    numPoints = len(nearestDists)
+    distBands = []
+    curDist   = begDist
+
+    for bandNum in range(0, numBands):
+      count = bisect.bisect_right(dists, curDist)
+
+      distBands.append({
+        "distanceBand": curDist,
+        "count":        count,
+        "proportion":   count / float(numPoints) if numPoints != 0 else 0.0})
+
+      curDist += distInc
+
+    return distBands
@@ -0,0 +1,61 @@
+import unittest
+
+from synthetic_network import SyntheticNetwork
+from local_odcm_solver import LocalODCMSolver
+from nearest_neighbor_calculation import NearestNeighborCalculation
+
+class NearestNeighborCalculationSuite(unittest.TestCase):
+  def setUp(self):
+    self.synNet = SyntheticNetwork(4)
+    self.graph  = self.synNet.makeGraph(self.synNet.makeRandomPlanar(8, 8))
+    self.solver = LocalODCMSolver(self.graph)
+
+  # Get each origin's nearest destination from a full OD cost matrix.
+  def getNearest(self, origins, destinations, cutoff=None, excludeSelf=False):
+    nearest = dict((originID, None) for originID, location in origins)
+
+    for odDist in self.solver.solve(origins, destinations, cutoff, excludeSelf):
+      if nearest[odDist["OriginID"]] is None or odDist["Total_Length"] < nearest[odDist["OriginID"]]:
+        nearest[odDist["OriginID"]] = odDist["Total_Length"]
+
+    return nearest
+
+  # Check that two dictionaries of distances match.
+  def assertDistancesEqual(self, actual, expected):
+    self.assertEqual(sorted(actual.keys()), sorted(expected.keys()))
+
+    for pointID in expected:
+      if expected[pointID] is None:
+        self.assertEqual(actual[pointID], None)
+      else:
+        self.assertAlmostEqual(actual[pointID], expected[pointID])
+
+  # Each point's nearest other point matches the OD cost matrix, including
+  # points on the same edge.
+  def test_global(self):
+    points = list(enumerate(self.synNet.makeClusteredPoints(self.graph, 80, 4, 150), 1))
+    nnc    = NearestNeighborCalculation(self.graph)
+
+    self.assertDistancesEqual(nnc.getNearestDistances(points), self.getNearest(points, points, None, True))
+    self.assertDistancesEqual(nnc.getNearestDistances(points, None, 60),
+      self.getNearest(points, points, 60, True))
+
+  # Each target's nearest source matches the OD cost matrix.
+  def test_cross(self):
+    sources = list(enumerate(self.synNet.makeUniformPoints(self.graph, 10), 1))
+    targets = list(enumerate(self.synNet.makeUniformPoints(self.graph, 50), 1))
+    nnc     = NearestNeighborCalculation(self.graph)
+
+    self.assertDistancesEqual(nnc.getNearestDistances(targets, sources), self.getNearest(targets, sources))
+    self.assertDistancesEqual(nnc.getNearestDistances(targets, sources, 80), self.getNearest(targets, sources, 80))
+
+  # The distribution counts the points within each band.
+  def test_distance_bands(self):
+    bands = NearestNeighborCalculation.getDistanceBands({1: 5.0, 2: 10.0, 3: 12.0, 4: None}, 0, 5, None)
+
+    self.assertEqual([band["distanceBand"] for band in bands], [0, 5, 10, 15])
+    self.assertEqual([band["count"] for band in bands], [0, 1, 2, 3])
+    self.assertEqual([band["proportion"] for band in bands], [0.0, 0.25, 0.5, 0.75])
+
+if __name__ == "__main__":
+  unittest.main()
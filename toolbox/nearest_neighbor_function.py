@@ -0,0 +1,398 @@
+import arcpy
+import os
+import k_function_helper
+import global_k_function_svc
+import nearest_neighbor_calculation
+import nearest_neighbor_function_svc
+import random_point_sampler
+import stage_profiler
+
+from arcpy import env
+from random import Random
+
+# ArcMap caching prevention.
+k_function_helper             = reload(k_function_helper)
+global_k_function_svc         = reload(global_k_function_svc)
+nearest_neighbor_calculation  = reload(nearest_neighbor_calculation)
+nearest_neighbor_function_svc = reload(nearest_neighbor_function_svc)
+random_point_sampler          = reload(random_point_sampler)
+stage_profiler                = reload(stage_profiler)
+
+from k_function_helper             import KFunctionHelper
+from global_k_function_svc         import GlobalKFunctionSvc
+from nearest_neighbor_calculation  import NearestNeighborCalculation
+from nearest_neighbor_function_svc import NearestNeighborFunctionSvc
+from random_point_sampler          import RandomPointSampler
+from stage_profiler                import StageProfiler
+
+class NearestNeighborFunction(object):
+  ###
+  # Initialize the tool.
+  ###
+  def __init__(self):
+    self.label              = "Nearest Neighbor (G and F) Function"
+    self.description        = "Uses the network distance from each crash to its nearest neighbor (G function), and from random locations to the nearest crash (F function), to analyze clustering and dispersion.  The distances are found on the network dataset's edges, connected at their end points and measured by their length, so network datasets with any vertex connectivity, elevations, turns, or another cost are not supported."
+    self.canRunInBackground = False
+    env.overwriteOutput     = True
+    self.kfHelper           = KFunctionHelper()
+
+  ###
+  # Get input from the users.
+  ###
+  def getParameterInfo(self):
+    # Analysis type.
+    analysisType = arcpy.Parameter(
+      displayName="Analysis Type",
+      name = "analysis_type",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    atKeys                   = list(self.kfHelper.getAnalysisTypeSelection().keys())
+    analysisType.filter.list = atKeys
+    analysisType.value       = atKeys[0]
+
+    # Input origin points features.
+    srcPoints = arcpy.Parameter(
+      displayName="Input Points Feature Dataset (Origin Points for Cross Analysis, e.g. bridges)",
+      name="srcPoints",
+      datatype="Feature Class",
+      parameterType="Required",
+      direction="Input")
+    srcPoints.filter.list = ["Point"]
+
+    # Input destination points features.
+    destPoints = arcpy.Parameter(
+      displayName="Input Destination Points Feature Dataset (Cross Analysis, e.g. crashes)",
+      name="destPoints",
+      datatype="Feature Class",
+      parameterType="Optional",
+      direction="Input")
+    destPoints.filter.list = ["Point"]
+
+    # Network dataset.
+    networkDataset = arcpy.Parameter(
+      displayName="Input Network Dataset",
+      name = "network_dataset",
+      datatype="Network Dataset Layer",
+      parameterType="Required",
+      direction="Input")
+
+    # Number of distance increments.
+    numBands = arcpy.Parameter(
+      displayName="Input Number of Distance Bands",
+      name="num_dist_bands",
+      datatype="Long",
+      parameterType="Optional",
+      direction="Input")
+
+    # Beginning distance.
+    begDist = arcpy.Parameter(
+      displayName="Input Beginning Distance",
+      name="beginning_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    begDist.value = 0
+
+    # Distance increment.
+    distInc = arcpy.Parameter(
+      displayName="Input Distance Increment",
+      name="distance_increment",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    distInc.value = 1000
+
+    # Snap distance.
+    snapDist = arcpy.Parameter(
+      displayName="Input Snap Distance",
+      name="snap_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    snapDist.value = 25
+
+    # Output location.
+    outNetKLoc = arcpy.Parameter(
+      displayName="Output Location (Database Path)",
+      name="out_location",
+      datatype="DEWorkspace",
+      parameterType="Required",
+      direction="Input")
+    outNetKLoc.value = arcpy.env.workspace
+
+    # The raw data feature class (e.g. observed and random point computations).
+    outRawFCName = arcpy.Parameter(
+      displayName="Raw Nearest Neighbor Data Table (Raw Analysis Data)",
+      name = "output_raw_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outRawFCName.value = "Nearest_Neighbor_Raw_Analysis_Data"
+
+    # The analysis feature class.
+    outAnlFCName = arcpy.Parameter(
+      displayName="Nearest Neighbor Summary Data (Plottable Data)",
+      name = "output_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outAnlFCName.value = "Nearest_Neighbor_Summary_Data"
+
+    # Confidence envelope (number of permutations).
+    numPerms = arcpy.Parameter(
+      displayName="Number of Random Point Permutations",
+      name = "num_permutations",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    permKeys             = list(self.kfHelper.getPermutationSelection().keys())
+    numPerms.filter.list = permKeys
+    numPerms.value       = permKeys[0]
+
+    # Projected coordinate system.
+    outCoordSys = arcpy.Parameter(
+      displayName="Output Network Dataset Length Projected Coordinate System",
+      name="coordinate_system",
+      datatype="GPSpatialReference",
+      parameterType="Optional",
+      direction="Input")
+
+    # Random seed.
+    seed = arcpy.Parameter(
+      displayName="Random Seed",
+      name = "random_seed",
+      datatype="GPLong",
+      parameterType="Optional",
+      direction="Input")
+
+    # How the random points are generated.
+    samplingMethod = arcpy.Parameter(
+      displayName="Random Point Sampling",
+      name = "random_point_sampling",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+    samplingMethod.filter.list = self.kfHelper.getSamplingMethods()
+    samplingMethod.value       = samplingMethod.filter.list[0]
+
+    return [analysisType, srcPoints, destPoints, networkDataset, numBands,
+      begDist, distInc, snapDist, outNetKLoc, outRawFCName, outAnlFCName,
+      numPerms, outCoordSys, seed, samplingMethod]
+
+  ###
+  # Check if the tool is available for use.
+  ###
+  def isLicensed(self):
+    # No Network Analyst tools are used: the network dataset's edges are read
+    # directly.
+    return True
+
+  ###
+  # Set parameter defaults.
+  ###
+  def updateParameters(self, parameters):
+    # Destination points are only used for cross analysis.
+    analysisTypes = self.kfHelper.getAnalysisTypeSelection()
+    if parameters[0].valueAsText in analysisTypes:
+      parameters[2].enabled = analysisTypes[parameters[0].valueAsText] == "CROSS"
+
+    networkDataset = parameters[3].value
+    outCoordSys    = parameters[12].value
+
+    # Default the coordinate system.
+    if networkDataset is not None and outCoordSys is None:
+      ndDesc = arcpy.Describe(networkDataset)
+      # If the network dataset's coordinate system is a projected one,
+      # use its coordinate system as the defualt.
+      if (ndDesc.spatialReference.projectionName != "" and
+        ndDesc.spatialReference.linearUnitName == "Meter" and
+        ndDesc.spatialReference.factoryCode != 0):
+        parameters[12].value = ndDesc.spatialReference.factoryCode
+
+  ###
+  # If any fields are invalid, show an appropriate error message.
+  ###
+  def updateMessages(self, parameters):
+    analysisTypes = self.kfHelper.getAnalysisTypeSelection()
+
+    if analysisTypes.get(parameters[0].valueAsText) == "CROSS" and parameters[2].value is None:
+      parameters[2].setErrorMessage("Destination points are required for cross analysis.")
+    else:
+      parameters[2].clearMessage()
+
+    # The nearest neighbors are found on the network's edges (see
+    # KFunctionHelper.getNetworkGraph), which must give the network dataset's
+    # distances.
+    if parameters[3].value is not None:
+      limitations = self.kfHelper.getNetworkGraphLimitations(parameters[3].value)
+
+      if len(limitations) != 0:
+        parameters[3].setErrorMessage("Nearest neighbors are found on the network's edges, connected at "
+          "their end points and measured by their length.  " + "  ".join(limitations))
+      else:
+        parameters[3].clearMessage()
+
+    outCoordSys = parameters[12].value
+
+    if outCoordSys is not None:
+      if outCoordSys.projectionName == "":
+        parameters[12].setErrorMessage("Output coordinate system must be a projected coordinate system.")
+      elif outCoordSys.linearUnitName != "Meter":
+        parameters[12].setErrorMessage("Output coordinate system must have a linear unit code of 'Meter.'")
+      else:
+        parameters[12].clearMessage()
+
+  ###
+  # Generate the random point permutations on the graph, in the same way as
+  # the K functions' random points (see KFunctionHelper.generateRandomPointBatch).
+  # Returns an array of location arrays, one per permutation.
+  # @param sampler A RandomPointSampler over the graph's edges.
+  ###
+  def _generateRandomPoints(self, sampler, numPoints, numPerms, seed, samplingMethod):
+    if samplingMethod == "Random":
+      permutations = []
+
+      for i in range(1, numPerms + 1):
+        if seed is not None:
+          sampler.seed(seed + i)
+        permutations.append(sampler.sample(numPoints))
+
+      return permutations
+
+    permutations = [[] for i in range(0, numPerms)]
+    for permNum, edgeID, offset in sampler.sampleBatch(numPoints, numPerms, samplingMethod):
+      permutations[permNum].append((edgeID, offset))
+
+    return permutations
+
+  ###
+  # Execute the tool.
+  ###
+  def execute(self, parameters, messages):
+    analysisType   = self.kfHelper.getAnalysisTypeSelection()[parameters[0].valueAsText]
+    srcPoints      = parameters[1].valueAsText
+    destPoints     = parameters[2].valueAsText
+    networkDataset = parameters[3].valueAsText
+    numBands       = parameters[4].value
+    begDist        = parameters[5].value
+    distInc        = parameters[6].value
+    snapDist       = parameters[7].value
+    outNetKLoc     = parameters[8].valueAsText
+    outRawFCName   = parameters[9].valueAsText
+    outAnlFCName   = parameters[10].valueAsText
+    numPermsDesc   = parameters[11].valueAsText
+    numPerms       = self.kfHelper.getPermutationSelection()[numPermsDesc]
+    outCoordSys    = parameters[12].value
+    seed           = parameters[13].value
+    samplingMethod = parameters[14].value or "Random"
+    ndDesc         = arcpy.Describe(networkDataset)
+    gkfSvc         = GlobalKFunctionSvc()
+    nnfSvc         = NearestNeighborFunctionSvc()
+    profiler       = StageProfiler(self.kfHelper.isMemoryTracingEnabled())
+
+    # Default the coordinate system to the network's.
+    if outCoordSys is None:
+      outCoordSys = ndDesc.spatialReference
+
+    messages.addMessage("\nAnalysis type: {0}".format(analysisType))
+    messages.addMessage("Origin points: {0}".format(srcPoints))
+    messages.addMessage("Destination points: {0}".format(destPoints))
+    messages.addMessage("Network dataset: {0}".format(networkDataset))
+    messages.addMessage("Number of distance bands: {0}".format(numBands))
+    messages.addMessage("Beginning distance: {0}".format(begDist))
+    messages.addMessage("Distance increment: {0}".format(distInc))
+    messages.addMessage("Snap distance: {0}".format(snapDist))
+    messages.addMessage("Output location (database path): {0}".format(outNetKLoc))
+    messages.addMessage("Raw nearest neighbor data table (raw analysis data): {0}".format(outRawFCName))
+    messages.addMessage("Nearest neighbor summary data (plottable data): {0}".format(outAnlFCName))
+    messages.addMessage("Number of random permutations: {0}".format(numPerms))
+    messages.addMessage("Network dataset length projected coordinate system: {0}".format(outCoordSys.name))
+    messages.addMessage("Random seed: {0}".format(seed))
+    messages.addMessage("Random point sampling: {0}\n".format(samplingMethod))
+
+    # The nearest neighbors are found on an in-memory copy of the network, so
+    # no OD cost matrices are solved.  The edges and points are projected to
+    # the output coordinate system so that the distances are in meters.
+    with profiler.span("network_graph"):
+      graph = self.kfHelper.getNetworkGraph(networkDataset, outCoordSys)
+    messages.addMessage("Network edges: {0}".format(graph.getNumberOfEdges()))
+
+    with profiler.span("snap_points"):
+      srcLocs, numMissed = self.kfHelper.snapPoints(os.path.join(outNetKLoc, srcPoints), graph,
+        outCoordSys, snapDist)
+      messages.addMessage("Origin points on the network: {0} ({1} not within the snap distance)".format(
+        len(srcLocs), numMissed))
+
+      if analysisType == "CROSS":
+        destLocs, numMissed = self.kfHelper.snapPoints(os.path.join(outNetKLoc, destPoints), graph,
+          outCoordSys, snapDist)
+        messages.addMessage("Destination points on the network: {0} ({1} not within the snap distance)".format(
+          len(destLocs), numMissed))
+
+    # Searches don't go past the last distance band.
+    cutoff = gkfSvc.getCutoff(numBands, distInc, begDist)
+    nnCalc = NearestNeighborCalculation(graph)
+
+    # G: the distance from each crash to the nearest other crash (or to the
+    # nearest origin for cross analysis).  F (global analysis): the distance
+    # from random reference locations to the nearest crash.  The reference
+    # locations are the same for every permutation.
+    def calculate(locations):
+      results = {}
+
+      if analysisType == "CROSS":
+        results["G"] = nnCalc.getNearestDistances(list(enumerate(locations, 1)), srcLocs, cutoff)
+      else:
+        points       = list(enumerate(locations, 1))
+        results["G"] = nnCalc.getNearestDistances(points, None, cutoff)
+        results["F"] = nnCalc.getNearestDistances(refLocs, points, cutoff)
+
+      return results
+
+    # The reference locations are drawn first, from the seed itself (the
+    # random permutations use seed + i, like the K functions).
+    crashLocs = [location for pointID, location in (destLocs if analysisType == "CROSS" else srcLocs)]
+    lengths   = [graph.getEdgeLength(edgeID) for edgeID in range(0, graph.getNumberOfEdges())]
+    sampler   = RandomPointSampler(lengths, None, Random(seed))
+    refLocs   = list(enumerate(sampler.sample(len(crashLocs)), 1))
+
+    with profiler.span("nearest_neighbors"):
+      observed = calculate(crashLocs)
+
+    # The number of bands is computed from the observed data if it's not given.
+    nnCalculations = {}
+    for function, nearestDists in observed.items():
+      nnCalculations[function] = [NearestNeighborCalculation.getDistanceBands(nearestDists,
+        begDist, distInc, numBands)]
+
+    if numBands is None:
+      numBands = max(len(calculations[0]) for calculations in nnCalculations.values())
+      for function, nearestDists in observed.items():
+        nnCalculations[function] = [NearestNeighborCalculation.getDistanceBands(nearestDists,
+          begDist, distInc, numBands)]
+    messages.addMessage("Iteration 0 (observed) complete.")
+
+    # Random point permutations of the crashes.
+    with profiler.span("random_points"):
+      permutations = self._generateRandomPoints(sampler, len(crashLocs), numPerms, seed, samplingMethod)
+
+    with profiler.span("permutation"):
+      for randLocs in permutations:
+        for function, nearestDists in calculate(randLocs).items():
+          nnCalculations[function].append(NearestNeighborCalculation.getDistanceBands(nearestDists,
+            begDist, distInc, numBands))
+    messages.addMessage("Random point permutations complete: {0}".format(numPerms))
+
+    # Store the raw analysis data.
+    messages.addMessage("Writing raw analysis data.")
+    with profiler.span("write_raw_analysis"):
+      nnfSvc.writeRawAnalysisData(outNetKLoc, outRawFCName, nnCalculations)
+
+    # Analyze the data and store the results.
+    messages.addMessage("Analyzing data.")
+    with profiler.span("analysis_summary"):
+      nnfSvc.writeAnalysisSummaryData(numPerms, nnCalculations, outNetKLoc, outAnlFCName)
+
+    # Write the time spent in each stage next to the output tables.
+    messages.addMessage("Profile report: {0}".format(profiler.writeReport(outNetKLoc, outAnlFCName)[0]))
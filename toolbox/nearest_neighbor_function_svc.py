@@ -0,0 +1,69 @@
+import arcpy
+import os
+import network_k_analysis
+
+# ArcMap caching prevention.
+network_k_analysis = reload(network_k_analysis)
+
+from network_k_analysis import NetworkKAnalysis
+
+class NearestNeighborFunctionSvc(object):
+  ###
+  # Write the raw analysis data.  The 0th iteration is the observed data.
+  # Subsequent iterations are the random point data.
+  # @param nnCalculations A dictionary of the distance bands of each iteration,
+  #        keyed by function name ("G" or "F").
+  ###
+  def writeRawAnalysisData(self, outNetKLoc, outRawFCName, nnCalculations):
+    outRawFCFullPath = os.path.join(outNetKLoc, outRawFCName)
+    arcpy.CreateTable_management(outNetKLoc, outRawFCName)
+
+    arcpy.AddField_management(outRawFCFullPath, "Function",         "TEXT")
+    arcpy.AddField_management(outRawFCFullPath, "Iteration_Number", "LONG")
+    arcpy.AddField_management(outRawFCFullPath, "Distance_Band",    "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "Point_Count",      "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "Proportion",       "DOUBLE")
+
+    with arcpy.da.InsertCursor(outRawFCFullPath,
+      ["Function", "Iteration_Number", "Distance_Band", "Point_Count", "Proportion"]) as cursor:
+      for function in sorted(nnCalculations.keys(), reverse=True):
+        for nnNum in range(0, len(nnCalculations[function])):
+          for distBand in nnCalculations[function][nnNum]:
+            cursor.insertRow([function, nnNum, distBand["distanceBand"], distBand["count"], distBand["proportion"]])
+
+  ###
+  # Perform the summary analysis and write the summary data.
+  # @param nnCalculations See writeRawAnalysisData.
+  ###
+  def writeAnalysisSummaryData(self, numPerms, nnCalculations, outNetKLoc, outAnlFCName):
+    outAnlFCFullPath = os.path.join(outNetKLoc, outAnlFCName)
+    arcpy.CreateTable_management(outNetKLoc, outAnlFCName)
+    arcpy.AddField_management(outAnlFCFullPath, "Function",      "TEXT")
+    arcpy.AddField_management(outAnlFCFullPath, "Description",   "TEXT")
+    arcpy.AddField_management(outAnlFCFullPath, "Distance_Band", "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "Point_Count",   "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "Proportion",    "DOUBLE")
+
+    with arcpy.da.InsertCursor(outAnlFCFullPath,
+      ["Function", "Description", "Distance_Band", "Point_Count", "Proportion"]) as cursor:
+      for function in sorted(nnCalculations.keys(), reverse=True):
+        calculations = nnCalculations[function]
+
+        self._writeAnalysis(cursor, function, calculations[0], "Observed")
+
+        # The envelopes are computed the same way as the network K function's.
+        # No confidence intervals are computed if there are no random
+        # permutations.
+        if numPerms != 0:
+          nnAn_95 = NetworkKAnalysis(.95, calculations)
+          nnAn_90 = NetworkKAnalysis(.90, calculations)
+
+          self._writeAnalysis(cursor, function, nnAn_95.getLowerConfidenceEnvelope(), "2.5% Lower Bound")
+          self._writeAnalysis(cursor, function, nnAn_95.getUpperConfidenceEnvelope(), "2.5% Upper Bound")
+          self._writeAnalysis(cursor, function, nnAn_90.getLowerConfidenceEnvelope(), "5% Lower Bound")
+          self._writeAnalysis(cursor, function, nnAn_90.getUpperConfidenceEnvelope(), "5% Upper Bound")
+
+  # Write the analysis data in distBands using cursor.
+  def _writeAnalysis(self, cursor, function, distBands, description):
+    for distBand in distBands:
+      cursor.insertRow([function, description, distBand["distanceBand"], distBand["count"], distBand["proportion"]])
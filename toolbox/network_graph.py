@@ -0,0 +1,222 @@
+import math
+
+###
+# An in-memory, undirected network built from polylines.  Lines are connected
+# at their end points (end point connectivity, like the default network
+# dataset connectivity policy).  Each line becomes an edge whose cost is its
+# length.
+#
+# Points are placed on the network as locations, which are (edgeID, offset)
+# tuples.  The offset is the distance along the edge from its first node.
+###
+class NetworkGraph(object):
+  ###
+  # Initialize an empty network.
+  # @param tolerance End points closer than this are treated as the same node.
+  ###
+  def __init__(self, tolerance=0.001):
+    self._tolerance = tolerance
+    self._nodeIDs   = {}
+    self._nodeXY    = []
+    self._adjacency = []
+    self._edges     = []
+    self._edgeIndex = None
+
+  ###
+  # Create a network from an array of polylines.
+  # @param lines An array of polylines, each an array of (x, y) vertices.
+  # @param tolerance See the constructor.
+  ###
+  @staticmethod
+  def fromLines(lines, tolerance=0.001):
+    graph = NetworkGraph(tolerance)
+    for line in lines:
+      graph.addLine(line)
+    return graph
+
+  # Get the node ID for a coordinate, adding the node if needed.
+  def _getNode(self, x, y):
+    key = (int(round(x / self._tolerance)), int(round(y / self._tolerance)))
+
+    if key not in self._nodeIDs:
+      self._nodeIDs[key] = len(self._nodeXY)
+      self._nodeXY.append((x, y))
+      self._adjacency.append([])
+
+    return self._nodeIDs[key]
+
+  ###
+  # Add a line to the network and return its edge ID.
+  # @param vertices An array of (x, y) vertices.
+  # @param length The cost of the edge (optional).  Defaults to the length of
+  #        the line.
+  ###
+  def addLine(self, vertices, length=None):
+    vertices = [(float(x), float(y)) for x, y in vertices]
+    fromNode = self._getNode(*vertices[0])
+    toNode   = self._getNode(*vertices[-1])
+    edgeID   = len(self._edges)
+
+    if length is None:
+      length = sum(math.hypot(x2 - x1, y2 - y1)
+        for (x1, y1), (x2, y2) in zip(vertices[:-1], vertices[1:]))
+
+    self._edges.append((fromNode, toNode, length, vertices))
+    self._adjacency[fromNode].append((toNode, length))
+    if toNode != fromNode:
+      self._adjacency[toNode].append((fromNode, length))
+
+    # The snapping index is stale.
+    self._edgeIndex = None
+
+    return edgeID
+
+  # Get the number of nodes.
+  def getNumberOfNodes(self):
+    return len(self._nodeXY)
+
+  # Get the number of edges.
+  def getNumberOfEdges(self):
+    return len(self._edges)
+
+  # Get the (x, y) coordinate of a node.
+  def getNodeCoordinates(self, node):
+    return self._nodeXY[node]
+
+  # Get an array of (neighbor, length) tuples for a node.
+  def getNeighbors(self, node):
+    return self._adjacency[node]
+
+  # Get the adjacency lists of all the nodes, indexed by node.
+  def getAdjacency(self):
+    return self._adjacency
+
+  # Get an edge as a (fromNode, toNode, length, vertices) tuple.
+  def getEdge(self, edgeID):
+    return self._edges[edgeID]
+
+  # Get the length of an edge.
+  def getEdgeLength(self, edgeID):
+    return self._edges[edgeID][2]
+
+  # Get the total length of the network.
+  def getTotalLength(self):
+    return sum(edge[2] for edge in self._edges)
+
+  # Get the shortest edge length (0 for an empty network).
+  def getMinimumEdgeLength(self):
+    if len(self._edges) == 0:
+      return 0
+    return min(edge[2] for edge in self._edges)
+
+  ###
+  # Get the nodes a location is between, with the distance to each.
+  # @param location An (edgeID, offset) tuple.
+  ###
+  def getLocationSeeds(self, location):
+    fromNode, toNode, length, vertices = self._edges[location[0]]
+    return [(fromNode, location[1]), (toNode, length - location[1])]
+
+  ###
+  # Get the (x, y) coordinate of a location.
+  # @param location An (edgeID, offset) tuple.
+  ###
+  def getLocationCoordinates(self, location):
+    edgeID, offset = location
+    vertices       = self._edges[edgeID][3]
+    lineLen        = self._getLineLength(vertices)
+
+    # The offset is measured in edge cost, which may not be the line length.
+    if self._edges[edgeID][2] > 0:
+      remaining = float(offset) / self._edges[edgeID][2] * lineLen
+    else:
+      remaining = 0
+
+    for (x1, y1), (x2, y2) in zip(vertices[:-1], vertices[1:]):
+      segLen = math.hypot(x2 - x1, y2 - y1)
+      if remaining <= segLen and segLen > 0:
+        frac = remaining / segLen
+        return (x1 + (x2 - x1) * frac, y1 + (y2 - y1) * frac)
+      remaining -= segLen
+
+    return vertices[-1]
+
+  # Get the geometric length of an array of vertices.
+  def _getLineLength(self, vertices):
+    return sum(math.hypot(x2 - x1, y2 - y1)
+      for (x1, y1), (x2, y2) in zip(vertices[:-1], vertices[1:]))
+
+  # Build a grid index of the line segments for snapping.
+  def _buildEdgeIndex(self):
+    numSegs = sum(len(edge[3]) - 1 for edge in self._edges)
+    totLen  = sum(self._getLineLength(edge[3]) for edge in self._edges)
+    cellSz  = max(totLen / max(numSegs, 1), self._tolerance)
+    grid    = {}
+
+    for edgeID in range(0, len(self._edges)):
+      vertices = self._edges[edgeID][3]
+      startLen = 0.0
+
+      for (x1, y1), (x2, y2) in zip(vertices[:-1], vertices[1:]):
+        minCX = int(math.floor(min(x1, x2) / cellSz))
+        maxCX = int(math.floor(max(x1, x2) / cellSz))
+        minCY = int(math.floor(min(y1, y2) / cellSz))
+        maxCY = int(math.floor(max(y1, y2) / cellSz))
+        seg   = (edgeID, x1, y1, x2, y2, startLen)
+
+        for cX in range(minCX, maxCX + 1):
+          for cY in range(minCY, maxCY + 1):
+            grid.setdefault((cX, cY), []).append(seg)
+
+        startLen += math.hypot(x2 - x1, y2 - y1)
+
+    self._edgeIndex = (cellSz, grid)
+
+  ###
+  # Snap a point to the nearest edge and return its location, or None if there
+  # is no edge within snapDist.
+  # @param x The x coordinate.
+  # @param y The y coordinate.
+  # @param snapDist The search tolerance.
+  ###
+  def snapPoint(self, x, y, snapDist):
+    if self._edgeIndex is None:
+      self._buildEdgeIndex()
+
+    cellSz, grid = self._edgeIndex
+    best         = None
+    bestDist     = snapDist
+    minCX        = int(math.floor((x - snapDist) / cellSz))
+    maxCX        = int(math.floor((x + snapDist) / cellSz))
+    minCY        = int(math.floor((y - snapDist) / cellSz))
+    maxCY        = int(math.floor((y + snapDist) / cellSz))
+
+    for cX in range(minCX, maxCX + 1):
+      for cY in range(minCY, maxCY + 1):
+        for edgeID, x1, y1, x2, y2, startLen in grid.get((cX, cY), ()):
+          dX    = x2 - x1
+          dY    = y2 - y1
+          segSq = dX * dX + dY * dY
+
+          # Project the point onto the segment.
+          if segSq > 0:
+            frac = max(0.0, min(1.0, ((x - x1) * dX + (y - y1) * dY) / segSq))
+          else:
+            frac = 0.0
+
+          dist = math.hypot(x - (x1 + dX * frac), y - (y1 + dY * frac))
+
+          if dist <= bestDist and (best is None or dist < bestDist or edgeID < best[0]):
+            bestDist = dist
+            best     = (edgeID, startLen + math.sqrt(segSq) * frac)
+
+    if best is None:
+      return None
+
+    # Convert the geometric distance along the line to edge cost.
+    edgeID, along = best
+    lineLen       = self._getLineLength(self._edges[edgeID][3])
+    if lineLen > 0:
+      along = along / lineLen * self._edges[edgeID][2]
+
+    return (edgeID, along)
@@ -0,0 +1,42 @@
+import unittest
+
+from network_graph import NetworkGraph
+
+class NetworkGraphSuite(unittest.TestCase):
+  # Lines that share end points share nodes.
+  def test_connectivity(self):
+    graph = NetworkGraph.fromLines([
+      [(0, 0), (0, 1)],
+      [(0, 1), (1, 1), (1, 2)],
+      [(5, 5), (6, 5)]])
+
+    self.assertEqual(graph.getNumberOfNodes(), 5)
+    self.assertEqual(graph.getNumberOfEdges(), 3)
+    self.assertEqual(graph.getTotalLength(), 4)
+    self.assertEqual(graph.getMinimumEdgeLength(), 1)
+    self.assertEqual(graph.getEdgeLength(1), 2)
+    self.assertEqual(sorted(graph.getNeighbors(1)), [(0, 1), (2, 2)])
+    self.assertEqual(graph.getNodeCoordinates(2), (1, 2))
+
+  # Points snap to the closest edge within the snap distance.
+  def test_snap_point(self):
+    graph = NetworkGraph.fromLines([
+      [(0, 0), (10, 0)],
+      [(10, 0), (10, 5), (20, 5)]])
+
+    self.assertEqual(graph.snapPoint(3, 1, 2), (0, 3))
+    self.assertEqual(graph.snapPoint(12, 6, 2), (1, 7))
+    self.assertEqual(graph.snapPoint(3, 3, 2), None)
+
+    # Seeds are the distance to each end of the edge.
+    self.assertEqual(graph.getLocationSeeds((1, 7)), [(1, 7), (2, 8)])
+    self.assertEqual(graph.getLocationCoordinates((1, 7)), (12, 5))
+
+  # An explicit edge cost is used for offsets.
+  def test_edge_cost(self):
+    graph = NetworkGraph()
+    graph.addLine([(0, 0), (10, 0)], 20)
+
+    self.assertEqual(graph.getEdgeLength(0), 20)
+    self.assertEqual(graph.snapPoint(5, 0, 1), (0, 10))
+    self.assertEqual(graph.getLocationCoordinates((0, 10)), (5, 0))
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+###
+# A persistent cache of network dataset lengths.
+#
+# The length of a network only changes when its edges change, but it's needed
+# by every K function run.  Lengths are cached per network dataset, edge
+# fingerprint (see KFunctionHelper.getNetworkFingerprint), and the coordinate
+# system that the length is measured in.  All the lengths are kept in one small
+# JSON file.
+###
+class NetworkLengthCache(object):
+  ###
+  # Initialize the cache.
+  # @param cacheDir The directory where the cache file is stored.
+  ###
+  def __init__(self, cacheDir):
+    self._cacheDir = cacheDir
+
+  # Get the cache directory.
+  def getCacheDirectory(self):
+    return self._cacheDir
+
+  # Get the path of the cache file.
+  def _getPath(self):
+    return os.path.join(self._cacheDir, "network_lengths.json")
+
+  ###
+  # Get the cache key for a network.
+  # @param networkPath The catalog path of the network dataset.
+  # @param networkFingerprint A fingerprint of the network's edge sources.
+  # @param spatialReference The coordinate system that the length is measured
+  #        in, as a string (e.g. from SpatialReference.exportToString()).
+  ###
+  def getKey(self, networkPath, networkFingerprint, spatialReference):
+    parts = [os.path.normcase(os.path.normpath(networkPath)), networkFingerprint, spatialReference]
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+  # Read all the cached lengths.  A missing or unreadable file is empty.
+  def _read(self):
+    path = self._getPath()
+
+    if not os.path.isfile(path):
+      return {}
+
+    try:
+      with open(path, "r") as cacheFile:
+        return json.load(cacheFile)
+    except ValueError:
+      return {}
+
+  ###
+  # Load the length for a key.  Returns None if it isn't cached.
+  # @param key The cache key.
+  ###
+  def load(self, key):
+    return self._read().get(key)
+
+  ###
+  # Store the length for a key.
+  # @param key The cache key.
+  # @param length The network length.
+  ###
+  def save(self, key, length):
+    if not os.path.isdir(self._cacheDir):
+      os.makedirs(self._cacheDir)
+
+    lengths      = self._read()
+    lengths[key] = length
+
+    # Write to a temporary file first so that a failed run doesn't leave a
+    # partial file behind.
+    path    = self._getPath()
+    tmpPath = "{0}.{1}.tmp".format(path, os.getpid())
+
+    with open(tmpPath, "w") as cacheFile:
+      json.dump(lengths, cacheFile, indent=2, sort_keys=True)
+
+    if os.path.exists(path):
+      os.remove(path)
+    os.rename(tmpPath, path)
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from network_length_cache import NetworkLengthCache
+
+class NetworkLengthCacheSuite(unittest.TestCase):
+  def setUp(self):
+    self.cacheDir = os.path.join(tempfile.mkdtemp(), "cache")
+
+  def tearDown(self):
+    shutil.rmtree(os.path.dirname(self.cacheDir))
+
+  # Lengths are stored per key, and persist between instances.
+  def test_save_load(self):
+    cache = NetworkLengthCache(self.cacheDir)
+    key1  = cache.getKey("C:/data/streets.gdb/ND", "abc", "26911;NAD_1983_UTM_Zone_11N")
+    key2  = cache.getKey("C:/data/streets.gdb/ND", "abc", "3857;WGS_1984_Web_Mercator_Auxiliary_Sphere")
+
+    self.assertEqual(cache.load(key1), None)
+    cache.save(key1, 1234.5)
+    cache.save(key2, 1300.25)
+
+    self.assertEqual(NetworkLengthCache(self.cacheDir).load(key1), 1234.5)
+    self.assertEqual(NetworkLengthCache(self.cacheDir).load(key2), 1300.25)
+
+  # The key changes with the network, its edges, and the coordinate system.
+  def test_key(self):
+    cache = NetworkLengthCache(self.cacheDir)
+    key   = cache.getKey("streets.gdb/ND", "abc", "26911")
+
+    self.assertEqual(key, cache.getKey("streets.gdb/ND", "abc", "26911"))
+    self.assertNotEqual(key, cache.getKey("other.gdb/ND", "abc", "26911"))
+    self.assertNotEqual(key, cache.getKey("streets.gdb/ND", "abd", "26911"))
+    self.assertNotEqual(key, cache.getKey("streets.gdb/ND", "abc", "3857"))
+
+  # A corrupt cache file is treated as empty.
+  def test_corrupt(self):
+    cache = NetworkLengthCache(self.cacheDir)
+    key   = cache.getKey("streets.gdb/ND", "abc", "26911")
+
+    os.makedirs(self.cacheDir)
+    with open(os.path.join(self.cacheDir, "network_lengths.json"), "w") as cacheFile:
+      cacheFile.write("{")
+
+    self.assertEqual(cache.load(key), None)
+    cache.save(key, 10.0)
+    self.assertEqual(cache.load(key), 10.0)
+
+if __name__ == "__main__":
+  unittest.main()
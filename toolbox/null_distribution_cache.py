@@ -0,0 +1,170 @@
+import bisect
+import hashlib
+import json
+import math
+import os
+
+###
+# A persistent cache of the random point permutations that make up the null
+# distribution of a K function analysis.
+#
+# The random permutations only depend on the network, the number of points,
+# the weighting field, and the random seed, not on the observed points, so
+# they can be reused by any analysis with the same inputs (e.g. crash subsets
+# of the same size).  Each permutation is stored as a histogram of OD
+# distances at a fine base resolution: bin n counts the distances in
+# ((n - 1) * resolution, n * resolution].  Any distance bands that start and
+# step on multiples of the resolution can be counted exactly from it.
+###
+class NullDistributionCache(object):
+  ###
+  # Initialize the cache.
+  # @param cacheDir The directory where cache entries are stored.
+  # @param resolution The width of each histogram bin.
+  ###
+  def __init__(self, cacheDir, resolution=1.0):
+    self._cacheDir   = cacheDir
+    self._resolution = float(resolution)
+
+  # Get the cache directory.
+  def getCacheDirectory(self):
+    return self._cacheDir
+
+  # Get the histogram resolution.
+  def getResolution(self):
+    return self._resolution
+
+  ###
+  # Get the cache key for a set of inputs.
+  # @param networkFingerprint A fingerprint of the network dataset.
+  # @param numPoints The number of random points in each permutation.
+  # @param numPointsFieldName The weighting field, or None.
+  # @param seed The random seed.
+  # @param snapDist The snap distance.
+  # @param samplingMethod How the random points were generated (see
+  #        RandomPointSampler).
+  # @param outCoordSys The coordinate system that the points are projected
+  #        into, as a string (e.g. from SpatialReference.exportToString()).
+  # @param fieldChecksum A checksum of the weighting field's values (see
+  #        KFunctionHelper.getFieldChecksum), if there's a weighting field.
+  ###
+  def getKey(self, networkFingerprint, numPoints, numPointsFieldName, seed, snapDist, samplingMethod="Random",
+    outCoordSys=None, fieldChecksum=None):
+    parts = [networkFingerprint, numPoints, numPointsFieldName, seed, snapDist, self._resolution]
+
+    # Keys of plain random permutations are unchanged from before there was a
+    # choice.
+    if samplingMethod != "Random":
+      parts.append(samplingMethod)
+    if outCoordSys is not None:
+      parts.append(outCoordSys)
+    if fieldChecksum is not None:
+      parts.append(fieldChecksum)
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+  # Get the file path for a key.
+  def _getPath(self, key):
+    return os.path.join(self._cacheDir, "{0}.json".format(key))
+
+  ###
+  # Check if the distances bands can be counted exactly from the histograms.
+  # @param begDist The beginning distance.
+  # @param distInc The distance increment.
+  ###
+  def isAligned(self, begDist, distInc):
+    for dist in (begDist, distInc):
+      bins = dist / self._resolution
+      if abs(bins - round(bins)) > 1e-9:
+        return False
+    return True
+
+  ###
+  # Load the cached histograms for a key.  Returns an empty array if there are
+  # none, or if they were computed with a cutoff shorter than maxDist.
+  # @param key The cache key.
+  # @param maxDist The distance that the histograms must cover (None means
+  #        all distances, e.g. no cutoff).
+  ###
+  def load(self, key, maxDist):
+    path = self._getPath(key)
+
+    if not os.path.isfile(path):
+      return []
+
+    with open(path, "r") as cacheFile:
+      entry = json.load(cacheFile)
+
+    if entry["maxDist"] is not None and (maxDist is None or entry["maxDist"] < maxDist):
+      return []
+
+    return [dict((int(binNum), count) for binNum, count in hist) for hist in entry["histograms"]]
+
+  ###
+  # Store the histograms for a key, replacing any that are there.
+  # @param key The cache key.
+  # @param maxDist The cutoff the histograms were computed with (None means
+  #        all distances).
+  # @param histograms An array of histograms, in permutation order.
+  ###
+  def save(self, key, maxDist, histograms):
+    if not os.path.isdir(self._cacheDir):
+      os.makedirs(self._cacheDir)
+
+    entry = {
+      "maxDist":    maxDist,
+      "resolution": self._resolution,
+      "histograms": [sorted(hist.items()) for hist in histograms]}
+
+    # Write to a temporary file first so that a failed run doesn't leave a
+    # partial entry behind.
+    path    = self._getPath(key)
+    tmpPath = "{0}.{1}.tmp".format(path, os.getpid())
+
+    with open(tmpPath, "w") as cacheFile:
+      json.dump(entry, cacheFile)
+
+    if os.path.exists(path):
+      os.remove(path)
+    os.rename(tmpPath, path)
+
+  ###
+  # Make a histogram of OD distances.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  ###
+  def getHistogram(self, odDists):
+    hist = {}
+
+    for odDist in odDists:
+      binNum       = int(math.ceil(odDist["Total_Length"] / self._resolution))
+      hist[binNum] = hist.get(binNum, 0) + 1
+
+    return hist
+
+  ###
+  # Count the distance bands from a histogram.  Returns the same array of
+  # distance bands as NetworkKCalculation.getDistanceBands().
+  # @param hist A histogram from getHistogram.
+  # @param netLen The length of the network.
+  # @param numPoints The number of points in the permutation.
+  # @param begDist The beginning distance (aligned to the resolution).
+  # @param distInc The distance increment (aligned to the resolution).
+  # @param numBands The number of distance bands.
+  ###
+  def getDistanceBands(self, hist, netLen, numPoints, begDist, distInc, numBands):
+    bins      = sorted(hist)
+    counts    = [0]
+    density   = netLen / ((numPoints - 1) * numPoints)
+    curDist   = begDist
+    distBands = []
+
+    for binNum in bins:
+      counts.append(counts[-1] + hist[binNum])
+
+    for bandNum in range(0, numBands):
+      lastBin = int(round(curDist / self._resolution))
+      count   = counts[bisect.bisect_right(bins, lastBin)]
+
+      distBands.append({"distanceBand": curDist, "count": count, "KFunction": count * density})
+      curDist += distInc
+
+    return distBands
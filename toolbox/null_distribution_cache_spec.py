@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import unittest
+
+from random import Random
+from null_distribution_cache import NullDistributionCache
+from network_k_calculation import NetworkKCalculation
+
+class NullDistributionCacheSuite(unittest.TestCase):
+  def setUp(self):
+    self.cacheDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.cacheDir)
+
+  # Random OD distances.
+  def getODDists(self, num, seed):
+    rand = Random(seed)
+    return [{"Total_Length": rand.uniform(0, 5000), "OriginID": 1, "DestinationID": 2} for i in range(0, num)]
+
+  # The bands counted from a histogram match NetworkKCalculation.
+  def test_distance_bands(self):
+    ndc     = NullDistributionCache(self.cacheDir)
+    odDists = self.getODDists(2000, 1)
+    hist    = ndc.getHistogram(odDists)
+
+    for begDist, distInc, numBands in ((0, 100, 51), (250, 50, 20), (0, 1000, 3)):
+      netKCalc = NetworkKCalculation(123456.7, 45, odDists, begDist, distInc, numBands)
+      self.assertEqual(ndc.getDistanceBands(hist, 123456.7, 45, begDist, distInc, numBands),
+        netKCalc.getDistanceBands())
+
+  # Distances exactly on a band are counted in that band.
+  def test_band_edges(self):
+    ndc     = NullDistributionCache(self.cacheDir, 0.5)
+    odDists = [{"Total_Length": dist} for dist in (0, 0.5, 1, 1.25, 2)]
+    bands   = ndc.getDistanceBands(ndc.getHistogram(odDists), 10.0, 3, 0, 0.5, 5)
+    self.assertEqual([band["count"] for band in bands], [1, 2, 3, 4, 5])
+
+  # Bands must line up with the bins.
+  def test_aligned(self):
+    ndc = NullDistributionCache(self.cacheDir, 0.5)
+    self.assertTrue(ndc.isAligned(0, 100))
+    self.assertTrue(ndc.isAligned(2.5, 0.5))
+    self.assertFalse(ndc.isAligned(0, 0.75))
+    self.assertFalse(ndc.isAligned(0.2, 1))
+
+  # Histograms are stored, and only reused if they cover the requested range.
+  def test_save_load(self):
+    ndc   = NullDistributionCache(self.cacheDir)
+    key   = ndc.getKey("abc", 100, None, 42, 25)
+    hists = [ndc.getHistogram(self.getODDists(50, seed)) for seed in range(0, 3)]
+
+    self.assertEqual(ndc.load(key, 1000), [])
+    ndc.save(key, 3000, hists)
+
+    self.assertEqual(ndc.load(key, 1000), hists)
+    self.assertEqual(ndc.load(key, 3000), hists)
+    self.assertEqual(ndc.load(key, 3001), [])
+    self.assertEqual(ndc.load(key, None), [])
+
+    # Histograms without a cutoff cover everything.
+    ndc.save(key, None, hists[:1])
+    self.assertEqual(ndc.load(key, None), hists[:1])
+    self.assertEqual(ndc.load(key, 1e9), hists[:1])
+
+    # Other inputs have other keys.
+    self.assertNotEqual(key, ndc.getKey("abc", 101, None, 42, 25))
+    self.assertNotEqual(key, ndc.getKey("abc", 100, "AADT", 42, 25))
+    self.assertNotEqual(key, ndc.getKey("abc", 100, None, 43, 25))
+    self.assertNotEqual(key, ndc.getKey("abc", 100, None, 42, 25, "Random", "26911;NAD_1983_UTM_Zone_11N"))
+    self.assertEqual(key, ndc.getKey("abc", 100, None, 42, 25))
+
+    weighted = ndc.getKey("abc", 100, "AADT", 42, 25, "Random", None, "f00d")
+    self.assertNotEqual(weighted, ndc.getKey("abc", 100, "AADT", 42, 25, "Random", None, "beef"))
@@ -0,0 +1,238 @@
+import array
+import hashlib
+import json
+import os
+
+###
+# A persistent cache of the observed OD cost matrix (iteration 0) of a K
+# function analysis.
+#
+# Analyses are often rerun with the same points and network, changing only
+# the number of permutations or the output names, and the observed distances
+# are the same each time.  Entries are addressed by a fingerprint of the
+# inputs that the distances depend on: the points (their IDs and
+# coordinates), the network, the snap distance, the cutoff, and the output
+# coordinate system.  The network's fingerprint covers its settings (the
+# attributes, connectivity, and turns) as well as its edges (see
+# KFunctionHelper.getNetworkFingerprint).  Each entry is a binary file: a JSON
+# header line followed by the origin IDs, destination IDs, and lengths as
+# native arrays.
+#
+# The cache is kept under a disk budget.  Entries are touched when they're
+# loaded, and the least recently used entries are evicted when a new entry
+# doesn't fit.
+###
+class ObservedODCMCache(object):
+  # The version of the entry format.  Entries of other versions are misses.
+  FORMAT_VERSION = 1
+
+  # The array type codes of the IDs and the lengths.
+  ID_TYPE_CODE     = "l"
+  LENGTH_TYPE_CODE = "d"
+
+  # The file extension of the entries.
+  EXTENSION = ".odcm"
+
+  ###
+  # Initialize the cache.
+  # @param cacheDir The directory where cache entries are stored.
+  # @param maxBytes The disk budget, in bytes.  0 turns the cache off.
+  ###
+  def __init__(self, cacheDir, maxBytes=512 * 1024 * 1024):
+    self._cacheDir = cacheDir
+    self._maxBytes = maxBytes
+
+  # Get the cache directory.
+  def getCacheDirectory(self):
+    return self._cacheDir
+
+  # Get the disk budget, in bytes.
+  def getMaxBytes(self):
+    return self._maxBytes
+
+  # Check if the cache is on (the budget isn't 0).
+  def isEnabled(self):
+    return self._maxBytes > 0
+
+  ###
+  # Get a fingerprint of a set of points from their IDs and coordinates.  The
+  # order of the points doesn't matter.
+  # @param points An array of (ID, x, y) tuples.
+  ###
+  @staticmethod
+  def getPointsFingerprint(points):
+    points = sorted(points)
+    ids    = array.array("l", [point[0] for point in points])
+    coords = array.array("d", [coord for point in points for coord in point[1:3]])
+
+    # The arrays are hashed in the native layout (the cache is per machine).
+    # tobytes is tostring in Python 2.
+    hasher = hashlib.sha1()
+    hasher.update(str(len(points)).encode("utf-8"))
+    for column in (ids, coords):
+      hasher.update(column.tobytes() if hasattr(column, "tobytes") else column.tostring())
+    return hasher.hexdigest()
+
+  ###
+  # Get the cache key for a set of inputs.
+  # @param srcFingerprint A fingerprint of the source points (see
+  #        getPointsFingerprint).
+  # @param destFingerprint A fingerprint of the destination points, or None if
+  #        they're the source points (global analysis).
+  # @param networkFingerprint A fingerprint of the network dataset.
+  # @param snapDist The snap distance.
+  # @param cutoff The cutoff distance (None for no cutoff).
+  # @param outCoordSys The output coordinate system, as a string (optional).
+  ###
+  def getKey(self, srcFingerprint, destFingerprint, networkFingerprint, snapDist, cutoff, outCoordSys=None):
+    parts = [srcFingerprint, destFingerprint, networkFingerprint, snapDist, cutoff, self.FORMAT_VERSION]
+
+    if outCoordSys is not None:
+      parts.append(outCoordSys)
+
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+  # Get the file path for a key.
+  def _getPath(self, key):
+    return os.path.join(self._cacheDir, "{0}{1}".format(key, self.EXTENSION))
+
+  ###
+  # Load the observed distances for a key.  Returns None if they aren't cached
+  # (or the entry can't be used, e.g. it was written on a platform with
+  # different array sizes).
+  # @param key The cache key.
+  ###
+  def load(self, key):
+    path = self._getPath(key)
+
+    if not self.isEnabled() or not os.path.isfile(path):
+      return None
+
+    try:
+      with open(path, "rb") as cacheFile:
+        header = json.loads(cacheFile.readline().decode("utf-8"))
+
+        if header["version"] != self.FORMAT_VERSION or \
+          header["idSize"] != array.array(self.ID_TYPE_CODE).itemsize:
+          return None
+
+        numDists = header["numDists"]
+        columns  = [array.array(typeCode) for typeCode in
+          (self.ID_TYPE_CODE, self.ID_TYPE_CODE, self.LENGTH_TYPE_CODE)]
+
+        # The arrays are written in the native byte order.
+        for column in columns:
+          column.fromfile(cacheFile, numDists)
+    except (IOError, OSError, ValueError, EOFError):
+      return None
+
+    # The entry was used, so it's the newest as far as eviction goes.
+    try:
+      os.utime(path, None)
+    except OSError:
+      pass
+
+    return [{"Total_Length": length, "OriginID": originID, "DestinationID": destID}
+      for originID, destID, length in zip(columns[0], columns[1], columns[2])]
+
+  ###
+  # Store the observed distances for a key, and evict the least recently used
+  # entries that no longer fit in the budget.  Distances that don't fit in the
+  # budget on their own aren't stored.
+  # @param key The cache key.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  ###
+  def save(self, key, odDists):
+    if not self.isEnabled():
+      return
+
+    header = {
+      "version":  self.FORMAT_VERSION,
+      "numDists": len(odDists),
+      "idSize":   array.array(self.ID_TYPE_CODE).itemsize}
+    columns = [
+      array.array(self.ID_TYPE_CODE,     [odDist["OriginID"] for odDist in odDists]),
+      array.array(self.ID_TYPE_CODE,     [odDist["DestinationID"] for odDist in odDists]),
+      array.array(self.LENGTH_TYPE_CODE, [odDist["Total_Length"] for odDist in odDists])]
+    headerLine = (json.dumps(header) + "\n").encode("utf-8")
+    numBytes   = len(headerLine) + sum(len(column) * column.itemsize for column in columns)
+
+    if numBytes > self._maxBytes:
+      return
+
+    if not os.path.isdir(self._cacheDir):
+      os.makedirs(self._cacheDir)
+
+    self.evict(self._maxBytes - numBytes)
+
+    # Write to a temporary file first so that a failed run doesn't leave a
+    # partial entry behind.
+    path    = self._getPath(key)
+    tmpPath = "{0}.{1}.tmp".format(path, os.getpid())
+
+    with open(tmpPath, "wb") as cacheFile:
+      cacheFile.write(headerLine)
+
+      for column in columns:
+        column.tofile(cacheFile)
+
+    # On Windows, rename doesn't replace an existing file.  Another process may
+    # write the same entry in between, in which case its entry is kept.
+    try:
+      if os.path.exists(path):
+        os.remove(path)
+      os.rename(tmpPath, path)
+    except OSError:
+      try:
+        os.remove(tmpPath)
+      except OSError:
+        pass
+
+  # Get the entries as (last use, size, path) tuples, least recently used
+  # first.
+  def _listEntries(self):
+    if not os.path.isdir(self._cacheDir):
+      return []
+
+    entries = []
+
+    for fileName in os.listdir(self._cacheDir):
+      if fileName.endswith(self.EXTENSION):
+        path = os.path.join(self._cacheDir, fileName)
+
+        try:
+          entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        except OSError:
+          continue
+
+    return sorted(entries)
+
+  # Get the total size of the entries, in bytes.
+  def getSize(self):
+    return sum(entry[1] for entry in self._listEntries())
+
+  ###
+  # Evict the least recently used entries until the entries take at most
+  # maxBytes.  Returns the number of entries that were evicted.
+  # @param maxBytes The size to evict down to (optional).  Defaults to the
+  #        budget.
+  ###
+  def evict(self, maxBytes=None):
+    maxBytes   = self._maxBytes if maxBytes is None else maxBytes
+    entries    = self._listEntries()
+    totalBytes = sum(entry[1] for entry in entries)
+    numEvicted = 0
+
+    for lastUse, numBytes, path in entries:
+      if totalBytes <= maxBytes:
+        break
+
+      try:
+        os.remove(path)
+      except OSError:
+        continue
+
+      totalBytes -= numBytes
+      numEvicted += 1
+
+    return numEvicted
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from observed_odcm_cache import ObservedODCMCache
+
+class ObservedODCMCacheSuite(unittest.TestCase):
+  def setUp(self):
+    self.cacheDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.cacheDir)
+
+  # Some OD distances.
+  def getODDists(self, num):
+    return [{"Total_Length": i * 1.5, "OriginID": i + 1, "DestinationID": num - i} for i in range(0, num)]
+
+  # The distances are stored and loaded in order.
+  def test_save_load(self):
+    cache   = ObservedODCMCache(self.cacheDir)
+    key     = cache.getKey("src", None, "net", 25, None)
+    odDists = self.getODDists(100)
+
+    self.assertEqual(cache.load(key), None)
+    cache.save(key, odDists)
+    self.assertEqual(cache.load(key), odDists)
+    self.assertEqual(cache.load(cache.getKey("src", None, "net", 25, 1000)), None)
+    self.assertEqual(cache.load(cache.getKey("src", None, "net", 25, None, "26911;NAD_1983_UTM_Zone_11N")), None)
+
+    cache.save(key, [])
+    self.assertEqual(cache.load(key), [])
+
+  # The points' fingerprint depends on the IDs and coordinates, not the order.
+  def test_fingerprint(self):
+    points = [(1, 10.0, 20.0), (2, 30.0, 40.0), (3, 50.0, 60.0)]
+    fp     = ObservedODCMCache.getPointsFingerprint(points)
+
+    self.assertEqual(ObservedODCMCache.getPointsFingerprint(list(reversed(points))), fp)
+    self.assertNotEqual(ObservedODCMCache.getPointsFingerprint(points[:2]), fp)
+    self.assertNotEqual(ObservedODCMCache.getPointsFingerprint([(1, 10.0, 20.0), (2, 30.0, 40.5),
+      (3, 50.0, 60.0)]), fp)
+    self.assertNotEqual(ObservedODCMCache.getPointsFingerprint([(1, 10.0, 20.0), (2, 30.0, 40.0),
+      (4, 50.0, 60.0)]), fp)
+
+  # The least recently used entries are evicted to stay in the budget.
+  def test_eviction(self):
+    probe      = ObservedODCMCache(self.cacheDir)
+    probe.save("probe", self.getODDists(100))
+    entryBytes = probe.getSize()
+    os.remove(os.path.join(self.cacheDir, "probe.odcm"))
+
+    cache = ObservedODCMCache(self.cacheDir, entryBytes * 2)
+
+    for lastUse, key in enumerate(("c", "b", "a")):
+      cache.save(key, self.getODDists(100))
+      os.utime(os.path.join(self.cacheDir, "{0}.odcm".format(key)), (1000 + lastUse, 1000 + lastUse))
+
+    # Two fit, so the oldest ("c") was evicted.  Loading "b" makes it newer
+    # than "a".
+    self.assertEqual(cache.load("c"), None)
+    self.assertNotEqual(cache.load("b"), None)
+
+    cache.save("d", self.getODDists(100))
+    self.assertEqual(cache.load("a"), None)
+    self.assertNotEqual(cache.load("b"), None)
+    self.assertNotEqual(cache.load("d"), None)
+    self.assertTrue(cache.getSize() <= entryBytes * 2)
+
+    # Entries that don't fit on their own aren't stored.
+    cache.save("e", self.getODDists(1000))
+    self.assertEqual(cache.load("e"), None)
+    self.assertEqual(cache.evict(0), 2)
+
+  # A budget of 0 turns the cache off.
+  def test_disabled(self):
+    cache = ObservedODCMCache(self.cacheDir, 0)
+
+    self.assertFalse(cache.isEnabled())
+    cache.save("a", self.getODDists(10))
+    self.assertEqual(cache.load("a"), None)
+    self.assertEqual(os.listdir(self.cacheDir), [])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,296 @@
+###
+# An offline stand-in for the parts of arcpy that the Crash Analysis Toolbox
+# uses, so that the tools can be run, timed, and profiled without ArcGIS.
+#
+# Data is stored in file-based tables (see _storage), OD cost matrices are
+# solved with LocalODCMSolver (see na), and Python toolboxes are imported with
+# ImportToolbox as usual.  Coordinates are never projected: offline data should
+# be created in the coordinate system the tools are run with.
+#
+# Put the directory that holds this package ahead of any real arcpy on
+# sys.path; offline_runner does this.
+###
+import os
+import random
+import sys
+
+from ._geometry          import Array, Point, PointGeometry, Polyline, getPartLength, getPointAlong
+from ._spatial_reference import SpatialReference
+from ._storage           import ExecuteError, FileDataset, LayerDataset, OID_FIELD, Result, SHAPE_FIELD
+from ._storage           import env, exists, getFields, layers, openDataset, resolvePath
+from ._toolbox           import Messages, Parameter, importToolbox, toolMessages
+
+from . import mapping
+from . import da
+from . import na
+
+# Random numbers for tools, reseeded from env.randomGenerator.
+_random = random.Random()
+
+class _Object(object):
+  def __init__(self, **kwargs):
+    self.__dict__.update(kwargs)
+
+###
+# Describe a dataset, layer, workspace, or network dataset.
+# @param value A path, name, or layer.
+###
+def Describe(value, datatype=None):
+  if isinstance(value, mapping.Layer) and not isinstance(value, na.NALayer):
+    desc          = Describe(value.getDataset())
+    desc.name     = value.name
+    desc.dataType = "FeatureLayer"
+    return desc
+
+  path = resolvePath(value) if not hasattr(value, "iterRows") else value.path
+
+  if path not in layers and not hasattr(value, "iterRows") and os.path.isdir(path) and \
+    not os.path.isfile(os.path.join(path, "schema.json")):
+    return _Object(name=os.path.basename(path), baseName=os.path.splitext(os.path.basename(path))[0],
+      path=os.path.dirname(path), catalogPath=path, dataType="Workspace", workspaceType="LocalDatabase")
+
+  dataset  = openDataset(value)
+  name     = dataset.getName()
+  desc     = _Object(
+    name=name,
+    baseName=os.path.splitext(name)[0],
+    path=os.path.dirname(dataset.getSource().path),
+    catalogPath=dataset.getSource().path,
+    dataType=dataset.getDataType(),
+    spatialReference=dataset.getSpatialReference())
+
+  if desc.dataType == "NetworkDataset":
+    desc.edgeSources     = [_Object(name=sourceName, sourceType="EdgeFeature")
+      for sourceName in dataset.schema["edgeSources"]]
+    desc.junctionSources = []
+    desc.extent          = _getExtent([row for edgePath in desc.edgeSources
+      for row in openDataset(os.path.join(desc.path, edgePath.name)).iterRows()])
+    return desc
+
+  desc.fields         = [_Object(name=fieldName, type=fieldType, aliasName=fieldName)
+    for fieldName, fieldType in getFields(dataset)]
+  desc.OIDFieldName   = OID_FIELD
+  desc.hasOID         = True
+  desc.shapeType      = dataset.getShapeType()
+  desc.shapeFieldName = SHAPE_FIELD if desc.shapeType else None
+
+  if desc.shapeType:
+    desc.extent = _getExtent(list(dataset.iterRows()))
+
+  return desc
+
+# Get the extent of some rows.
+def _getExtent(rows):
+  xs = []
+  ys = []
+
+  for row in rows:
+    shape = row[SHAPE_FIELD]
+    if shape is None:
+      continue
+    if len(shape) == 2 and not isinstance(shape[0], list):
+      xs.append(shape[0])
+      ys.append(shape[1])
+    else:
+      for part in shape:
+        xs.extend(x for x, y in part)
+        ys.extend(y for x, y in part)
+
+  if len(xs) == 0:
+    return _Object(XMin=0.0, YMin=0.0, XMax=0.0, YMax=0.0, width=0.0, height=0.0)
+
+  return _Object(XMin=min(xs), YMin=min(ys), XMax=max(xs), YMax=max(ys),
+    width=max(xs) - min(xs), height=max(ys) - min(ys))
+
+# Get the path of a new dataset.
+def _getOutputPath(out_path, out_name):
+  return os.path.join(resolvePath(out_path) if out_path else env.workspace, out_name)
+
+def Exists(dataset):
+  return exists(dataset)
+
+def Delete_management(in_data, data_type=None):
+  path = resolvePath(in_data)
+
+  if path in layers:
+    del layers[path]
+  elif os.path.isdir(path):
+    import shutil
+    shutil.rmtree(path)
+
+  return Result([True])
+
+def CreateTable_management(out_path, out_name, template=None, config_keyword=None):
+  path = _getOutputPath(out_path, out_name)
+  FileDataset.create(path, {"dataType": "Table"})
+  return Result([path])
+
+def CreateFeatureclass_management(out_path, out_name, geometry_type="POLYGON", template=None,
+  has_m="DISABLED", has_z="DISABLED", spatial_reference=None, config_keyword=None):
+  path = _getOutputPath(out_path, out_name)
+  FileDataset.create(path, {
+    "dataType":         "FeatureClass",
+    "shapeType":        str(geometry_type).capitalize(),
+    "spatialReference": SpatialReference(spatial_reference).toJSON()})
+  return Result([path])
+
+def AddField_management(in_table, field_name, field_type, field_precision=None, field_scale=None,
+  field_length=None, field_alias=None, field_is_nullable=None, field_is_required=None, field_domain=None):
+  openDataset(in_table).addField(field_name, field_type)
+  return Result([in_table])
+
+# Tables are scanned, so indexes are not kept.
+def AddIndex_management(in_table, fields, index_name=None, unique=None, ascending=None):
+  openDataset(in_table)
+  return Result([in_table])
+
+def GetCount_management(in_rows):
+  return Result([str(sum(1 for row in openDataset(in_rows).iterRows()))])
+
+def AddFieldDelimiters(datasource, field):
+  return field
+
+def MakeFeatureLayer_management(in_features, out_layer, where_clause=None, workspace=None, field_info=None):
+  layers[out_layer] = LayerDataset(out_layer, openDataset(in_features), where_clause)
+  return Result([mapping.Layer(out_layer)])
+
+def MakeTableView_management(in_table, out_view, where_clause=None, workspace=None, field_info=None):
+  return MakeFeatureLayer_management(in_table, out_view, where_clause)
+
+# Copy a dataset's schema and rows to a new dataset.
+def _copy(source, path, where=None, spatialReference=None):
+  schema = {
+    "dataType":         "FeatureClass" if source.getShapeType() else "Table",
+    "shapeType":        source.getShapeType(),
+    "spatialReference": (spatialReference or source.getSpatialReference()).toJSON(),
+    "fields":           [{"name": name, "type": fieldType} for name, fieldType in source.getUserFields()]}
+  dataset = FileDataset.create(path, schema)
+  match   = LayerDataset(None, source, where)
+  dataset.appendRows(list(match.iterRows()))
+  return dataset
+
+def FeatureClassToFeatureClass_conversion(in_features, out_path, out_name, where_clause=None,
+  field_mapping=None, config_keyword=None):
+  path = _getOutputPath(out_path, out_name)
+  _copy(openDataset(in_features), path, where_clause)
+  return Result([path])
+
+def CopyFeatures_management(in_features, out_feature_class, config_keyword=None):
+  path = resolvePath(out_feature_class)
+  _copy(openDataset(in_features), path)
+  return Result([path])
+
+###
+# Coordinates are not transformed offline, so only a dataset that is already
+# in the output coordinate system can be "projected" (copied).
+###
+def Project_management(in_dataset, out_dataset, out_coor_system, transform_method=None,
+  in_coor_system=None, preserve_shape=None, max_deviation=None):
+  source  = openDataset(in_dataset)
+  outSR   = SpatialReference(out_coor_system)
+
+  if source.getSpatialReference() != outSR:
+    raise ExecuteError("Offline: cannot project {0} from {1} to {2}.".format(
+      in_dataset, source.getSpatialReference().name, outSR.name))
+
+  path = resolvePath(out_dataset)
+  _copy(source, path, None, outSR)
+  return Result([path])
+
+###
+# Dissolve all the features into one multipart feature (dissolve fields are
+# not supported).
+###
+def Dissolve_management(in_features, out_feature_class, dissolve_field=None, statistics_fields=None,
+  multi_part="MULTI_PART", unsplit_lines="DISSOLVE_LINES"):
+  source  = openDataset(in_features)
+  path    = resolvePath(out_feature_class)
+  dataset = FileDataset.create(path, {
+    "dataType":         "FeatureClass",
+    "shapeType":        source.getShapeType(),
+    "spatialReference": source.getSpatialReference().toJSON()})
+  parts   = [part for row in source.iterRows() for part in (row[SHAPE_FIELD] or [])]
+  dataset.appendRows([{SHAPE_FIELD: parts}])
+  return Result([path])
+
+# Get the random number generator for a tool, seeded from env.randomGenerator
+# ("<seed> <generator>"; a seed of 0 continues the current sequence).
+def _getRandom():
+  if env.randomGenerator:
+    seed = int(str(env.randomGenerator).split()[0])
+    if seed != 0:
+      return random.Random(seed)
+  return _random
+
+###
+# Create random points along each feature of a line feature class (in the
+# constraining feature class's coordinates).  Each point has a CID field with
+# the ObjectID of its constraining feature.
+###
+def CreateRandomPoints_management(out_path, out_name, constraining_feature_class=None,
+  constraining_extent=None, number_of_points_or_field=100, minimum_allowed_distance=None,
+  create_multipoint_output=None, multipoint_size=None):
+  source  = openDataset(constraining_feature_class)
+  path    = _getOutputPath(out_path, out_name)
+  rand    = _getRandom()
+  dataset = FileDataset.create(path, {
+    "dataType":         "FeatureClass",
+    "shapeType":        "Point",
+    "spatialReference": source.getSpatialReference().toJSON(),
+    "fields":           [{"name": "CID", "type": "LONG"}]})
+  points  = []
+
+  try:
+    numPoints = int(number_of_points_or_field)
+    reader    = lambda row: numPoints
+  except (TypeError, ValueError):
+    fieldName = [name for name, fieldType in getFields(source) if name.lower() == str(number_of_points_or_field).lower()][0]
+    reader    = lambda row: int(row.get(fieldName) or 0)
+
+  for row in source.iterRows():
+    parts  = row[SHAPE_FIELD] or []
+    length = sum(getPartLength(part) for part in parts)
+
+    for i in range(0, reader(row)):
+      x, y = getPointAlong(parts, rand.random() * length)
+      points.append({SHAPE_FIELD: [x, y], "CID": row[OID_FIELD]})
+
+  dataset.appendRows(points)
+  return Result([path])
+
+def CheckExtension(extension_code):
+  return "Available"
+
+def CheckOutExtension(extension_code):
+  return "CheckedOut"
+
+def CheckInExtension(extension_code):
+  return "CheckedIn"
+
+def GetInstallInfo(product=None):
+  return {"ProductName": "Offline", "Version": "10.8", "InstallDir": os.path.dirname(__file__)}
+
+def RefreshTOC():
+  pass
+
+def RefreshActiveView():
+  pass
+
+def AddMessage(message):
+  toolMessages.addMessage(message)
+
+def AddWarning(message):
+  toolMessages.addWarningMessage(message)
+
+def AddError(message):
+  toolMessages.addErrorMessage(message)
+
+def GetMessages(severity=0):
+  return "\n".join(message for msgSeverity, message in toolMessages.messages if msgSeverity >= severity)
+
+###
+# Import a Python toolbox: each tool becomes a function named
+# <ToolClass>_<alias> (e.g. NetworkDatasetLength_crashAnalysis).
+###
+def ImportToolbox(input_file, module_name=None):
+  return importToolbox(resolvePath(input_file), sys.modules[__name__], module_name)
@@ -0,0 +1,144 @@
+import math
+
+###
+# Geometry objects.  Only points and polylines are supported, which is all that
+# the toolbox uses.  Shapes are stored in tables as plain lists: [x, y] for a
+# point and [[[x, y], ...], ...] (an array of parts) for a polyline.
+###
+
+class Point(object):
+  ###
+  # Initialize the point.
+  # @param X The x coordinate.
+  # @param Y The y coordinate.
+  ###
+  def __init__(self, X=None, Y=None, Z=None, M=None, ID=None):
+    self.X  = X
+    self.Y  = Y
+    self.Z  = Z
+    self.M  = M
+    self.ID = ID
+
+  def __repr__(self):
+    return "Point({0}, {1})".format(self.X, self.Y)
+
+class Array(list):
+  # An array of Points (or of Arrays, for multipart lines).
+  def add(self, item):
+    self.append(item)
+
+class PointGeometry(object):
+  ###
+  # Initialize the geometry.
+  # @param inputs A Point.
+  # @param spatial_reference The spatial reference (optional).
+  ###
+  def __init__(self, inputs, spatial_reference=None):
+    self.firstPoint       = inputs
+    self.lastPoint        = inputs
+    self.centroid         = inputs
+    self.spatialReference = spatial_reference
+    self.length           = 0.0
+    self.partCount        = 1
+    self.pointCount       = 1
+    self.type             = "point"
+
+  # Get the shape as stored in a table.
+  def toShape(self):
+    return [self.firstPoint.X, self.firstPoint.Y]
+
+class Polyline(object):
+  ###
+  # Initialize the line.
+  # @param inputs An Array of Points, or an Array of Arrays of Points (one per
+  #        part).
+  # @param spatial_reference The spatial reference (optional).
+  ###
+  def __init__(self, inputs, spatial_reference=None):
+    if len(inputs) != 0 and isinstance(inputs[0], Point):
+      inputs = [inputs]
+
+    self._parts           = [[(point.X, point.Y) for point in part] for part in inputs]
+    self.spatialReference = spatial_reference
+    self.type             = "polyline"
+    self.partCount        = len(self._parts)
+    self.pointCount       = sum(len(part) for part in self._parts)
+    self.length           = sum(getPartLength(part) for part in self._parts)
+
+    if self.pointCount != 0:
+      self.firstPoint = Point(*self._parts[0][0])
+      self.lastPoint  = Point(*self._parts[-1][-1])
+      self.centroid   = Point(
+        sum(x for part in self._parts for x, y in part) / self.pointCount,
+        sum(y for part in self._parts for x, y in part) / self.pointCount)
+    else:
+      self.firstPoint = self.lastPoint = self.centroid = None
+
+  # Get a part as an Array of Points.
+  def getPart(self, index=None):
+    if index is None:
+      return Array([Array([Point(x, y) for x, y in part]) for part in self._parts])
+    return Array([Point(x, y) for x, y in self._parts[index]])
+
+  # Get the shape as stored in a table.
+  def toShape(self):
+    return [[[x, y] for x, y in part] for part in self._parts]
+
+  ###
+  # Get the point at a distance along the line (across parts, in order).
+  # @param distance The distance from the start of the line.
+  ###
+  def positionAlongLine(self, distance):
+    return PointGeometry(Point(*getPointAlong(self._parts, distance)), self.spatialReference)
+
+###
+# Get the length of a part.
+# @param part An array of (x, y) vertices.
+###
+def getPartLength(part):
+  return sum(math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(part[:-1], part[1:]))
+
+###
+# Get the point at a distance along an array of parts.
+# @param parts An array of parts, each an array of (x, y) vertices.
+# @param distance The distance from the start of the first part.
+###
+def getPointAlong(parts, distance):
+  for part in parts:
+    for (x1, y1), (x2, y2) in zip(part[:-1], part[1:]):
+      segLen = math.hypot(x2 - x1, y2 - y1)
+
+      if distance <= segLen and segLen > 0:
+        ratio = distance / segLen
+        return (x1 + (x2 - x1) * ratio, y1 + (y2 - y1) * ratio)
+
+      distance -= segLen
+
+  return tuple(parts[-1][-1])
+
+###
+# Convert a geometry (or a coordinate tuple) to the shape stored in a table.
+# @param geometry A PointGeometry, Point, Polyline, or (x, y) tuple.
+###
+def toShape(geometry):
+  if geometry is None:
+    return None
+  if isinstance(geometry, Point):
+    return [geometry.X, geometry.Y]
+  if hasattr(geometry, "toShape"):
+    return geometry.toShape()
+  if len(geometry) == 2 and not isinstance(geometry[0], (list, tuple)):
+    return [geometry[0], geometry[1]]
+  return [[[x, y] for x, y in part] for part in geometry]
+
+###
+# Convert a stored shape to a geometry.
+# @param shape The stored shape.
+# @param spatialReference The spatial reference.
+###
+def fromShape(shape, spatialReference=None):
+  if shape is None:
+    return None
+  if len(shape) == 2 and not isinstance(shape[0], list):
+    return PointGeometry(Point(shape[0], shape[1]), spatialReference)
+  return Polyline(Array([Array([Point(x, y) for x, y in part]) for part in shape]), spatialReference)
@@ -0,0 +1,102 @@
+###
+# A minimal spatial reference.  Coordinates are never transformed offline, so a
+# spatial reference is only a description: its name, factory code, projection,
+# linear unit, and ellipsoid.
+###
+
+# Known factory codes: code -> (name, projection name, linear unit name).
+KNOWN_CODES = {
+  4326:  ("GCS_WGS_1984", "", ""),
+  4269:  ("GCS_North_American_1983", "", ""),
+  3857:  ("WGS_1984_Web_Mercator_Auxiliary_Sphere", "Mercator_Auxiliary_Sphere", "Meter"),
+  26911: ("NAD_1983_UTM_Zone_11N", "Transverse_Mercator", "Meter"),
+  26912: ("NAD_1983_UTM_Zone_12N", "Transverse_Mercator", "Meter"),
+  32611: ("WGS_1984_UTM_Zone_11N", "Transverse_Mercator", "Meter")}
+
+# Ellipsoids: (semi-major axis, flattening).  NAD 83 uses GRS 1980, everything
+# else WGS 84.
+WGS_1984 = (6378137.0, 1 / 298.257223563)
+GRS_1980 = (6378137.0, 1 / 298.257222101)
+
+class SpatialReference(object):
+  ###
+  # Initialize the spatial reference.
+  # @param item A factory code, a name, or None (unknown).
+  ###
+  def __init__(self, item=None):
+    self.factoryCode    = 0
+    self.name           = "Unknown"
+    self.projectionName = ""
+    self.linearUnitName = ""
+    self.type           = "Unknown"
+    self.metersPerUnit  = 1.0
+    self.semiMajorAxis, self.flattening = WGS_1984
+
+    if isinstance(item, SpatialReference):
+      item = item.factoryCode or item.name
+
+    if item is None:
+      return
+
+    try:
+      code = int(item)
+    except (TypeError, ValueError):
+      code = None
+
+    if code is not None:
+      self.factoryCode = code
+      self.name, self.projectionName, self.linearUnitName = KNOWN_CODES.get(code,
+        ("Projected_{0}".format(code), "Transverse_Mercator", "Meter"))
+    else:
+      self.name = str(item)
+
+      for knownCode, (name, projectionName, linearUnitName) in KNOWN_CODES.items():
+        if name == self.name:
+          self.factoryCode    = knownCode
+          self.projectionName = projectionName
+          self.linearUnitName = linearUnitName
+
+    self.type = "Projected" if self.projectionName else "Geographic"
+
+    if "North_American_1983" in self.name or "NAD_1983" in self.name:
+      self.semiMajorAxis, self.flattening = GRS_1980
+
+  def __eq__(self, other):
+    return isinstance(other, SpatialReference) and other.name == self.name
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __hash__(self):
+    return hash(self.name)
+
+  def __repr__(self):
+    return "SpatialReference({0})".format(self.name)
+
+  # Get a string that identifies the spatial reference.
+  def exportToString(self):
+    return "{0};{1}".format(self.factoryCode, self.name)
+
+  ###
+  # Load from a string from exportToString.
+  # @param string The string.
+  ###
+  def loadFromString(self, string):
+    code, name = string.split(";", 1)
+    self.__init__(int(code) or name)
+
+  # Serialize for storage in a table schema.
+  def toJSON(self):
+    return {"factoryCode": self.factoryCode, "name": self.name}
+
+  ###
+  # Restore from a table schema.
+  # @param data A dictionary from toJSON (or None).
+  ###
+  @staticmethod
+  def fromJSON(data):
+    if data is None:
+      return SpatialReference()
+    if data.get("factoryCode"):
+      return SpatialReference(data["factoryCode"])
+    return SpatialReference(data.get("name"))
@@ -0,0 +1,527 @@
+import json
+import os
+import re
+import shutil
+import struct
+import tempfile
+
+from ._geometry          import fromShape, getPartLength
+from ._spatial_reference import SpatialReference
+
+###
+# File-based tables.
+#
+# A workspace is a directory (e.g. "analysis.gdb"), and each table, feature
+# class, or network dataset in it is a directory with a schema.json file.
+# Tables and feature classes also have a rows.jsonl file with one JSON array
+# per row: [ObjectID, shape, field values...].  Rows are appended, so writing
+# each permutation's ODCM data doesn't rewrite the table.
+#
+# Feature layers (MakeFeatureLayer) and network analysis sublayers live in
+# memory and are looked up by name.  The in_memory workspace is a temporary
+# directory, so in-memory tables behave like any other table.
+###
+
+OID_FIELD   = "OBJECTID"
+SHAPE_FIELD = "Shape"
+
+# Field type keywords (AddField) -> Describe field types.
+FIELD_TYPES = {
+  "LONG":   "Integer",
+  "SHORT":  "SmallInteger",
+  "DOUBLE": "Double",
+  "FLOAT":  "Single",
+  "TEXT":   "String",
+  "DATE":   "Date",
+  "GUID":   "Guid"}
+
+# In-memory datasets (layers) by name.
+layers = {}
+
+# The in_memory workspace name, and the directory that stands in for it.
+IN_MEMORY  = "in_memory"
+_memoryDir = []
+
+# The geoprocessing environment (arcpy.env).
+class _Env(object):
+  def __init__(self):
+    self.workspace              = None
+    self.scratchWorkspace       = None
+    self.overwriteOutput        = False
+    self.randomGenerator        = None
+    self.outputCoordinateSystem = None
+
+  # The scratch geodatabase defaults to the workspace.
+  @property
+  def scratchGDB(self):
+    return self.scratchWorkspace or self.workspace
+
+  # The scratch folder is the directory that holds the scratch geodatabase.
+  @property
+  def scratchFolder(self):
+    return os.path.dirname(self.scratchGDB) if self.scratchGDB else None
+
+env = _Env()
+
+# Raised when a tool fails, like arcpy.ExecuteError.
+class ExecuteError(Exception):
+  pass
+
+# The result of a tool.
+class Result(object):
+  def __init__(self, outputs):
+    self._outputs = outputs
+
+  # Get an output by index.
+  def getOutput(self, index):
+    return self._outputs[index]
+
+  # Get the number of outputs.
+  @property
+  def outputCount(self):
+    return len(self._outputs)
+
+###
+# A dataset that is backed by files.
+###
+class FileDataset(object):
+  ###
+  # Open a dataset.
+  # @param path The dataset directory.
+  ###
+  def __init__(self, path):
+    self.path = path
+
+    with open(os.path.join(path, "schema.json"), "r") as schemaFile:
+      self.schema = json.load(schemaFile)
+
+  ###
+  # Create a dataset, replacing any that's there.
+  # @param path The dataset directory.
+  # @param schema The schema.
+  ###
+  @staticmethod
+  def create(path, schema):
+    if not os.path.isdir(os.path.dirname(path)):
+      raise ExecuteError("ERROR 000732: Workspace does not exist: {0}".format(os.path.dirname(path)))
+
+    if os.path.exists(path):
+      if not env.overwriteOutput:
+        raise ExecuteError("ERROR 000725: Dataset already exists: {0}".format(path))
+      shutil.rmtree(path)
+
+    os.makedirs(path)
+    schema.setdefault("fields",   [])
+    schema.setdefault("nextOID",  1)
+    dataset = FileDataset.__new__(FileDataset)
+    dataset.path   = path
+    dataset.schema = schema
+    dataset.saveSchema()
+
+    if schema["dataType"] != "NetworkDataset":
+      open(os.path.join(path, "rows.jsonl"), "w").close()
+
+    return dataset
+
+  # Write the schema.
+  def saveSchema(self):
+    with open(os.path.join(self.path, "schema.json"), "w") as schemaFile:
+      json.dump(self.schema, schemaFile)
+
+  # Get the name of the dataset.
+  def getName(self):
+    return os.path.basename(self.path)
+
+  # Get the data type (Table, FeatureClass, NetworkDataset).
+  def getDataType(self):
+    return self.schema["dataType"]
+
+  # Get the shape type (Point, Polyline) or None.
+  def getShapeType(self):
+    return self.schema.get("shapeType")
+
+  # Get the spatial reference.
+  def getSpatialReference(self):
+    return SpatialReference.fromJSON(self.schema.get("spatialReference"))
+
+  # Get the user fields as (name, type keyword) tuples.
+  def getUserFields(self):
+    return [(field["name"], field["type"]) for field in self.schema["fields"]]
+
+  ###
+  # Add a field.
+  # @param name The field name.
+  # @param fieldType The type keyword (LONG, DOUBLE, TEXT, ...).
+  ###
+  def addField(self, name, fieldType):
+    if name.lower() in [fieldName.lower() for fieldName, ftype in self.getUserFields()]:
+      return
+
+    self.schema["fields"].append({"name": name, "type": fieldType.upper()})
+    self.saveSchema()
+
+    # Existing rows get nulls.
+    rows = list(self._readRaw())
+    if len(rows) != 0:
+      with open(os.path.join(self.path, "rows.jsonl"), "w") as rowsFile:
+        for row in rows:
+          rowsFile.write(json.dumps(row + [None]) + "\n")
+
+  # Read the raw stored rows.
+  def _readRaw(self):
+    with open(os.path.join(self.path, "rows.jsonl"), "r") as rowsFile:
+      for line in rowsFile:
+        yield json.loads(line)
+
+  # Iterate over the rows as dictionaries of field name -> value.
+  def iterRows(self):
+    names = [field["name"] for field in self.schema["fields"]]
+
+    for raw in self._readRaw():
+      row = dict(zip(names, raw[2:]))
+      row[OID_FIELD]   = raw[0]
+      row[SHAPE_FIELD] = raw[1]
+      yield row
+
+  ###
+  # Append rows.  Returns the new ObjectIDs.
+  # @param rows An array of dictionaries of field name -> value.
+  ###
+  def appendRows(self, rows):
+    names   = [field["name"] for field in self.schema["fields"]]
+    nextOID = self.schema["nextOID"]
+    oids    = []
+
+    with open(os.path.join(self.path, "rows.jsonl"), "a") as rowsFile:
+      for row in rows:
+        rowsFile.write(json.dumps([nextOID, row.get(SHAPE_FIELD)] + [row.get(name) for name in names]) + "\n")
+        oids.append(nextOID)
+        nextOID += 1
+
+    self.schema["nextOID"] = nextOID
+    self.saveSchema()
+    return oids
+
+  ###
+  # Replace all the rows.
+  # @param rows An array of row dictionaries (with ObjectIDs).
+  ###
+  def replaceRows(self, rows):
+    names = [field["name"] for field in self.schema["fields"]]
+
+    with open(os.path.join(self.path, "rows.jsonl"), "w") as rowsFile:
+      for row in rows:
+        rowsFile.write(json.dumps([row[OID_FIELD], row.get(SHAPE_FIELD)] + [row.get(name) for name in names]) + "\n")
+
+  # Get the source dataset (a file dataset is its own source).
+  def getSource(self):
+    return self
+
+###
+# A dataset that lives in memory (network analysis sublayers, feature layers
+# that are copies).
+###
+class MemoryDataset(object):
+  ###
+  # Initialize the dataset.
+  # @param name The name.
+  # @param fields An array of (name, type keyword) tuples.
+  # @param shapeType The shape type, or None for a table.
+  # @param spatialReference The spatial reference (optional).
+  ###
+  def __init__(self, name, fields, shapeType=None, spatialReference=None):
+    self.path              = name
+    self._name             = name
+    self._fields           = list(fields)
+    self._shapeType        = shapeType
+    self._spatialReference = spatialReference or SpatialReference()
+    self.rows              = []
+
+  def getName(self):
+    return self._name
+
+  def getDataType(self):
+    return "FeatureLayer" if self._shapeType else "TableView"
+
+  def getShapeType(self):
+    return self._shapeType
+
+  def getSpatialReference(self):
+    return self._spatialReference
+
+  def getUserFields(self):
+    return self._fields
+
+  def addField(self, name, fieldType):
+    self._fields.append((name, fieldType.upper()))
+
+  def iterRows(self):
+    return iter(self.rows)
+
+  def appendRows(self, rows):
+    oids = []
+    for row in rows:
+      row = dict(row)
+      row[OID_FIELD] = len(self.rows) + 1
+      self.rows.append(row)
+      oids.append(row[OID_FIELD])
+    return oids
+
+  def replaceRows(self, rows):
+    self.rows = list(rows)
+
+  def getSource(self):
+    return self
+
+###
+# A feature layer: a named view of another dataset with a definition query.
+###
+class LayerDataset(object):
+  ###
+  # Initialize the layer.
+  # @param name The layer name.
+  # @param source The source dataset.
+  # @param where A where clause (optional).
+  ###
+  def __init__(self, name, source, where=None):
+    self.path    = name
+    self._name   = name
+    self._source = source
+    self._where  = compileWhere(where)
+
+  def getName(self):
+    return self._name
+
+  def getDataType(self):
+    return "FeatureLayer" if self._source.getShapeType() else "TableView"
+
+  def getShapeType(self):
+    return self._source.getShapeType()
+
+  def getSpatialReference(self):
+    return self._source.getSpatialReference()
+
+  def getUserFields(self):
+    return self._source.getUserFields()
+
+  def addField(self, name, fieldType):
+    self._source.addField(name, fieldType)
+
+  def iterRows(self):
+    return (row for row in self._source.iterRows() if self._where(row))
+
+  def appendRows(self, rows):
+    return self._source.appendRows(rows)
+
+  def getSource(self):
+    return self._source.getSource()
+
+###
+# Resolve a path or layer name to a full path.
+# @param dataset A path, a name in the workspace, or a layer name.
+###
+def resolvePath(dataset):
+  dataset = str(getattr(dataset, "path", dataset))
+
+  if dataset == IN_MEMORY:
+    return getMemoryWorkspace()
+  elif dataset.startswith(IN_MEMORY + "/") or dataset.startswith(IN_MEMORY + "\\"):
+    return os.path.join(getMemoryWorkspace(), dataset[len(IN_MEMORY) + 1:])
+
+  if dataset in layers or os.path.isabs(dataset) or env.workspace is None:
+    return dataset
+
+  return os.path.join(env.workspace, dataset)
+
+###
+# Get the directory that stands in for the in_memory workspace (created on
+# first use, and deleted when the process exits).
+###
+def getMemoryWorkspace():
+  if len(_memoryDir) == 0:
+    import atexit
+    _memoryDir.append(tempfile.mkdtemp(prefix="offline_in_memory_"))
+    atexit.register(shutil.rmtree, _memoryDir[0], True)
+  return _memoryDir[0]
+
+###
+# Open a dataset.
+# @param dataset A path, a name in the workspace, a layer name, or a dataset.
+###
+def openDataset(dataset):
+  if isinstance(dataset, (FileDataset, MemoryDataset, LayerDataset)):
+    return dataset
+
+  if hasattr(dataset, "getDataset"):
+    return dataset.getDataset()
+
+  path = resolvePath(dataset)
+
+  if path in layers:
+    layer = layers[path]
+    return layer.getDataset() if hasattr(layer, "getDataset") else layer
+
+  if os.path.isfile(os.path.join(path, "schema.json")):
+    return FileDataset(path)
+
+  raise ExecuteError("ERROR 000732: Dataset {0} does not exist or is not supported".format(dataset))
+
+###
+# Check if a dataset exists.
+# @param dataset A path or a layer name.
+###
+def exists(dataset):
+  path = resolvePath(dataset)
+  return path in layers or os.path.isfile(os.path.join(path, "schema.json")) or os.path.isdir(path)
+
+###
+# Get the fields of a dataset as (name, Describe type) tuples, including the
+# ObjectID, shape, and shape length fields.
+# @param dataset An open dataset.
+###
+def getFields(dataset):
+  fields = [(OID_FIELD, "OID")]
+
+  if dataset.getShapeType():
+    fields.append((SHAPE_FIELD, "Geometry"))
+  if dataset.getShapeType() == "Polyline":
+    fields.append(("Shape_Length", "Double"))
+
+  for name, fieldType in dataset.getUserFields():
+    fields.append((name, FIELD_TYPES.get(fieldType, fieldType)))
+
+  return fields
+
+###
+# Get a function that reads a field or token (OID@, SHAPE@XY, ...) from a row.
+# @param dataset An open dataset.
+# @param token A field name or token.
+###
+def getReader(dataset, token):
+  spatialRef = dataset.getSpatialReference()
+  upper      = token.upper()
+
+  if upper == "OID@":
+    return lambda row: row[OID_FIELD]
+  if upper == "SHAPE@XY":
+    return lambda row: _getXY(row[SHAPE_FIELD])
+  if upper == "SHAPE@X":
+    return lambda row: _getXY(row[SHAPE_FIELD])[0]
+  if upper == "SHAPE@Y":
+    return lambda row: _getXY(row[SHAPE_FIELD])[1]
+  if upper in ("SHAPE@", SHAPE_FIELD.upper()):
+    return lambda row: fromShape(row[SHAPE_FIELD], spatialRef)
+  if upper in ("SHAPE@LENGTH", "SHAPE_LENGTH"):
+    return lambda row: _getLength(row[SHAPE_FIELD])
+  if upper == "SHAPE@WKB":
+    return lambda row: _getWKB(row[SHAPE_FIELD])
+
+  name = getFieldName(dataset, token)
+  return lambda row: row.get(name)
+
+###
+# Get the stored name of a field (field names are case insensitive).
+# @param dataset An open dataset.
+# @param name A field name.
+###
+def getFieldName(dataset, name):
+  for fieldName, fieldType in getFields(dataset):
+    if fieldName.lower() == name.lower():
+      return fieldName
+
+  raise ExecuteError("ERROR 000728: Field {0} does not exist within table".format(name))
+
+# Get the x, y of a shape (the centroid of the vertices for a line).
+def _getXY(shape):
+  if shape is None:
+    return None
+  if len(shape) == 2 and not isinstance(shape[0], list):
+    return (shape[0], shape[1])
+
+  vertices = [vertex for part in shape for vertex in part]
+  return (sum(x for x, y in vertices) / len(vertices), sum(y for x, y in vertices) / len(vertices))
+
+# Get the length of a shape.
+def _getLength(shape):
+  if shape is None or (len(shape) == 2 and not isinstance(shape[0], list)):
+    return 0.0
+  return sum(getPartLength(part) for part in shape)
+
+# Get a shape as little-endian WKB: a Point or a MultiLineString.
+def _getWKB(shape):
+  if shape is None:
+    return None
+  if len(shape) == 2 and not isinstance(shape[0], list):
+    return bytearray(struct.pack("<BIdd", 1, 1, shape[0], shape[1]))
+
+  wkb = struct.pack("<BII", 1, 5, len(shape))
+  for part in shape:
+    wkb += struct.pack("<BII", 1, 2, len(part))
+    wkb += struct.pack("<{0}d".format(2 * len(part)), *[coord for vertex in part for coord in vertex])
+
+  return bytearray(wkb)
+
+# Where clause tokens: strings, numbers, operators, and names.
+_TOKEN_RE = re.compile(r"""\s*(?:('(?:[^']|'')*')|(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)|(<>|<=|>=|=|<|>|\(|\)|,)|("[^"]+"|\[[^\]]+\]|[A-Za-z_][A-Za-z0-9_]*))""")
+
+###
+# Compile a SQL where clause into a function(row) that returns True if the row
+# matches.  Comparisons, IN, NOT IN, IS [NOT] NULL, AND, OR, NOT, and
+# parentheses are supported.  Field names are case insensitive.
+# @param where The where clause (optional).
+###
+def compileWhere(where):
+  if where is None or str(where).strip() == "":
+    return lambda row: True
+
+  where  = str(where)
+  parts  = []
+  pos    = 0
+
+  while pos < len(where):
+    match = _TOKEN_RE.match(where, pos)
+
+    if match is None or match.end() == pos:
+      if where[pos:].strip() == "":
+        break
+      raise ExecuteError("ERROR 000358: Invalid expression {0}".format(where))
+
+    string, number, operator, name = match.groups()
+    pos = match.end()
+
+    if string is not None:
+      parts.append(repr(string[1:-1].replace("''", "'")))
+    elif number is not None:
+      parts.append(number)
+    elif operator is not None:
+      parts.append({"=": "==", "<>": "!="}.get(operator, operator))
+    else:
+      keyword = name.upper()
+
+      if keyword in ("AND", "OR", "NOT", "IN"):
+        parts.append(keyword.lower())
+      elif keyword == "IS":
+        parts.append("is")
+      elif keyword == "NULL":
+        parts.append("None")
+      else:
+        parts.append("_field({0})".format(repr(name.strip('"[]').lower())))
+
+  # IN lists are tuples, which need a trailing comma for a single element.
+  for partNum in range(0, len(parts) - 1):
+    if parts[partNum] == "in" and parts[partNum + 1] == "(":
+      closeNum = parts.index(")", partNum + 1)
+      parts[closeNum] = ",)"
+
+  code = " ".join(parts)
+
+  try:
+    compiled = compile(code, "<where>", "eval")
+  except SyntaxError:
+    raise ExecuteError("ERROR 000358: Invalid expression {0}".format(where))
+
+  def matches(row):
+    lower = dict((key.lower(), value) for key, value in row.items())
+    return eval(compiled, {"__builtins__": {}}, {"_field": lambda name: lower.get(name)})
+
+  return matches
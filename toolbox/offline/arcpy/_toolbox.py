@@ -0,0 +1,191 @@
+import os
+import sys
+
+from ._spatial_reference import SpatialReference
+from ._storage           import ExecuteError, Result
+
+###
+# Python toolboxes: tool parameters, messages, and ImportToolbox.
+###
+
+class Filter(object):
+  def __init__(self):
+    self.list = []
+    self.type = "ValueList"
+
+class Parameter(object):
+  ###
+  # Initialize a parameter (see arcpy.Parameter).
+  ###
+  def __init__(self, name=None, displayName=None, direction=None, datatype=None,
+    parameterType=None, enabled=True, category=None, symbology=None, multiValue=False):
+    self.name                  = name
+    self.displayName           = displayName
+    self.direction             = direction
+    self.datatype              = datatype
+    self.parameterType         = parameterType
+    self.enabled               = enabled
+    self.category              = category
+    self.symbology             = symbology
+    self.multiValue            = multiValue
+    self.filter                = Filter()
+    self.parameterDependencies = []
+    self.altered               = False
+    self.hasBeenValidated      = False
+    self.message               = ""
+    self._messageType          = None
+    self._value                = None
+
+  # The value.  Spatial references are converted from factory codes and names.
+  @property
+  def value(self):
+    return self._value
+
+  @value.setter
+  def value(self, value):
+    if value is not None and self.datatype == "GPSpatialReference" and not isinstance(value, SpatialReference):
+      value = SpatialReference(value)
+    self._value = value
+
+  # The value as text, as given to a tool.
+  @property
+  def valueAsText(self):
+    if self._value is None:
+      return None
+    if isinstance(self._value, SpatialReference):
+      return self._value.name
+    if isinstance(self._value, bool):
+      return "true" if self._value else "false"
+    return str(self._value)
+
+  def setErrorMessage(self, message):
+    self.message      = message
+    self._messageType = "error"
+
+  def setWarningMessage(self, message):
+    self.message      = message
+    self._messageType = "warning"
+
+  def clearMessage(self):
+    self.message      = ""
+    self._messageType = None
+
+  def hasError(self):
+    return self._messageType == "error"
+
+  def hasWarning(self):
+    return self._messageType == "warning"
+
+class Messages(object):
+  ###
+  # Initialize the messages.
+  # @param echo A function(message) that each message is passed to
+  #        (optional).
+  ###
+  def __init__(self, echo=None):
+    self.messages = []
+    self._echo    = echo
+
+  def _add(self, severity, message):
+    self.messages.append((severity, message))
+    if self._echo is not None:
+      self._echo(message)
+
+  def addMessage(self, message):
+    self._add(0, message)
+
+  def addWarningMessage(self, message):
+    self._add(1, message)
+
+  def addErrorMessage(self, message):
+    self._add(2, message)
+
+  def addIDMessage(self, messageType, messageID, addArgument1=None, addArgument2=None):
+    self._add(0, "{0} {1}".format(messageType, messageID))
+
+  def addGPMessages(self):
+    pass
+
+  # Get all the messages as text.
+  def getMessages(self):
+    return "\n".join(message for severity, message in self.messages)
+
+# Messages from tools that are called through ImportToolbox (not shown by
+# default, like nested geoprocessing tools).
+toolMessages = Messages()
+
+###
+# Run a tool: bind the arguments to the tool's parameters, validate, and
+# execute.
+# @param toolClass The tool class.
+# @param args Positional arguments, in parameter order.
+# @param kwargs Keyword arguments, by parameter name.
+# @param messages A Messages instance.
+###
+def runTool(toolClass, args, kwargs, messages):
+  tool   = toolClass()
+  params = tool.getParameterInfo()
+  names  = [param.name for param in params]
+
+  for param, value in zip(params, args):
+    param.value   = value
+    param.altered = True
+
+  for name, value in kwargs.items():
+    if name not in names:
+      raise ExecuteError("ERROR 000800: {0} is not a parameter of {1}".format(name, toolClass.__name__))
+    params[names.index(name)].value   = value
+    params[names.index(name)].altered = True
+
+  if hasattr(tool, "updateParameters"):
+    tool.updateParameters(params)
+  if hasattr(tool, "updateMessages"):
+    tool.updateMessages(params)
+
+  for param in params:
+    if param.hasError():
+      raise ExecuteError("{0}: {1}".format(param.name, param.message))
+    if param.parameterType == "Required" and param.direction == "Input" and param.value is None:
+      raise ExecuteError("ERROR 000735: {0}: Value is required".format(param.name))
+
+  tool.execute(params, messages)
+  return Result([param.value for param in params if param.direction == "Output"] or [True])
+
+###
+# Load a Python toolbox and add a function for each of its tools to a module,
+# named <ToolClass>_<alias>.
+# @param toolboxPath The path of the .pyt file.
+# @param module The module to add the functions to (arcpy).
+# @param alias The toolbox alias (optional).  Defaults to the toolbox's alias.
+###
+def importToolbox(toolboxPath, module, alias=None):
+  toolboxDir = os.path.dirname(os.path.abspath(toolboxPath))
+  modName    = "offline_pyt_{0}".format(abs(hash(os.path.abspath(toolboxPath))))
+
+  if toolboxDir not in sys.path:
+    sys.path.insert(0, toolboxDir)
+
+  if sys.version_info[0] >= 3:
+    import importlib.machinery
+    import importlib.util
+    loader  = importlib.machinery.SourceFileLoader(modName, toolboxPath)
+    spec    = importlib.util.spec_from_loader(modName, loader)
+    pyt     = importlib.util.module_from_spec(spec)
+    loader.exec_module(pyt)
+  else:
+    import imp
+    pyt = imp.load_source(modName, toolboxPath)
+
+  toolbox = pyt.Toolbox()
+  alias   = alias or toolbox.alias
+
+  for toolClass in toolbox.tools:
+    def makeTool(toolClass):
+      def tool(*args, **kwargs):
+        return runTool(toolClass, args, kwargs, toolMessages)
+      tool.__name__ = "{0}_{1}".format(toolClass.__name__, alias)
+      return tool
+
+    setattr(module, "{0}_{1}".format(toolClass.__name__, alias), makeTool(toolClass))
+
+  return toolbox
@@ -0,0 +1,162 @@
+from ._geometry import toShape
+from ._storage  import OID_FIELD, SHAPE_FIELD, compileWhere, getFieldName, getReader, openDataset
+
+###
+# Data access cursors (arcpy.da).  Coordinates are never projected, so
+# spatial_reference is accepted and ignored.
+###
+
+class SearchCursor(object):
+  ###
+  # Open a cursor.
+  # @param in_table A dataset path, name, or layer.
+  # @param field_names An array of field names and tokens (OID@, SHAPE@XY,
+  #        SHAPE@, SHAPE@LENGTH), or "*".
+  # @param where_clause A where clause (optional).
+  # @param spatial_reference Ignored.
+  # @param explode_to_points Ignored.
+  # @param sql_clause A (prefix, postfix) tuple.  Only "ORDER BY <field>" in
+  #        the postfix is supported.
+  ###
+  def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None,
+    explode_to_points=False, sql_clause=(None, None)):
+    dataset = openDataset(in_table)
+
+    if field_names == "*" or field_names == ["*"]:
+      field_names = [name for name, fieldType in dataset.getUserFields()]
+      field_names = ["OID@"] + (["SHAPE@"] if dataset.getShapeType() else []) + field_names
+    elif not isinstance(field_names, (list, tuple)):
+      field_names = [field_names]
+
+    self.fields   = tuple(field_names)
+    self._dataset = dataset
+    self._readers = [getReader(dataset, name) for name in field_names]
+    self._where   = compileWhere(where_clause)
+    self._orderBy = None
+
+    if sql_clause and sql_clause[1] and sql_clause[1].upper().startswith("ORDER BY"):
+      self._orderBy = getReader(dataset, sql_clause[1][len("ORDER BY"):].strip())
+
+    self.reset()
+
+  # Start over from the first row.
+  def reset(self):
+    rows = (row for row in self._dataset.iterRows() if self._where(row))
+
+    if self._orderBy is not None:
+      rows = iter(sorted(rows, key=self._orderBy))
+
+    self._rows = rows
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    row = next(self._rows)
+    return tuple(reader(row) for reader in self._readers)
+
+  # Python 2.
+  next = __next__
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self._rows = iter(())
+    return False
+
+class InsertCursor(object):
+  ###
+  # Open a cursor.  Rows are written when the cursor is closed.
+  # @param in_table A dataset path, name, or layer.
+  # @param field_names An array of field names and tokens (SHAPE@, SHAPE@XY).
+  ###
+  def __init__(self, in_table, field_names):
+    if not isinstance(field_names, (list, tuple)):
+      field_names = [field_names]
+
+    self.fields   = tuple(field_names)
+    self._dataset = openDataset(in_table)
+    self._names   = [self._getName(name) for name in field_names]
+    self._rows    = []
+
+  # Get the stored name for a field or token.
+  def _getName(self, name):
+    if name.upper() in ("SHAPE@", "SHAPE@XY", SHAPE_FIELD.upper()):
+      return SHAPE_FIELD
+    return getFieldName(self._dataset, name)
+
+  ###
+  # Insert a row.
+  # @param row An array of values in the order of the field names.
+  ###
+  def insertRow(self, row):
+    values = {}
+
+    for name, value in zip(self._names, row):
+      values[name] = toShape(value) if name == SHAPE_FIELD else value
+
+    self._rows.append(values)
+
+    # Flush in batches so that large inserts don't build up in memory.
+    if len(self._rows) >= 10000:
+      self._flush()
+
+  # Write the pending rows.
+  def _flush(self):
+    if len(self._rows) != 0:
+      self._dataset.appendRows(self._rows)
+      self._rows = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self._flush()
+    return False
+
+  def __del__(self):
+    self._flush()
+
+class UpdateCursor(SearchCursor):
+  ###
+  # Open a cursor.  Changes are written when the cursor is closed.  See
+  # SearchCursor for the parameters.
+  ###
+  def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None,
+    explode_to_points=False, sql_clause=(None, None)):
+    SearchCursor.__init__(self, in_table, field_names, where_clause, spatial_reference,
+      explode_to_points, sql_clause)
+
+    # Layers are views, so the source's rows are updated and written back.
+    matching      = set(row[OID_FIELD] for row in self._dataset.iterRows() if self._where(row))
+    self._allRows = list(self._dataset.getSource().iterRows())
+    self._names   = [SHAPE_FIELD if name.upper() in ("SHAPE@", "SHAPE@XY") else
+      (OID_FIELD if name.upper() == "OID@" else getFieldName(self._dataset, name)) for name in self.fields]
+    self._current = None
+    self._deleted = set()
+    self._rows    = iter([row for row in self._allRows if row[OID_FIELD] in matching])
+
+  def __next__(self):
+    self._current = next(self._rows)
+    return [reader(self._current) for reader in self._readers]
+
+  next = __next__
+
+  ###
+  # Update the current row.
+  # @param row An array of values in the order of the field names.
+  ###
+  def updateRow(self, row):
+    for name, value in zip(self._names, row):
+      if name != OID_FIELD:
+        self._current[name] = toShape(value) if name == SHAPE_FIELD else value
+
+  # Delete the current row.
+  def deleteRow(self):
+    self._deleted.add(self._current[OID_FIELD])
+
+  def __exit__(self, excType, excValue, traceback):
+    self._dataset.getSource().replaceRows(
+      [row for row in self._allRows if row[OID_FIELD] not in self._deleted])
+    return False
@@ -0,0 +1,96 @@
+import fnmatch
+
+from ._storage import layers, openDataset, resolvePath
+
+###
+# Map documents and layers (arcpy.mapping).  There is no map offline: the
+# current map document is empty, and layers are looked up by name.
+###
+
+class Layer(object):
+  ###
+  # Initialize a layer.
+  # @param lyr_file_path A dataset path or layer name.
+  ###
+  def __init__(self, lyr_file_path):
+    self.name       = str(lyr_file_path).replace("\\", "/").split("/")[-1]
+    self.longName   = self.name
+    self.dataSource = resolvePath(lyr_file_path)
+    self.visible    = True
+    self._dataset   = None
+
+  # Get the dataset that the layer refers to.
+  def getDataset(self):
+    return self._dataset if self._dataset is not None else openDataset(self.dataSource)
+
+  # Get the sublayers (none for a plain layer).
+  def getSublayers(self):
+    return []
+
+  def __str__(self):
+    return self.name
+
+###
+# Wrap a dataset (e.g. a network analysis sublayer) in a layer.
+# @param name The layer name.
+# @param dataset The dataset.
+###
+def wrapDataset(name, dataset):
+  layer            = Layer.__new__(Layer)
+  layer.name       = name
+  layer.longName   = name
+  layer.dataSource = name
+  layer.visible    = True
+  layer._dataset   = dataset
+  return layer
+
+class DataFrame(object):
+  def __init__(self, name):
+    self.name = name
+
+class MapDocument(object):
+  ###
+  # Open a map document.
+  # @param mxd_path A path, or "CURRENT".
+  ###
+  def __init__(self, mxd_path):
+    self.filePath = mxd_path
+
+  def save(self):
+    pass
+
+###
+# Get the data frames of a map document.
+# @param map_document A MapDocument.
+# @param wildcard A name pattern (optional).
+###
+def ListDataFrames(map_document, wildcard=None):
+  return [DataFrame("Layers")] if wildcard is None or fnmatch.fnmatch("Layers", wildcard) else []
+
+###
+# Get the layers in a map document, or the sublayers of a group layer (e.g. a
+# network analysis layer).
+# @param map_document_or_layer A MapDocument or Layer.
+# @param wildcard A name pattern (optional).
+# @param data_frame Ignored.
+###
+def ListLayers(map_document_or_layer, wildcard=None, data_frame=None):
+  if isinstance(map_document_or_layer, MapDocument):
+    candidates = [Layer(name) for name in sorted(layers)]
+  else:
+    layer = map_document_or_layer
+
+    if not isinstance(layer, Layer):
+      layer = layers.get(str(layer), layer)
+    if not isinstance(layer, Layer):
+      layer = wrapDataset(layer.getName(), layer)
+
+    candidates = [layer] + layer.getSublayers()
+
+  return [layer for layer in candidates if wildcard is None or fnmatch.fnmatch(layer.name, wildcard)]
+
+def AddLayer(data_frame, add_layer, add_position="AUTO_ARRANGE"):
+  pass
+
+def RemoveLayer(data_frame, remove_layer):
+  pass
@@ -0,0 +1,194 @@
+import os
+
+from ._storage import ExecuteError, MemoryDataset, OID_FIELD, Result, SHAPE_FIELD, layers, openDataset, resolvePath
+from .mapping  import Layer, wrapDataset
+
+# The toolbox directory must be on the path (see offline_runner).
+from network_graph     import NetworkGraph
+from local_odcm_solver import LocalODCMSolver
+
+###
+# OD cost matrices (arcpy.na), solved with LocalODCMSolver on a NetworkGraph
+# built from the network dataset's edge sources.  Edges are undirected and
+# their cost is their length, whatever the impedance attribute.
+###
+
+# The sublayer names of an OD cost matrix layer.
+NA_CLASS_NAMES = {
+  "Origins":         "Origins",
+  "Destinations":    "Destinations",
+  "ODLines":         "Lines",
+  "PointBarriers":   "Point Barriers",
+  "LineBarriers":    "Line Barriers",
+  "PolygonBarriers": "Polygon Barriers"}
+
+# Solvers by network dataset, rebuilt when an edge source changes.
+_solvers = {}
+
+###
+# Get a solver for a network dataset.
+# @param networkDataset The path of a network dataset.
+###
+def getSolver(networkDataset):
+  ndDataset = openDataset(networkDataset)
+  ndPath    = os.path.dirname(ndDataset.path)
+  edgePaths = [os.path.join(ndPath, name) for name in ndDataset.schema["edgeSources"]]
+  key       = tuple((edgePath, os.path.getmtime(os.path.join(edgePath, "rows.jsonl"))) for edgePath in edgePaths)
+
+  if _solvers.get(ndDataset.path, (None, None))[0] != key:
+    graph = NetworkGraph()
+
+    for edgePath in edgePaths:
+      for row in openDataset(edgePath).iterRows():
+        for part in row[SHAPE_FIELD] or []:
+          graph.addLine(part)
+
+    _solvers[ndDataset.path] = (key, LocalODCMSolver(graph))
+
+  return _solvers[ndDataset.path][1]
+
+class NALayer(Layer):
+  ###
+  # Initialize the layer.
+  # @param name The layer name.
+  # @param networkDataset The network dataset path.
+  # @param cutoff The default cutoff (optional).
+  # @param numDests The default number of destinations to find (optional).
+  ###
+  def __init__(self, name, networkDataset, cutoff, numDests):
+    self.name           = name
+    self.longName       = name
+    self.dataSource     = networkDataset
+    self.visible        = True
+    self.networkDataset = networkDataset
+    self.cutoff         = cutoff
+    self.numDests       = numDests
+    self._dataset       = None
+
+    locFields = [("Name", "TEXT"), ("SourceOID", "LONG"), ("Status", "SHORT")]
+    self.sublayers = {
+      "Origins":      MemoryDataset("Origins",      locFields, "Point"),
+      "Destinations": MemoryDataset("Destinations", locFields, "Point"),
+      "Lines":        MemoryDataset("Lines", [("Name", "TEXT"), ("OriginID", "LONG"),
+        ("DestinationID", "LONG"), ("DestinationRank", "LONG"), ("Total_Length", "DOUBLE")])}
+
+  def getDataset(self):
+    raise ExecuteError("ERROR 000840: {0} is a network analysis layer".format(self.name))
+
+  def getSublayers(self):
+    return [wrapDataset(name, self.sublayers[name]) for name in ("Origins", "Destinations", "Lines")]
+
+# Get the NA layer from a layer or a name.
+def _getLayer(layer):
+  layer = layers.get(str(layer), layer) if not isinstance(layer, NALayer) else layer
+
+  if not isinstance(layer, NALayer):
+    raise ExecuteError("ERROR 000840: {0} is not a network analysis layer".format(layer))
+
+  return layer
+
+# Parse a linear distance (e.g. 25 or "25 Meters").
+def _parseDistance(distance):
+  if distance is None or str(distance).strip() == "":
+    return None
+  return float(str(distance).split()[0])
+
+###
+# Make an OD cost matrix layer.
+###
+def MakeODCostMatrixLayer(in_network_dataset, out_network_analysis_layer, impedance_attribute,
+  default_cutoff=None, default_number_destinations_to_find=None, accumulate_attribute_name=None,
+  UTurn_policy=None, restriction_attribute_name=None, hierarchy=None, hierarchy_settings=None,
+  output_path_shape=None, time_of_day=None):
+  numDests = int(default_number_destinations_to_find) if default_number_destinations_to_find else None
+  layer    = NALayer(out_network_analysis_layer, resolvePath(in_network_dataset),
+    _parseDistance(default_cutoff), numDests)
+  layers[out_network_analysis_layer] = layer
+  return Result([layer])
+
+###
+# Get the sublayer names of a network analysis layer.
+###
+def GetNAClassNames(network_analyst_layer, network_analyst_class_type="", io_type=""):
+  return dict(NA_CLASS_NAMES)
+
+###
+# Add locations to a network analysis sublayer.  Points are snapped to the
+# closest edge within the search tolerance; points that don't snap are added
+# but not located.  Locations are added in ObjectID order.
+# @param field_mappings "Name <field> #" maps a field to the location name.
+###
+def AddLocations(in_network_analysis_layer, sub_layer, in_table, field_mappings="",
+  search_tolerance="", sort_field="", search_criteria="", match_type="", append="APPEND",
+  snap_to_position_along_network="", snap_offset="", exclude_restricted_elements="",
+  search_query=""):
+  layer     = _getLayer(in_network_analysis_layer)
+  sublayer  = layer.sublayers[sub_layer]
+  graph     = getSolver(layer.networkDataset).getGraph()
+  tolerance = _parseDistance(search_tolerance)
+  dataset   = openDataset(in_table)
+  nameField = None
+  rows      = []
+
+  if field_mappings:
+    for mapping in str(field_mappings).split(";"):
+      parts = mapping.split()
+      if len(parts) >= 2 and parts[0].lower() == "name" and parts[1] != "#":
+        nameField = parts[1]
+
+  if str(append).upper() == "CLEAR":
+    sublayer.rows = []
+
+  for row in sorted(dataset.iterRows(), key=lambda row: row[OID_FIELD]):
+    x, y     = row[SHAPE_FIELD]
+    location = graph.snapPoint(x, y, tolerance if tolerance is not None else float("inf"))
+    lower    = dict((key.lower(), value) for key, value in row.items())
+    name     = lower.get(nameField.lower()) if nameField else lower.get("name")
+
+    rows.append({
+      SHAPE_FIELD:  [x, y],
+      "Name":       str(name) if name is not None else "Location {0}".format(len(sublayer.rows) + len(rows) + 1),
+      "SourceOID":  row[OID_FIELD],
+      "Status":     0 if location is not None else 1,
+      "_location":  location})
+
+  sublayer.appendRows(rows)
+  return Result([layer])
+
+###
+# Solve a network analysis layer.
+###
+def Solve(in_network_analysis_layer, ignore_invalids="SKIP", terminate_on_solve_error="TERMINATE",
+  simplification_tolerance=None, overrides=None):
+  layer    = _getLayer(in_network_analysis_layer)
+  solver   = getSolver(layer.networkDataset)
+  origins  = [(row[OID_FIELD], row["_location"]) for row in layer.sublayers["Origins"].rows
+    if row["_location"] is not None]
+  dests    = [(row[OID_FIELD], row["_location"]) for row in layer.sublayers["Destinations"].rows
+    if row["_location"] is not None]
+  names    = dict((("O", row[OID_FIELD]), row["Name"]) for row in layer.sublayers["Origins"].rows)
+  names.update((("D", row[OID_FIELD]), row["Name"]) for row in layer.sublayers["Destinations"].rows)
+  byOrigin = {}
+
+  for odDist in solver.solve(origins, dests, layer.cutoff):
+    byOrigin.setdefault(odDist["OriginID"], []).append(odDist)
+
+  lines = []
+  for originID in sorted(byOrigin):
+    odDists = sorted(byOrigin[originID], key=lambda odDist: (odDist["Total_Length"], odDist["DestinationID"]))
+
+    if layer.numDests is not None:
+      odDists = odDists[:layer.numDests]
+
+    for rank in range(0, len(odDists)):
+      odDist = odDists[rank]
+      lines.append({
+        "Name":            "{0} - {1}".format(names[("O", originID)], names[("D", odDist["DestinationID"])]),
+        "OriginID":        originID,
+        "DestinationID":   odDist["DestinationID"],
+        "DestinationRank": rank + 1,
+        "Total_Length":    odDist["Total_Length"]})
+
+  layer.sublayers["Lines"].rows = []
+  layer.sublayers["Lines"].appendRows(lines)
+  return Result([layer, True])
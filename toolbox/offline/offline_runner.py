@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# The offline arcpy package is next to this file, and the tools are one
+# directory up.  The offline package has to come first on the path so that it
+# is used instead of a real arcpy.
+_offlineDir = os.path.dirname(os.path.abspath(__file__))
+_toolboxDir = os.path.dirname(_offlineDir)
+
+for _path in (_toolboxDir, _offlineDir):
+  if _path in sys.path:
+    sys.path.remove(_path)
+  sys.path.insert(0, _path)
+
+# The tools reload their modules (an ArcMap caching fix).  reload is not a
+# builtin in Python 3.
+if sys.version_info[0] >= 3:
+  import builtins
+  import importlib
+  builtins.reload = importlib.reload
+
+import arcpy
+
+from arcpy          import _toolbox
+from arcpy._storage import FileDataset
+
+from synthetic_network import SyntheticNetwork
+
+# The toolbox, imported when the first runner is created.
+TOOLBOX_PATH = os.path.join(_toolboxDir, "Crash Analysis Toolbox.pyt")
+
+###
+# Runs the Crash Analysis Toolbox tools without ArcMap, against file-based
+# tables in a workspace directory (see the offline arcpy package).
+###
+class OfflineRunner(object):
+  ###
+  # Initialize the runner.
+  # @param workspace The workspace directory (created if needed).
+  # @param messages A function(message) that tool messages are passed to
+  #        (optional).
+  ###
+  def __init__(self, workspace, messages=None):
+    if not os.path.isdir(workspace):
+      os.makedirs(workspace)
+
+    self._workspace = workspace
+    self._echo      = messages
+    self._toolbox   = arcpy.ImportToolbox(TOOLBOX_PATH)
+
+    arcpy.env.workspace       = workspace
+    arcpy.env.overwriteOutput = True
+
+  # Get the workspace directory.
+  def getWorkspace(self):
+    return self._workspace
+
+  ###
+  # Create a network dataset with one edge source.
+  # @param name The name of the network dataset.  The edge source is named
+  #        <name>_Edges.
+  # @param lines An array of lines, each an array of (x, y) vertices.
+  # @param spatialReference A factory code or name.
+  ###
+  def createNetworkDataset(self, name, lines, spatialReference=26911):
+    edgeName = "{0}_Edges".format(name)
+    spatRef  = arcpy.SpatialReference(spatialReference)
+
+    arcpy.CreateFeatureclass_management(self._workspace, edgeName, "POLYLINE",
+      spatial_reference=spatRef)
+
+    with arcpy.da.InsertCursor(edgeName, ["SHAPE@"]) as cursor:
+      for line in lines:
+        cursor.insertRow([arcpy.Polyline(arcpy.Array([arcpy.Point(x, y) for x, y in line]), spatRef)])
+
+    FileDataset.create(os.path.join(self._workspace, name), {
+      "dataType":         "NetworkDataset",
+      "spatialReference": spatRef.toJSON(),
+      "edgeSources":      [edgeName]})
+
+    return os.path.join(self._workspace, name)
+
+  ###
+  # Create a point feature class.
+  # @param name The name of the feature class.
+  # @param points An array of (x, y) tuples.
+  # @param spatialReference A factory code or name.
+  ###
+  def createPoints(self, name, points, spatialReference=26911):
+    arcpy.CreateFeatureclass_management(self._workspace, name, "POINT",
+      spatial_reference=arcpy.SpatialReference(spatialReference))
+
+    with arcpy.da.InsertCursor(name, ["SHAPE@XY"]) as cursor:
+      for point in points:
+        cursor.insertRow([point])
+
+    return os.path.join(self._workspace, name)
+
+  ###
+  # Run a tool.  Returns a tuple of (Result, an array of messages).
+  # @param toolName The tool's class name (e.g. GlobalKFunction).
+  # @param kwargs The parameters, by name.
+  ###
+  def runTool(self, toolName, **kwargs):
+    toolClass = [tool for tool in self._toolbox.tools if tool.__name__ == toolName][0]
+    messages  = _toolbox.Messages(self._echo)
+    result    = _toolbox.runTool(toolClass, (), kwargs, messages)
+
+    return (result, [message for severity, message in messages.messages])
+
+###
+# Get the permutation selection text for a number of permutations (e.g.
+# "9 Permutations").
+# @param numPerms The number of permutations.
+###
+def getPermutationText(numPerms):
+  if numPerms == 0:
+    return "0 Permutations (No Confidence Envelope)"
+  return "{0} Permutations".format(numPerms)
+
+###
+# Run a tool on a synthetic network, and write the timing as JSON.
+###
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Run a Crash Analysis Toolbox tool offline.")
+  parser.add_argument("--tool", default="GlobalKFunction",
+    choices=["GlobalKFunction", "CrossKFunction", "RandomODCMPermutations", "NetworkDatasetLength"])
+  parser.add_argument("--network", default="grid:20",
+    help="grid:N, planar:N, or csv:PATH.")
+  parser.add_argument("--points",       type=int, default=200)
+  parser.add_argument("--distribution", default="uniform", choices=["uniform", "clustered"])
+  parser.add_argument("--permutations", type=int, default=9, choices=[0, 9, 99, 999])
+  parser.add_argument("--seed",         type=int, default=0)
+  parser.add_argument("--distance-increment", type=float, default=100.0)
+  parser.add_argument("--bands",        type=int, default=10)
+  parser.add_argument("--sampling",     default="Random", choices=["Random", "Stratified", "Quasi-random"],
+    help="The random point sampling of the K function tools.")
+  parser.add_argument("--workspace", help="The workspace directory.  Default: a new temporary directory.")
+  parser.add_argument("--profile",   help="Write cProfile statistics for the tool run here.")
+  parser.add_argument("--verbose",   action="store_true", help="Show the tool messages.")
+  args = parser.parse_args(argv)
+
+  workspace = args.workspace or os.path.join(tempfile.mkdtemp(), "offline.gdb")
+  echo      = (lambda message: sys.stderr.write(message + "\n")) if args.verbose else None
+  runner    = OfflineRunner(workspace, echo)
+  synNet    = SyntheticNetwork(args.seed)
+  netType, netArg = args.network.split(":", 1)
+
+  if netType == "grid":
+    lines = synNet.makeGrid(int(netArg), int(netArg))
+  elif netType == "planar":
+    lines = synNet.makeRandomPlanar(int(netArg), int(netArg))
+  else:
+    lines = synNet.readLines(netArg)
+
+  graph = synNet.makeGraph(lines)
+
+  if args.distribution == "clustered":
+    locations = synNet.makeClusteredPoints(graph, args.points, 5, args.distance_increment * 3)
+  else:
+    locations = synNet.makeUniformPoints(graph, args.points)
+
+  networkDataset = runner.createNetworkDataset("Offline_ND", lines)
+  crashes        = runner.createPoints("Crashes", [graph.getLocationCoordinates(loc) for loc in locations])
+  otherCrashes   = runner.createPoints("Other_Crashes",
+    [graph.getLocationCoordinates(loc) for loc in synNet.makeUniformPoints(graph, args.points)])
+  kArgs          = {
+    "network_dataset":    networkDataset,
+    "num_dist_bands":     args.bands,
+    "beginning_distance": 0,
+    "distance_increment": args.distance_increment,
+    "snap_distance":      1,
+    "out_location":       workspace,
+    "num_permutations":   getPermutationText(args.permutations)}
+
+  if args.tool == "GlobalKFunction":
+    kArgs.update(points="Crashes", output_raw_odcm_feature_class="Global_K_ODCM",
+      output_raw_analysis_feature_class="Global_K_Raw", output_analysis_feature_class="Global_K_Summary",
+      random_seed=args.seed, random_point_sampling=args.sampling)
+  elif args.tool == "CrossKFunction":
+    kArgs.update(srcPoints="Crashes", destPoints="Other_Crashes", output_raw_odcm_feature_class="Cross_K_ODCM",
+      output_raw_analysis_feature_class="Cross_K_Raw", output_analysis_feature_class="Cross_K_Summary",
+      random_point_sampling=args.sampling)
+  elif args.tool == "RandomODCMPermutations":
+    kArgs = {"analysis_type": "Global Analysis", "srcPoints": "Crashes", "destPoints": "Crashes",
+      "network_dataset": networkDataset, "snap_distance": 1,
+      "cutoff_distance": args.distance_increment * (args.bands - 1), "out_location": workspace,
+      "output_raw_feature_class": "ODCM_Permutations", "num_permutations": getPermutationText(args.permutations)}
+  else:
+    kArgs = {"network_dataset": networkDataset, "out_location": workspace,
+      "out_length_table_name": "Offline_ND_Length"}
+
+  if args.profile:
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+  start = time.time()
+  runner.runTool(args.tool, **kArgs)
+  elapsed = time.time() - start
+
+  if args.profile:
+    profiler.disable()
+    profiler.dump_stats(args.profile)
+
+  report = {
+    "tool":          args.tool,
+    "network":       args.network,
+    "edges":         graph.getNumberOfEdges(),
+    "points":        args.points,
+    "distribution":  args.distribution,
+    "permutations":  args.permutations,
+    "sampling":      args.sampling,
+    "workspace":     workspace,
+    "seconds":       elapsed}
+
+  json.dump(report, sys.stdout, indent=2, sort_keys=True)
+  sys.stdout.write("\n")
+
+if __name__ == "__main__":
+  main()
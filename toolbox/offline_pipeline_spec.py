@@ -0,0 +1,724 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline"))
+
+from offline_runner import OfflineRunner, getPermutationText
+from synthetic_network import SyntheticNetwork
+from local_odcm_solver import LocalODCMSolver
+from network_k_calculation import NetworkKCalculation
+from k_function_helper import KFunctionHelper
+from network_length_cache import NetworkLengthCache
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+from permutation_work_queue import PermutationWorkQueue
+from permutation_bands import PermutationBands
+
+import arcpy
+
+class OfflinePipelineSuite(unittest.TestCase):
+  def setUp(self):
+    self.tempDir   = tempfile.mkdtemp()
+    self.cacheDir  = os.environ.get("CRASH_ANALYSIS_CACHE_DIR")
+    self.runner    = OfflineRunner(os.path.join(self.tempDir, "offline.gdb"))
+    self.synNet    = SyntheticNetwork(3)
+    self.lines     = self.synNet.makeGrid(5, 5)
+    self.graph     = self.synNet.makeGraph(self.lines)
+    self.locations = self.synNet.makeUniformPoints(self.graph, 15)
+    self.network   = self.runner.createNetworkDataset("Grid_ND", self.lines)
+
+    self.runner.createPoints("Crashes", [self.graph.getLocationCoordinates(loc) for loc in self.locations])
+    os.environ["CRASH_ANALYSIS_CACHE_DIR"] = os.path.join(self.tempDir, "cache")
+
+    # In-memory datasets last as long as the process.
+    for name in os.listdir(arcpy.resolvePath("in_memory")):
+      arcpy.Delete_management("in_memory/{0}".format(name))
+
+  def tearDown(self):
+    if self.cacheDir is None:
+      del os.environ["CRASH_ANALYSIS_CACHE_DIR"]
+    else:
+      os.environ["CRASH_ANALYSIS_CACHE_DIR"] = self.cacheDir
+
+    shutil.rmtree(self.tempDir)
+
+  # Read a table's rows.
+  def readRows(self, table, fields):
+    with arcpy.da.SearchCursor(table, fields) as cursor:
+      return [row for row in cursor]
+
+  # The network dataset length is the total length of the edges.
+  def test_network_dataset_length(self):
+    self.runner.runTool("NetworkDatasetLength", network_dataset=self.network,
+      out_location=self.runner.getWorkspace(), out_length_table_name="Grid_Length")
+
+    rows = self.readRows("Grid_Length", ["Network_Dataset_Length"])
+    self.assertEqual(len(rows), 1)
+    self.assertAlmostEqual(rows[0][0], self.graph.getTotalLength())
+
+  # Edge sources in another coordinate system are measured as they are read
+  # (offline, coordinates aren't transformed, so the length is the same).
+  def test_projected_length(self):
+    lengths = KFunctionHelper().getEdgeSourceLengths(self.network, arcpy.SpatialReference(32611))
+
+    self.assertEqual(len(lengths), 1)
+    self.assertAlmostEqual(lengths[0], self.graph.getTotalLength())
+
+  # The network's fingerprint only changes when its edges change, not when
+  # other datasets are written to its geodatabase.  The edges aren't read
+  # unless the geometry checksum is turned on.
+  def test_network_fingerprint(self):
+    search = arcpy.da.SearchCursor
+    tables = []
+
+    def recordSearch(in_table, *args, **kwargs):
+      tables.append(in_table)
+      return search(in_table, *args, **kwargs)
+
+    arcpy.da.SearchCursor = recordSearch
+    try:
+      fingerprint = KFunctionHelper().getNetworkFingerprint(self.network)
+      self.assertEqual(tables, [])
+
+      os.environ["CRASH_ANALYSIS_GEOMETRY_CHECKSUM"] = "1"
+      checksummed = KFunctionHelper().getNetworkFingerprint(self.network)
+      self.assertEqual(len(tables), 1)
+    finally:
+      arcpy.da.SearchCursor = search
+      os.environ.pop("CRASH_ANALYSIS_GEOMETRY_CHECKSUM", None)
+
+    self.assertNotEqual(checksummed, fingerprint)
+
+    time.sleep(0.01)
+    self.runner.createPoints("Other_Crashes", [(1.0, 2.0)])
+    self.assertEqual(KFunctionHelper().getNetworkFingerprint(self.network), fingerprint)
+
+    with arcpy.da.UpdateCursor("Grid_ND_Edges", ["SHAPE@"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([arcpy.Polyline(arcpy.Array([arcpy.Point(0, 0), arcpy.Point(1, 1)]))])
+        break
+
+    self.assertNotEqual(KFunctionHelper().getNetworkFingerprint(self.network), fingerprint)
+
+  # The weighting field's checksum changes when its values do.
+  def test_field_checksum(self):
+    kfHelper = KFunctionHelper()
+    arcpy.AddField_management("Grid_ND_Edges", "Weight", "LONG")
+
+    with arcpy.da.UpdateCursor("Grid_ND_Edges", ["Weight"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([1])
+
+    checksum = kfHelper.getFieldChecksum(self.network, "Weight")
+    self.assertEqual(kfHelper.getFieldChecksum(self.network, "Weight"), checksum)
+
+    with arcpy.da.UpdateCursor("Grid_ND_Edges", ["Weight"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([2])
+        break
+
+    self.assertNotEqual(kfHelper.getFieldChecksum(self.network, "Weight"), checksum)
+
+  # The network length is calculated once, then read from the cache until the
+  # edges change.
+  def test_cached_length(self):
+    kfHelper    = KFunctionHelper()
+    lengthCache = NetworkLengthCache(kfHelper.getCacheDirectory())
+    key         = lengthCache.getKey(arcpy.Describe(self.network).catalogPath,
+      kfHelper.getNetworkFingerprint(self.network), arcpy.Describe(self.network).spatialReference.exportToString())
+
+    self.assertAlmostEqual(kfHelper.calculateLength(self.network, None), self.graph.getTotalLength())
+    self.assertAlmostEqual(lengthCache.load(key), self.graph.getTotalLength())
+
+    lengthCache.save(key, 42.0)
+    self.assertEqual(kfHelper.calculateLength(self.network, None), 42.0)
+
+    # Writing other datasets to the network's geodatabase is still a hit.
+    time.sleep(0.01)
+    self.runner.createPoints("Other_Crashes", [(1.0, 2.0)])
+    self.assertEqual(KFunctionHelper().calculateLength(self.network, None), 42.0)
+
+    # Changing an edge is a miss.
+    with arcpy.da.UpdateCursor("Grid_ND_Edges", ["SHAPE@"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([arcpy.Polyline(arcpy.Array([arcpy.Point(0, 0), arcpy.Point(1, 1)]))])
+        break
+
+    self.assertNotEqual(KFunctionHelper().calculateLength(self.network, None), 42.0)
+
+  # The Global K tool's observed distance bands match a direct calculation.
+  def test_global_k(self):
+    self.runner.runTool("GlobalKFunction", points="Crashes", network_dataset=self.network,
+      num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+      out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary",
+      num_permutations=getPermutationText(9), random_seed=1)
+
+    points   = [(oid, self.locations[oid - 1]) for oid in range(1, len(self.locations) + 1)]
+    odDists  = LocalODCMSolver(self.graph).solve(points, points, 400, True)
+    netKCalc = NetworkKCalculation(self.graph.getTotalLength(), len(points), odDists, 0, 100, 5)
+    expected = [distBand["count"] for distBand in netKCalc.getDistanceBands()]
+    raw      = self.readRows("Raw", ["Iteration_Number", "Point_Count"])
+    observed = [row[1] for row in raw if row[0] == 0]
+
+    self.assertEqual(observed, expected)
+    self.assertEqual(len(raw), 10 * 5)
+    self.assertEqual(len(self.readRows("Summary", ["Description"])), 5 * 5)
+    self.assertEqual(sorted(set(row[0] for row in self.readRows("ODCM", ["Iteration_Number"]))),
+      list(range(0, 10)))
+
+    # Temporary tables and layers are cleaned up.
+    self.assertEqual(sorted(name for name in os.listdir(self.runner.getWorkspace())),
+      ["Crashes", "Grid_ND", "Grid_ND_Edges", "ODCM", "Raw", "Summary"])
+    self.assertEqual([name for name in arcpy.layers if "TEMP_" in name], [])
+
+  # A run that fails part way deletes its temporary datasets, and doesn't touch
+  # another run's.
+  def test_temp_cleanup_on_failure(self):
+    other = RandomODCMPermutationsSvc()
+    kept  = other.kfHelper.generateRandomPointBatch(self.network, 5, None, [1], 1)
+
+    def callback(odDists, iteration):
+      if iteration == 2:
+        raise RuntimeError("Failed.")
+
+    svc = RandomODCMPermutationsSvc()
+    self.assertRaises(RuntimeError, svc.generateODCMPermutations, "GLOBAL", "Crashes", None, self.network, 1,
+      400, self.runner.getWorkspace(), "ODCM", 9, arcpy.SpatialReference(26911), None, arcpy.Messages(),
+      callback, 1)
+
+    self.assertEqual(svc.tempNS.getNames(), [])
+    self.assertEqual(self.listTempDatasets(), [os.path.basename(kept)])
+    self.assertEqual([name for name in arcpy.layers if "TEMP_" in name], [])
+
+  # The temporary datasets in the workspace and in memory.
+  def listTempDatasets(self):
+    names = os.listdir(self.runner.getWorkspace()) + os.listdir(arcpy.resolvePath("in_memory"))
+    return sorted(name for name in names if "TEMP_" in name)
+
+  # Intermediate datasets go to the scratch workspace, and only the outputs go
+  # to the output location.
+  def test_scratch_workspace(self):
+    scratchGDB = os.path.join(self.tempDir, "scratch.gdb")
+    os.makedirs(scratchGDB)
+    arcpy.env.scratchWorkspace = scratchGDB
+
+    try:
+      for mode, location in (("memory", arcpy.resolvePath("in_memory")), ("disk", scratchGDB),
+        ("workspace", self.runner.getWorkspace())):
+        os.environ["CRASH_ANALYSIS_SCRATCH"] = mode
+        batch = KFunctionHelper().generateRandomPointBatch(self.network, 15, None, [1, 2], 7)
+
+        self.assertEqual(os.path.dirname(arcpy.resolvePath(batch)), location)
+        self.assertEqual(len(self.readRows(batch, ["OID@"])), 30)
+        arcpy.Delete_management(batch)
+
+      os.environ["CRASH_ANALYSIS_SCRATCH"] = "disk"
+      self.runner.runTool("GlobalKFunction", points="Crashes", network_dataset=self.network,
+        num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+        out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM",
+        output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary",
+        num_permutations=getPermutationText(9), random_seed=1)
+
+      self.assertEqual(os.listdir(scratchGDB), [])
+      self.assertEqual(self.listTempDatasets(), [])
+    finally:
+      del os.environ["CRASH_ANALYSIS_SCRATCH"]
+      arcpy.env.scratchWorkspace = None
+
+  # The local K table has each point's neighbor counts, which add up to the
+  # global counts, and the bounds of the random points' counts.
+  def test_local_k(self):
+    self.runner.runTool("GlobalKFunction", points="Crashes", network_dataset=self.network,
+      num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+      out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary",
+      num_permutations=getPermutationText(9), random_seed=1, output_local_k_table="Local")
+
+    bands    = ["Band_{0}".format(bandNum) for bandNum in range(1, 6)]
+    local    = self.readRows("Local", ["Description", "Point_ID"] + bands + ["Clustered_Bands"])
+    observed = [row for row in local if row[0] == "Observed"]
+    raw      = self.readRows("Raw", ["Iteration_Number", "Point_Count"])
+
+    self.assertEqual([row[1] for row in observed], list(range(1, len(self.locations) + 1)))
+    self.assertEqual([sum(row[bandNum + 2] for row in observed) for bandNum in range(0, 5)],
+      [row[1] for row in raw if row[0] == 0])
+
+    # Each observed point is followed by its own bounds, and is clustered
+    # against its own upper bound.
+    uppers = []
+    for pointNum in range(0, len(observed)):
+      rows = local[pointNum * 5:(pointNum + 1) * 5]
+
+      self.assertEqual([row[0] for row in rows],
+        ["Observed", "2.5% Lower Bound", "2.5% Upper Bound", "5% Lower Bound", "5% Upper Bound"])
+      self.assertEqual(set(row[1] for row in rows), set([rows[0][1]]))
+
+      upper = rows[2][2:7]
+      uppers.append(tuple(upper))
+      self.assertEqual(rows[0][7], len([bandNum for bandNum in range(0, 5) if rows[0][bandNum + 2] > upper[bandNum]]))
+
+    # The points are in different parts of the grid, so their nulls differ.
+    self.assertTrue(len(set(uppers)) > 1)
+
+  # A multi-type Global K has the K functions of each category and pair of
+  # categories, and the observed ones match a direct calculation.
+  def test_multi_type_global_k(self):
+    severities = [(oid % 3) + 1 for oid in range(1, len(self.locations) + 1)]
+
+    arcpy.CreateFeatureclass_management(self.runner.getWorkspace(), "Typed_Crashes", "POINT",
+      spatial_reference=arcpy.SpatialReference(26911))
+    arcpy.AddField_management("Typed_Crashes", "Severity", "SHORT")
+
+    with arcpy.da.InsertCursor("Typed_Crashes", ["SHAPE@XY", "Severity"]) as cursor:
+      for loc, severity in zip(self.locations, severities):
+        cursor.insertRow([self.graph.getLocationCoordinates(loc), severity])
+
+    self.runner.runTool("GlobalKFunction", points="Typed_Crashes", network_dataset=self.network,
+      num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+      out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary",
+      num_permutations=getPermutationText(9), random_seed=1, category_field="Severity")
+
+    raw     = self.readRows("Raw", ["Category", "Iteration_Number", "Point_Count"])
+    summary = self.readRows("Summary", ["Category", "Description"])
+    curves  = ["All", "1", "2", "3", "1 x 2", "1 x 3", "2 x 3"]
+
+    self.assertEqual(sorted(set(row[0] for row in raw)), sorted(curves))
+    self.assertEqual(len(raw), len(curves) * 10 * 5)
+    self.assertEqual(len(summary), len(curves) * 5 * 5)
+
+    for severity in (1, 2, 3):
+      points   = [(oid, self.locations[oid - 1]) for oid in range(1, len(self.locations) + 1)
+        if severities[oid - 1] == severity]
+      odDists  = LocalODCMSolver(self.graph).solve(points, points, 400, True)
+      netKCalc = NetworkKCalculation(self.graph.getTotalLength(), len(points), odDists, 0, 100, 5)
+      observed = [row[2] for row in raw if row[0] == str(severity) and row[1] == 0]
+
+      self.assertEqual(observed, [distBand["count"] for distBand in netKCalc.getDistanceBands()])
+
+  # The space-time K function solves the observed points once, and its
+  # observed counts match a direct count.
+  def test_space_time_k(self):
+    days = ["2011-01-{0:02d}".format(day) for day in range(1, len(self.locations) + 1)]
+
+    arcpy.CreateFeatureclass_management(self.runner.getWorkspace(), "Dated_Crashes", "POINT",
+      spatial_reference=arcpy.SpatialReference(26911))
+    arcpy.AddField_management("Dated_Crashes", "DATE_", "TEXT")
+    arcpy.AddField_management("Dated_Crashes", "TIME_", "TEXT")
+
+    with arcpy.da.InsertCursor("Dated_Crashes", ["SHAPE@XY", "DATE_", "TIME_"]) as cursor:
+      for loc, day in zip(self.locations, days):
+        cursor.insertRow([self.graph.getLocationCoordinates(loc), day, "1200"])
+
+    self.runner.runTool("SpaceTimeKFunction", points="Dated_Crashes", network_dataset=self.network,
+      num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+      out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary",
+      num_permutations=getPermutationText(9), num_time_bands=3, beginning_time=0, time_increment=2,
+      random_seed=1)
+
+    points  = [(oid, self.locations[oid - 1]) for oid in range(1, len(self.locations) + 1)]
+    odDists = LocalODCMSolver(self.graph).solve(points, points, 400, True)
+    raw     = self.readRows("Raw", ["Iteration_Number", "Distance_Band", "Time_Band", "Point_Count"])
+
+    for row in [row for row in raw if row[0] == 0]:
+      self.assertEqual(row[3], len([odDist for odDist in odDists if odDist["Total_Length"] <= row[1] and
+        abs(odDist["OriginID"] - odDist["DestinationID"]) <= row[2]]))
+
+    self.assertEqual(len(raw), 10 * 5 * 3)
+    self.assertEqual(len(self.readRows("Summary", ["Description"])), 5 * 5 * 3)
+    self.assertEqual(set(row[0] for row in self.readRows("ODCM", ["Iteration_Number"])), set([0]))
+
+  # The observed G function counts each crash whose nearest other crash (on the
+  # network) is within the band.
+  def test_nearest_neighbor(self):
+    self.runner.runTool("NearestNeighborFunction", analysis_type="Global Analysis", srcPoints="Crashes",
+      network_dataset=self.network, num_dist_bands=4, beginning_distance=0, distance_increment=50,
+      snap_distance=1, out_location=self.runner.getWorkspace(), output_raw_analysis_feature_class="Raw",
+      output_analysis_feature_class="Summary", num_permutations=getPermutationText(9), random_seed=1)
+
+    points  = [(oid, self.locations[oid - 1]) for oid in range(1, len(self.locations) + 1)]
+    odDists = LocalODCMSolver(self.graph).solve(points, points, None, True)
+    nearest = [min(odDist["Total_Length"] for odDist in odDists
+      if odDist["OriginID"] == oid and odDist["DestinationID"] != oid) for oid, loc in points]
+    raw     = self.readRows("Raw", ["Function", "Iteration_Number", "Distance_Band", "Point_Count"])
+
+    for row in [row for row in raw if row[0] == "G" and row[1] == 0]:
+      self.assertEqual(row[3], len([dist for dist in nearest if dist <= row[2] + 1e-6]))
+
+    self.assertEqual(len([row for row in raw if row[0] == "G"]), 10 * 4)
+    self.assertEqual(len([row for row in raw if row[0] == "F"]), 10 * 4)
+    self.assertEqual(len(self.readRows("Summary", ["Description"])), 2 * 5 * 4)
+
+  # The nearest neighbor tool needs a projected, metered coordinate system, and
+  # a network dataset whose distances its graph of the edges gives.
+  def test_nearest_neighbor_validation(self):
+    nnArgs = {"analysis_type": "Global Analysis", "srcPoints": "Crashes", "network_dataset": self.network,
+      "num_dist_bands": 4, "beginning_distance": 0, "distance_increment": 50, "snap_distance": 1,
+      "out_location": self.runner.getWorkspace(), "output_raw_analysis_feature_class": "Raw",
+      "output_analysis_feature_class": "Summary", "num_permutations": getPermutationText(0)}
+
+    messages = self.runner.runTool("NearestNeighborFunction", **nnArgs)[1]
+    self.assertIn("Network dataset length projected coordinate system: NAD_1983_UTM_Zone_11N", messages)
+
+    with self.assertRaises(arcpy.ExecuteError) as context:
+      self.runner.runTool("NearestNeighborFunction", coordinate_system=4326, **nnArgs)
+    self.assertIn("must be a projected coordinate system", str(context.exception))
+
+    describe = arcpy.Describe
+
+    def describeAnyVertex(value, *args):
+      desc = describe(value, *args)
+      if desc.dataType == "NetworkDataset":
+        for edgeSource in desc.edgeSources:
+          edgeSource.connectivityPolicies = "AnyVertex"
+      return desc
+
+    arcpy.Describe = describeAnyVertex
+    try:
+      with self.assertRaises(arcpy.ExecuteError) as context:
+        self.runner.runTool("NearestNeighborFunction", **nnArgs)
+    finally:
+      arcpy.Describe = describe
+
+    self.assertIn("Edge source Grid_ND_Edges has any vertex connectivity.", str(context.exception))
+
+  # The crashes in a CSV file that match the filter are loaded as points, and
+  # the columns are cached under the cache directory, not next to the file.
+  def test_crash_csv_points(self):
+    csvPath = os.path.join(self.tempDir, "crashes.csv")
+    coords  = [self.graph.getLocationCoordinates(loc) for loc in self.locations]
+
+    with open(csvPath, "w") as csvFile:
+      csvFile.write("CASEID,POINT_X,POINT_Y,YEAR_\n")
+      for caseNum in range(0, len(coords)):
+        csvFile.write("{0},{1!r},{2!r},{3}\n".format(9000000001 + caseNum, coords[caseNum][0], coords[caseNum][1],
+          2010 + caseNum % 2))
+      csvFile.write("9000000100,,,2011\n")
+      csvFile.write(",{0!r},{1!r},2011\n".format(coords[0][0], coords[0][1]))
+      csvFile.write("9000000101,{0!r},{1!r},\n".format(coords[0][0], coords[0][1]))
+
+    csvArgs = {"csv_file": csvPath, "filter": "YEAR_ == 2011", "coordinate_system": 26911,
+      "out_location": self.runner.getWorkspace(), "output_points_feature_class": "CSV_Crashes"}
+
+    messages = self.runner.runTool("CrashCSVPoints", **csvArgs)[1]
+    rows     = self.readRows("CSV_Crashes", ["CASEID", "SHAPE@XY"])
+
+    # The row without an ID isn't loaded, and the row without a year doesn't
+    # match.
+    self.assertIn("Crashes matching the filter: 9", messages)
+    self.assertIn("Crashes without coordinates: 1", messages)
+    self.assertIn("Crashes without an ID: 1", messages)
+    self.assertEqual([row[0] for row in rows], [9000000001 + caseNum for caseNum in range(1, len(coords), 2)])
+    self.assertEqual([tuple(row[1]) for row in rows], [tuple(coords[caseNum]) for caseNum in range(1, len(coords), 2)])
+    self.assertEqual([name for name in os.listdir(self.tempDir) if name.endswith(".columns")], [])
+    self.assertEqual(len(os.listdir(os.path.join(self.tempDir, "cache", "crash_csv"))), 1)
+
+    messages = self.runner.runTool("CrashCSVPoints", **csvArgs)[1]
+    self.assertIn("Crashes matching the filter: 9 (cached)", messages)
+
+    # The empty ID doesn't match CASEID < 0, and the IDs that are left fit in a
+    # LONG.
+    with open(csvPath, "a") as csvFile:
+      csvFile.write("-5,{0!r},{1!r},2011\n".format(coords[0][0], coords[0][1]))
+    csvArgs["filter"] = "CASEID < 0"
+
+    self.runner.runTool("CrashCSVPoints", **csvArgs)
+    self.assertEqual(self.readRows("CSV_Crashes", ["CASEID"]), [(-5,)])
+    self.assertEqual([field.type for field in arcpy.Describe(os.path.join(self.runner.getWorkspace(),
+      "CSV_Crashes")).fields if field.name == "CASEID"], ["Integer"])
+
+  # The OD lines are mapped back to the points through the locations' names,
+  # so it doesn't matter what order AddLocations loads the points in.
+  def test_location_order(self):
+    svc          = RandomODCMPermutationsSvc()
+    spatRef      = arcpy.SpatialReference(26911)
+    addLocations = arcpy.na.AddLocations
+
+    def toPairs(odDists):
+      return sorted((odDist["OriginID"], odDist["DestinationID"], round(odDist["Total_Length"], 6))
+        for odDist in odDists)
+
+    # Load the rows in reverse order: the last point gets the first location.
+    def reverseLocations(layer, sublayerName, *args, **kwargs):
+      rows   = layer.sublayers[sublayerName].rows
+      first  = len(rows)
+      result = addLocations(layer, sublayerName, *args, **kwargs)
+      oids   = [row["OBJECTID"] for row in rows[first:]]
+
+      rows[first:] = rows[first:][::-1]
+      for row, oid in zip(rows[first:], oids):
+        row["OBJECTID"] = oid
+      return result
+
+    expected = toPairs(svc.calculateDistances(self.network, "Crashes", "Crashes", 1, None, spatRef))
+
+    arcpy.na.AddLocations = reverseLocations
+    try:
+      reordered = toPairs(svc.calculateDistances(self.network, "Crashes", "Crashes", 1, None, spatRef))
+    finally:
+      arcpy.na.AddLocations = addLocations
+
+    self.assertEqual(len(expected), 15 * 14)
+    self.assertEqual(reordered, expected)
+
+  # A batch of random points has each permutation's points, and a permutation
+  # can be reproduced on its own from the seed.
+  def test_random_point_batch(self):
+    kfHelper = KFunctionHelper()
+    batch    = kfHelper.generateRandomPointBatch(self.network, 15, None, [1, 2, 3], 7)
+    rows     = self.readRows(batch, ["Iteration_Number", "SHAPE@XY"])
+    layer    = kfHelper.getRandomPointLayer(batch, 2)
+    second   = [(row[1],) for row in rows if row[0] == 2]
+
+    self.assertEqual([row[0] for row in rows], [1] * 15 + [2] * 15 + [3] * 15)
+    self.assertEqual(self.readRows(layer, ["SHAPE@XY"]), second)
+
+    arcpy.Delete_management(layer)
+    batch = kfHelper.generateRandomPointBatch(self.network, 15, None, [2], 7)
+    self.assertEqual(self.readRows(batch, ["SHAPE@XY"]), second)
+
+  # Worker processes compute the same band counts as a serial run with the
+  # same seed.
+  def test_distributed_permutations(self):
+    spoolDir = os.path.join(self.tempDir, "spool")
+    bands    = PermutationBands("NETWORK", self.graph.getTotalLength(), 15, 0, 2, 10)
+    serial   = {}
+
+    def callback(odDists, iteration):
+      serial[iteration] = bands.count(odDists)
+
+    svc = RandomODCMPermutationsSvc()
+    svc.generateODCMPermutations("GLOBAL", "Crashes", None, self.network, 1, None,
+      self.runner.getWorkspace(), "ODCM", 6, None, None, arcpy.Messages(), callback, 11)
+
+    queue = PermutationWorkQueue.create(spoolDir, "run", svc.createPermutationJob("GLOBAL", "Crashes",
+      self.network, 1, None, None, None, 15, bands))
+    queue.submit(svc.createPermutationTasks(self.network, 11, range(1, 7)))
+
+    # Each worker stops after two tasks, so all three take part.
+    offlineDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline")
+    workers    = [subprocess.Popen([sys.executable, "-c",
+      "import sys, offline_runner, permutation_worker; permutation_worker.main(sys.argv[1:])",
+      spoolDir, "--worker-id", "worker_{0}".format(i), "--max-tasks", "2", "--idle-seconds", "30",
+      "--poll-seconds", "0.1"], cwd=offlineDir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+      for i in range(0, 3)]
+
+    for worker in workers:
+      output = worker.communicate()[0]
+      self.assertEqual(worker.returncode, 0, output)
+
+    self.assertEqual(queue.getResults(), dict((i, serial[i]) for i in range(1, 7)))
+    self.assertEqual(sorted(queue.getWorkers().values()),
+      ["worker_0", "worker_0", "worker_1", "worker_1", "worker_2", "worker_2"])
+
+  # The Global K tool gives the same results with the permutations on a work
+  # queue (computed by the tool itself here).
+  def test_distributed_global_k(self):
+    kArgs = {"points": "Crashes", "network_dataset": self.network, "num_dist_bands": 5,
+      "beginning_distance": 0, "distance_increment": 100, "snap_distance": 1,
+      "out_location": self.runner.getWorkspace(), "num_permutations": getPermutationText(9), "random_seed": 1}
+
+    self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary", **kArgs)
+
+    os.environ["CRASH_ANALYSIS_WORK_QUEUE"] = os.path.join(self.tempDir, "spool")
+    try:
+      messages = self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM_Queue",
+        output_raw_analysis_feature_class="Raw_Queue", output_analysis_feature_class="Summary_Queue",
+        **kArgs)[1]
+    finally:
+      del os.environ["CRASH_ANALYSIS_WORK_QUEUE"]
+
+    fields = ["Iteration_Number", "Distance_Band", "Point_Count", "K_Function"]
+    self.assertEqual(self.readRows("Raw_Queue", fields), self.readRows("Raw", fields))
+    self.assertEqual(self.readRows("Summary_Queue", ["Description", "Point_Count"]),
+      self.readRows("Summary", ["Description", "Point_Count"]))
+    self.assertTrue(any(message.startswith("Permutations queued") for message in messages))
+    self.assertEqual(os.listdir(os.path.join(self.tempDir, "spool")), [])
+
+    # Only the observed ODCM is written.
+    self.assertEqual(sorted(set(row[0] for row in self.readRows("ODCM_Queue", ["Iteration_Number"]))), [0])
+
+  # Pipelined permutations match sequential ones, and arcpy is only used on
+  # the calling thread.
+  def test_pipelined_global_k(self):
+    kArgs = {"points": "Crashes", "network_dataset": self.network, "num_dist_bands": 5,
+      "beginning_distance": 0, "distance_increment": 100, "snap_distance": 1,
+      "out_location": self.runner.getWorkspace(), "num_permutations": getPermutationText(9), "random_seed": 1}
+
+    self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary", **kArgs)
+
+    threads = set()
+    solve   = arcpy.na.Solve
+    insert  = arcpy.da.InsertCursor
+
+    def recordSolve(*args, **kwargs):
+      threads.add(threading.current_thread().ident)
+      return solve(*args, **kwargs)
+
+    def recordInsert(*args, **kwargs):
+      threads.add(threading.current_thread().ident)
+      return insert(*args, **kwargs)
+
+    os.environ["CRASH_ANALYSIS_PIPELINE"] = "1"
+    arcpy.na.Solve        = recordSolve
+    arcpy.da.InsertCursor = recordInsert
+    try:
+      messages = self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM_Pipe",
+        output_raw_analysis_feature_class="Raw_Pipe", output_analysis_feature_class="Summary_Pipe",
+        **kArgs)[1]
+    finally:
+      del os.environ["CRASH_ANALYSIS_PIPELINE"]
+      arcpy.na.Solve        = solve
+      arcpy.da.InsertCursor = insert
+
+    fields = ["Iteration_Number", "Distance_Band", "Point_Count", "K_Function"]
+    self.assertEqual(self.readRows("Raw_Pipe", fields), self.readRows("Raw", fields))
+    self.assertIn("Pipelining the permutations.", messages)
+    self.assertEqual(threads, set([threading.current_thread().ident]))
+
+  # With the local solver, only the observed points are solved with the
+  # network dataset, and the permutations match.
+  def test_local_solver(self):
+    kArgs = {"points": "Crashes", "network_dataset": self.network, "num_dist_bands": 5,
+      "beginning_distance": 0, "distance_increment": 100, "snap_distance": 1,
+      "out_location": self.runner.getWorkspace(), "num_permutations": getPermutationText(9), "random_seed": 1}
+
+    self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM",
+      output_raw_analysis_feature_class="Raw", output_analysis_feature_class="Summary", **kArgs)
+
+    solves = []
+    solve  = arcpy.na.Solve
+
+    def recordSolve(*args, **kwargs):
+      solves.append(args[0])
+      return solve(*args, **kwargs)
+
+    os.environ["CRASH_ANALYSIS_LOCAL_SOLVER"] = "1"
+    arcpy.na.Solve = recordSolve
+    try:
+      messages = self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM_Local",
+        output_raw_analysis_feature_class="Raw_Local", output_analysis_feature_class="Summary_Local",
+        **kArgs)[1]
+    finally:
+      del os.environ["CRASH_ANALYSIS_LOCAL_SOLVER"]
+      arcpy.na.Solve = solve
+
+    fields = ["Iteration_Number", "Distance_Band", "Point_Count", "K_Function"]
+    self.assertEqual(self.readRows("Raw_Local", fields), self.readRows("Raw", fields))
+    self.assertIn("Solving the permutations on the network's edges (16 landmarks).", messages)
+    self.assertEqual(len(solves), 1)
+
+    # Without landmarks the results are the same.
+    os.environ["CRASH_ANALYSIS_LOCAL_SOLVER"] = "1"
+    os.environ["CRASH_ANALYSIS_LANDMARKS"]    = "0"
+    try:
+      messages = self.runner.runTool("GlobalKFunction", output_raw_odcm_feature_class="ODCM_Plain",
+        output_raw_analysis_feature_class="Raw_Plain", output_analysis_feature_class="Summary_Plain",
+        **kArgs)[1]
+    finally:
+      del os.environ["CRASH_ANALYSIS_LOCAL_SOLVER"]
+      del os.environ["CRASH_ANALYSIS_LANDMARKS"]
+
+    self.assertEqual(self.readRows("Raw_Plain", fields), self.readRows("Raw", fields))
+    self.assertIn("Solving the permutations on the network's edges (0 landmarks).", messages)
+
+  # Distances that differ from the network dataset's by more than the
+  # tolerance, or pairs that only one has, rule out the local solver.
+  def test_local_solver_check(self):
+    svc     = RandomODCMPermutationsSvc()
+    odDists = [{"OriginID": 1, "DestinationID": 2, "Total_Length": 100.0},
+      {"OriginID": 2, "DestinationID": 1, "Total_Length": 100.0}]
+
+    def withLength(length):
+      return [dict(odDist, Total_Length=length) for odDist in odDists]
+
+    self.assertTrue(svc._isSameDistances(odDists, withLength(100.001), 400))
+    self.assertFalse(svc._isSameDistances(odDists, withLength(101.0), 400))
+    self.assertFalse(svc._isSameDistances(odDists, odDists[:1], 400))
+
+    # A pair right at the cutoff can go either way.
+    self.assertTrue(svc._isSameDistances(withLength(400.0), withLength(400.0)[:1], 400))
+
+  # A task that keeps failing, e.g. on a worker with another copy of the
+  # network, fails the run.
+  def test_distributed_failure(self):
+    svc   = RandomODCMPermutationsSvc()
+    bands = PermutationBands("NETWORK", self.graph.getTotalLength(), 15, 0, 2, 10)
+    queue = PermutationWorkQueue.create(os.path.join(self.tempDir, "spool"), "run",
+      svc.createPermutationJob("GLOBAL", "Crashes", self.network, 1, None, None, None, 15, bands), 2)
+
+    queue.submit([{"iteration": 1, "seed": 1, "fingerprint": "other"}])
+
+    self.assertTrue(svc.runNextPermutationTask(queue, "worker"))
+    self.assertTrue(svc.runNextPermutationTask(queue, "worker"))
+    self.assertFalse(svc.runNextPermutationTask(queue, "worker"))
+    self.assertIn("differs from the coordinator", queue.getFailures()[0]["errors"][-1])
+
+  # With the observed cache on, a rerun with the same points and network loads
+  # the observed distances from the cache instead of solving them.
+  def test_observed_cache(self):
+    # The outputs are written to the network's geodatabase, which doesn't
+    # change the network's fingerprint.
+    def run(suffix):
+      messages = self.runner.runTool("GlobalKFunction", points="Crashes", network_dataset=self.network,
+        num_dist_bands=5, beginning_distance=0, distance_increment=100, snap_distance=1,
+        out_location=self.runner.getWorkspace(), output_raw_odcm_feature_class="ODCM" + suffix,
+        output_raw_analysis_feature_class="Raw" + suffix, output_analysis_feature_class="Summary" + suffix,
+        num_permutations=getPermutationText(9), random_seed=1)[1]
+      return "Observed distances loaded from the cache." in messages
+
+    # The cache is off by default.
+    self.assertFalse(run("_0"))
+    self.assertFalse(run("_1"))
+
+    os.environ["CRASH_ANALYSIS_OBSERVED_CACHE_MB"] = "512"
+    try:
+      self._checkObservedCache(run)
+    finally:
+      del os.environ["CRASH_ANALYSIS_OBSERVED_CACHE_MB"]
+
+  # See test_observed_cache.
+  def _checkObservedCache(self, run):
+    self.assertFalse(run("_1"))
+    self.assertTrue(run("_2"))
+
+    fields = ["Iteration_Number", "OriginID", "DestinationID", "Total_Length"]
+    self.assertEqual(self.readRows("ODCM_2", fields), self.readRows("ODCM_1", fields))
+    self.assertEqual(self.readRows("Raw_2", ["Point_Count"]), self.readRows("Raw_1", ["Point_Count"]))
+
+    # Moving a point is a miss.
+    with arcpy.da.UpdateCursor("Crashes", ["SHAPE@XY"]) as cursor:
+      for row in cursor:
+        cursor.updateRow([(row[0][0] + 1, row[0][1])])
+        break
+
+    self.assertFalse(run("_3"))
+    self.assertTrue(run("_4"))
+
+    # Rebuilding the network dataset with other settings is a miss.
+    describe = arcpy.Describe
+
+    def describeAnyVertex(value, *args):
+      desc = describe(value, *args)
+      if desc.dataType == "NetworkDataset":
+        for edgeSource in desc.edgeSources:
+          edgeSource.connectivityPolicies = "AnyVertex"
+      return desc
+
+    arcpy.Describe = describeAnyVertex
+    try:
+      self.assertFalse(run("_5"))
+    finally:
+      arcpy.Describe = describe
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,83 @@
+from network_k_calculation import NetworkKCalculation
+from cross_k_calculation   import CrossKCalculation
+
+###
+# Counts the distance bands of a permutation as a vector of counts, and turns
+# the counts back into distance bands.  The counts are what permutation workers
+# send back (see PermutationWorkQueue), so the settings are serializable.
+###
+class PermutationBands(object):
+  # The calculations that the bands can be counted with: cumulative (Global K)
+  # or non-cumulative (Cross K).
+  CALCULATIONS = {
+    "NETWORK": NetworkKCalculation,
+    "CROSS":   CrossKCalculation}
+
+  ###
+  # Initialize the counter.
+  # @param calcType One of CALCULATIONS.
+  # @param netLen The length of the network.
+  # @param numPoints The number of points (see NetworkKCalculation).
+  # @param begDist The beginning distance.
+  # @param distInc The distance increment.
+  # @param numBands The number of distance bands.
+  ###
+  def __init__(self, calcType, netLen, numPoints, begDist, distInc, numBands):
+    if calcType not in self.CALCULATIONS:
+      raise ValueError("Unknown distance band calculation: {0}".format(calcType))
+
+    self._calcType  = calcType
+    self._netLen    = netLen
+    self._numPoints = numPoints
+    self._begDist   = begDist
+    self._distInc   = distInc
+    self._numBands  = numBands
+
+  # Get the number of distance bands.
+  def getNumberOfDistanceBands(self):
+    return self._numBands
+
+  # Make a calculation of some OD distances.
+  def _calculate(self, odDists):
+    return self.CALCULATIONS[self._calcType](self._netLen, self._numPoints, odDists,
+      self._begDist, self._distInc, self._numBands)
+
+  ###
+  # Count the OD distances in each distance band.  Returns an array of counts.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  ###
+  def count(self, odDists):
+    return [distBand["count"] for distBand in self._calculate(odDists).getDistanceBands()]
+
+  ###
+  # Get the distance bands from counts.  Returns the same array of distance
+  # bands as the calculation's getDistanceBands().
+  # @param counts An array of counts (from count).
+  ###
+  def getDistanceBands(self, counts):
+    netKCalc = self._calculate([])
+
+    for distBand, count in zip(netKCalc.getDistanceBands(), counts):
+      distBand["count"] = count
+    netKCalc.calculateNetworkK()
+
+    return netKCalc.getDistanceBands()
+
+  # Serialize the settings.
+  def toJSON(self):
+    return {
+      "calcType":  self._calcType,
+      "netLen":    self._netLen,
+      "numPoints": self._numPoints,
+      "begDist":   self._begDist,
+      "distInc":   self._distInc,
+      "numBands":  self._numBands}
+
+  ###
+  # Restore the settings.
+  # @param data A dictionary from toJSON.
+  ###
+  @staticmethod
+  def fromJSON(data):
+    return PermutationBands(data["calcType"], data["netLen"], data["numPoints"],
+      data["begDist"], data["distInc"], data["numBands"])
@@ -0,0 +1,30 @@
+import unittest
+
+from network_k_calculation import NetworkKCalculation
+from cross_k_calculation import CrossKCalculation
+from permutation_bands import PermutationBands
+
+class PermutationBandsSuite(unittest.TestCase):
+  def setUp(self):
+    self.odDists = [{"Total_Length": length, "OriginID": 1, "DestinationID": 2}
+      for length in (0.5, 1.5, 1.7, 3.2, 9.0)]
+
+  # The counts turn back into the calculation's distance bands.
+  def test_network(self):
+    bands    = PermutationBands("NETWORK", 100.0, 5, 0, 1, 4)
+    expected = NetworkKCalculation(100.0, 5, self.odDists, 0, 1, 4).getDistanceBands()
+
+    self.assertEqual(bands.count(self.odDists), [0, 1, 3, 3])
+    self.assertEqual(bands.getDistanceBands(bands.count(self.odDists)), expected)
+
+  def test_cross(self):
+    bands    = PermutationBands.fromJSON(PermutationBands("CROSS", 100.0, 5, 1, 1, 3).toJSON())
+    expected = CrossKCalculation(100.0, 5, self.odDists, 1, 1, 3).getDistanceBands()
+
+    self.assertEqual(bands.getNumberOfDistanceBands(), 3)
+    self.assertEqual(bands.count(self.odDists), [2, 0, 1])
+    self.assertEqual(bands.getDistanceBands(bands.count(self.odDists)), expected)
+    self.assertRaises(ValueError, PermutationBands, "LOCAL", 100.0, 5, 0, 1, 3)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,144 @@
+import sys
+import threading
+
+# The queue module was renamed in Python 3.
+try:
+  import Queue as queue
+except ImportError:
+  import queue
+
+###
+# Runs the permutations as a two-stage pipeline, so that the stages overlap:
+# permutation i+1 is solved while permutation i is counted.
+#
+#   solve    Runs on the calling thread.  Everything that uses arcpy (random
+#            points, the solve, writing the ODCM) belongs here: arcpy isn't
+#            safe to use from other threads.
+#   consume  Runs on a background thread.  It must be pure Python (e.g.
+#            counting the distance bands), and it only overlaps the time the
+#            calling thread spends outside the interpreter, e.g. in the solver.
+#
+# Each stage handles the permutations one at a time and in order, and the
+# stages are connected by a bounded FIFO queue, so the results and their order
+# are the same as running the permutations one after another.  If a stage
+# raises, the pipeline stops, and the exception is raised by run().
+###
+class PermutationPipeline(object):
+  # Marks the end of the permutations in the queue.
+  _END = object()
+
+  # How often (seconds) blocked stages check if the pipeline was stopped.
+  _POLL = 0.1
+
+  ###
+  # Initialize the pipeline.
+  # @param solve A function(iteration) that returns the result of a
+  #        permutation (e.g. OD distances).
+  # @param consume A function(iteration, result) that counts a result.  It
+  #        must not use arcpy.  Its return value is passed to report.
+  # @param report A function(iteration, value) called on the calling thread
+  #        after each permutation is consumed, e.g. to show progress (optional).
+  # @param queueSize The number of solved permutations that can wait to be
+  #        consumed.
+  ###
+  def __init__(self, solve, consume, report=None, queueSize=2):
+    self._solve     = solve
+    self._consume   = consume
+    self._report    = report or (lambda iteration, value: None)
+    self._queueSize = queueSize
+
+  ###
+  # Run the permutations.
+  # @param iterations An array of iteration numbers.
+  ###
+  def run(self, iterations):
+    self._stop    = threading.Event()
+    self._errors  = []
+    self._solved  = queue.Queue(self._queueSize)
+    self._reports = queue.Queue()
+
+    consumer = threading.Thread(target=self._runConsumer)
+    consumer.daemon = True
+    consumer.start()
+
+    try:
+      self._runSolver(list(iterations))
+    except BaseException:
+      self._fail()
+
+    consumer.join()
+    self._sendReports()
+
+    if len(self._errors) != 0:
+      self._raise(self._errors[0])
+
+  # Record the current exception and stop the pipeline.
+  def _fail(self):
+    self._errors.append(sys.exc_info())
+    self._stop.set()
+
+  # Re-raise an exception from another thread with its traceback.
+  def _raise(self, excInfo):
+    if sys.version_info[0] >= 3:
+      raise excInfo[1].with_traceback(excInfo[2])
+    raise excInfo[1]
+
+  ###
+  # Put an entry in the queue, waiting while it's full.  Returns False if the
+  # pipeline stopped first.
+  ###
+  def _put(self, entry):
+    while not self._stop.is_set():
+      try:
+        self._solved.put(entry, True, self._POLL)
+        return True
+      except queue.Full:
+        pass
+
+    return False
+
+  ###
+  # Get an entry from the queue, waiting while it's empty.  Returns _END if
+  # the pipeline stopped first.
+  ###
+  def _get(self):
+    while not self._stop.is_set():
+      try:
+        return self._solved.get(True, self._POLL)
+      except queue.Empty:
+        pass
+
+    return self._END
+
+  # Pass the consumed permutations' values to report.
+  def _sendReports(self):
+    while not self._reports.empty():
+      iteration, value = self._reports.get()
+      self._report(iteration, value)
+
+  # Solve the permutations, in order (on the calling thread).
+  def _runSolver(self, iterations):
+    for iteration in iterations:
+      if self._stop.is_set():
+        return
+
+      if not self._put((iteration, self._solve(iteration))):
+        return
+
+      self._sendReports()
+
+    self._put(self._END)
+
+  # Consume the results, in order.
+  def _runConsumer(self):
+    try:
+      while True:
+        entry = self._get()
+
+        if entry is self._END:
+          return
+
+        iteration, result = entry
+        self._reports.put((iteration, self._consume(iteration, result)))
+    except BaseException:
+      self._fail()
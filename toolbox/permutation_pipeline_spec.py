@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+from permutation_pipeline import PermutationPipeline
+
+class PermutationPipelineSuite(unittest.TestCase):
+  # The results and their order match running the permutations in sequence,
+  # solving is done on the calling thread, and consuming on another thread.
+  def test_order(self):
+    consumed  = []
+    reported  = []
+    solvers   = set()
+    consumers = set()
+
+    def solve(i):
+      solvers.add(threading.current_thread().ident)
+      time.sleep(0.002 * (i % 3))
+      return i * 10
+
+    def consume(i, result):
+      consumers.add(threading.current_thread().ident)
+      time.sleep(0.001 * (i % 2))
+      consumed.append((i, result))
+      return "Iteration {0}".format(i)
+
+    pipeline = PermutationPipeline(solve, consume, lambda i, value: reported.append(value))
+    pipeline.run(range(1, 21))
+
+    self.assertEqual(consumed, [(i, i * 10) for i in range(1, 21)])
+    self.assertEqual(reported, ["Iteration {0}".format(i) for i in range(1, 21)])
+    self.assertEqual(solvers, set([threading.current_thread().ident]))
+    self.assertEqual(len(consumers), 1)
+    self.assertNotIn(threading.current_thread().ident, consumers)
+
+  # Stages overlap: solving runs ahead of consuming, but no more than the
+  # queue size.
+  def test_overlap(self):
+    solved = []
+    ahead  = []
+
+    def consume(i, result):
+      time.sleep(0.01)
+      ahead.append(len(solved) - i)
+
+    PermutationPipeline(lambda i: solved.append(i), consume, queueSize=1).run(range(1, 11))
+
+    self.assertTrue(max(ahead) >= 1)
+    self.assertTrue(max(ahead) <= 2)
+
+  # An exception in either stage stops the pipeline and is raised.
+  def test_errors(self):
+    for failStage in ("solve", "consume"):
+      solved   = []
+      consumed = []
+
+      def stage(name, value):
+        def run(i, *args):
+          if name == failStage and i == 5:
+            raise ValueError(name)
+          value(i)
+          return i
+        return run
+
+      pipeline = PermutationPipeline(stage("solve", solved.append), stage("consume", consumed.append))
+
+      with self.assertRaises(ValueError) as context:
+        pipeline.run(range(1, 101))
+
+      self.assertEqual(str(context.exception), failStage)
+      self.assertEqual(consumed, list(range(1, len(consumed) + 1)))
+      self.assertTrue(len(solved) < 100)
+      self.assertTrue(len(consumed) < 5)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,323 @@
+import json
+import os
+import shutil
+import time
+import uuid
+
+###
+# A work queue of permutation tasks in a spool directory, so that the
+# permutations of one run can be computed by workers on several machines (or
+# several processes on one machine) without a broker: every worker only needs
+# access to the spool directory, e.g. on a network share.
+#
+# Each job (one run) has its own directory in the spool directory, with the
+# job's parameters in job.json and a file per task in one of these directories:
+#
+#   pending   Tasks that are waiting for a worker.
+#   claimed   Tasks that a worker is working on.  A task is claimed by moving it
+#             here, which only one worker can do.  The file's modification time
+#             is the worker's lease, which the worker renews while it works.
+#   results   The result of each finished task.
+#   failed    Tasks that failed too many times.
+#
+# A task that fails, or whose lease expires (e.g. because the worker was
+# killed), goes back to pending until it has been attempted maxAttempts times.
+# Tasks can be computed more than once (e.g. a worker whose lease expired may
+# still finish), so a task's result must only depend on the task.
+###
+class PermutationWorkQueue(object):
+  # The name of the job parameters file.
+  JOB_FILE = "job.json"
+
+  # The task directories.
+  PENDING = "pending"
+  CLAIMED = "claimed"
+  RESULTS = "results"
+  FAILED  = "failed"
+
+  ###
+  # Initialize the queue.
+  # @param jobDir The job's directory (see create).
+  # @param maxAttempts The number of times a task is attempted before it fails.
+  # @param leaseSeconds The time after which a claimed task that hasn't been
+  #        renewed is given to another worker.
+  ###
+  def __init__(self, jobDir, maxAttempts=3, leaseSeconds=300.0):
+    self._jobDir       = jobDir
+    self._maxAttempts  = maxAttempts
+    self._leaseSeconds = leaseSeconds
+
+  ###
+  # Create a job in a spool directory.
+  # @param spoolDir The spool directory (created if needed).
+  # @param jobID The job's ID, e.g. the run ID (see TempNamespace).
+  # @param job A dictionary of the job's parameters, which is shared by the
+  #        tasks.  It must be serializable as JSON.
+  # @param maxAttempts See the constructor.
+  # @param leaseSeconds See the constructor.
+  ###
+  @staticmethod
+  def create(spoolDir, jobID, job, maxAttempts=3, leaseSeconds=300.0):
+    jobDir = os.path.join(spoolDir, jobID)
+
+    for dirName in (PermutationWorkQueue.PENDING, PermutationWorkQueue.CLAIMED,
+      PermutationWorkQueue.RESULTS, PermutationWorkQueue.FAILED):
+      if not os.path.isdir(os.path.join(jobDir, dirName)):
+        os.makedirs(os.path.join(jobDir, dirName))
+
+    # The job file is written last: workers ignore a job without one.
+    PermutationWorkQueue._writeJSON(os.path.join(jobDir, PermutationWorkQueue.JOB_FILE), job)
+
+    return PermutationWorkQueue(jobDir, maxAttempts, leaseSeconds)
+
+  ###
+  # List the job directories in a spool directory, oldest first.
+  # @param spoolDir The spool directory.
+  ###
+  @staticmethod
+  def listJobs(spoolDir):
+    if not os.path.isdir(spoolDir):
+      return []
+
+    jobDirs = [os.path.join(spoolDir, name) for name in os.listdir(spoolDir)]
+    jobDirs = [jobDir for jobDir in jobDirs
+      if os.path.isfile(os.path.join(jobDir, PermutationWorkQueue.JOB_FILE))]
+
+    return sorted(jobDirs, key=lambda jobDir: (os.path.getmtime(os.path.join(jobDir,
+      PermutationWorkQueue.JOB_FILE)), jobDir))
+
+  ###
+  # Write JSON to a file atomically: other processes see either the whole file
+  # or nothing.
+  # @param path The file's path.
+  # @param data The data to write.
+  ###
+  @staticmethod
+  def _writeJSON(path, data):
+    tempPath = "{0}.{1}.tmp".format(path, uuid.uuid4().hex)
+
+    with open(tempPath, "w") as jsonFile:
+      json.dump(data, jsonFile)
+
+    try:
+      os.rename(tempPath, path)
+    except OSError:
+      # On Windows, rename doesn't replace an existing file.
+      if os.path.exists(path):
+        os.remove(path)
+      os.rename(tempPath, path)
+
+  # Read a JSON file.
+  @staticmethod
+  def _readJSON(path):
+    with open(path, "r") as jsonFile:
+      return json.load(jsonFile)
+
+  # Get the path of a task file.
+  def _getPath(self, dirName, taskID):
+    return os.path.join(self._jobDir, dirName, "{0}.json".format(taskID))
+
+  # List the IDs of the tasks in a directory, in order.
+  def _listTasks(self, dirName):
+    dirPath = os.path.join(self._jobDir, dirName)
+
+    if not os.path.isdir(dirPath):
+      return []
+
+    return sorted(name[:-5] for name in os.listdir(dirPath) if name.endswith(".json"))
+
+  # Get the job's directory.
+  def getJobDirectory(self):
+    return self._jobDir
+
+  # Get the time after which an unrenewed claim expires, in seconds.
+  def getLeaseSeconds(self):
+    return self._leaseSeconds
+
+  # Get the job's ID.
+  def getJobID(self):
+    return os.path.basename(self._jobDir)
+
+  # Get the job's parameters.
+  def getJob(self):
+    return self._readJSON(os.path.join(self._jobDir, self.JOB_FILE))
+
+  # Check if the job still exists (the coordinator removes it when it's done).
+  def exists(self):
+    return os.path.isfile(os.path.join(self._jobDir, self.JOB_FILE))
+
+  ###
+  # Add tasks to the queue.  Each task is a dictionary with an iteration
+  # number, which identifies the task, and any other parameters (e.g. a seed).
+  # @param tasks An array of tasks.
+  ###
+  def submit(self, tasks):
+    for task in tasks:
+      task          = dict(task)
+      task["id"]    = "{0:08d}".format(task["iteration"])
+      task.setdefault("attempts", 0)
+      task.setdefault("errors",   [])
+
+      self._writeJSON(self._getPath(self.PENDING, task["id"]), task)
+
+  ###
+  # Claim the next pending task.  Returns the task, or None if no task is
+  # pending.
+  # @param workerID The worker's ID (stored with the task, for debugging).
+  ###
+  def claim(self, workerID):
+    for taskID in self._listTasks(self.PENDING):
+      claimedPath = self._getPath(self.CLAIMED, taskID)
+
+      pendingPath = self._getPath(self.PENDING, taskID)
+
+      # Only one worker can move the file.  The others move on.  The lease
+      # starts now, not when the task was queued, so the file is touched
+      # before it's moved: a claimed file never has the old time, which
+      # requeueExpired would take for an expired lease.
+      try:
+        os.utime(pendingPath, None)
+        os.rename(pendingPath, claimedPath)
+      except OSError:
+        continue
+
+      task           = self._readJSON(claimedPath)
+      task["worker"] = workerID
+      self._writeJSON(claimedPath, task)
+
+      return task
+
+    return None
+
+  ###
+  # Renew the lease on a claimed task.  Returns False if the task is no longer
+  # claimed (e.g. the lease expired and the task was requeued).
+  # @param taskID The task's ID.
+  ###
+  def renew(self, taskID):
+    try:
+      os.utime(self._getPath(self.CLAIMED, taskID), None)
+      return True
+    except OSError:
+      return False
+
+  ###
+  # Store the result of a claimed task.
+  # @param task The task (from claim).
+  # @param result The result, which must be serializable as JSON.
+  ###
+  def complete(self, task, result):
+    self._writeJSON(self._getPath(self.RESULTS, task["id"]), {
+      "iteration": task["iteration"],
+      "worker":    task.get("worker"),
+      "attempts":  task["attempts"] + 1,
+      "result":    result})
+
+    try:
+      os.remove(self._getPath(self.CLAIMED, task["id"]))
+    except OSError:
+      pass
+
+  ###
+  # Give up on a claimed task.  It's returned to the queue, unless it has been
+  # attempted maxAttempts times, in which case it fails.
+  # @param task The task (from claim).
+  # @param error A description of the error.
+  ###
+  def fail(self, task, error):
+    self._release(task, self._getPath(self.CLAIMED, task["id"]), error)
+
+  # Return a task to the queue, or fail it.  The task's file is at fromPath,
+  # which is removed.
+  def _release(self, task, fromPath, error):
+    task             = dict(task)
+    task["attempts"] = task["attempts"] + 1
+    task["errors"]   = task["errors"] + [str(error)]
+    task.pop("worker", None)
+
+    # The task may have been finished in the meantime.
+    if not os.path.exists(self._getPath(self.RESULTS, task["id"])):
+      if task["attempts"] >= self._maxAttempts:
+        self._writeJSON(self._getPath(self.FAILED, task["id"]), task)
+      else:
+        self._writeJSON(self._getPath(self.PENDING, task["id"]), task)
+
+    try:
+      os.remove(fromPath)
+    except OSError:
+      pass
+
+  ###
+  # Return the claimed tasks whose lease has expired to the queue (see fail).
+  # Returns the number of tasks that were requeued.
+  # @param now The current time (optional, for testing).
+  ###
+  def requeueExpired(self, now=None):
+    now        = time.time() if now is None else now
+    numExpired = 0
+
+    for taskID in self._listTasks(self.CLAIMED):
+      claimedPath = self._getPath(self.CLAIMED, taskID)
+
+      try:
+        if now - os.path.getmtime(claimedPath) < self._leaseSeconds:
+          continue
+
+        # Move the task out of the way first, so that it's only requeued once
+        # if several processes check at the same time.
+        expiredPath = "{0}.{1}.expired".format(claimedPath, uuid.uuid4().hex)
+        os.rename(claimedPath, expiredPath)
+      except OSError:
+        continue
+
+      self._release(self._readJSON(expiredPath), expiredPath, "The lease expired.")
+      numExpired += 1
+
+    return numExpired
+
+  ###
+  # Get the results that are finished: a dictionary of iteration number ->
+  # result.
+  # @param skip Iteration numbers to skip, e.g. results that were read
+  #        before (optional).
+  ###
+  def getResults(self, skip=()):
+    results = {}
+
+    for taskID in self._listTasks(self.RESULTS):
+      if int(taskID) not in skip:
+        result = self._readJSON(self._getPath(self.RESULTS, taskID))
+        results[result["iteration"]] = result["result"]
+
+    return results
+
+  ###
+  # Get the workers that finished each task: a dictionary of iteration number
+  # -> worker ID.
+  ###
+  def getWorkers(self):
+    workers = {}
+
+    for taskID in self._listTasks(self.RESULTS):
+      result = self._readJSON(self._getPath(self.RESULTS, taskID))
+      workers[result["iteration"]] = result["worker"]
+
+    return workers
+
+  # Get the tasks that failed.
+  def getFailures(self):
+    return [self._readJSON(self._getPath(self.FAILED, taskID)) for taskID in self._listTasks(self.FAILED)]
+
+  # Get the number of pending and claimed tasks.
+  def getNumberOfOpenTasks(self):
+    return len(self._listTasks(self.PENDING)) + len(self._listTasks(self.CLAIMED))
+
+  # Remove the job and all its tasks.
+  def remove(self):
+    # The job file goes first so that workers stop claiming tasks.
+    try:
+      os.remove(os.path.join(self._jobDir, self.JOB_FILE))
+    except OSError:
+      pass
+
+    shutil.rmtree(self._jobDir, True)
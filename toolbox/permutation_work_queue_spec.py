@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from permutation_work_queue import PermutationWorkQueue
+
+class PermutationWorkQueueSuite(unittest.TestCase):
+  def setUp(self):
+    self.spoolDir = tempfile.mkdtemp()
+    self.queue    = PermutationWorkQueue.create(self.spoolDir, "run_1", {"seed": 7}, 2, 60)
+    self.queue.submit([{"iteration": i, "seed": 7 + i} for i in range(1, 4)])
+
+  def tearDown(self):
+    shutil.rmtree(self.spoolDir)
+
+  # Each task is claimed by one worker, in order.
+  def test_claim(self):
+    self.assertEqual(PermutationWorkQueue.listJobs(self.spoolDir), [self.queue.getJobDirectory()])
+    self.assertEqual(self.queue.getJob(), {"seed": 7})
+
+    other  = PermutationWorkQueue(self.queue.getJobDirectory())
+    tasks  = [self.queue.claim("a"), other.claim("b"), self.queue.claim("a")]
+
+    self.assertEqual([task["iteration"] for task in tasks], [1, 2, 3])
+    self.assertEqual([task["seed"] for task in tasks], [8, 9, 10])
+    self.assertEqual(tasks[1]["worker"], "b")
+    self.assertEqual(other.claim("b"), None)
+    self.assertEqual(self.queue.getNumberOfOpenTasks(), 3)
+
+    for task in tasks:
+      self.queue.complete(task, [task["iteration"], 0])
+
+    self.assertEqual(self.queue.getResults(), {1: [1, 0], 2: [2, 0], 3: [3, 0]})
+    self.assertEqual(self.queue.getResults(set([1, 3])), {2: [2, 0]})
+    self.assertEqual(self.queue.getWorkers(), {1: "a", 2: "b", 3: "a"})
+    self.assertEqual(self.queue.getNumberOfOpenTasks(), 0)
+
+  # A failed task is retried until it has been attempted maxAttempts times.
+  def test_retry(self):
+    task = self.queue.claim("a")
+    self.queue.fail(task, "Solve failed.")
+
+    retry = self.queue.claim("b")
+    self.assertEqual(retry["iteration"], 1)
+    self.assertEqual(retry["attempts"], 1)
+    self.assertEqual(retry["errors"], ["Solve failed."])
+    self.assertEqual(self.queue.getFailures(), [])
+
+    self.queue.fail(retry, "Solve failed again.")
+    failures = self.queue.getFailures()
+
+    self.assertEqual(len(failures), 1)
+    self.assertEqual(failures[0]["attempts"], 2)
+    self.assertEqual(failures[0]["errors"], ["Solve failed.", "Solve failed again."])
+    self.assertEqual(self.queue.claim("b")["iteration"], 2)
+
+  # A task whose lease isn't renewed goes back to the queue.
+  def test_lease(self):
+    task = self.queue.claim("a")
+
+    self.assertEqual(self.queue.requeueExpired(time.time() + 30), 0)
+    self.assertTrue(self.queue.renew(task["id"]))
+    self.assertEqual(self.queue.requeueExpired(time.time() + 90), 1)
+    self.assertFalse(self.queue.renew(task["id"]))
+
+    retry = self.queue.claim("b")
+    self.assertEqual(retry["iteration"], 1)
+    self.assertEqual(retry["errors"], ["The lease expired."])
+
+    # The first worker finishing late doesn't hurt.
+    self.queue.complete(task, [1])
+    self.queue.complete(retry, [1])
+    self.assertEqual(self.queue.getResults(), {1: [1]})
+
+  # A task that waited in the queue longer than the lease isn't expired when
+  # it's claimed.
+  def test_lease_starts_at_claim(self):
+    pendingPath = os.path.join(self.queue.getJobDirectory(), PermutationWorkQueue.PENDING, "00000001.json")
+    os.utime(pendingPath, (1000, 1000))
+
+    task = self.queue.claim("a")
+    self.assertEqual(task["iteration"], 1)
+    self.assertEqual(self.queue.requeueExpired(), 0)
+    self.assertTrue(self.queue.renew(task["id"]))
+
+  # Removing the job removes its directory.
+  def test_remove(self):
+    self.queue.remove()
+
+    self.assertFalse(self.queue.exists())
+    self.assertFalse(os.path.exists(self.queue.getJobDirectory()))
+    self.assertEqual(PermutationWorkQueue.listJobs(self.spoolDir), [])
+
+if __name__ == "__main__":
+  unittest.main()
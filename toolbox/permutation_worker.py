@@ -0,0 +1,105 @@
+import arcpy
+import argparse
+import os
+import socket
+import time
+import random_odcm_permutations_svc
+import permutation_work_queue
+
+# ArcMap caching prevention.
+random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
+permutation_work_queue       = reload(permutation_work_queue)
+
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+from permutation_work_queue       import PermutationWorkQueue
+
+###
+# A permutation worker: it computes the tasks of the permutation jobs in a
+# spool directory (see PermutationWorkQueue) until it's stopped.  Run one on
+# each machine (or core) that should help, e.g.
+#
+#   python permutation_worker.py \\server\share\crash_analysis_queue
+#
+# where the spool directory is the same as the CRASH_ANALYSIS_WORK_QUEUE
+# environment variable of the session that runs the tool.  The network dataset
+# and the points must be at the same paths on every machine.
+###
+class PermutationWorker(object):
+  ###
+  # Initialize the worker.
+  # @param spoolDir The spool directory.
+  # @param workerID The worker's ID (optional).  Defaults to the host name and
+  #        the process ID.
+  ###
+  def __init__(self, spoolDir, workerID=None):
+    self._spoolDir = spoolDir
+    self._workerID = workerID or "{0}_{1}".format(socket.gethostname(), os.getpid())
+    self._svc      = RandomODCMPermutationsSvc()
+
+  # Get the worker's ID.
+  def getWorkerID(self):
+    return self._workerID
+
+  ###
+  # Compute one task from the oldest job that has one.  Returns False if no
+  # job had a pending task.
+  ###
+  def runOnce(self):
+    for jobDir in PermutationWorkQueue.listJobs(self._spoolDir):
+      queue = PermutationWorkQueue(jobDir)
+
+      # The job is removed by its coordinator when it's done, which can happen
+      # at any time.
+      try:
+        arcpy.env.workspace = queue.getJob()["workspace"]
+
+        if self._svc.runNextPermutationTask(queue, self._workerID):
+          return True
+      except (IOError, OSError, ValueError):
+        continue
+
+    return False
+
+  ###
+  # Compute tasks.  Returns the number of tasks that were computed.
+  # @param maxTasks The number of tasks after which to stop (optional).
+  # @param idleSeconds The time without tasks after which to stop (optional).
+  #        By default the worker waits for tasks forever.
+  # @param pollSeconds How long to wait when there are no tasks.
+  ###
+  def run(self, maxTasks=None, idleSeconds=None, pollSeconds=1.0):
+    numTasks = 0
+    lastTask = time.time()
+
+    while maxTasks is None or numTasks < maxTasks:
+      if self.runOnce():
+        numTasks += 1
+        lastTask  = time.time()
+      elif idleSeconds is not None and time.time() - lastTask >= idleSeconds:
+        break
+      else:
+        time.sleep(pollSeconds)
+
+    return numTasks
+
+###
+# Run a worker from the command line.
+###
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Compute K function permutations from a work queue.")
+  parser.add_argument("spool_dir", help="The work queue's spool directory.")
+  parser.add_argument("--worker-id",    help="The worker's ID.  Default: the host name and process ID.")
+  parser.add_argument("--max-tasks",    type=int,   help="Stop after this many tasks.")
+  parser.add_argument("--idle-seconds", type=float, help="Stop after this long without tasks.")
+  parser.add_argument("--poll-seconds", type=float, default=1.0,
+    help="How long to wait for tasks before checking again.")
+  args = parser.parse_args(argv)
+
+  arcpy.env.overwriteOutput = True
+
+  worker   = PermutationWorker(args.spool_dir, args.worker_id)
+  numTasks = worker.run(args.max_tasks, args.idle_seconds, args.poll_seconds)
+  print("Worker {0} computed {1} permutations.".format(worker.getWorkerID(), numTasks))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,179 @@
+import cProfile
+import os
+import pstats
+import tempfile
+import threading
+import time
+import sampling_profiler
+
+# ArcMap caching prevention.
+sampling_profiler = reload(sampling_profiler)
+
+from sampling_profiler import SamplingProfiler
+
+###
+# Opt-in profiling of tool execution.  Set the CRASH_ANALYSIS_PROFILE
+# environment variable before starting ArcMap (or the offline runner):
+#   cprofile  Profile each call (exact counts, but slows Python code down).
+#   sampling  Sample the stack every few milliseconds (low overhead).
+# Each tool run writes a profile and a summary of the hottest functions to
+# the tool's output workspace (next to it for a geodatabase), or to
+# CRASH_ANALYSIS_PROFILE_DIR if that's set.  The summary is also shown in the
+# tool's messages.
+###
+class ProfileHook(object):
+  # The profiling modes.
+  MODES = ("cprofile", "sampling")
+
+  ###
+  # Initialize the hook.
+  # @param mode The profiling mode (optional).  Defaults to the
+  #        CRASH_ANALYSIS_PROFILE environment variable.  Any other value turns
+  #        profiling off.
+  # @param outDir The directory to write profiles to (optional).  Defaults to
+  #        CRASH_ANALYSIS_PROFILE_DIR, then to the tool's output workspace.
+  # @param numTop The number of functions in the summary.
+  # @param interval The sampling interval, in seconds.
+  ###
+  def __init__(self, mode=None, outDir=None, numTop=25, interval=0.005):
+    if mode is None:
+      mode = os.environ.get("CRASH_ANALYSIS_PROFILE", "")
+
+    self._mode     = mode.lower() if mode.lower() in self.MODES else None
+    self._outDir   = outDir or os.environ.get("CRASH_ANALYSIS_PROFILE_DIR") or None
+    self._numTop   = numTop
+    self._interval = interval
+
+  # Get the profiling mode, or None if profiling is off.
+  def getMode(self):
+    return self._mode
+
+  ###
+  # Get the directory to write a tool's profile to: the configured directory,
+  # or the first workspace parameter, or the temp directory.
+  # @param parameters The tool's parameters.
+  ###
+  def getOutputDirectory(self, parameters):
+    if self._outDir:
+      return self._outDir
+
+    for param in parameters:
+      if getattr(param, "datatype", None) in ("DEWorkspace", "Workspace") and param.valueAsText:
+        outLoc = os.path.normpath(param.valueAsText)
+
+        # Geodatabases are managed by ArcGIS, so profiles go next to them.
+        if outLoc.lower().endswith((".gdb", ".mdb", ".sde")) or not os.path.isdir(outLoc):
+          return os.path.dirname(outLoc)
+        return outLoc
+
+    return tempfile.gettempdir()
+
+  ###
+  # Run a tool's execute function, profiling it if profiling is on.  Returns
+  # what the function returns.
+  # @param toolName The tool's name (used in the file names).
+  # @param func The function to run (no arguments).
+  # @param parameters The tool's parameters.
+  # @param messages The tool's messages.
+  ###
+  def run(self, toolName, func, parameters, messages):
+    # Tools that are run by a profiled tool (e.g. Network Dataset Length by
+    # Global K) are part of the outer profile.  The flag is kept on the thread
+    # because importing the toolbox reloads this module.
+    thread = threading.current_thread()
+
+    if self._mode is None or getattr(thread, "crashAnalysisProfiling", False):
+      return func()
+
+    basePath = os.path.join(self.getOutputDirectory(parameters),
+      "{0}_{1}_{2}".format(toolName, time.strftime("%Y%m%d_%H%M%S"), self._mode))
+
+    thread.crashAnalysisProfiling = True
+    summary                       = None
+
+    try:
+      if self._mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+          return profiler.runcall(func)
+        finally:
+          summary = self._writeCProfile(profiler, basePath)
+      else:
+        profiler = SamplingProfiler(self._interval)
+        profiler.start()
+        try:
+          return func()
+        finally:
+          profiler.stop()
+          summary = self._writeSamplingProfile(profiler, basePath)
+    finally:
+      thread.crashAnalysisProfiling = False
+
+      # The summary is shown even if the tool fails; that's often when it's
+      # most useful.
+      if summary is not None:
+        messages.addMessage("\n".join(["", "Profile: {0}".format(basePath)] + summary))
+
+  ###
+  # Write a cProfile profile (.prof, readable with pstats or snakeviz) and a
+  # summary (_hotspots.txt).  Returns the summary lines.
+  # @param profiler The cProfile.Profile.
+  # @param basePath The path of the files, without an extension.
+  ###
+  def _writeCProfile(self, profiler, basePath):
+    profiler.dump_stats(basePath + ".prof")
+
+    stats   = pstats.Stats(basePath + ".prof")
+    funcs   = stats.stats
+    summary = []
+
+    for title, index in (("Self", 2), ("Cumulative", 3)):
+      summary.append("")
+      summary.append("{0}: seconds     calls  function".format(title))
+      top = sorted(funcs.items(), key=lambda item: -item[1][index])[:self._numTop]
+
+      for func, (primCalls, numCalls, totTime, cumTime, callers) in top:
+        summary.append("{0:>14.3f} {1:>9d}  {2}".format((totTime, cumTime)[index - 2], numCalls,
+          SamplingProfiler.formatFunction(func)))
+
+    self._writeSummary(basePath, summary)
+    return summary
+
+  ###
+  # Write a sampling profile (_collapsed.txt, for flame graph tools) and a
+  # summary (_hotspots.txt).  Returns the summary lines.
+  # @param profiler The SamplingProfiler.
+  # @param basePath The path of the files, without an extension.
+  ###
+  def _writeSamplingProfile(self, profiler, basePath):
+    profiler.writeCollapsed(basePath + "_collapsed.txt")
+
+    summary = profiler.getSummary(self._numTop)
+    self._writeSummary(basePath, summary)
+    return summary
+
+  # Write the summary lines to <basePath>_hotspots.txt.
+  def _writeSummary(self, basePath, summary):
+    with open(basePath + "_hotspots.txt", "w") as outFile:
+      outFile.write("\n".join(summary) + "\n")
+
+  ###
+  # Wrap the execute method of a tool class so that each run goes through a
+  # ProfileHook.  The environment is read on each run, so profiling can be
+  # turned on without reloading the toolbox.
+  # @param toolClass The tool class.
+  ###
+  @staticmethod
+  def wrapTool(toolClass):
+    execute = toolClass.execute
+
+    if getattr(execute, "_profileHook", False):
+      return toolClass
+
+    def profiledExecute(self, parameters, messages):
+      return ProfileHook().run(toolClass.__name__,
+        lambda: execute(self, parameters, messages), parameters, messages)
+
+    profiledExecute._profileHook = True
+    toolClass.execute = profiledExecute
+    return toolClass
@@ -0,0 +1,111 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline"))
+
+# The offline runner sets up reload for the toolbox modules.
+import offline_runner
+
+from profile_hook import ProfileHook
+
+# Collects tool messages.
+class Messages(object):
+  def __init__(self):
+    self.messages = []
+
+  def addMessage(self, message):
+    self.messages.append(message)
+
+# A tool parameter.
+class Parameter(object):
+  def __init__(self, datatype, valueAsText):
+    self.datatype    = datatype
+    self.valueAsText = valueAsText
+
+# A tool that a profile hook is installed on.
+class Tool(object):
+  def execute(self, parameters, messages):
+    messages.addMessage("Executed.")
+    return sum(range(0, 10000))
+
+class ProfileHookSuite(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  # Profiling is on for the known modes only.
+  def test_mode(self):
+    self.assertEqual(ProfileHook("cprofile").getMode(), "cprofile")
+    self.assertEqual(ProfileHook("Sampling").getMode(), "sampling")
+    self.assertEqual(ProfileHook("").getMode(),         None)
+    self.assertEqual(ProfileHook("yes").getMode(),      None)
+
+  # Profiles go to the workspace parameter, next to a geodatabase.
+  def test_output_directory(self):
+    hook = ProfileHook("cprofile")
+
+    self.assertEqual(hook.getOutputDirectory([Parameter("GPString", "x"), Parameter("DEWorkspace", self.tempDir)]),
+      os.path.normpath(self.tempDir))
+    self.assertEqual(hook.getOutputDirectory([Parameter("DEWorkspace", os.path.join(self.tempDir, "out.gdb"))]),
+      os.path.normpath(self.tempDir))
+    self.assertEqual(ProfileHook("cprofile", "profiles").getOutputDirectory([]), "profiles")
+
+  # Each mode writes a profile and a summary, and shows the summary.
+  def test_run(self):
+    for mode, profileSuffix in (("cprofile", ".prof"), ("sampling", "_collapsed.txt")):
+      outDir   = os.path.join(self.tempDir, mode)
+      messages = Messages()
+      os.mkdir(outDir)
+
+      result = ProfileHook(mode, outDir).run("Tool", lambda: 42, [], messages)
+      files  = sorted(os.listdir(outDir))
+
+      self.assertEqual(result, 42)
+      self.assertEqual(len(files), 2)
+      self.assertTrue([fileName for fileName in files if fileName.endswith(profileSuffix)])
+      self.assertTrue([fileName for fileName in files if fileName.endswith("_hotspots.txt")])
+      self.assertTrue("Profile: " in messages.messages[0])
+
+  # Profiling off runs the function as is.
+  def test_off(self):
+    messages = Messages()
+
+    self.assertEqual(ProfileHook("", self.tempDir).run("Tool", lambda: 42, [], messages), 42)
+    self.assertEqual(os.listdir(self.tempDir), [])
+    self.assertEqual(messages.messages, [])
+
+  # A nested run is part of the outer profile, and a failing tool still gets
+  # its profile.
+  def test_nested_failure(self):
+    hook     = ProfileHook("cprofile", self.tempDir)
+    messages = Messages()
+
+    def fail():
+      hook.run("Inner", lambda: 1, [], messages)
+      raise ValueError("Tool failed.")
+
+    with self.assertRaises(ValueError):
+      hook.run("Outer", fail, [], messages)
+
+    self.assertEqual(len(os.listdir(self.tempDir)), 2)
+    self.assertTrue(all(fileName.startswith("Outer_") for fileName in os.listdir(self.tempDir)))
+    self.assertEqual(len(messages.messages), 1)
+
+  # Wrapping a tool class is idempotent, and the tool runs as before.
+  def test_wrap_tool(self):
+    ProfileHook.wrapTool(Tool)
+    execute = Tool.execute
+    ProfileHook.wrapTool(Tool)
+
+    messages = Messages()
+    self.assertEqual(Tool.execute, execute)
+    self.assertEqual(Tool().execute([], messages), sum(range(0, 10000)))
+    self.assertEqual(messages.messages[0], "Executed.")
+
+if __name__ == "__main__":
+  unittest.main()
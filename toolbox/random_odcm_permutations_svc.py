@@ -1,174 +1,786 @@
-import arcpy
-import os
-import k_function_helper
-import k_function_timer
-
-from arcpy import env
-
-# ArcMap caching prevention.
-k_function_helper = reload(k_function_helper)
-k_function_timer  = reload(k_function_timer)
-
-from k_function_helper import KFunctionHelper
-from k_function_timer  import KFunctionTimer
-
-class RandomODCMPermutationsSvc:
-  ###
-  # Initialize the service (stateless).
-  ###
-  def __init__(self):
-    self.kfHelper = KFunctionHelper()
-
-  ###
-  # Generate the ODCM permutations.
-  # @param analysisType Either Global Analysis or Cross Analysis.
-  # @param srcPoints The source points.
-  # @param destPoints The destination points.  Ignored if analysisType is GLOBAL.
-  # @param networkDataset The network dataset to use for the ODCMs.
-  # @param snapDist The snap distance for points that are not directly on the network.
-  # @param cutoff The cutoff distance.  Ignored if None.
-  # @param outLoc The full path to a database.  The ODCM data will be written here.
-  # @param outFC The name of the feature class in outLoc where the ODCM data will be written.
-  # @param numPerms The number of permutations (string representation).
-  # @param outCoordSys The coordinate system to project the points into (optional).
-  # @param numPointsFieldName The optional name of a field in the network dataset's edge source
-  #        from which the number of random points should be derived.
-  # @param messages A messages instances with addMessage() implemented (for debug output).
-  # @param callback A callback function(odDists, iteration) called on each iteration
-  #        with the current OD cost matrix.
-  ###
-  def generateODCMPermutations(self, analysisType, srcPoints, destPoints,
-    networkDataset, snapDist, cutoff, outLoc, outFC, numPerms, outCoordSys,
-    numPointsFieldName, messages, callback = None):
-    # Default no-op for the callback.
-    if callback is None:
-      callback = lambda odDists, iteration: None
-
-    # For global analysis the destination points are the same as the source points
-    # (e.g. destPoints is ignored).
-    if analysisType == "GLOBAL" or destPoints is None:
-      destPoints = srcPoints
-
-    # Count the number of crashes (there may be fewer points in the ODCM, but it's the total
-    # number of crashes that is needed).
-    numDests = self.kfHelper.countNumberOfFeatures(os.path.join(outLoc, destPoints))
-    messages.addMessage("Number of crashes: {0}".format(numDests))
-
-    # Make the observed ODCM and calculate the distance between each set of
-    # points.  If a cross analysis is selected, find the distance between the
-    # source and destination points.  Otherwise there is only one set of points
-    odDists = self._calculateDistances(networkDataset, srcPoints, destPoints, snapDist, cutoff)
-    self._writeODCMData(odDists, outLoc, outFC, 0)
-    callback(odDists, 0)
-    messages.addMessage("Iteration 0 (observed) complete.")
-
-    # Generate the OD Cost matrix permutations.
-    kfTimer = KFunctionTimer(numPerms)
-    for i in range(1, numPerms + 1):
-      if numPointsFieldName:
-        randPoints = self.kfHelper.generateRandomPoints(networkDataset, outCoordSys, None, numPointsFieldName)
-      else:
-        randPoints = self.kfHelper.generateRandomPoints(networkDataset, outCoordSys, numDests, None)
-
-      # See the note above: Either find the distance from the source points to the random points,
-      # or the distance between the random points.
-      if analysisType == "CROSS":
-        odDists = self._calculateDistances(networkDataset, srcPoints, randPoints, snapDist, cutoff)
-      else:
-        odDists = self._calculateDistances(networkDataset, randPoints, randPoints, snapDist, cutoff)
-      self._writeODCMData(odDists, outLoc, outFC, i)
-      callback(odDists, i)
-
-      # Clean up the random points table.
-      arcpy.Delete_management(randPoints)
-
-      # Show the progress.
-      kfTimer.increment()
-      messages.addMessage("Iteration {0} complete.  Elapsed time: {1}s.  ETA: {2}s.".format(
-        i, kfTimer.getElapsedTime(), kfTimer.getETA()))
-
-  ###
-  # Calculate the distances between each set of points using an OD Cost Matrix.
-  # @param networkDataset A network dataset which the points are on.
-  # @param srcPoints The source points to calculate distances from.
-  # @param destPoints The destination points to calculate distances to.
-  # @param snapDist If a point is not directly on the network, it will be
-  #        snapped to the nearset line if it is within this threshold.
-  # @param cutoff The cutoff distance for the ODCM (optional).
-  ###
-  def _calculateDistances(self, networkDataset, srcPoints, destPoints, snapDist, cutoff):
-    # This is the current map, which should be an OSM base map.
-    curMapDoc = arcpy.mapping.MapDocument("CURRENT")
-
-    # Get the data from from the map (see the DataFrame object of arcpy).
-    dataFrame = arcpy.mapping.ListDataFrames(curMapDoc, "Layers")[0]
-
-    # Create the cost matrix.
-    costMatResult = arcpy.na.MakeODCostMatrixLayer(networkDataset, "TEMP_ODCM_NETWORK_K", "Length", cutoff)
-    odcmLayer     = costMatResult.getOutput(0)
-
-    # The OD Cost Matrix layer will have Origins and Destinations layers.  Get
-    # a reference to each of these.
-    odcmSublayers   = arcpy.na.GetNAClassNames(odcmLayer)
-    odcmOriginLayer = odcmSublayers["Origins"]
-    odcmDestLayer   = odcmSublayers["Destinations"]
-
-    # Add the origins and destinations to the ODCM.
-    arcpy.na.AddLocations(odcmLayer, odcmOriginLayer, srcPoints,  "", snapDist)
-    arcpy.na.AddLocations(odcmLayer, odcmDestLayer,   destPoints, "", snapDist)
-
-    # Solve the matrix.
-    arcpy.na.Solve(odcmLayer)
-
-    # Show the ODCM layer (it must be showing to open th ODLines sub layer below).
-    #arcpy.mapping.AddLayer(dataFrame, odcmLayer, "TOP")
-    #arcpy.RefreshTOC()
-
-    # Get the "Lines" layer, which has the distance between each point.
-    odcmLines = arcpy.mapping.ListLayers(odcmLayer, odcmSublayers["ODLines"])[0]
-
-    # This array will hold all the OD distances.
-    odDists = []
-
-    if srcPoints == destPoints:
-      # If the source points and destination points are the same, exclude the
-      # distance from the point to itself.
-      where = """{0} <> {1}""".format(
-        arcpy.AddFieldDelimiters(odcmLines, "originID"),
-        arcpy.AddFieldDelimiters(odcmLines, "destinationID"))
-    else:
-      where = ""
-
-    with arcpy.da.SearchCursor(
-      in_table=odcmLines,
-      field_names=["Total_Length", "originID", "destinationID"],
-      where_clause=where) as cursor:
-
-      for row in cursor:
-        odDists.append({"Total_Length": row[0], "OriginID": row[1], "DestinationID": row[2]})
-
-    return odDists
-  
-  ###
-  # Write the ODCM data to a table.
-  # @param odDists An array of raw ODCM data.
-  # @param outLoc The location of a database.
-  # @param outFC The feature class name, in outLoc, to write the data to.
-  # @param iteration The iteration number (0 is observed).
-  ###
-  def _writeODCMData(self, odDists, outLoc, outFC, iteration):
-    # This is the full path to the output feature class.
-    outFCFullPath = os.path.join(outLoc, outFC)
-
-    if iteration == 0:
-      # Create the output table.
-      arcpy.CreateTable_management(outLoc, outFC)
-      arcpy.AddField_management(outFCFullPath, "Iteration_Number", "LONG")
-      arcpy.AddField_management(outFCFullPath, "OriginID",         "LONG")
-      arcpy.AddField_management(outFCFullPath, "DestinationID",    "LONG")
-      arcpy.AddField_management(outFCFullPath, "Total_Length",     "DOUBLE")
-
-    with arcpy.da.InsertCursor(outFCFullPath,
-      ["Iteration_Number", "OriginID", "DestinationID", "Total_Length"]) as cursor:
-      for odDist in odDists:
-        cursor.insertRow([iteration, odDist["OriginID"], odDist["DestinationID"], odDist["Total_Length"]])
+import arcpy
+import os
+import random
+import threading
+import time
+import traceback
+import k_function_helper
+import k_function_timer
+import euclidean_pair_filter
+import stage_profiler
+import permutation_pipeline
+import temp_namespace
+import permutation_work_queue
+import permutation_bands
+import observed_odcm_cache
+import local_odcm_solver
+import landmark_bounds
+
+from arcpy import env
+
+# ArcMap caching prevention.
+k_function_helper      = reload(k_function_helper)
+k_function_timer       = reload(k_function_timer)
+euclidean_pair_filter  = reload(euclidean_pair_filter)
+stage_profiler         = reload(stage_profiler)
+permutation_pipeline   = reload(permutation_pipeline)
+temp_namespace         = reload(temp_namespace)
+permutation_work_queue = reload(permutation_work_queue)
+permutation_bands      = reload(permutation_bands)
+observed_odcm_cache    = reload(observed_odcm_cache)
+local_odcm_solver      = reload(local_odcm_solver)
+landmark_bounds        = reload(landmark_bounds)
+
+from k_function_helper      import KFunctionHelper
+from k_function_timer       import KFunctionTimer
+from euclidean_pair_filter  import EuclideanPairFilter
+from stage_profiler         import StageProfiler
+from permutation_pipeline   import PermutationPipeline
+from temp_namespace         import TempNamespace
+from permutation_work_queue import PermutationWorkQueue
+from permutation_bands      import PermutationBands
+from observed_odcm_cache    import ObservedODCMCache
+from local_odcm_solver      import LocalODCMSolver
+from landmark_bounds        import LandmarkBounds
+
+class RandomODCMPermutationsSvc:
+  # How long the coordinator waits for workers when no task is pending.
+  POLL_SECONDS = 0.5
+
+  # How far (relative) the in-memory graph's distances can be from the network
+  # dataset's for the permutations to be solved on the graph.
+  LOCAL_SOLVER_TOLERANCE = 1e-4
+
+  ###
+  # Initialize the service.
+  # @param profiler A StageProfiler that the time spent in each stage is
+  #        recorded in (optional).
+  # @param tempNS The TempNamespace that temporary datasets and layers are
+  #        named in (optional).  Defaults to a new namespace, so each service
+  #        (e.g. each run) has its own temporary names.
+  ###
+  def __init__(self, profiler=None, tempNS=None):
+    self.tempNS   = tempNS if tempNS is not None else TempNamespace()
+    self.kfHelper = KFunctionHelper(self.tempNS)
+    self.profiler = profiler if profiler is not None else StageProfiler()
+
+    # The network fingerprints of the permutation jobs (see runPermutationTask).
+    self._fingerprints = {}
+
+  ###
+  # Generate the ODCM permutations.
+  # @param analysisType Either Global Analysis or Cross Analysis.
+  # @param srcPoints The source points.
+  # @param destPoints The destination points.  Ignored if analysisType is GLOBAL.
+  # @param networkDataset The network dataset to use for the ODCMs.
+  # @param snapDist The snap distance for points that are not directly on the network.
+  # @param cutoff The cutoff distance.  Ignored if None.
+  # @param outLoc The full path to a database.  The ODCM data will be written here.
+  # @param outFC The name of the feature class in outLoc where the ODCM data will be written.
+  # @param numPerms The number of permutations (string representation).
+  # @param outCoordSys The coordinate system to project the points into (optional).
+  # @param numPointsFieldName The optional name of a field in the network dataset's edge source
+  #        from which the number of random points should be derived.
+  # @param messages A messages instances with addMessage() implemented (for debug output).
+  # @param callback A callback function(odDists, iteration) called on each iteration
+  #        with the current OD cost matrix.
+  # @param seed A random seed (optional).  If given, permutation i is generated
+  #        with seed + i, so any permutation can be reproduced on its own.
+  # @param firstPerm The first random permutation to generate (optional).  Used
+  #        to extend a set of permutations that were generated earlier.
+  # @param observedDists The observed OD distances (optional).  If given, the
+  #        observed ODCM is not solved (see IncrementalObservedSvc).
+  # @param samplingMethod How the random points are generated: one of
+  #        RandomPointSampler.SAMPLING_METHODS (optional).  Stratified and
+  #        Quasi-random generate all the permutations at once.
+  # @param bandCounter A function() that returns the PermutationBands that
+  #        the permutations are counted with (optional).  It's called after the
+  #        callback of the observed data.  If given, and a work queue is set up
+  #        (see KFunctionHelper.getWorkQueueDirectory), the permutations are
+  #        computed by workers, which only send back the band counts: the
+  #        distance bands are passed to bandCallback instead of the distances
+  #        to callback, and the permutations' ODCM data is not written.
+  # @param bandCallback A callback function(distBands, iteration) called on
+  #        each permutation computed by a worker, in order.
+  # @param localPoints Points to solve to each permutation's random points
+  #        too (optional), e.g. the observed points of a local analysis (see
+  #        LocalKEnvelope).  The permutations are then computed here.
+  # @param localCallback A callback function(odDists, iteration, numRandPoints)
+  #        called on each permutation with the distances from localPoints to
+  #        the random points, and the number of random points.
+  ###
+  def generateODCMPermutations(self, analysisType, srcPoints, destPoints,
+    networkDataset, snapDist, cutoff, outLoc, outFC, numPerms, outCoordSys,
+    numPointsFieldName, messages, callback = None, seed = None, firstPerm = 1,
+    observedDists = None, samplingMethod = "Random", bandCounter = None, bandCallback = None,
+    localPoints = None, localCallback = None):
+    # Default no-op for the callback.
+    if callback is None:
+      callback = lambda odDists, iteration: None
+
+    # For global analysis the destination points are the same as the source points
+    # (e.g. destPoints is ignored).
+    if analysisType == "GLOBAL" or destPoints is None:
+      destPoints = srcPoints
+
+    # Anything temporary that's left over, e.g. when a permutation fails, is
+    # deleted at the end.
+    try:
+      # Count the number of crashes (there may be fewer points in the ODCM, but it's the total
+      # number of crashes that is needed).
+      numDests = self.kfHelper.countNumberOfFeatures(os.path.join(outLoc, destPoints))
+      messages.addMessage("Number of crashes: {0}".format(numDests))
+
+      # Make the observed ODCM and calculate the distance between each set of
+      # points.  If a cross analysis is selected, find the distance between the
+      # source and destination points.  Otherwise there is only one set of points
+      if observedDists is not None:
+        odDists = observedDists
+      else:
+        odDists = self._calculateObservedDistances(networkDataset, srcPoints, destPoints, snapDist,
+          cutoff, outCoordSys, messages)
+      with self.profiler.span("write_odcm"):
+        self._writeODCMData(odDists, outLoc, outFC, 0)
+      callback(odDists, 0)
+      messages.addMessage("Iteration 0 (observed) complete.")
+
+      # Optionally, the permutations are put on a work queue.  Each worker
+      # generates its own random points, so only independent, random sampling
+      # can be distributed.
+      spoolDir = self.kfHelper.getWorkQueueDirectory()
+
+      if spoolDir is not None and bandCounter is not None and localPoints is None:
+        if self.kfHelper.isRandomPointBatchEnabled() or samplingMethod not in (None, "Random"):
+          messages.addMessage("Only Random sampling is distributed.  Computing the permutations here.")
+        else:
+          self._distributePermutations(spoolDir, analysisType, srcPoints, networkDataset, snapDist,
+            cutoff, outCoordSys, numPointsFieldName, numDests, bandCounter(), seed, firstPerm,
+            numPerms, messages, bandCallback)
+          return
+
+      # Optionally, the permutations are solved on an in-memory graph of the
+      # network's edges, if that gives the network dataset's distances.
+      localSolver = None
+
+      if self.kfHelper.isLocalSolverEnabled():
+        localSolver = self._getLocalSolver(networkDataset, srcPoints, destPoints, snapDist, cutoff,
+          odDists, messages)
+
+      # Each permutation is made in two stages: the random points are
+      # generated, the ODCM is solved and written, and the points are deleted
+      # (all with arcpy, on this thread), then the distances are counted.  The
+      # random points table is named after the permutation so that other runs'
+      # points don't clash with it.
+      kfTimer     = KFunctionTimer(numPerms - firstPerm + 1)
+      batchPoints = None
+
+      # Optionally, the random points of all the permutations are generated up
+      # front, and each permutation uses a layer of its points.  Variance
+      # reduction needs all the permutations at once.
+      if self.kfHelper.isRandomPointBatchEnabled() or samplingMethod not in (None, "Random"):
+        with self.profiler.span("random_points_batch"):
+          batchPoints = self.kfHelper.generateRandomPointBatch(networkDataset, numDests, numPointsFieldName,
+            range(firstPerm, numPerms + 1), seed, samplingMethod or "Random")
+        messages.addMessage("Random points generated for {0} permutations.".format(numPerms - firstPerm + 1))
+
+      def generatePoints(i):
+        if seed is not None:
+          arcpy.env.randomGenerator = "{0} ACM599".format(seed + i)
+
+        with self.profiler.span("random_points"):
+          if batchPoints is not None:
+            return self.kfHelper.getRandomPointLayer(batchPoints, i)
+          elif numPointsFieldName:
+            return self.kfHelper.generateRandomPoints(networkDataset, outCoordSys, None, numPointsFieldName, i)
+          else:
+            return self.kfHelper.generateRandomPoints(networkDataset, outCoordSys, numDests, None, i)
+
+      # See the note above: Either find the distance from the source points to the random points,
+      # or the distance between the random points.
+      def solve(i):
+        randPoints = generatePoints(i)
+        origins    = srcPoints if analysisType == "CROSS" else randPoints
+
+        if localSolver is not None:
+          with self.profiler.span("local_solve"):
+            odDists = self._solveLocally(localSolver, networkDataset, origins, randPoints, snapDist, cutoff)
+        else:
+          odDists = self._calculateDistances(networkDataset, origins, randPoints, snapDist, cutoff, outCoordSys)
+
+        # The distances from the local points to the random points, and the
+        # number of random points (which varies with numPointsFieldName).
+        localDists    = None
+        numRandPoints = None
+
+        if localPoints is not None:
+          with self.profiler.span("local_points_solve"):
+            numRandPoints = int(arcpy.GetCount_management(randPoints).getOutput(0))
+
+            if localSolver is not None:
+              localDists = self._solveLocally(localSolver, networkDataset, localPoints, randPoints, snapDist, cutoff)
+            else:
+              localDists = self._calculateDistances(networkDataset, localPoints, randPoints, snapDist, cutoff,
+                outCoordSys)
+
+        with self.profiler.span("write_odcm"):
+          self._writeODCMData(odDists, outLoc, outFC, i)
+
+        with self.profiler.span("cleanup"):
+          self.kfHelper.deleteTempDataset(randPoints)
+
+        return (odDists, localDists, numRandPoints)
+
+      # Returns a progress message, throttled so that the messages don't flood
+      # the geoprocessing window.  No arcpy here: when pipelined, this runs on
+      # another thread.
+      def count(i, dists):
+        odDists, localDists, numRandPoints = dists
+        callback(odDists, i)
+
+        if localDists is not None:
+          localCallback(localDists, i, numRandPoints)
+
+        kfTimer.increment(len(odDists))
+        return kfTimer.getProgressMessage(i) if kfTimer.shouldReport() else None
+
+      def report(i, message):
+        if message is not None:
+          messages.addMessage(message)
+
+      # Generate the OD Cost matrix permutations.
+      kfTimer.start()
+      if self.kfHelper.isPipelineEnabled():
+        messages.addMessage("Pipelining the permutations.")
+        PermutationPipeline(solve, count, report).run(range(firstPerm, numPerms + 1))
+      else:
+        for i in range(firstPerm, numPerms + 1):
+          with self.profiler.span("permutation"):
+            message = count(i, solve(i))
+          report(i, message)
+
+      if batchPoints is not None:
+        self.kfHelper.deleteTempDataset(batchPoints)
+    finally:
+      self.kfHelper.deleteTempDatasets()
+
+  ###
+  # Calculate the observed distances, or load them from the observed ODCM cache
+  # (see ObservedODCMCache) if the same points, network, snap distance,
+  # cutoff, and output coordinate system were solved before.
+  # See generateODCMPermutations for the parameters.
+  ###
+  def _calculateObservedDistances(self, networkDataset, srcPoints, destPoints, snapDist, cutoff,
+    outCoordSys, messages):
+    odcmCache = self.kfHelper.getObservedODCMCache()
+
+    if odcmCache.isEnabled():
+      with self.profiler.span("observed_cache"):
+        srcFingerprint  = ObservedODCMCache.getPointsFingerprint(self._readPoints(srcPoints, None))
+        destFingerprint = None
+        if destPoints != srcPoints:
+          destFingerprint = ObservedODCMCache.getPointsFingerprint(self._readPoints(destPoints, None))
+
+        coordSys = outCoordSys.exportToString() if outCoordSys is not None else None
+        key      = odcmCache.getKey(srcFingerprint, destFingerprint,
+          self.kfHelper.getNetworkFingerprint(networkDataset), snapDist, cutoff, coordSys)
+        odDists  = odcmCache.load(key)
+
+      if odDists is not None:
+        messages.addMessage("Observed distances loaded from the cache.")
+        return odDists
+
+    with self.profiler.span("observed_distances"):
+      odDists = self._calculateDistances(networkDataset, srcPoints, destPoints, snapDist, cutoff, outCoordSys)
+
+    if odcmCache.isEnabled():
+      with self.profiler.span("observed_cache"):
+        odcmCache.save(key, odDists)
+
+    return odDists
+
+  ###
+  # Get a solver for the permutations on an in-memory graph of the network's
+  # edges (see KFunctionHelper.getNetworkGraph and LocalODCMSolver), or None
+  # if it doesn't give the network dataset's distances.  The graph connects
+  # edges only at their end points, costs them by their length, and ignores
+  # turns and restrictions, unlike a network dataset with any vertex
+  # connectivity, elevation fields, or another cost attribute.  The observed
+  # points are solved on the graph too, and the graph is only used if every
+  # pair matches the network dataset's.  With a cutoff, the searches are
+  # pruned with landmark bounds (see KFunctionHelper.getNumberOfLandmarks).
+  # @param odDists The observed OD distances, solved with the network dataset.
+  # See generateODCMPermutations for the other parameters.
+  ###
+  def _getLocalSolver(self, networkDataset, srcPoints, destPoints, snapDist, cutoff, odDists, messages):
+    numLandmarks = self.kfHelper.getNumberOfLandmarks()
+
+    with self.profiler.span("local_solver"):
+      graph     = self.kfHelper.getNetworkGraph(networkDataset)
+      landmarks = None
+
+      if cutoff is not None and numLandmarks > 0:
+        landmarks = LandmarkBounds(graph, numLandmarks)
+
+      solver     = LocalODCMSolver(graph, None, landmarks, cutoff)
+      localDists = self._solveLocally(solver, networkDataset, srcPoints, destPoints, snapDist, cutoff)
+
+    # Without observed pairs there's nothing to check the graph against.
+    if len(odDists) == 0 or not self._isSameDistances(odDists, localDists, cutoff):
+      messages.addMessage("The network's edges don't give the network dataset's distances.  "
+        "Solving with the network dataset.")
+      return None
+
+    messages.addMessage("Solving the permutations on the network's edges ({0} landmarks).".format(
+      len(landmarks.getLandmarks()) if landmarks is not None else 0))
+    return solver
+
+  ###
+  # Solve the distances between two sets of points on a LocalODCMSolver.  The
+  # OriginID and DestinationID of each distance are the ObjectIDs of the
+  # points.
+  # @param solver A LocalODCMSolver of the network dataset.
+  # See _calculateDistances for the other parameters.
+  ###
+  def _solveLocally(self, solver, networkDataset, srcPoints, destPoints, snapDist, cutoff):
+    spatRef  = arcpy.Describe(networkDataset).spatialReference
+    srcLocs  = self.kfHelper.snapPoints(srcPoints, solver.getGraph(), spatRef, snapDist)[0]
+    destLocs = srcLocs
+
+    if destPoints != srcPoints:
+      destLocs = self.kfHelper.snapPoints(destPoints, solver.getGraph(), spatRef, snapDist)[0]
+
+    return solver.solve(srcLocs, destLocs, cutoff, destPoints == srcPoints)
+
+  ###
+  # Check if two sets of OD distances have the same pairs and lengths (within
+  # LOCAL_SOLVER_TOLERANCE).  A pair right at the cutoff may be in one and not
+  # the other.
+  # @param odDists An array of OD distances.
+  # @param otherDists Another array of OD distances.
+  # @param cutoff The cutoff distance (optional).
+  ###
+  def _isSameDistances(self, odDists, otherDists, cutoff):
+    tolerance = self.LOCAL_SOLVER_TOLERANCE
+    limit     = float("inf") if cutoff is None else cutoff * (1 - tolerance)
+    lengths   = dict(((odDist["OriginID"], odDist["DestinationID"]), odDist["Total_Length"]) for odDist in odDists)
+    others    = dict(((odDist["OriginID"], odDist["DestinationID"]), odDist["Total_Length"]) for odDist in otherDists)
+
+    for pair in set(lengths) | set(others):
+      length = lengths.get(pair)
+      other  = others.get(pair)
+
+      if length is None or other is None:
+        if (other if length is None else length) < limit:
+          return False
+      elif abs(length - other) > tolerance * max(1.0, length):
+        return False
+
+    return True
+
+  ###
+  # Compute the permutations on a work queue, and hand the distance bands of
+  # each to bandCallback in order.  The coordinator works on the tasks too, so
+  # the run finishes even if no other workers are running.
+  # @param spoolDir The work queue's spool directory.
+  # @param bands The PermutationBands that the permutations are counted with.
+  # See generateODCMPermutations for the other parameters.
+  ###
+  def _distributePermutations(self, spoolDir, analysisType, srcPoints, networkDataset, snapDist,
+    cutoff, outCoordSys, numPointsFieldName, numDests, bands, seed, firstPerm, numPerms,
+    messages, bandCallback):
+    job = self.createPermutationJob(analysisType, srcPoints, networkDataset, snapDist, cutoff,
+      outCoordSys, numPointsFieldName, numDests, bands)
+
+    with self.profiler.span("queue_permutations"):
+      queue = PermutationWorkQueue.create(spoolDir, job["runID"], job)
+      queue.submit(self.createPermutationTasks(networkDataset, seed, range(firstPerm, numPerms + 1)))
+    messages.addMessage("Permutations queued in {0}.".format(queue.getJobDirectory()))
+
+    kfTimer   = KFunctionTimer(numPerms - firstPerm + 1)
+    results   = {}
+    iteration = firstPerm
+
+    try:
+      kfTimer.start()
+
+      while iteration <= numPerms:
+        failures = queue.getFailures()
+        if len(failures) != 0:
+          raise RuntimeError("Permutation {0} failed {1} times.  Last error: {2}".format(
+            failures[0]["iteration"], failures[0]["attempts"], failures[0]["errors"][-1]))
+
+        queue.requeueExpired()
+        results.update(queue.getResults(set(results).union(range(firstPerm, iteration))))
+
+        # The results arrive in any order, but they're handed on in order.
+        while iteration in results:
+          bandCallback(bands.getDistanceBands(results.pop(iteration)), iteration)
+          kfTimer.increment()
+
+          if kfTimer.shouldReport():
+            messages.addMessage(kfTimer.getProgressMessage(iteration))
+          iteration += 1
+
+        if iteration <= numPerms and not self.runNextPermutationTask(queue, "coordinator"):
+          time.sleep(self.POLL_SECONDS)
+    finally:
+      queue.remove()
+
+  ###
+  # Make the parameters of a permutation job, which are shared by the tasks.
+  # @param bands The PermutationBands that the permutations are counted with.
+  # See generateODCMPermutations for the other parameters.
+  ###
+  def createPermutationJob(self, analysisType, srcPoints, networkDataset, snapDist, cutoff,
+    outCoordSys, numPointsFieldName, numDests, bands):
+    return {
+      "runID":              self.tempNS.getRunID(),
+      "workspace":          arcpy.env.workspace,
+      "analysisType":       analysisType,
+      "srcPoints":          srcPoints,
+      "networkDataset":     networkDataset,
+      "snapDist":           snapDist,
+      "cutoff":             cutoff,
+      "outCoordSys":        outCoordSys.exportToString() if outCoordSys is not None else None,
+      "numPointsFieldName": numPointsFieldName,
+      "numDests":           numDests,
+      "bands":              bands.toJSON()}
+
+  ###
+  # Make the permutation tasks.  Each task has its own seed, so a task that's
+  # retried (or computed twice) gives the same result.
+  # @param networkDataset The network dataset.  Workers check that their copy
+  #        has the same fingerprint.
+  # @param seed The random seed (optional).  Permutation i is seeded with
+  #        seed + i, like in generateODCMPermutations.  Defaults to a random seed.
+  # @param iterations An array of permutation numbers.
+  ###
+  def createPermutationTasks(self, networkDataset, seed, iterations):
+    fingerprint = self.kfHelper.getNetworkFingerprint(networkDataset)
+
+    if seed is None:
+      seed = random.randint(1, 2 ** 30)
+
+    return [{"iteration": i, "seed": seed + i, "fingerprint": fingerprint} for i in iterations]
+
+  ###
+  # Claim and compute the next task on a work queue.  The task's lease is
+  # renewed while it runs, and it's returned to the queue if it fails.  Returns
+  # False if there was no task to claim.
+  # @param queue A PermutationWorkQueue.
+  # @param workerID The worker's ID.
+  ###
+  def runNextPermutationTask(self, queue, workerID):
+    task = queue.claim(workerID)
+    if task is None:
+      return False
+
+    stop      = threading.Event()
+    heartbeat = threading.Thread(target=self._renewLease, args=(queue, task, stop))
+    heartbeat.daemon = True
+    heartbeat.start()
+
+    try:
+      result = self.runPermutationTask(queue.getJob(), task)
+      error  = None
+    except Exception:
+      error  = traceback.format_exc()
+    finally:
+      stop.set()
+      heartbeat.join()
+
+    if error is None:
+      queue.complete(task, result)
+    else:
+      queue.fail(task, error)
+
+    return True
+
+  # Renew a task's lease until stop is set.
+  def _renewLease(self, queue, task, stop):
+    while not stop.wait(queue.getLeaseSeconds() / 3.0):
+      queue.renew(task["id"])
+
+  ###
+  # Compute a permutation task: generate the random points with the task's
+  # seed, solve the ODCM, and count the distance bands.  Returns the array of
+  # counts.
+  # @param job The job's parameters (see createPermutationJob).
+  # @param task The task (see createPermutationTasks).
+  ###
+  def runPermutationTask(self, job, task):
+    # The fingerprint is slow to compute, so it's checked once per job.  (The
+    # network may have changed since an earlier job.)
+    if job["runID"] not in self._fingerprints:
+      self.kfHelper.clearNetworkFingerprints()
+      self._fingerprints[job["runID"]] = self.kfHelper.getNetworkFingerprint(job["networkDataset"])
+
+    if self._fingerprints[job["runID"]] != task["fingerprint"]:
+      raise RuntimeError("The network dataset {0} differs from the coordinator's.".format(job["networkDataset"]))
+
+    outCoordSys = None
+    if job["outCoordSys"] is not None:
+      outCoordSys = arcpy.SpatialReference()
+      outCoordSys.loadFromString(job["outCoordSys"])
+
+    arcpy.env.randomGenerator = "{0} ACM599".format(task["seed"])
+
+    with self.profiler.span("random_points"):
+      if job["numPointsFieldName"]:
+        randPoints = self.kfHelper.generateRandomPoints(job["networkDataset"], outCoordSys, None,
+          job["numPointsFieldName"], task["iteration"])
+      else:
+        randPoints = self.kfHelper.generateRandomPoints(job["networkDataset"], outCoordSys,
+          job["numDests"], None, task["iteration"])
+
+    # See generateODCMPermutations.
+    try:
+      srcPoints = job["srcPoints"] if job["analysisType"] == "CROSS" else randPoints
+      odDists   = self._calculateDistances(job["networkDataset"], srcPoints, randPoints,
+        job["snapDist"], job["cutoff"], outCoordSys)
+    finally:
+      self.kfHelper.deleteTempDataset(randPoints)
+
+    with self.profiler.span("band_counting"):
+      return PermutationBands.fromJSON(job["bands"]).count(odDists)
+
+  ###
+  # Read the ObjectID and coordinates of each point in a feature class.
+  # @param points A point feature class.
+  # @param outCoordSys The coordinate system to project the points into.
+  ###
+  def _readPoints(self, points, outCoordSys):
+    with arcpy.da.SearchCursor(in_table=points, field_names=["OID@", "SHAPE@XY"],
+      spatial_reference=outCoordSys) as cursor:
+      return [(row[0], row[1][0], row[1][1]) for row in cursor]
+
+  ###
+  # Make a feature layer that only has the points with the given ObjectIDs.
+  # @param points A point feature class.
+  # @param oids A sorted array of ObjectIDs.
+  # @param layerName The name of the layer to create.
+  ###
+  def _makeSubsetLayer(self, points, oids, layerName):
+    where = """{0} IN ({1})""".format(
+      arcpy.AddFieldDelimiters(points, arcpy.Describe(points).OIDFieldName),
+      ",".join(str(oid) for oid in oids))
+    arcpy.MakeFeatureLayer_management(points, layerName, where)
+    return layerName
+
+  ###
+  # Get the field mappings that load each point's ObjectID into the Name of
+  # its location (see _mapLocationIDs).
+  # @param points The points to load.
+  ###
+  def _getLocationFieldMappings(self, points):
+    return "Name {0} #".format(arcpy.Describe(points).OIDFieldName)
+
+  ###
+  # Map the ObjectIDs of the locations in an OD Cost Matrix sublayer back to
+  # the ObjectIDs of the points that were loaded.  The locations are loaded
+  # with the points' ObjectIDs as their names (see _getLocationFieldMappings),
+  # so the order that AddLocations loads them in doesn't matter.
+  # @param odcmLayer The OD Cost Matrix layer.
+  # @param sublayerName The name of the Origins or Destinations sublayer.
+  ###
+  def _mapLocationIDs(self, odcmLayer, sublayerName):
+    sublayer = arcpy.mapping.ListLayers(odcmLayer, sublayerName)[0]
+
+    with arcpy.da.SearchCursor(in_table=sublayer, field_names=["OID@", "Name"]) as cursor:
+      return dict((row[0], int(row[1])) for row in cursor)
+
+  ###
+  # Calculate the distances between some or all of the points in two sets
+  # using an OD Cost Matrix.
+  # @param networkDataset A network dataset which the points are on.
+  # @param srcPoints The source points to calculate distances from.
+  # @param destPoints The destination points to calculate distances to.
+  # @param snapDist The snap distance for points that are not directly on the
+  #        network.
+  # @param cutoff The cutoff distance for the ODCM (optional).
+  # @param outCoordSys The projected coordinate system used to measure
+  #        straight-line distances between points.
+  # @param srcOIDs A sorted array of the ObjectIDs of the source points to
+  #        solve from (optional, defaults to all of them).
+  # @param destOIDs A sorted array of the ObjectIDs of the destination points
+  #        to solve to (optional, defaults to all of them).
+  #
+  # The OriginID and DestinationID of each distance are the ObjectIDs of the
+  # source and destination points.  If the source and destination points are
+  # the same, the distance from a point to itself is excluded.
+  ###
+  def calculateDistances(self, networkDataset, srcPoints, destPoints, snapDist, cutoff, outCoordSys,
+    srcOIDs=None, destOIDs=None):
+    sameSet    = srcPoints == destPoints
+    srcLocs    = srcPoints
+    destLocs   = destPoints
+    tempLayers = []
+
+    if srcOIDs is not None:
+      srcLocs = self._makeSubsetLayer(srcPoints, srcOIDs, self.tempNS.getUniqueName("SUBSET_ORIGINS_NETWORK_K"))
+      tempLayers.append(srcLocs)
+
+    if destOIDs is not None:
+      destLocs = self._makeSubsetLayer(destPoints, destOIDs,
+        self.tempNS.getUniqueName("SUBSET_DESTINATIONS_NETWORK_K"))
+      tempLayers.append(destLocs)
+
+    odDists = self._calculateDistances(networkDataset, srcLocs, destLocs, snapDist, cutoff, outCoordSys)
+
+    # Subsets of the same points are solved as two sets of points.
+    if sameSet and len(tempLayers) != 0:
+      odDists = [odDist for odDist in odDists if odDist["OriginID"] != odDist["DestinationID"]]
+
+    for layer in reversed(tempLayers):
+      self.kfHelper.deleteTempDataset(layer)
+
+    return odDists
+
+  ###
+  # Calculate the distances between each set of points using an OD Cost Matrix.
+  # @param networkDataset A network dataset which the points are on.
+  # @param srcPoints The source points to calculate distances from.
+  # @param destPoints The destination points to calculate distances to.
+  # @param snapDist If a point is not directly on the network, it will be
+  #        snapped to the nearset line if it is within this threshold.
+  # @param cutoff The cutoff distance for the ODCM (optional).
+  # @param outCoordSys The projected coordinate system used to measure
+  #        straight-line distances between points.
+  #
+  # The OriginID and DestinationID of each distance are the ObjectIDs of the
+  # source and destination points.
+  ###
+  def _calculateDistances(self, networkDataset, srcPoints, destPoints, snapDist, cutoff, outCoordSys):
+    # This is the current map, which should be an OSM base map.
+    curMapDoc = arcpy.mapping.MapDocument("CURRENT")
+
+    # Get the data from from the map (see the DataFrame object of arcpy).
+    dataFrame = arcpy.mapping.ListDataFrames(curMapDoc, "Layers")[0]
+
+    # Read the points.  If the points are the same (global analysis), the
+    # distance from a point to itself is excluded below.
+    sameSet  = srcPoints == destPoints
+
+    with self.profiler.span("read_points"):
+      srcPts  = self._readPoints(srcPoints, outCoordSys)
+      destPts = srcPts if sameSet else self._readPoints(destPoints, outCoordSys)
+
+    srcLocs  = srcPoints
+    destLocs = destPoints
+
+    # The layers that are made here are deleted at the end.
+    tempLayers = []
+
+    # The network distance between two points is never shorter than the
+    # straight-line distance, so a point that has no partner within the cutoff
+    # can only be part of pairs that are beyond the last distance band.  Those
+    # points are not added to the ODCM at all.  Points are snapped to the
+    # network, which can bring a pair closer by up to two snap distances.
+    if cutoff is not None:
+      with self.profiler.span("pair_filter"):
+        pairFilter      = EuclideanPairFilter(cutoff + 2 * (snapDist or 0))
+        srcIDs, destIDs = pairFilter.getCandidateIDs(srcPts, destPts, sameSet)
+
+      if len(srcIDs) == 0:
+        return []
+
+      if len(srcIDs) < len(srcPts):
+        srcLocs = self._makeSubsetLayer(srcPoints, sorted(srcIDs),
+          self.tempNS.getUniqueName("ODCM_ORIGINS_NETWORK_K"))
+        tempLayers.append(srcLocs)
+
+      # For global analysis the candidate sources and destinations are the
+      # same points.
+      if sameSet:
+        destLocs = srcLocs
+      elif len(destIDs) < len(destPts):
+        destLocs = self._makeSubsetLayer(destPoints, sorted(destIDs),
+          self.tempNS.getUniqueName("ODCM_DESTINATIONS_NETWORK_K"))
+        tempLayers.append(destLocs)
+
+    # Create the cost matrix.
+    with self.profiler.span("make_odcm_layer"):
+      odcmName      = self.tempNS.getUniqueName("ODCM_NETWORK_K")
+      costMatResult = arcpy.na.MakeODCostMatrixLayer(networkDataset, odcmName, "Length", cutoff)
+      tempLayers.append(odcmName)
+      odcmLayer     = costMatResult.getOutput(0)
+
+    # The OD Cost Matrix layer will have Origins and Destinations layers.  Get
+    # a reference to each of these.
+    odcmSublayers   = arcpy.na.GetNAClassNames(odcmLayer)
+    odcmOriginLayer = odcmSublayers["Origins"]
+    odcmDestLayer   = odcmSublayers["Destinations"]
+
+    # Add the origins and destinations to the ODCM.
+    with self.profiler.span("add_locations"):
+      arcpy.na.AddLocations(odcmLayer, odcmOriginLayer, srcLocs,  self._getLocationFieldMappings(srcLocs),
+        snapDist)
+      arcpy.na.AddLocations(odcmLayer, odcmDestLayer,   destLocs, self._getLocationFieldMappings(destLocs),
+        snapDist)
+
+    # Solve the matrix.
+    with self.profiler.span("solve"):
+      arcpy.na.Solve(odcmLayer)
+
+    # Show the ODCM layer (it must be showing to open th ODLines sub layer below).
+    #arcpy.mapping.AddLayer(dataFrame, odcmLayer, "TOP")
+    #arcpy.RefreshTOC()
+
+    # Get the "Lines" layer, which has the distance between each point.
+    odcmLines = arcpy.mapping.ListLayers(odcmLayer, odcmSublayers["ODLines"])[0]
+
+    # The OD lines refer to the ODCM locations, not the points.
+    with self.profiler.span("read_locations"):
+      srcIDMap  = self._mapLocationIDs(odcmLayer, odcmOriginLayer)
+      destIDMap = self._mapLocationIDs(odcmLayer, odcmDestLayer)
+
+    # This array will hold all the OD distances.
+    odDists = []
+
+    if sameSet:
+      # If the source points and destination points are the same, exclude the
+      # distance from the point to itself.
+      where = """{0} <> {1}""".format(
+        arcpy.AddFieldDelimiters(odcmLines, "originID"),
+        arcpy.AddFieldDelimiters(odcmLines, "destinationID"))
+    else:
+      where = ""
+
+    with self.profiler.span("read_lines"), arcpy.da.SearchCursor(
+      in_table=odcmLines,
+      field_names=["Total_Length", "originID", "destinationID"],
+      where_clause=where) as cursor:
+
+      for row in cursor:
+        odDists.append({"Total_Length": row[0], "OriginID": srcIDMap[row[1]], "DestinationID": destIDMap[row[2]]})
+
+    # The layers are named per call (see TempNamespace), so they are deleted
+    # rather than overwritten.
+    for layer in reversed(tempLayers):
+      self.kfHelper.deleteTempDataset(layer)
+
+    return odDists
+  
+  ###
+  # Write the ODCM data to a table.
+  # @param odDists An array of raw ODCM data.
+  # @param outLoc The location of a database.
+  # @param outFC The feature class name, in outLoc, to write the data to.
+  # @param iteration The iteration number (0 is observed).
+  ###
+  def _writeODCMData(self, odDists, outLoc, outFC, iteration):
+    # This is the full path to the output feature class.
+    outFCFullPath = os.path.join(outLoc, outFC)
+
+    if iteration == 0:
+      # Create the output table.
+      arcpy.CreateTable_management(outLoc, outFC)
+      arcpy.AddField_management(outFCFullPath, "Iteration_Number", "LONG")
+      arcpy.AddField_management(outFCFullPath, "OriginID",         "LONG")
+      arcpy.AddField_management(outFCFullPath, "DestinationID",    "LONG")
+      arcpy.AddField_management(outFCFullPath, "Total_Length",     "DOUBLE")
+
+    with arcpy.da.InsertCursor(outFCFullPath,
+      ["Iteration_Number", "OriginID", "DestinationID", "Total_Length"]) as cursor:
+      for odDist in odDists:
+        cursor.insertRow([iteration, odDist["OriginID"], odDist["DestinationID"], odDist["Total_Length"]])
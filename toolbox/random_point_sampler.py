@@ -0,0 +1,191 @@
+import bisect
+import random
+
+###
+# Generates uniformly random points on a network, where the chance of a point
+# falling on an edge is proportional to the edge's length (or to a weight).
+#
+# The cumulative lengths are computed once, and each point is placed with a
+# binary search, so generating n points on m edges takes O(m + n log m) time.
+# Points are (edgeID, offset) locations (see NetworkGraph).
+#
+# The points of many permutations can be generated together with variance
+# reduction (see sampleBatch).  Each point of each permutation is still
+# uniform and independent of the other points in its permutation, so every
+# permutation is a valid random pattern, but across permutations each point
+# covers the network evenly rather than by chance:
+#
+#   Stratified    The network (by cumulative length) is split into one stratum
+#                 per permutation, and each point is in a different stratum in
+#                 each permutation, in random order (Latin hypercube sampling).
+#   Quasi-random  Each point follows a van der Corput sequence over the
+#                 permutations with its own random shift (randomized quasi-
+#                 Monte Carlo).
+###
+class RandomPointSampler(object):
+  # The ways of generating the points of many permutations.
+  SAMPLING_METHODS = ["Random", "Stratified", "Quasi-random"]
+
+  ###
+  # Initialize the sampler.
+  # @param lengths An array of edge lengths, indexed by edge ID.
+  # @param weights An array of edge weights (optional).  Defaults to the
+  #        lengths.
+  # @param rand A random.Random instance (optional).
+  ###
+  def __init__(self, lengths, weights=None, rand=None):
+    if weights is None:
+      weights = lengths
+
+    self._lengths    = lengths
+    self._rand       = rand if rand is not None else random.Random()
+    self._cumWeights = []
+
+    total = 0.0
+    for weight in weights:
+      total += weight
+      self._cumWeights.append(total)
+
+  # Get the total weight (the total length if no weights were given).
+  def getTotalWeight(self):
+    return self._cumWeights[-1] if len(self._cumWeights) != 0 else 0.0
+
+  # Get the random number generator.
+  def getRandom(self):
+    return self._rand
+
+  ###
+  # Reseed the random number generator, e.g. per permutation so that each
+  # permutation can be reproduced on its own.
+  # @param seed The seed.
+  ###
+  def seed(self, seed):
+    self._rand.seed(seed)
+
+  ###
+  # Find the edge that a position along the cumulative weights falls on.
+  # @param position A number in [0, getTotalWeight()).
+  ###
+  def findEdge(self, position):
+    edgeID = bisect.bisect_right(self._cumWeights, position)
+
+    # Guard against rounding at the very end.
+    return min(edgeID, len(self._cumWeights) - 1)
+
+  ###
+  # Find the location at a position along the cumulative weights.  The offset
+  # is proportional to the position within the edge's weight.
+  # @param position A number in [0, getTotalWeight()).
+  ###
+  def locate(self, position):
+    edgeID = self.findEdge(position)
+    start  = self._cumWeights[edgeID - 1] if edgeID > 0 else 0.0
+    weight = self._cumWeights[edgeID] - start
+    ratio  = min(max((position - start) / weight, 0.0), 1.0) if weight > 0 else 0.0
+
+    return (edgeID, ratio * self._lengths[edgeID])
+
+  ###
+  # Get the radical inverse of an index (the van der Corput sequence).
+  # @param index A non-negative integer.
+  # @param base The base.
+  ###
+  @staticmethod
+  def getRadicalInverse(index, base=2):
+    inverse  = 0.0
+    fraction = 1.0 / base
+
+    while index > 0:
+      inverse  += (index % base) * fraction
+      index   //= base
+      fraction /= base
+
+    return inverse
+
+  ###
+  # Get a uniform number in [0, 1) for each permutation, for one point.
+  # @param numPerms The number of permutations.
+  # @param method One of SAMPLING_METHODS.
+  ###
+  def _getUniforms(self, numPerms, method):
+    rand = self._rand
+
+    if method == "Stratified":
+      strata = list(range(0, numPerms))
+      rand.shuffle(strata)
+      return [(stratum + rand.random()) / numPerms for stratum in strata]
+    elif method == "Quasi-random":
+      shift = rand.random()
+      return [(self.getRadicalInverse(permNum) + shift) % 1.0 for permNum in range(0, numPerms)]
+    elif method == "Random":
+      return [rand.random() for permNum in range(0, numPerms)]
+
+    raise ValueError("Unknown sampling method: {0}".format(method))
+
+  ###
+  # Generate the random points of several permutations at once.  Yields
+  # (permutation index, edgeID, offset) tuples.  The points are generated one
+  # point number at a time across the permutations, not in permutation order,
+  # so memory doesn't grow with the number of permutations.
+  # @param numPoints The number of points in each permutation.
+  # @param numPerms The number of permutations.
+  # @param method One of SAMPLING_METHODS.
+  ###
+  def sampleBatch(self, numPoints, numPerms, method):
+    total = self.getTotalWeight()
+
+    if total <= 0:
+      return
+
+    for pointNum in range(0, numPoints):
+      for permNum, uniform in enumerate(self._getUniforms(numPerms, method)):
+        edgeID, offset = self.locate(uniform * total)
+        yield (permNum, edgeID, offset)
+
+  ###
+  # Generate the points of several permutations at once with a fixed number
+  # of points on each edge (see sampleCounts and sampleBatch).  Yields
+  # (permutation index, edgeID, offset) tuples.
+  # @param counts An array of the number of points on each edge.
+  # @param numPerms The number of permutations.
+  # @param method One of SAMPLING_METHODS.
+  ###
+  def sampleCountsBatch(self, counts, numPerms, method):
+    for edgeID, count in enumerate(counts):
+      for pointNum in range(0, count):
+        for permNum, uniform in enumerate(self._getUniforms(numPerms, method)):
+          yield (permNum, edgeID, uniform * self._lengths[edgeID])
+
+  ###
+  # Generate random points.
+  # @param numPoints The number of points.
+  ###
+  def sample(self, numPoints):
+    total  = self.getTotalWeight()
+    rand   = self._rand
+    points = []
+
+    if total <= 0:
+      return points
+
+    for i in range(0, numPoints):
+      edgeID = self.findEdge(rand.random() * total)
+      points.append((edgeID, rand.random() * self._lengths[edgeID]))
+
+    return points
+
+  ###
+  # Generate a fixed number of random points on each edge, placed uniformly
+  # along it (like CreateRandomPoints with a number of points field).
+  # @param counts An array of the number of points on each edge, indexed by
+  #        edge ID.
+  ###
+  def sampleCounts(self, counts):
+    rand   = self._rand
+    points = []
+
+    for edgeID, count in enumerate(counts):
+      for i in range(0, count):
+        points.append((edgeID, rand.random() * self._lengths[edgeID]))
+
+    return points
@@ -0,0 +1,117 @@
+import unittest
+
+from random import Random
+from random_point_sampler import RandomPointSampler
+
+class RandomPointSamplerSuite(unittest.TestCase):
+  # Points land on edges in proportion to their lengths.
+  def test_proportional(self):
+    sampler = RandomPointSampler([1.0, 3.0, 0.0, 6.0], None, Random(3))
+    counts  = [0, 0, 0, 0]
+
+    self.assertEqual(sampler.getTotalWeight(), 10.0)
+
+    for edgeID, offset in sampler.sample(20000):
+      counts[edgeID] += 1
+      self.assertTrue(0 <= offset <= [1.0, 3.0, 0.0, 6.0][edgeID])
+
+    self.assertEqual(counts[2], 0)
+    self.assertAlmostEqual(counts[0] / 20000.0, 0.1, 1)
+    self.assertAlmostEqual(counts[1] / 20000.0, 0.3, 1)
+    self.assertAlmostEqual(counts[3] / 20000.0, 0.6, 1)
+
+  # Weights replace the lengths when picking edges.
+  def test_weights(self):
+    sampler = RandomPointSampler([5.0, 5.0], [0.0, 2.0], Random(1))
+    self.assertEqual(set(edgeID for edgeID, offset in sampler.sample(100)), set([1]))
+
+  # Positions are mapped to edges by the cumulative weights.
+  def test_find_edge(self):
+    sampler = RandomPointSampler([1.0, 3.0, 6.0])
+    self.assertEqual(sampler.findEdge(0), 0)
+    self.assertEqual(sampler.findEdge(0.99), 0)
+    self.assertEqual(sampler.findEdge(1), 1)
+    self.assertEqual(sampler.findEdge(9.99), 2)
+    self.assertEqual(sampler.findEdge(10), 2)
+
+  # Same seed, same points.
+  def test_seed(self):
+    self.assertEqual(RandomPointSampler([1.0, 2.0], None, Random(5)).sample(10),
+      RandomPointSampler([1.0, 2.0], None, Random(5)).sample(10))
+    self.assertEqual(RandomPointSampler([]).sample(10), [])
+
+  # Fixed counts put exactly that many points on each edge.
+  def test_counts(self):
+    sampler = RandomPointSampler([2.0, 0.0, 4.0], None, Random(2))
+    points  = sampler.sampleCounts([3, 0, 2])
+
+    self.assertEqual([edgeID for edgeID, offset in points], [0, 0, 0, 2, 2])
+    self.assertTrue(all(0 <= offset <= [2.0, 0.0, 4.0][edgeID] for edgeID, offset in points))
+
+  # Reseeding repeats the points.
+  def test_reseed(self):
+    sampler = RandomPointSampler([1.0, 2.0])
+
+    sampler.seed(7)
+    first = sampler.sample(10)
+    sampler.sample(5)
+    sampler.seed(7)
+
+    self.assertEqual(sampler.sample(10), first)
+
+  # Positions map to an offset in proportion to the edge's weight.
+  def test_locate(self):
+    sampler = RandomPointSampler([2.0, 4.0], [1.0, 1.0])
+
+    self.assertEqual(sampler.locate(0.5), (0, 1.0))
+    self.assertEqual(sampler.locate(1.25), (1, 1.0))
+
+  # The van der Corput sequence in base 2.
+  def test_radical_inverse(self):
+    self.assertEqual([RandomPointSampler.getRadicalInverse(i) for i in range(0, 8)],
+      [0.0, 0.5, 0.25, 0.75, 0.125, 0.625, 0.375, 0.875])
+
+  # With stratified sampling each point falls in a different stratum of the
+  # network in each permutation, and every permutation gets all its points.
+  def test_stratified_batch(self):
+    sampler = RandomPointSampler([10.0, 30.0], None, Random(4))
+    points  = list(sampler.sampleBatch(5, 8, "Stratified"))
+    perms   = [[] for i in range(0, 8)]
+
+    for permNum, edgeID, offset in points:
+      position = offset + (10.0 if edgeID == 1 else 0.0)
+      perms[permNum].append(int(position // 5.0))
+
+    self.assertEqual(len(points), 40)
+    for pointNum in range(0, 5):
+      self.assertEqual(sorted(perm[pointNum] for perm in perms), list(range(0, 8)))
+
+  # Quasi-random points cover the network evenly across the permutations.
+  def test_quasi_random_batch(self):
+    sampler = RandomPointSampler([1.0], None, Random(6))
+    offsets = sorted(offset for permNum, edgeID, offset in sampler.sampleBatch(1, 16, "Quasi-random"))
+    gaps    = [second - first for first, second in zip(offsets, offsets[1:])]
+
+    self.assertTrue(all(abs(gap - 1 / 16.0) < 1e-9 for gap in gaps))
+
+  # Every method places points uniformly on the network.
+  def test_batch_uniform(self):
+    for method in RandomPointSampler.SAMPLING_METHODS:
+      sampler = RandomPointSampler([1.0, 3.0], None, Random(8))
+      counts  = [0, 0]
+
+      for permNum, edgeID, offset in sampler.sampleBatch(50, 99, method):
+        counts[edgeID] += 1
+
+      self.assertAlmostEqual(counts[1] / float(sum(counts)), 0.75, 1)
+
+    with self.assertRaises(ValueError):
+      list(RandomPointSampler([1.0]).sampleBatch(1, 2, "Sobol"))
+
+  # Fixed counts work in batches too.
+  def test_counts_batch(self):
+    sampler = RandomPointSampler([2.0, 4.0], None, Random(9))
+    points  = list(sampler.sampleCountsBatch([1, 2], 3, "Stratified"))
+
+    self.assertEqual(len(points), 9)
+    self.assertEqual(sorted(permNum for permNum, edgeID, offset in points if edgeID == 1), [0, 0, 1, 1, 2, 2])
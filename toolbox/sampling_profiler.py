@@ -0,0 +1,126 @@
+import os
+import sys
+import threading
+
+###
+# A low-overhead sampling profiler.  A background thread looks at the stack
+# of the profiled thread every interval seconds, and counts the functions on
+# it.  Unlike cProfile, the profiled code isn't slowed down by each call, so
+# it can be used on long production runs.
+###
+class SamplingProfiler(object):
+  ###
+  # Initialize the profiler.
+  # @param interval The time between samples, in seconds.
+  ###
+  def __init__(self, interval=0.005):
+    self._interval   = interval
+    self._threadID   = None
+    self._thread     = None
+    self._stopEvent  = threading.Event()
+    self._numSamples = 0
+    self._selfCounts = {}
+    self._inclCounts = {}
+    self._stacks     = {}
+
+  # Get the sampling interval.
+  def getInterval(self):
+    return self._interval
+
+  # Get the number of samples taken.
+  def getNumberOfSamples(self):
+    return self._numSamples
+
+  ###
+  # Start sampling a thread.
+  # @param threadID The ident of the thread to sample (optional).  Defaults to
+  #        the calling thread.
+  ###
+  def start(self, threadID=None):
+    self._threadID = threadID if threadID is not None else threading.current_thread().ident
+    self._stopEvent.clear()
+    self._thread   = threading.Thread(target=self._run)
+    self._thread.daemon = True
+    self._thread.start()
+
+  # Stop sampling.
+  def stop(self):
+    self._stopEvent.set()
+
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  # Take samples until stopped.
+  def _run(self):
+    while not self._stopEvent.is_set():
+      frame = sys._current_frames().get(self._threadID)
+
+      if frame is not None:
+        self.addSample(frame)
+
+      self._stopEvent.wait(self._interval)
+
+  ###
+  # Count the functions on a stack.
+  # @param frame The innermost frame of the stack.
+  ###
+  def addSample(self, frame):
+    stack = []
+
+    while frame is not None:
+      code = frame.f_code
+      stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+      frame = frame.f_back
+
+    self._numSamples += 1
+    self._selfCounts[stack[0]] = self._selfCounts.get(stack[0], 0) + 1
+
+    # A recursive function is counted once per sample.
+    for func in set(stack):
+      self._inclCounts[func] = self._inclCounts.get(func, 0) + 1
+
+    stackKey = tuple(reversed(stack))
+    self._stacks[stackKey] = self._stacks.get(stackKey, 0) + 1
+
+  ###
+  # Get the functions with the most samples, as (function, count) tuples.  A
+  # function is a (file name, line number, name) tuple.
+  # @param numTop The number of functions.
+  # @param inclusive If True, count the samples where the function is anywhere
+  #        on the stack rather than at the top.
+  ###
+  def getTopFunctions(self, numTop, inclusive=False):
+    counts = self._inclCounts if inclusive else self._selfCounts
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:numTop]
+
+  # Format a function for display: name (file:line).
+  @staticmethod
+  def formatFunction(func):
+    return "{0} ({1}:{2})".format(func[2], os.path.basename(func[0]), func[1])
+
+  ###
+  # Get a summary of the functions with the most samples, as lines of text.
+  # @param numTop The number of functions.
+  ###
+  def getSummary(self, numTop):
+    lines = ["Samples: {0} (every {1}s)".format(self._numSamples, self._interval)]
+
+    for title, inclusive in (("Self", False), ("Inclusive", True)):
+      lines.append("")
+      lines.append("{0} samples  seconds  function".format(title))
+
+      for func, count in self.getTopFunctions(numTop, inclusive):
+        lines.append("{0:>7d} {1:8.2f}  {2}".format(count, count * self._interval, self.formatFunction(func)))
+
+    return lines
+
+  ###
+  # Write the sampled stacks in the "collapsed" format that flame graph tools
+  # read: one line per stack, outermost function first, with its count.
+  # @param path The file to write.
+  ###
+  def writeCollapsed(self, path):
+    with open(path, "w") as outFile:
+      for stack, count in sorted(self._stacks.items()):
+        outFile.write("{0} {1}\n".format(";".join(self.formatFunction(func) for func in stack), count))
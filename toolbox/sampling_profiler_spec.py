@@ -0,0 +1,83 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from sampling_profiler import SamplingProfiler
+
+class SamplingProfilerSuite(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  # Keep the CPU busy for a while.
+  def busyLoop(self, seconds):
+    end   = time.time() + seconds
+    total = 0
+
+    while time.time() < end:
+      total += sum(range(0, 100))
+
+    return total
+
+  # Take a sample in a nested function.
+  def sampleInner(self, profiler):
+    profiler.addSample(sys._getframe())
+
+  # Samples count the top of the stack (self) and the whole stack (inclusive).
+  def test_add_sample(self):
+    profiler = SamplingProfiler()
+
+    self.sampleInner(profiler)
+    self.sampleInner(profiler)
+    profiler.addSample(sys._getframe())
+
+    self.assertEqual(profiler.getNumberOfSamples(), 3)
+
+    selfTop = profiler.getTopFunctions(1)[0]
+    self.assertEqual(selfTop[0][2], "sampleInner")
+    self.assertEqual(selfTop[1], 2)
+
+    inclusive = dict((func[2], count) for func, count in profiler.getTopFunctions(100, True))
+    self.assertEqual(inclusive["test_add_sample"], 3)
+    self.assertEqual(inclusive["sampleInner"],     2)
+
+    # The collapsed stacks have the outermost function first.
+    collapsedPath = os.path.join(self.tempDir, "collapsed.txt")
+    profiler.writeCollapsed(collapsedPath)
+
+    with open(collapsedPath, "r") as collapsedFile:
+      lines = collapsedFile.read().splitlines()
+
+    counts = {}
+    for line in lines:
+      stack, count = line.rsplit(" ", 1)
+      counts[stack.split(";")[-1].split(" (")[0]] = int(count)
+
+    self.assertEqual(counts["sampleInner"],     2)
+    self.assertEqual(counts["test_add_sample"], 1)
+
+  # A thread is sampled while it runs.
+  def test_sampling(self):
+    profiler = SamplingProfiler(0.001)
+    profiler.start()
+    self.busyLoop(0.2)
+    profiler.stop()
+
+    numSamples = profiler.getNumberOfSamples()
+    self.assertTrue(numSamples > 0)
+
+    inclusive = dict((func[2], count) for func, count in profiler.getTopFunctions(100, True))
+    self.assertTrue(inclusive.get("busyLoop", 0) > numSamples / 2)
+
+    # Nothing is sampled after stopping.
+    self.busyLoop(0.02)
+    self.assertEqual(profiler.getNumberOfSamples(), numSamples)
+    self.assertTrue(profiler.getSummary(5)[0].startswith("Samples: {0}".format(numSamples)))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,90 @@
+###
+# Chooses where intermediate datasets (random points, dissolved edges, etc.)
+# are written, so that only final outputs go to the output location.
+#
+# Intermediate datasets are written, read once or twice, and deleted, so when
+# the workspace is on a network share most of their cost is I/O.  They can go
+# to the in_memory workspace, to the scratch geodatabase (on local disk by
+# default), or to the workspace as before.  In auto mode a dataset goes to
+# memory if its estimated size fits in the memory budget, and to scratch disk
+# otherwise (or if its size isn't known).
+###
+class ScratchWorkspace(object):
+  # The in-memory workspace.
+  MEMORY = "in_memory"
+
+  # The ways of choosing a workspace.
+  MODES = ["auto", "memory", "disk", "workspace"]
+
+  # Rough sizes used for the estimates: the bytes stored per feature (the
+  # ObjectID, the shape's header and extent, and a few fields), and per vertex.
+  FEATURE_BYTES = 128
+  VERTEX_BYTES  = 16
+
+  # The number of vertices assumed per line when it isn't known.
+  DEFAULT_VERTICES = 10
+
+  ###
+  # Initialize the chooser.
+  # @param diskPath The scratch workspace on disk (e.g. arcpy.env.scratchGDB).
+  # @param workspacePath The workspace (e.g. arcpy.env.workspace).
+  # @param mode One of MODES.
+  # @param memoryBudget The largest estimated size, in bytes, that goes to
+  #        memory in auto mode.
+  ###
+  def __init__(self, diskPath, workspacePath, mode="auto", memoryBudget=256 * 1024 * 1024):
+    if mode not in self.MODES:
+      raise ValueError("Unknown scratch mode: {0}".format(mode))
+
+    self._diskPath      = diskPath or workspacePath
+    self._workspacePath = workspacePath
+    self._mode          = mode
+    self._memoryBudget  = memoryBudget
+
+  # Get the mode.
+  def getMode(self):
+    return self._mode
+
+  # Get the memory budget, in bytes.
+  def getMemoryBudget(self):
+    return self._memoryBudget
+
+  ###
+  # Choose the workspace for an intermediate dataset.
+  # @param estimatedBytes The dataset's estimated size (see the estimate
+  #        functions), or None if it isn't known.
+  ###
+  def choose(self, estimatedBytes):
+    if self._mode == "memory":
+      return self.MEMORY
+    elif self._mode == "disk":
+      return self._diskPath
+    elif self._mode == "workspace":
+      return self._workspacePath
+
+    if estimatedBytes is not None and estimatedBytes <= self._memoryBudget:
+      return self.MEMORY
+    return self._diskPath
+
+  ###
+  # Estimate the size of a point feature class.
+  # @param numPoints The number of points (None if it isn't known).
+  ###
+  @staticmethod
+  def estimatePointBytes(numPoints):
+    if numPoints is None:
+      return None
+    return numPoints * (ScratchWorkspace.FEATURE_BYTES + ScratchWorkspace.VERTEX_BYTES)
+
+  ###
+  # Estimate the size of a line feature class.
+  # @param numLines The number of lines (None if it isn't known).
+  # @param numVertices The total number of vertices (optional).
+  ###
+  @staticmethod
+  def estimateLineBytes(numLines, numVertices=None):
+    if numLines is None:
+      return None
+    if numVertices is None:
+      numVertices = numLines * ScratchWorkspace.DEFAULT_VERTICES
+    return numLines * ScratchWorkspace.FEATURE_BYTES + numVertices * ScratchWorkspace.VERTEX_BYTES
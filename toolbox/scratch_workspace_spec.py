@@ -0,0 +1,32 @@
+import unittest
+
+from scratch_workspace import ScratchWorkspace
+
+class ScratchWorkspaceSuite(unittest.TestCase):
+  # In auto mode, small datasets go to memory and large or unknown ones to
+  # scratch disk.
+  def test_auto(self):
+    scratch = ScratchWorkspace("C:/Temp/scratch.gdb", "Z:/share/analysis.gdb", "auto", 1024 * 1024)
+
+    self.assertEqual(scratch.choose(ScratchWorkspace.estimatePointBytes(1000)), ScratchWorkspace.MEMORY)
+    self.assertEqual(scratch.choose(ScratchWorkspace.estimatePointBytes(100000)), "C:/Temp/scratch.gdb")
+    self.assertEqual(scratch.choose(ScratchWorkspace.estimatePointBytes(None)), "C:/Temp/scratch.gdb")
+    self.assertEqual(scratch.choose(ScratchWorkspace.estimateLineBytes(1000)), ScratchWorkspace.MEMORY)
+    self.assertEqual(scratch.choose(ScratchWorkspace.estimateLineBytes(1000, 100000)), "C:/Temp/scratch.gdb")
+
+  # The other modes ignore the estimate.
+  def test_modes(self):
+    for mode, expected in (("memory", ScratchWorkspace.MEMORY), ("disk", "C:/Temp/scratch.gdb"),
+      ("workspace", "Z:/share/analysis.gdb")):
+      scratch = ScratchWorkspace("C:/Temp/scratch.gdb", "Z:/share/analysis.gdb", mode)
+
+      self.assertEqual(scratch.getMode(), mode)
+      self.assertEqual(scratch.choose(None), expected)
+      self.assertEqual(scratch.choose(10), expected)
+
+    # Without a scratch geodatabase, disk is the workspace.
+    self.assertEqual(ScratchWorkspace(None, "Z:/share/analysis.gdb", "disk").choose(10), "Z:/share/analysis.gdb")
+    self.assertRaises(ValueError, ScratchWorkspace, None, None, "tmp")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,354 @@
+import array
+import math
+import mmap
+import os
+import struct
+import sys
+
+###
+# Reads point and polyline shapefiles without arcpy.
+#
+# The .shp and .shx files are memory mapped.  The .shx gives the offset of
+# each record, so records are read in place: coordinates are copied straight
+# from the map into arrays of doubles, without a geometry object per feature.
+# Attributes are read from the .dbf one column at a time.
+#
+# Bounding box queries use a grid index built from the record bounding boxes
+# (the .sbn index format isn't published, so it isn't read).
+###
+class ShapefileReader(object):
+  # Shape types.
+  NULL_SHAPE = 0
+  POINT      = 1
+  POLYLINE   = 3
+  POINTZ     = 11
+  POLYLINEZ  = 13
+  POINTM     = 21
+  POLYLINEM  = 23
+
+  POINT_TYPES    = (POINT, POINTZ, POINTM)
+  POLYLINE_TYPES = (POLYLINE, POLYLINEZ, POLYLINEM)
+
+  # The value of empty integer fields (empty decimal fields are NaN).
+  NULL_INTEGER = -2147483648
+
+  ###
+  # Open a shapefile.
+  # @param shpPath The path of the .shp file.  The .shx and .dbf files must be
+  #        next to it.
+  ###
+  def __init__(self, shpPath):
+    basePath     = os.path.splitext(shpPath)[0]
+    self._files  = []
+    self._shp    = self._map(shpPath)
+    self._shx    = self._map(basePath + ".shx")
+    self._dbf    = self._map(basePath + ".dbf") if os.path.isfile(basePath + ".dbf") else None
+    self._index  = None
+    self._fields = self._readDBFHeader() if self._dbf is not None else []
+
+    self._shapeType, = struct.unpack_from("<i", self._shp, 32)
+    self._bbox       = struct.unpack_from("<4d", self._shp, 36)
+    self._numRecords = (len(self._shx) - 100) // 8
+
+  # Memory map a file.
+  def _map(self, path):
+    mapFile = open(path, "rb")
+    self._files.append(mapFile)
+
+    # Empty files can't be mapped.
+    if os.path.getsize(path) == 0:
+      return b""
+    return mmap.mmap(mapFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+  # Close the maps and files.
+  def close(self):
+    for mapped in (self._shp, self._shx, self._dbf):
+      if isinstance(mapped, mmap.mmap):
+        mapped.close()
+    for mapFile in self._files:
+      mapFile.close()
+    self._files = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self.close()
+
+  # Get the shape type.
+  def getShapeType(self):
+    return self._shapeType
+
+  # Get the bounding box of the file: (xMin, yMin, xMax, yMax).
+  def getExtent(self):
+    return self._bbox
+
+  # Get the number of records.
+  def getNumberOfRecords(self):
+    return self._numRecords
+
+  # Get the offset of a record's content (after the record header).
+  def _getContentOffset(self, recordNum):
+    offset, = struct.unpack_from(">i", self._shx, 100 + recordNum * 8)
+    return offset * 2 + 8
+
+  ###
+  # Read doubles from the .shp file into an array.
+  # @param offset The byte offset.
+  # @param count The number of doubles.
+  ###
+  def _readDoubles(self, offset, count):
+    values = array.array("d")
+    data   = self._shp[offset:offset + count * 8]
+
+    if sys.version_info[0] < 3:
+      values.fromstring(data)
+    else:
+      values.frombytes(data)
+
+    # Shapefile doubles are little endian.
+    if sys.byteorder != "little":
+      values.byteswap()
+
+    return values
+
+  ###
+  # Get the coordinates of all the points: a flat array x0, y0, x1, y1, ...
+  # indexed by record number.  Null shapes have NaN coordinates.
+  ###
+  def getPointCoordinates(self):
+    if self._shapeType not in self.POINT_TYPES:
+      raise ValueError("The shapefile doesn't contain points.")
+
+    coords = array.array("d", [float("nan")]) * (self._numRecords * 2)
+    shp    = self._shp
+
+    for recordNum in range(0, self._numRecords):
+      offset     = self._getContentOffset(recordNum)
+      shapeType, = struct.unpack_from("<i", shp, offset)
+
+      # A null shape record is only the shape type.
+      if shapeType != self.NULL_SHAPE:
+        coords[recordNum * 2], coords[recordNum * 2 + 1] = struct.unpack_from("<2d", shp, offset + 4)
+
+    return coords
+
+  ###
+  # Get the points as (record number, x, y) tuples, skipping null shapes and
+  # records that are deleted in the .dbf (e.g. origin points to snap to a
+  # NetworkGraph).  Record numbers start at 0, like shapefile FIDs.
+  ###
+  def getPoints(self):
+    coords  = self.getPointCoordinates()
+    deleted = set(self.getDeletedRecords())
+    return [(recordNum, coords[recordNum * 2], coords[recordNum * 2 + 1])
+      for recordNum in range(0, self._numRecords)
+      if coords[recordNum * 2] == coords[recordNum * 2] and recordNum not in deleted]
+
+  ###
+  # Get the coordinates of all the polylines.  Returns (coords, partStarts,
+  # recordStarts): coords is a flat array of x, y values of all the vertices;
+  # part p has the vertices from partStarts[p] to partStarts[p + 1]; and record
+  # r has the parts from recordStarts[r] to recordStarts[r + 1].  The last
+  # entry of partStarts and recordStarts is the total.
+  ###
+  def getLineCoordinates(self):
+    if self._shapeType not in self.POLYLINE_TYPES:
+      raise ValueError("The shapefile doesn't contain polylines.")
+
+    coords       = array.array("d")
+    partStarts   = array.array("l")
+    recordStarts = array.array("l")
+    shp          = self._shp
+
+    for recordNum in range(0, self._numRecords):
+      offset = self._getContentOffset(recordNum)
+      recordStarts.append(len(partStarts))
+      shapeType, = struct.unpack_from("<i", shp, offset)
+
+      if shapeType == self.NULL_SHAPE:
+        continue
+
+      # Type, box, number of parts and points, part indices, then points.
+      numParts, numPoints = struct.unpack_from("<2i", shp, offset + 36)
+      firstVertex         = len(coords) // 2
+
+      for partStart in struct.unpack_from("<{0}i".format(numParts), shp, offset + 44):
+        partStarts.append(firstVertex + partStart)
+
+      coords.extend(self._readDoubles(offset + 44 + numParts * 4, numPoints * 2))
+
+    partStarts.append(len(coords) // 2)
+    recordStarts.append(len(partStarts) - 1)
+
+    return (coords, partStarts, recordStarts)
+
+  ###
+  # Get the parts of all the polylines, each a flat array of coordinates x1,
+  # y1, x2, y2, ... (the same as LineLengthEngine.readWKB).
+  ###
+  def getLineParts(self):
+    coords, partStarts, recordStarts = self.getLineCoordinates()
+    return [coords[partStarts[partNum] * 2:partStarts[partNum + 1] * 2]
+      for partNum in range(0, len(partStarts) - 1)]
+
+  ###
+  # Get the bounding box of each record: an array of (xMin, yMin, xMax, yMax)
+  # tuples, or None for null shapes.  Only the record headers are read.
+  ###
+  def getRecordExtents(self):
+    extents = []
+    shp     = self._shp
+
+    for recordNum in range(0, self._numRecords):
+      offset     = self._getContentOffset(recordNum)
+      shapeType, = struct.unpack_from("<i", shp, offset)
+
+      if shapeType == self.NULL_SHAPE:
+        extents.append(None)
+      elif shapeType in self.POINT_TYPES:
+        x, y = struct.unpack_from("<2d", shp, offset + 4)
+        extents.append((x, y, x, y))
+      else:
+        extents.append(struct.unpack_from("<4d", shp, offset + 4))
+
+    return extents
+
+  # Build the grid index: about one record per cell.
+  def _buildIndex(self):
+    xMin, yMin, xMax, yMax = self._bbox
+
+    extents    = self.getRecordExtents()
+    numCells   = max(1, int(math.sqrt(self._numRecords)))
+    cellWidth  = max((xMax - xMin) / numCells, 1e-9)
+    cellHeight = max((yMax - yMin) / numCells, 1e-9)
+    cells      = {}
+
+    for recordNum, extent in enumerate(extents):
+      if extent is None:
+        continue
+
+      for cell in self._getCells(extent, numCells, cellWidth, cellHeight):
+        cells.setdefault(cell, []).append(recordNum)
+
+    self._index = (extents, numCells, cellWidth, cellHeight, cells)
+
+  # Get the grid cells that a bounding box overlaps.
+  def _getCells(self, extent, numCells, cellWidth, cellHeight):
+    xMin, yMin = self._bbox[0], self._bbox[1]
+    colMin     = min(max(int((extent[0] - xMin) / cellWidth), 0), numCells - 1)
+    colMax     = min(max(int((extent[2] - xMin) / cellWidth), 0), numCells - 1)
+    rowMin     = min(max(int((extent[1] - yMin) / cellHeight), 0), numCells - 1)
+    rowMax     = min(max(int((extent[3] - yMin) / cellHeight), 0), numCells - 1)
+
+    return [(col, row) for col in range(colMin, colMax + 1) for row in range(rowMin, rowMax + 1)]
+
+  ###
+  # Find the records whose bounding boxes intersect a box.  Returns the sorted
+  # record numbers.
+  # @param xMin The minimum x of the box.
+  # @param yMin The minimum y of the box.
+  # @param xMax The maximum x of the box.
+  # @param yMax The maximum y of the box.
+  ###
+  def query(self, xMin, yMin, xMax, yMax):
+    if self._index is None:
+      self._buildIndex()
+
+    extents, numCells, cellWidth, cellHeight, cells = self._index
+    found = set()
+
+    for cell in self._getCells((xMin, yMin, xMax, yMax), numCells, cellWidth, cellHeight):
+      for recordNum in cells.get(cell, []):
+        extent = extents[recordNum]
+
+        if extent[0] <= xMax and extent[2] >= xMin and extent[1] <= yMax and extent[3] >= yMin:
+          found.add(recordNum)
+
+    return sorted(found)
+
+  # Read the field descriptors of the .dbf file.
+  def _readDBFHeader(self):
+    dbf = self._dbf
+    self._dbfNumRecords, self._dbfHeaderLen, self._dbfRecordLen = struct.unpack_from("<IHH", dbf, 4)
+
+    fields = []
+    offset = 32
+    start  = 1
+
+    # The field descriptors end with a carriage return.  Each record starts
+    # with a deletion flag.
+    while offset < self._dbfHeaderLen and dbf[offset:offset + 1] != b"\r":
+      name      = dbf[offset:offset + 11].split(b"\0")[0].decode("ascii")
+      fieldType = dbf[offset + 11:offset + 12].decode("ascii")
+      length, decimals = struct.unpack_from("<BB", dbf, offset + 16)
+
+      fields.append({"name": name, "type": fieldType, "start": start, "length": length, "decimals": decimals})
+      start  += length
+      offset += 32
+
+    return fields
+
+  # Get the attribute field names.
+  def getFieldNames(self):
+    return [field["name"] for field in self._fields]
+
+  # Get the numbers of the records that are flagged as deleted in the .dbf.
+  def getDeletedRecords(self):
+    if self._dbf is None:
+      return []
+
+    dbf       = self._dbf
+    start     = self._dbfHeaderLen
+    recordLen = self._dbfRecordLen
+    return [recordNum for recordNum in range(0, self._dbfNumRecords)
+      if dbf[start + recordNum * recordLen:start + recordNum * recordLen + 1] == b"*"]
+
+  ###
+  # Read an attribute column from the .dbf file.  Numeric fields without
+  # decimals are read into array("l") (empty values are NULL_INTEGER), other
+  # numeric fields into array("d") (empty values are NaN), logical fields into
+  # booleans, and other fields into stripped strings.  Records that are
+  # deleted (see getDeletedRecords) are read as empty values, so the column
+  # still lines up with the record numbers.
+  # @param name The field name.
+  # @param encoding The encoding of text fields.
+  ###
+  def readColumn(self, name, encoding="utf-8"):
+    fields = [field for field in self._fields if field["name"].upper() == name.upper()]
+
+    if len(fields) == 0:
+      raise ValueError("Field {0} is not in the shapefile.".format(name))
+
+    field      = fields[0]
+    dbf        = self._dbf
+    start      = self._dbfHeaderLen + field["start"]
+    end        = start + field["length"]
+    recordLen  = self._dbfRecordLen
+    rawValues  = [dbf[start + recordNum * recordLen:end + recordNum * recordLen].strip()
+      for recordNum in range(0, self._dbfNumRecords)]
+
+    for recordNum in self.getDeletedRecords():
+      rawValues[recordNum] = b""
+
+    if field["type"] in ("N", "F") and field["decimals"] == 0 and field["length"] < 10:
+      return array.array("l", [self._toInteger(value, self.NULL_INTEGER) for value in rawValues])
+    elif field["type"] in ("N", "F"):
+      nan = float("nan")
+      return array.array("d", [self._toFloat(value, nan) for value in rawValues])
+    elif field["type"] == "L":
+      return [value in (b"T", b"t", b"Y", b"y") for value in rawValues]
+
+    return [value.decode(encoding, "replace") for value in rawValues]
+
+  # Convert a numeric field to a float (default if it's empty or invalid).
+  def _toFloat(self, value, default):
+    try:
+      return float(value)
+    except ValueError:
+      return default
+
+  # Convert a numeric field to an integer (default if it's empty or invalid).
+  def _toInteger(self, value, default):
+    number = self._toFloat(value, None)
+    return int(number) if number is not None else default
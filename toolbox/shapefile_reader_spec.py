@@ -0,0 +1,214 @@
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline"))
+
+# The offline runner sets up reload for the toolbox modules.
+import offline_runner
+
+from shapefile_reader import ShapefileReader
+from network_graph import NetworkGraph
+from k_function_helper import KFunctionHelper
+
+import arcpy
+
+class ShapefileReaderSuite(unittest.TestCase):
+  BRIDGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scratch", "bridge_start_points",
+    "Bridge_Start_Point.shp")
+
+  def setUp(self):
+    self.tmpDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpDir)
+
+  # Write a shapefile (.shp and .shx) of record contents.
+  def writeShapefile(self, name, shapeType, contents, allXY):
+    bbox   = (min(x for x, y in allXY), min(y for x, y in allXY), max(x for x, y in allXY), max(y for x, y in allXY))
+    shpLen = 100 + sum(8 + len(content) for content in contents)
+    shxLen = 100 + 8 * len(contents)
+
+    def header(fileLen):
+      return struct.pack(">7i", 9994, 0, 0, 0, 0, 0, fileLen // 2) + struct.pack("<2i4d4d", 1000, shapeType,
+        bbox[0], bbox[1], bbox[2], bbox[3], 0, 0, 0, 0)
+
+    shpPath = os.path.join(self.tmpDir, name + ".shp")
+    offset  = 100
+
+    with open(shpPath, "wb") as shp, open(os.path.join(self.tmpDir, name + ".shx"), "wb") as shx:
+      shp.write(header(shpLen))
+      shx.write(header(shxLen))
+
+      for recordNum, content in enumerate(contents):
+        shp.write(struct.pack(">2i", recordNum + 1, len(content) // 2) + content)
+        shx.write(struct.pack(">2i", offset // 2, len(content) // 2))
+        offset += 8 + len(content)
+
+    return shpPath
+
+  # Write a point shapefile of (x, y) records, or None for a null shape.
+  def writePoints(self, name, records):
+    contents = [struct.pack("<i", 0) if point is None else struct.pack("<i2d", 1, point[0], point[1])
+      for point in records]
+    return self.writeShapefile(name, 1, contents, [point for point in records if point is not None])
+
+  # Write a polyline shapefile of records, each an array of parts (arrays of
+  # (x, y) vertices), or None for a null shape.
+  def writePolylines(self, name, records):
+    contents = []
+
+    for parts in records:
+      if parts is None:
+        contents.append(struct.pack("<i", 0))
+        continue
+
+      vertices = [vertex for part in parts for vertex in part]
+      xs       = [x for x, y in vertices]
+      ys       = [y for x, y in vertices]
+      starts   = [sum(len(part) for part in parts[:partNum]) for partNum in range(0, len(parts))]
+      content  = struct.pack("<i4d2i", 3, min(xs), min(ys), max(xs), max(ys), len(parts), len(vertices))
+      content += struct.pack("<{0}i".format(len(parts)), *starts)
+      content += b"".join(struct.pack("<2d", x, y) for x, y in vertices)
+      contents.append(content)
+
+    return self.writeShapefile(name, 3, contents,
+      [vertex for parts in records if parts is not None for part in parts for vertex in part])
+
+  # Write a .dbf file of records, each an array of raw field values, or None
+  # for a deleted record.
+  # @param fields An array of (name, type, length, decimals) tuples.
+  def writeDBF(self, name, fields, records):
+    recordLen = 1 + sum(field[2] for field in fields)
+    headerLen = 32 + 32 * len(fields) + 1
+
+    with open(os.path.join(self.tmpDir, name + ".dbf"), "wb") as dbf:
+      dbf.write(struct.pack("<4BIHH20x", 3, 120, 1, 1, len(records), headerLen, recordLen))
+
+      for fieldName, fieldType, length, decimals in fields:
+        dbf.write(struct.pack("<11sc4xBB14x", fieldName.encode("ascii"), fieldType.encode("ascii"),
+          length, decimals))
+      dbf.write(b"\r")
+
+      for record in records:
+        values = record if record is not None else [b"9" * field[2] for field in fields]
+        dbf.write(b" " if record is not None else b"*")
+        dbf.write(b"".join(value.rjust(field[2]) for value, field in zip(values, fields)))
+
+      dbf.write(b"\x1a")
+
+  # The bridge points and attributes line up by record.
+  def test_points(self):
+    with ShapefileReader(self.BRIDGES) as reader:
+      points = reader.getPoints()
+
+      self.assertEqual(reader.getShapeType(), ShapefileReader.POINTM)
+      self.assertEqual(len(points), reader.getNumberOfRecords())
+      self.assertEqual(points[0], (0, 541058.1087999996, 320350.4991999995))
+      self.assertEqual(reader.getFieldNames(), ["RouteId", "F13", "Dir", "Length", "Id", "INFL_AREA"])
+      self.assertEqual(len(reader.readColumn("RouteId")), len(points))
+      self.assertEqual(reader.readColumn("RouteId")[0], "039N")
+      self.assertEqual(list(reader.readColumn("Id")[:3]), [1, 2, 3])
+      self.assertAlmostEqual(reader.readColumn("Length")[0], 32.1886453157)
+
+      for x, y in zip(reader.getPointCoordinates()[0::2], reader.getPointCoordinates()[1::2]):
+        self.assertTrue(reader.getExtent()[0] <= x <= reader.getExtent()[2])
+        self.assertTrue(reader.getExtent()[1] <= y <= reader.getExtent()[3])
+
+      self.assertRaises(ValueError, reader.readColumn, "NOT_A_FIELD")
+      self.assertRaises(ValueError, reader.getLineCoordinates)
+
+  # Null shapes (including a last one, which is only 4 bytes) have NaN
+  # coordinates and are skipped by getPoints.
+  def test_null_points(self):
+    shpPath = self.writePoints("Crashes", [(1, 2), None, (3, 4), None])
+
+    with ShapefileReader(shpPath) as reader:
+      coords = reader.getPointCoordinates()
+
+      self.assertEqual(reader.getNumberOfRecords(), 4)
+      self.assertEqual(list(coords[0:2]), [1, 2])
+      self.assertTrue(all(coord != coord for coord in list(coords[2:4]) + list(coords[6:8])))
+      self.assertEqual(reader.getPoints(), [(0, 1, 2), (2, 3, 4)])
+      self.assertEqual(reader.getRecordExtents(), [(1, 2, 1, 2), None, (3, 4, 3, 4), None])
+
+  # Empty integers are NULL_INTEGER, and deleted records are flagged, read as
+  # empty values, and skipped by getPoints.
+  def test_empty_and_deleted(self):
+    shpPath = self.writePoints("Crashes", [(1, 2), (3, 4), (5, 6)])
+    self.writeDBF("Crashes", [("CASEID", "N", 9, 0), ("SPEED", "N", 9, 2)],
+      [[b"7", b""], None, [b"", b"1.50"]])
+
+    with ShapefileReader(shpPath) as reader:
+      self.assertEqual(reader.getDeletedRecords(), [1])
+      self.assertEqual(list(reader.readColumn("CASEID")),
+        [7, ShapefileReader.NULL_INTEGER, ShapefileReader.NULL_INTEGER])
+      self.assertEqual([value == value for value in reader.readColumn("SPEED")], [False, False, True])
+      self.assertEqual(reader.getPoints(), [(0, 1, 2), (2, 5, 6)])
+
+  # Shapefile points that don't need projecting are snapped without a cursor.
+  def test_snap_points(self):
+    shpPath  = self.writePoints("Crashes", [(10, 0.5), None, (200, 200), (50, 99.5)])
+    graph    = NetworkGraph.fromLines([[(0, 0), (100, 0), (100, 100), (0, 100)]])
+    spatRef  = arcpy.SpatialReference(26911)
+    describe = arcpy.Describe
+    cursor   = arcpy.da.SearchCursor
+
+    def noCursor(*args, **kwargs):
+      raise AssertionError("The shapefile was read through a cursor.")
+
+    arcpy.Describe        = lambda value, *args: type("Desc", (object,), {"spatialReference": spatRef})()
+    arcpy.da.SearchCursor = noCursor
+
+    try:
+      locations, numMissed = KFunctionHelper().snapPoints(shpPath, graph, spatRef, 1)
+    finally:
+      arcpy.Describe        = describe
+      arcpy.da.SearchCursor = cursor
+
+    self.assertEqual([oid for oid, location in locations], [0, 3])
+    self.assertEqual(numMissed, 2)
+
+  # Bounding box queries match a brute force search.
+  def test_query(self):
+    with ShapefileReader(self.BRIDGES) as reader:
+      points = reader.getPoints()
+      xMin, yMin, xMax, yMax = reader.getExtent()
+
+      for box in ((xMin, yMin, xMax, yMax), (xMin, yMin, (xMin + xMax) / 2, (yMin + yMax) / 2),
+        (500000, 300000, 520000, 350000), (0, 0, 1, 1)):
+        expected = [recordNum for recordNum, x, y in points if box[0] <= x <= box[2] and box[1] <= y <= box[3]]
+        self.assertEqual(reader.query(*box), expected)
+
+  # Polyline parts (with a null shape) come back as flat coordinate arrays
+  # that can build a NetworkGraph.
+  def test_polylines(self):
+    records = [
+      [[(0, 0), (100, 0)]],
+      None,
+      [[(100, 0), (100, 50), (100, 100)], [(100, 100), (0, 100)]],
+      [[(0, 100), (0, 0)]]]
+    shpPath = self.writePolylines("Streets", records)
+
+    with ShapefileReader(shpPath) as reader:
+      coords, partStarts, recordStarts = reader.getLineCoordinates()
+      parts = reader.getLineParts()
+
+      self.assertEqual(list(recordStarts), [0, 1, 1, 3, 4])
+      self.assertEqual(list(partStarts), [0, 2, 5, 7, 9])
+      self.assertEqual([list(part) for part in parts],
+        [[0, 0, 100, 0], [100, 0, 100, 50, 100, 100], [100, 100, 0, 100], [0, 100, 0, 0]])
+      # Record 2's bounding box covers the whole square.
+      self.assertEqual(reader.query(-1, 40, 1, 60), [2, 3])
+      self.assertEqual(reader.query(101, 40, 102, 60), [])
+      self.assertEqual(reader.getFieldNames(), [])
+
+    graph = NetworkGraph.fromLines([list(zip(part[0::2], part[1::2])) for part in parts])
+    self.assertEqual(graph.getNumberOfNodes(), 4)
+    self.assertEqual(graph.getTotalLength(), 400)
+
+if __name__ == "__main__":
+  unittest.main()
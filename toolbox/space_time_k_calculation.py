@@ -0,0 +1,212 @@
+import bisect
+import datetime
+import math
+
+###
+# Space-time network K function: the pairs of points that are within both a
+# network distance band and a time band.
+#
+#   K(d, t) = netLen * timeSpan / (n * (n - 1)) * pairs within d and t
+#
+# The OD cost matrix of the observed points is indexed once: each point's
+# neighbors within the last distance band, with their distance band.  The
+# timestamps are indexed by sorting them, so the points within a time window of
+# a point are a range (a bisection) rather than a scan of all the pairs.  Each
+# point's pairs are counted from whichever is smaller, its neighbors or its
+# time window.
+#
+# Random permutations shuffle the timestamps over the fixed points (see
+# permute), so the network is only solved for the observed points.  This tests
+# for space-time interaction: the spatial and temporal patterns are kept, and
+# only their pairing is random.
+###
+class SpaceTimeKCalculation(object):
+  ###
+  # Initialize the calculator and index the distances.
+  # @param netLen The length of the network.
+  # @param timestamps A dictionary of the time of each point in days (see
+  #        getTimestamp), keyed by point ID (the OriginID and DestinationID of
+  #        the distances).  Points without a timestamp are ignored.
+  # @param odDists An array of OD distances (see NetworkKCalculation).
+  # @param begDist The distance to begin calculating (the first distance band).
+  # @param distInc The amount to increment each distance band.
+  # @param numBands The number of distance bands (optional).
+  # @param begTime The first time band, in days.
+  # @param timeInc The amount to increment each time band, in days.
+  # @param numTimeBands The number of time bands.
+  ###
+  def __init__(self, netLen, timestamps, odDists, begDist, distInc, numBands, begTime, timeInc, numTimeBands):
+    self._netLen       = netLen
+    self._timestamps   = timestamps
+    self._begDist      = begDist
+    self._distInc      = distInc
+    self._numBands     = numBands
+    self._numTimeBands = numTimeBands
+
+    # If the user doesn't specify the number of distance bands then calculate it.
+    if self._numBands is None:
+      maxLen         = max([odDist["Total_Length"] for odDist in odDists] or [begDist])
+      self._numBands = int(math.ceil((maxLen - self._begDist) / self._distInc + 1))
+
+    self._bandDists = self._getBands(begDist, distInc, self._numBands)
+    self._bandTimes = self._getBands(begTime, timeInc, numTimeBands)
+
+    # The neighbors of each point, with the distance band of each.
+    self._neighbors = {}
+    lastDist        = self._bandDists[-1] if self._numBands != 0 else None
+
+    for odDist in odDists:
+      origID = odDist["OriginID"]
+      destID = odDist["DestinationID"]
+
+      if lastDist is None or odDist["Total_Length"] > lastDist or origID == destID or \
+        origID not in timestamps or destID not in timestamps:
+        continue
+
+      self._neighbors.setdefault(origID, {})[destID] = \
+        bisect.bisect_left(self._bandDists, odDist["Total_Length"])
+
+    self._distBands = self.calculate(timestamps)
+
+  # Get the band limits, accumulated like NetworkKCalculation's distance bands.
+  def _getBands(self, begin, increment, numBands):
+    bands = []
+    cur   = begin
+    for bandNum in range(0, numBands):
+      bands.append(cur)
+      cur += increment
+    return bands
+
+  ###
+  # Convert a date and a time of day to a timestamp in days.  Returns None if
+  # there's no date.
+  # @param date A date or datetime, or a date string (YYYY-MM-DD or YYYY/MM/DD,
+  #        optionally followed by a time).
+  # @param time The time of day (optional) as an HHMM number or string (e.g.
+  #        633 or "0633"), or "HH:MM".  A datetime's own time is used if there
+  #        is no time.
+  ###
+  @staticmethod
+  def getTimestamp(date, time=None):
+    if date is None or date == "":
+      return None
+
+    if not isinstance(date, datetime.date):
+      date = datetime.datetime.strptime(str(date).strip()[:10].replace("/", "-"), "%Y-%m-%d")
+
+    days = float(date.toordinal())
+
+    if time is not None and str(time).strip() != "":
+      time = str(time).strip()
+
+      if ":" in time:
+        hours, minutes = time.split(":")[:2]
+      else:
+        hours, minutes = time[:-2] or 0, time[-2:]
+
+      days += (int(hours) * 60 + int(minutes)) / 1440.0
+    elif isinstance(date, datetime.datetime):
+      days += (date.hour * 3600 + date.minute * 60 + date.second) / 86400.0
+
+    return days
+
+  ###
+  # Count the pairs in each distance and time band for some timestamps of the
+  # same points.  Returns the bands (see getDistanceBands).
+  # @param timestamps A dictionary of the time of each point in days.
+  ###
+  def calculate(self, timestamps):
+    numTimes = self._numTimeBands
+    counts   = [[0] * numTimes for bandNum in range(0, self._numBands)]
+
+    if numTimes != 0:
+      lastTime = self._bandTimes[-1]
+      order    = sorted(timestamps.keys(), key=lambda pointID: timestamps[pointID])
+      times    = [timestamps[pointID] for pointID in order]
+
+      for origID, neighbors in self._neighbors.items():
+        origTime = timestamps[origID]
+        first    = bisect.bisect_left(times, origTime - lastTime)
+        last     = bisect.bisect_right(times, origTime + lastTime)
+
+        # Count from the smaller of the point's neighbors and time window.
+        if last - first < len(neighbors):
+          pairs = [(neighbors.get(order[pointNum]), abs(times[pointNum] - origTime))
+            for pointNum in range(first, last)]
+        else:
+          pairs = [(bandNum, abs(timestamps[destID] - origTime))
+            for destID, bandNum in neighbors.items()]
+
+        for bandNum, timeDiff in pairs:
+          if bandNum is not None and timeDiff <= lastTime:
+            counts[bandNum][bisect.bisect_left(self._bandTimes, timeDiff)] += 1
+
+    # The counts are cumulative in both distance and time.
+    for bandNum in range(0, self._numBands):
+      for timeNum in range(0, numTimes):
+        if bandNum != 0:
+          counts[bandNum][timeNum] += counts[bandNum - 1][timeNum]
+        if timeNum != 0:
+          counts[bandNum][timeNum] += counts[bandNum][timeNum - 1]
+        if bandNum != 0 and timeNum != 0:
+          counts[bandNum][timeNum] -= counts[bandNum - 1][timeNum - 1]
+
+    density = self.getPointNetworkTimeDensity()
+    bands   = []
+
+    for bandNum in range(0, self._numBands):
+      for timeNum in range(0, numTimes):
+        bands.append({
+          "distanceBand": self._bandDists[bandNum],
+          "timeBand":     self._bandTimes[timeNum],
+          "count":        counts[bandNum][timeNum],
+          "KFunction":    counts[bandNum][timeNum] * density})
+
+    return bands
+
+  ###
+  # Count the pairs with the timestamps shuffled over the points.  Returns the
+  # bands (see getDistanceBands).
+  # @param rand A random.Random instance.
+  ###
+  def permute(self, rand):
+    pointIDs = sorted(self._timestamps.keys())
+    times    = [self._timestamps[pointID] for pointID in pointIDs]
+    rand.shuffle(times)
+
+    return self.calculate(dict(zip(pointIDs, times)))
+
+  # Get the number of points (with timestamps).
+  def getNumberOfPoints(self):
+    return len(self._timestamps)
+
+  # Get the number of distance bands.
+  def getNumberOfDistanceBands(self):
+    return self._numBands
+
+  # Get the number of time bands.
+  def getNumberOfTimeBands(self):
+    return self._numTimeBands
+
+  # Get the time span of the points, in days.
+  def getTimeSpan(self):
+    if len(self._timestamps) == 0:
+      return 0.0
+    return max(self._timestamps.values()) - min(self._timestamps.values())
+
+  # Get the point-network-time density.
+  def getPointNetworkTimeDensity(self):
+    numPoints = self.getNumberOfPoints()
+
+    if numPoints < 2:
+      return 0.0
+    return self._netLen * self.getTimeSpan() / float((numPoints - 1) * numPoints)
+
+  ###
+  # Get the observed bands: an array of dictionaries with distanceBand,
+  # timeBand, count, and KFunction, for each time band of each distance band.
+  # (The same form as NetworkKCalculation, so NetworkKAnalysis can compute
+  # envelopes of them.)
+  ###
+  def getDistanceBands(self):
+    return self._distBands
@@ -0,0 +1,82 @@
+import datetime
+import unittest
+
+from random import Random
+from space_time_k_calculation import SpaceTimeKCalculation
+from network_k_calculation import NetworkKCalculation
+
+class SpaceTimeKCalculationSuite(unittest.TestCase):
+  # Random points on a line, with their pairwise distances and random times.
+  def getPoints(self, rand, numPoints):
+    positions  = dict((pointID, rand.uniform(0, 100)) for pointID in range(1, numPoints + 1))
+    timestamps = dict((pointID, rand.uniform(0, 365)) for pointID in positions)
+    odDists    = []
+
+    for origID in positions:
+      for destID in positions:
+        if origID != destID:
+          odDists.append({"OriginID": origID, "DestinationID": destID,
+            "Total_Length": abs(positions[origID] - positions[destID])})
+
+    return (timestamps, odDists)
+
+  # Count the pairs in a band by brute force.
+  def countPairs(self, timestamps, odDists, distBand, timeBand):
+    return len([odDist for odDist in odDists if odDist["Total_Length"] <= distBand and
+      abs(timestamps[odDist["OriginID"]] - timestamps[odDist["DestinationID"]]) <= timeBand])
+
+  # Dates and times of crash records.
+  def test_timestamps(self):
+    day = float(datetime.date(2011, 2, 24).toordinal())
+
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp("2011-02-24"), day)
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp("2011/02/24", "2156"), day + (21 * 60 + 56) / 1440.0)
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp(datetime.date(2011, 2, 24), 633), day + (6 * 60 + 33) / 1440.0)
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp(datetime.datetime(2011, 2, 24, 12)), day + 0.5)
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp("2011-02-24 00:00:00", "12:00"), day + 0.5)
+    self.assertEqual(SpaceTimeKCalculation.getTimestamp(None, "1200"), None)
+
+  # The counts match a brute force count, in both distance and time.
+  def test_counts(self):
+    timestamps, odDists = self.getPoints(Random(3), 30)
+    stkc = SpaceTimeKCalculation(200.0, timestamps, odDists, 0, 10, 8, 5, 30, 6)
+    bands = stkc.getDistanceBands()
+
+    self.assertEqual(len(bands), 8 * 6)
+    self.assertEqual(stkc.getPointNetworkTimeDensity(), 200.0 * stkc.getTimeSpan() / (29 * 30))
+
+    for band in bands:
+      self.assertEqual(band["count"], self.countPairs(timestamps, odDists, band["distanceBand"], band["timeBand"]))
+      self.assertEqual(band["KFunction"], band["count"] * stkc.getPointNetworkTimeDensity())
+
+    # With a time band that covers the time span, the counts match the network
+    # K function.
+    stkc  = SpaceTimeKCalculation(200.0, timestamps, odDists, 0, 10, 8, 365, 1, 1)
+    netKC = NetworkKCalculation(200.0, 30, odDists, 0, 10, 8)
+
+    self.assertEqual([band["count"] for band in stkc.getDistanceBands()],
+      [band["count"] for band in netKC.getDistanceBands()])
+
+  # Permutations shuffle the timestamps over the same points.
+  def test_permute(self):
+    timestamps, odDists = self.getPoints(Random(5), 25)
+    stkc     = SpaceTimeKCalculation(200.0, timestamps, odDists, 0, 20, 5, 10, 120, 4)
+    permuted = stkc.permute(Random(1))
+    pointIDs = sorted(timestamps.keys())
+    times    = [timestamps[pointID] for pointID in pointIDs]
+    Random(1).shuffle(times)
+    shuffled = dict(zip(pointIDs, times))
+
+    self.assertEqual(permuted, stkc.permute(Random(1)))
+    self.assertEqual(stkc.getDistanceBands(),
+      SpaceTimeKCalculation(200.0, timestamps, odDists, 0, 20, 5, 10, 120, 4).getDistanceBands())
+
+    for band in permuted:
+      self.assertEqual(band["count"], self.countPairs(shuffled, odDists, band["distanceBand"], band["timeBand"]))
+
+    # The distance-only counts (the last time band) don't change.
+    self.assertEqual([band["count"] for band in permuted if band["timeBand"] == 370],
+      [band["count"] for band in stkc.getDistanceBands() if band["timeBand"] == 370])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,350 @@
+import arcpy
+import os
+import k_function_helper
+import random_odcm_permutations_svc
+import global_k_function_svc
+import space_time_k_calculation
+import space_time_k_function_svc
+import stage_profiler
+
+from arcpy import env
+from random import Random
+
+# ArcMap caching prevention.
+k_function_helper            = reload(k_function_helper)
+random_odcm_permutations_svc = reload(random_odcm_permutations_svc)
+global_k_function_svc        = reload(global_k_function_svc)
+space_time_k_calculation     = reload(space_time_k_calculation)
+space_time_k_function_svc    = reload(space_time_k_function_svc)
+stage_profiler               = reload(stage_profiler)
+
+from k_function_helper            import KFunctionHelper
+from random_odcm_permutations_svc import RandomODCMPermutationsSvc
+from global_k_function_svc        import GlobalKFunctionSvc
+from space_time_k_calculation     import SpaceTimeKCalculation
+from space_time_k_function_svc    import SpaceTimeKFunctionSvc
+from stage_profiler               import StageProfiler
+
+class SpaceTimeKFunction(object):
+  ###
+  # Initialize the tool.
+  ###
+  def __init__(self):
+    self.label              = "Space-Time K Function"
+    self.description        = "Uses a Space-Time Network K Function to analyze whether crashes that are close on the network are also close in time."
+    self.canRunInBackground = False
+    env.overwriteOutput     = True
+    self.kfHelper           = KFunctionHelper()
+
+  ###
+  # Get input from the users.
+  ###
+  def getParameterInfo(self):
+    # Input origin features.
+    points = arcpy.Parameter(
+      displayName="Input Points Feature Dataset",
+      name="points",
+      datatype="Feature Class",
+      parameterType="Required",
+      direction="Input")
+    points.filter.list = ["Point"]
+
+    # Network dataset.
+    networkDataset = arcpy.Parameter(
+      displayName="Input Network Dataset",
+      name = "network_dataset",
+      datatype="Network Dataset Layer",
+      parameterType="Required",
+      direction="Input")
+
+    # Number of distance increments.
+    numBands = arcpy.Parameter(
+      displayName="Input Number of Distance Bands",
+      name="num_dist_bands",
+      datatype="Long",
+      parameterType="Optional",
+      direction="Input")
+
+    # Beginning distance.
+    begDist = arcpy.Parameter(
+      displayName="Input Beginning Distance",
+      name="beginning_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    begDist.value = 0
+
+    # Distance increment.
+    distInc = arcpy.Parameter(
+      displayName="Input Distance Increment",
+      name="distance_increment",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    distInc.value = 1000
+
+    # Snap distance.
+    snapDist = arcpy.Parameter(
+      displayName="Input Snap Distance",
+      name="snap_distance",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    snapDist.value = 25
+
+    # Output location.
+    outNetKLoc = arcpy.Parameter(
+      displayName="Output Location (Database Path)",
+      name="out_location",
+      datatype="DEWorkspace",
+      parameterType="Required",
+      direction="Input")
+    outNetKLoc.value = arcpy.env.workspace
+
+    # The raw ODCM data.
+    outRawODCMFCName = arcpy.Parameter(
+      displayName="Raw ODCM Data Table",
+      name = "output_raw_odcm_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outRawODCMFCName.value = "Space_Time_K_Raw_ODCM_Data"
+
+    # The raw data feature class (e.g. observed and permuted computations).
+    outRawFCName = arcpy.Parameter(
+      displayName="Raw Space-Time-K Data Table (Raw Analysis Data)",
+      name = "output_raw_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outRawFCName.value = "Space_Time_K_Raw_Analysis_Data"
+
+    # The analysis feature class.
+    outAnlFCName = arcpy.Parameter(
+      displayName="Space-Time-K Summary Data (Plottable Data)",
+      name = "output_analysis_feature_class",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Output")
+    outAnlFCName.value = "Space_Time_K_Summary_Data"
+
+    # Confidence envelope (number of permutations).
+    numPerms = arcpy.Parameter(
+      displayName="Number of Timestamp Permutations",
+      name = "num_permutations",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    permKeys             = list(self.kfHelper.getPermutationSelection().keys())
+    numPerms.filter.list = permKeys
+    numPerms.value       = permKeys[0]
+
+    # Projected coordinate system.
+    outCoordSys = arcpy.Parameter(
+      displayName="Output Network Dataset Length Projected Coordinate System",
+      name="coordinate_system",
+      datatype="GPSpatialReference",
+      parameterType="Optional",
+      direction="Input")
+
+    # Date field.
+    dateFieldName = arcpy.Parameter(
+      displayName="Date Field",
+      name = "date_field",
+      datatype="GPString",
+      parameterType="Required",
+      direction="Input")
+    dateFieldName.value = "DATE_"
+
+    # Time of day field (HHMM).
+    timeFieldName = arcpy.Parameter(
+      displayName="Time Field (HHMM)",
+      name = "time_field",
+      datatype="GPString",
+      parameterType="Optional",
+      direction="Input")
+    timeFieldName.value = "TIME_"
+
+    # Number of time bands.
+    numTimeBands = arcpy.Parameter(
+      displayName="Number of Time Bands",
+      name = "num_time_bands",
+      datatype="Long",
+      parameterType="Required",
+      direction="Input")
+    numTimeBands.value = 10
+
+    # Beginning time.
+    begTime = arcpy.Parameter(
+      displayName="Beginning Time (Days)",
+      name = "beginning_time",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    begTime.value = 0
+
+    # Time increment.
+    timeInc = arcpy.Parameter(
+      displayName="Time Increment (Days)",
+      name = "time_increment",
+      datatype="Double",
+      parameterType="Required",
+      direction="Input")
+    timeInc.value = 7
+
+    # Random seed.
+    seed = arcpy.Parameter(
+      displayName="Random Seed",
+      name = "random_seed",
+      datatype="GPLong",
+      parameterType="Optional",
+      direction="Input")
+
+    return [points, networkDataset, numBands, begDist, distInc, snapDist,
+      outNetKLoc, outRawODCMFCName, outRawFCName, outAnlFCName, numPerms,
+      outCoordSys, dateFieldName, timeFieldName, numTimeBands, begTime, timeInc,
+      seed]
+
+  ###
+  # Check if the tool is available for use.
+  ###
+  def isLicensed(self):
+    # Network Analyst tools must be available.
+    return arcpy.CheckExtension("Network") == "Available"
+
+  ###
+  # Set parameter defaults.
+  ###
+  def updateParameters(self, parameters):
+    points         = parameters[0].value
+    networkDataset = parameters[1].value
+    outCoordSys    = parameters[11].value
+
+    # Default the coordinate system.
+    if networkDataset is not None and outCoordSys is None:
+      ndDesc = arcpy.Describe(networkDataset)
+      # If the network dataset's coordinate system is a projected one,
+      # use its coordinate system as the defualt.
+      if (ndDesc.spatialReference.projectionName != "" and
+        ndDesc.spatialReference.linearUnitName == "Meter" and
+        ndDesc.spatialReference.factoryCode != 0):
+        parameters[11].value = ndDesc.spatialReference.factoryCode
+
+    # Set the source of the date and time fields (the points).
+    if points is not None:
+      parameters[12].filter.list = self.kfHelper.getTimeFieldNames(points)
+      parameters[13].filter.list = self.kfHelper.getTimeFieldNames(points)
+
+  ###
+  # If any fields are invalid, show an appropriate error message.
+  ###
+  def updateMessages(self, parameters):
+    outCoordSys = parameters[11].value
+
+    if outCoordSys is not None:
+      if outCoordSys.projectionName == "":
+        parameters[11].setErrorMessage("Output coordinate system must be a projected coordinate system.")
+      elif outCoordSys.linearUnitName != "Meter":
+        parameters[11].setErrorMessage("Output coordinate system must have a linear unit code of 'Meter.'")
+      else:
+        parameters[11].clearMessage()
+
+  ###
+  # Execute the tool.
+  ###
+  def execute(self, parameters, messages):
+    points            = parameters[0].valueAsText
+    networkDataset    = parameters[1].valueAsText
+    numBands          = parameters[2].value
+    begDist           = parameters[3].value
+    distInc           = parameters[4].value
+    snapDist          = parameters[5].value
+    outNetKLoc        = parameters[6].valueAsText
+    outRawODCMFCName  = parameters[7].valueAsText
+    outRawFCName      = parameters[8].valueAsText
+    outAnlFCName      = parameters[9].valueAsText
+    numPermsDesc      = parameters[10].valueAsText
+    numPerms          = self.kfHelper.getPermutationSelection()[numPermsDesc]
+    outCoordSys       = parameters[11].value
+    dateFieldName     = parameters[12].value
+    timeFieldName     = parameters[13].value
+    numTimeBands      = parameters[14].value
+    begTime           = parameters[15].value
+    timeInc           = parameters[16].value
+    seed              = parameters[17].value
+    ndDesc            = arcpy.Describe(networkDataset)
+    gkfSvc            = GlobalKFunctionSvc()
+    stkfSvc           = SpaceTimeKFunctionSvc()
+    profiler          = StageProfiler(self.kfHelper.isMemoryTracingEnabled())
+
+    # Refer to the note in the NetworkDatasetLength tool.
+    if outCoordSys is None:
+      outCoordSys = ndDesc.spatialReference
+
+    messages.addMessage("\nOrigin points: {0}".format(points))
+    messages.addMessage("Network dataset: {0}".format(networkDataset))
+    messages.addMessage("Number of distance bands: {0}".format(numBands))
+    messages.addMessage("Beginning distance: {0}".format(begDist))
+    messages.addMessage("Distance increment: {0}".format(distInc))
+    messages.addMessage("Snap distance: {0}".format(snapDist))
+    messages.addMessage("Output location (database path): {0}".format(outNetKLoc))
+    messages.addMessage("Raw ODCM data table: {0}".format(outRawODCMFCName))
+    messages.addMessage("Raw space-time-K data table (raw analysis data): {0}".format(outRawFCName))
+    messages.addMessage("Space-time-K summary data (plottable data): {0}".format(outAnlFCName))
+    messages.addMessage("Number of timestamp permutations: {0}".format(numPerms))
+    messages.addMessage("Network dataset length projected coordinate system: {0}".format(outCoordSys.name))
+    messages.addMessage("Date field: {0}".format(dateFieldName))
+    messages.addMessage("Time field: {0}".format(timeFieldName))
+    messages.addMessage("Number of time bands: {0}".format(numTimeBands))
+    messages.addMessage("Beginning time (days): {0}".format(begTime))
+    messages.addMessage("Time increment (days): {0}".format(timeInc))
+    messages.addMessage("Random seed: {0}\n".format(seed))
+
+    # Calculate the length of the network.
+    with profiler.span("network_length"):
+      networkLength = self.kfHelper.calculateLength(networkDataset, outCoordSys)
+    messages.addMessage("Total network length: {0}".format(networkLength))
+
+    # Read the time of each crash.
+    timestamps = stkfSvc.readTimestamps(os.path.join(outNetKLoc, points), dateFieldName, timeFieldName)
+    messages.addMessage("Points with a date: {0}".format(len(timestamps)))
+
+    # Only the observed ODCM is solved: the permutations shuffle the
+    # timestamps over the observed points.
+    cutoff      = gkfSvc.getCutoff(numBands, distInc, begDist)
+    odDistsCont = [None]
+
+    def storeODDists(odDists, iteration):
+      odDistsCont[0] = odDists
+
+    randODCMPermSvc = RandomODCMPermutationsSvc(profiler)
+    randODCMPermSvc.generateODCMPermutations("Global Analysis",
+      points, points, networkDataset, snapDist, cutoff, outNetKLoc,
+      outRawODCMFCName, 0, outCoordSys, None, messages, storeODDists)
+
+    # Index the observed distances and count the observed pairs.
+    with profiler.span("space_time_index"):
+      stKCalc = SpaceTimeKCalculation(networkLength, timestamps, odDistsCont[0], begDist, distInc,
+        numBands, begTime, timeInc, numTimeBands)
+    stKCalculations = [stKCalc.getDistanceBands()]
+
+    # Count the pairs of each permutation.
+    rand = Random(seed)
+
+    with profiler.span("timestamp_permutations"):
+      for i in range(1, numPerms + 1):
+        stKCalculations.append(stKCalc.permute(rand))
+    messages.addMessage("Timestamp permutations complete: {0}".format(numPerms))
+
+    # Store the raw analysis data.
+    messages.addMessage("Writing raw analysis data.")
+    with profiler.span("write_raw_analysis"):
+      stkfSvc.writeRawAnalysisData(outNetKLoc, outRawFCName, stKCalculations)
+
+    # Analyze the data and store the results.
+    messages.addMessage("Analyzing data.")
+    with profiler.span("analysis_summary"):
+      stkfSvc.writeAnalysisSummaryData(numPerms, stKCalculations, outNetKLoc, outAnlFCName)
+
+    # Write the time spent in each stage next to the output tables.
+    messages.addMessage("Profile report: {0}".format(profiler.writeReport(outNetKLoc, outAnlFCName)[0]))
@@ -0,0 +1,87 @@
+import arcpy
+import os
+import network_k_analysis
+import space_time_k_calculation
+
+# ArcMap caching prevention.
+network_k_analysis       = reload(network_k_analysis)
+space_time_k_calculation = reload(space_time_k_calculation)
+
+from network_k_analysis       import NetworkKAnalysis
+from space_time_k_calculation import SpaceTimeKCalculation
+
+class SpaceTimeKFunctionSvc(object):
+  ###
+  # Read the timestamp of each point.  Returns a dictionary of timestamps in
+  # days (see SpaceTimeKCalculation.getTimestamp) keyed by ObjectID.  Points
+  # without a date are left out.
+  # @param points The points.
+  # @param dateFieldName The name of the date field (e.g. DATE_).
+  # @param timeFieldName The name of the time of day field (e.g. TIME_,
+  #        optional).
+  ###
+  def readTimestamps(self, points, dateFieldName, timeFieldName):
+    fields     = ["OID@", dateFieldName] + ([timeFieldName] if timeFieldName else [])
+    timestamps = {}
+
+    with arcpy.da.SearchCursor(points, fields) as cursor:
+      for row in cursor:
+        timestamp = SpaceTimeKCalculation.getTimestamp(row[1], row[2] if timeFieldName else None)
+
+        if timestamp is not None:
+          timestamps[row[0]] = timestamp
+
+    return timestamps
+
+  ###
+  # Write the raw analysis data.  The 0th iteration is the observed data, and
+  # the rest have shuffled timestamps.
+  ###
+  def writeRawAnalysisData(self, outNetKLoc, outRawFCName, stKCalculations):
+    outRawFCFullPath = os.path.join(outNetKLoc, outRawFCName)
+    arcpy.CreateTable_management(outNetKLoc, outRawFCName)
+
+    arcpy.AddField_management(outRawFCFullPath, "Iteration_Number", "LONG")
+    arcpy.AddField_management(outRawFCFullPath, "Distance_Band",    "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "Time_Band",        "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "Point_Count",      "DOUBLE")
+    arcpy.AddField_management(outRawFCFullPath, "K_Function",       "DOUBLE")
+
+    with arcpy.da.InsertCursor(outRawFCFullPath,
+      ["Iteration_Number", "Distance_Band", "Time_Band", "Point_Count", "K_Function"]) as cursor:
+      for stKNum in range(0, len(stKCalculations)):
+        for band in stKCalculations[stKNum]:
+          cursor.insertRow([stKNum, band["distanceBand"], band["timeBand"], band["count"], band["KFunction"]])
+
+  ###
+  # Perform the summary analysis and write the summary data.
+  ###
+  def writeAnalysisSummaryData(self, numPerms, stKCalculations, outNetKLoc, outAnlFCName):
+    # The bands are in the same form as the network K function's, so the
+    # envelopes are computed the same way.
+    if numPerms != 0:
+      stKAn_95 = NetworkKAnalysis(.95, stKCalculations)
+      stKAn_90 = NetworkKAnalysis(.90, stKCalculations)
+
+    outAnlFCFullPath = os.path.join(outNetKLoc, outAnlFCName)
+    arcpy.CreateTable_management(outNetKLoc, outAnlFCName)
+    arcpy.AddField_management(outAnlFCFullPath, "Description",   "TEXT")
+    arcpy.AddField_management(outAnlFCFullPath, "Distance_Band", "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "Time_Band",     "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "Point_Count",   "DOUBLE")
+    arcpy.AddField_management(outAnlFCFullPath, "K_Function",    "DOUBLE")
+
+    with arcpy.da.InsertCursor(outAnlFCFullPath,
+      ["Description", "Distance_Band", "Time_Band", "Point_Count", "K_Function"]) as cursor:
+      self._writeAnalysis(cursor, stKCalculations[0], "Observed")
+
+      if numPerms != 0:
+        self._writeAnalysis(cursor, stKAn_95.getLowerConfidenceEnvelope(), "2.5% Lower Bound")
+        self._writeAnalysis(cursor, stKAn_95.getUpperConfidenceEnvelope(), "2.5% Upper Bound")
+        self._writeAnalysis(cursor, stKAn_90.getLowerConfidenceEnvelope(), "5% Lower Bound")
+        self._writeAnalysis(cursor, stKAn_90.getUpperConfidenceEnvelope(), "5% Upper Bound")
+
+  # Write the analysis data in bands using cursor.
+  def _writeAnalysis(self, cursor, bands, description):
+    for band in bands:
+      cursor.insertRow([description, band["distanceBand"], band["timeBand"], band["count"], band["KFunction"]])
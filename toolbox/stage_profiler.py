@@ -0,0 +1,294 @@
+import csv
+import json
+import os
+import threading
+import time
+import timeit
+
+# tracemalloc is not available in Python 2.7 (ArcMap), in which case memory
+# is not recorded.
+try:
+  import tracemalloc
+except ImportError:
+  tracemalloc = None
+
+# CPU time of the process: user plus system time.  Python 2 has no
+# process_time, and its time.clock is wall time on Windows, so os.times is used
+# instead.
+def _getOSCPUTime():
+  times = os.times()
+  return times[0] + times[1]
+
+_cpuTime = getattr(time, "process_time", None) or _getOSCPUTime
+
+###
+# Records the wall time, CPU time, and (optionally) peak traced memory of
+# named stages of a run, e.g. "solve" or "write_odcm" in each permutation,
+# and summarizes each stage with percentiles.
+#
+# Usage:
+#   profiler = StageProfiler()
+#   with profiler.span("solve"):
+#     arcpy.na.Solve(odcmLayer)
+#   profiler.writeReport(outDir, "Global_K")
+#
+# Spans can be recorded from several threads (e.g. the permutation pipeline);
+# each thread has its own stack of nested spans.  Traced memory is process
+# wide, though, so the peaks of concurrent spans include each other.
+###
+class StageProfiler(object):
+  # The percentiles that are reported for each stage.
+  PERCENTILES = (50, 90, 95)
+
+  ###
+  # Initialize the profiler.
+  # @param traceMemory Whether or not to record the peak memory allocated in
+  #        each span with tracemalloc.  Tracing slows Python code down, so it's
+  #        off by default.  Ignored if tracemalloc is not available.
+  ###
+  def __init__(self, traceMemory=False):
+    self._traceMemory = traceMemory and tracemalloc is not None
+    self._stageNames  = []
+    self._spans       = {}
+    self._local       = threading.local()
+    self._lock        = threading.Lock()
+    self._startTime   = timeit.default_timer()
+    self._ownsTracing = False
+
+    if self._traceMemory and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self._ownsTracing = True
+
+  # Check if memory is traced.
+  def isTracingMemory(self):
+    return self._traceMemory and tracemalloc.is_tracing()
+
+  # Get the stage names in the order that they were first seen.
+  def getStageNames(self):
+    with self._lock:
+      return list(self._stageNames)
+
+  ###
+  # Get the recorded spans of a stage.  Each is a dictionary with wall, cpu,
+  # and peakMemory (bytes, None if memory isn't traced) keys.
+  # @param name The stage name.
+  ###
+  def getSpans(self, name):
+    with self._lock:
+      return list(self._spans.get(name, []))
+
+  ###
+  # Time a stage.  Spans can be nested (the time of an inner span is also part
+  # of the outer span).
+  # @param name The stage name.
+  ###
+  def span(self, name):
+    return _Span(self, name)
+
+  # Get the calling thread's stack of open spans.
+  def _getStack(self):
+    if not hasattr(self._local, "stack"):
+      self._local.stack = []
+    return self._local.stack
+
+  ###
+  # Start a span.  Called by _Span.
+  # @param name The stage name.
+  ###
+  def _start(self, name):
+    with self._lock:
+      self._addStage(name)
+
+    stack = self._getStack()
+    frame = {
+      "name":       name,
+      "wall":       timeit.default_timer(),
+      "cpu":        _cpuTime(),
+      "memory":     None,
+      "peakMemory": None}
+
+    if self.isTracingMemory():
+      # The peak of an enclosing span is carried in its frame, so the peak can
+      # be reset for this span.
+      current, peak = tracemalloc.get_traced_memory()
+
+      if len(stack) != 0:
+        stack[-1]["peakMemory"] = max(stack[-1]["peakMemory"], peak)
+
+      if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+      frame["memory"]     = current
+      frame["peakMemory"] = current
+
+    stack.append(frame)
+
+  # End the current span.  Called by _Span.
+  def _end(self):
+    stack      = self._getStack()
+    frame      = stack.pop()
+    peakMemory = None
+
+    if self.isTracingMemory() and frame["memory"] is not None:
+      current, peak = tracemalloc.get_traced_memory()
+      peak          = max(frame["peakMemory"], peak)
+      peakMemory    = peak - frame["memory"]
+
+      if len(stack) != 0:
+        stack[-1]["peakMemory"] = max(stack[-1]["peakMemory"], peak)
+
+    self.record(frame["name"], timeit.default_timer() - frame["wall"], _cpuTime() - frame["cpu"], peakMemory)
+
+  # Add a stage if it hasn't been seen (call with the lock held).
+  def _addStage(self, name):
+    if name not in self._spans:
+      self._stageNames.append(name)
+      self._spans[name] = []
+
+  ###
+  # Record a span that was timed elsewhere.
+  # @param name The stage name.
+  # @param wall The wall time (seconds).
+  # @param cpu The CPU time (seconds).
+  # @param peakMemory The peak memory allocated (bytes, optional).
+  ###
+  def record(self, name, wall, cpu, peakMemory=None):
+    with self._lock:
+      self._addStage(name)
+      self._spans[name].append({"wall": wall, "cpu": cpu, "peakMemory": peakMemory})
+
+  ###
+  # Get a percentile of some values (linear interpolation between the closest
+  # ranks).
+  # @param values A sorted array of values.
+  # @param percentile The percentile, 0 to 100.
+  ###
+  @staticmethod
+  def getPercentile(values, percentile):
+    if len(values) == 0:
+      return None
+
+    rank  = (len(values) - 1) * percentile / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+  ###
+  # Summarize each stage: the number of spans, the total, mean, percentiles,
+  # and maximum of the wall times, the total CPU time, and the largest peak
+  # memory.
+  ###
+  def getSummary(self):
+    summary = []
+
+    for name in self.getStageNames():
+      spans    = self.getSpans(name)
+      walls    = sorted(span["wall"] for span in spans)
+      memories = [span["peakMemory"] for span in spans if span["peakMemory"] is not None]
+      stage    = {
+        "stage":      name,
+        "count":      len(spans),
+        "wallTotal":  sum(walls),
+        "wallMean":   sum(walls) / len(walls),
+        "wallMax":    walls[-1],
+        "cpuTotal":   sum(span["cpu"] for span in spans),
+        "peakMemory": max(memories) if len(memories) != 0 else None}
+
+      for percentile in self.PERCENTILES:
+        stage["wallP{0}".format(percentile)] = self.getPercentile(walls, percentile)
+
+      summary.append(stage)
+
+    return summary
+
+  # Get the wall time since the profiler was created.
+  def getElapsedTime(self):
+    return timeit.default_timer() - self._startTime
+
+  ###
+  # Get the directory that a report for an output workspace is written to.
+  # Geodatabases are directories that ArcGIS manages, so the report goes next
+  # to the geodatabase rather than in it.
+  # @param outLoc The output workspace.
+  ###
+  @staticmethod
+  def getReportDirectory(outLoc):
+    outLoc = os.path.normpath(outLoc)
+
+    if outLoc.lower().endswith((".gdb", ".mdb", ".sde")) or not os.path.isdir(outLoc):
+      return os.path.dirname(outLoc)
+
+    return outLoc
+
+  ###
+  # Write the summary as JSON.
+  # @param path The file to write.
+  ###
+  def writeJSON(self, path):
+    report = {
+      "elapsedTime": self.getElapsedTime(),
+      "traceMemory": self._traceMemory,
+      "stages":      self.getSummary()}
+
+    with open(path, "w") as reportFile:
+      json.dump(report, reportFile, indent=2, sort_keys=True)
+
+  ###
+  # Write the summary as CSV, one row per stage.
+  # @param path The file to write.
+  ###
+  def writeCSV(self, path):
+    columns = ["stage", "count", "wallTotal", "wallMean"] + \
+      ["wallP{0}".format(percentile) for percentile in self.PERCENTILES] + \
+      ["wallMax", "cpuTotal", "peakMemory"]
+
+    # Python 2's csv module wants binary files.
+    mode   = "wb" if str is bytes else "w"
+    kwargs = {} if str is bytes else {"newline": ""}
+
+    with open(path, mode, **kwargs) as reportFile:
+      writer = csv.writer(reportFile)
+      writer.writerow(columns)
+
+      for stage in self.getSummary():
+        writer.writerow([stage[column] for column in columns])
+
+  # Stop tracing memory if this profiler started it.
+  def stop(self):
+    if self._ownsTracing:
+      tracemalloc.stop()
+      self._ownsTracing = False
+
+  ###
+  # Write the JSON and CSV reports for a run, and stop tracing memory (see
+  # stop).  Returns the paths.
+  # @param outLoc The output workspace (see getReportDirectory).
+  # @param baseName The base file name, e.g. the name of the output table.  The
+  #        reports are <baseName>_profile.json and <baseName>_profile.csv.
+  ###
+  def writeReport(self, outLoc, baseName):
+    outDir   = self.getReportDirectory(outLoc)
+    jsonPath = os.path.join(outDir, "{0}_profile.json".format(baseName))
+    csvPath  = os.path.join(outDir, "{0}_profile.csv".format(baseName))
+
+    self.stop()
+    self.writeJSON(jsonPath)
+    self.writeCSV(csvPath)
+
+    return (jsonPath, csvPath)
+
+###
+# A span of a stage (see StageProfiler.span).
+###
+class _Span(object):
+  def __init__(self, profiler, name):
+    self._profiler = profiler
+    self._name     = name
+
+  def __enter__(self):
+    self._profiler._start(self._name)
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self._profiler._end()
+    return False
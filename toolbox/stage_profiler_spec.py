@@ -0,0 +1,135 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from stage_profiler import StageProfiler
+
+class StageProfilerSuite(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  # Spans are recorded per stage, in the order the stages are first seen.
+  def test_spans(self):
+    profiler = StageProfiler()
+
+    for i in range(0, 3):
+      with profiler.span("permutation"):
+        with profiler.span("solve"):
+          sum(range(0, 1000))
+
+    self.assertEqual(profiler.getStageNames(), ["permutation", "solve"])
+    self.assertEqual(len(profiler.getSpans("solve")), 3)
+    self.assertEqual(profiler.getSpans("missing"), [])
+
+    # An outer span includes its inner spans.
+    for outer, inner in zip(profiler.getSpans("permutation"), profiler.getSpans("solve")):
+      self.assertTrue(outer["wall"] >= inner["wall"])
+      self.assertEqual(outer["peakMemory"], None)
+
+  # A span is recorded when the stage raises.
+  def test_exception(self):
+    profiler = StageProfiler()
+
+    with self.assertRaises(ValueError):
+      with profiler.span("solve"):
+        raise ValueError("Solve failed.")
+
+    self.assertEqual(len(profiler.getSpans("solve")), 1)
+
+  # Threads have their own stacks of nested spans.
+  def test_threads(self):
+    profiler = StageProfiler()
+
+    def work(name):
+      for i in range(0, 50):
+        with profiler.span(name):
+          with profiler.span("inner"):
+            sum(range(0, 100))
+
+    workers = [threading.Thread(target=work, args=("outer{0}".format(i),)) for i in range(0, 4)]
+    for worker in workers:
+      worker.start()
+    for worker in workers:
+      worker.join()
+
+    self.assertEqual(len(profiler.getSpans("inner")), 200)
+    for i in range(0, 4):
+      self.assertEqual(len(profiler.getSpans("outer{0}".format(i))), 50)
+
+  # Percentiles interpolate between the closest ranks.
+  def test_percentiles(self):
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    self.assertEqual(StageProfiler.getPercentile(values, 0),   1.0)
+    self.assertEqual(StageProfiler.getPercentile(values, 50),  3.0)
+    self.assertEqual(StageProfiler.getPercentile(values, 90),  4.6)
+    self.assertEqual(StageProfiler.getPercentile(values, 100), 5.0)
+    self.assertEqual(StageProfiler.getPercentile([7.0], 95),   7.0)
+    self.assertEqual(StageProfiler.getPercentile([], 50),      None)
+
+  # The summary aggregates the spans of each stage.
+  def test_summary(self):
+    profiler = StageProfiler()
+
+    for wall in (4.0, 1.0, 3.0, 2.0):
+      profiler.record("solve", wall, wall / 2)
+    profiler.record("write_odcm", 0.5, 0.25, 1024)
+
+    solve, write = profiler.getSummary()
+
+    self.assertEqual(solve["stage"],     "solve")
+    self.assertEqual(solve["count"],     4)
+    self.assertEqual(solve["wallTotal"], 10.0)
+    self.assertEqual(solve["wallMean"],  2.5)
+    self.assertEqual(solve["wallP50"],   2.5)
+    self.assertEqual(solve["wallMax"],   4.0)
+    self.assertEqual(solve["cpuTotal"],  5.0)
+    self.assertEqual(solve["peakMemory"], None)
+    self.assertEqual(write["peakMemory"], 1024)
+
+  # Memory is traced when requested (and available).
+  def test_memory(self):
+    profiler = StageProfiler(True)
+
+    if not profiler.isTracingMemory():
+      self.skipTest("tracemalloc is not available.")
+
+    with profiler.span("outer"):
+      with profiler.span("allocate"):
+        data = [0] * 100000
+      del data
+
+    self.assertTrue(profiler.getSpans("allocate")[0]["peakMemory"] >= 100000 * 8)
+    self.assertTrue(profiler.getSpans("outer")[0]["peakMemory"] >= profiler.getSpans("allocate")[0]["peakMemory"])
+
+  # Reports go next to a geodatabase, and in a folder workspace.
+  def test_report(self):
+    profiler = StageProfiler()
+    profiler.record("solve", 1.0, 0.5)
+
+    gdbPath = os.path.join(self.tempDir, "output.gdb")
+    os.mkdir(gdbPath)
+
+    jsonPath, csvPath = profiler.writeReport(gdbPath, "Global_K")
+    self.assertEqual(os.path.dirname(jsonPath), self.tempDir)
+    self.assertEqual(os.path.dirname(csvPath),  self.tempDir)
+    self.assertEqual(StageProfiler.getReportDirectory(self.tempDir), self.tempDir)
+
+    with open(jsonPath, "r") as jsonFile:
+      report = json.load(jsonFile)
+    self.assertEqual([stage["stage"] for stage in report["stages"]], ["solve"])
+
+    with open(csvPath, "r") as csvFile:
+      rows = list(csv.reader(csvFile))
+    self.assertEqual(rows[0][0:2], ["stage", "count"])
+    self.assertEqual(rows[1][0:2], ["solve", "1"])
+
+if __name__ == "__main__":
+  unittest.main()
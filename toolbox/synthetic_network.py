@@ -0,0 +1,166 @@
+import csv
+import random
+
+from bounded_shortest_path import BoundedShortestPath
+from network_graph         import NetworkGraph
+from random_point_sampler  import RandomPointSampler
+
+###
+# Synthetic networks and crash sets for testing and benchmarking.
+#
+# Networks are arrays of two-point lines, which can be turned into a
+# NetworkGraph or written to a CSV edge list with the same columns as the
+# sample data (StartX, StartY, EndX, EndY).  Crashes are (edgeID, offset)
+# locations on a NetworkGraph.
+###
+class SyntheticNetwork(object):
+  ###
+  # Initialize the generator.
+  # @param seed The random seed (optional).
+  ###
+  def __init__(self, seed=None):
+    self._rand = random.Random(seed)
+
+  # Get the random number generator.
+  def getRandom(self):
+    return self._rand
+
+  ###
+  # Make a Manhattan grid of streets.
+  # @param rows The number of rows of intersections.
+  # @param cols The number of columns of intersections.
+  # @param spacing The block length.
+  ###
+  def makeGrid(self, rows, cols, spacing=100.0):
+    lines = []
+
+    for row in range(0, rows):
+      for col in range(0, cols):
+        x = col * spacing
+        y = row * spacing
+
+        if col + 1 < cols:
+          lines.append([(x, y), (x + spacing, y)])
+        if row + 1 < rows:
+          lines.append([(x, y), (x, y + spacing)])
+
+    return lines
+
+  ###
+  # Make a random planar network.  Intersections are placed on a jittered
+  # grid, some of the grid's streets are dropped, and some blocks get a
+  # diagonal street (at most one per block, so streets never cross).
+  # @param rows The number of rows of intersections.
+  # @param cols The number of columns of intersections.
+  # @param spacing The average block length.
+  # @param keepFraction The fraction of grid streets to keep.
+  # @param diagonalFraction The fraction of blocks with a diagonal street.
+  # @param jitter How far intersections move, as a fraction of the spacing
+  #        (less than 0.5 keeps the network planar).
+  ###
+  def makeRandomPlanar(self, rows, cols, spacing=100.0, keepFraction=0.8,
+    diagonalFraction=0.15, jitter=0.3):
+    rand  = self._rand
+    nodes = {}
+    lines = []
+
+    for row in range(0, rows):
+      for col in range(0, cols):
+        nodes[(row, col)] = (
+          (col + rand.uniform(-jitter, jitter)) * spacing,
+          (row + rand.uniform(-jitter, jitter)) * spacing)
+
+    for row in range(0, rows):
+      for col in range(0, cols):
+        if col + 1 < cols and rand.random() < keepFraction:
+          lines.append([nodes[(row, col)], nodes[(row, col + 1)]])
+        if row + 1 < rows and rand.random() < keepFraction:
+          lines.append([nodes[(row, col)], nodes[(row + 1, col)]])
+
+        if col + 1 < cols and row + 1 < rows and rand.random() < diagonalFraction:
+          if rand.random() < 0.5:
+            lines.append([nodes[(row, col)], nodes[(row + 1, col + 1)]])
+          else:
+            lines.append([nodes[(row, col + 1)], nodes[(row + 1, col)]])
+
+    return lines
+
+  ###
+  # Write lines to a CSV edge list (StartX, StartY, EndX, EndY).  Only the end
+  # points of each line are written.
+  # @param lines An array of lines.
+  # @param path The path of the CSV file.
+  ###
+  def writeLines(self, lines, path):
+    with open(path, "w") as csvFile:
+      writer = csv.writer(csvFile, lineterminator="\n")
+      writer.writerow(["StartX", "StartY", "EndX", "EndY"])
+
+      for line in lines:
+        writer.writerow([line[0][0], line[0][1], line[-1][0], line[-1][1]])
+
+  ###
+  # Read lines from a CSV edge list (StartX, StartY, EndX, EndY).
+  # @param path The path of the CSV file.
+  ###
+  def readLines(self, path):
+    with open(path, "r") as csvFile:
+      return [[(float(row["StartX"]), float(row["StartY"])), (float(row["EndX"]), float(row["EndY"]))]
+        for row in csv.DictReader(csvFile)]
+
+  ###
+  # Make uniformly random crashes on a network.
+  # @param graph A NetworkGraph.
+  # @param numPoints The number of crashes.
+  ###
+  def makeUniformPoints(self, graph, numPoints):
+    lengths = [graph.getEdgeLength(edgeID) for edgeID in range(0, graph.getNumberOfEdges())]
+    return RandomPointSampler(lengths, None, self._rand).sample(numPoints)
+
+  ###
+  # Make clustered crashes on a network.  Cluster centers are uniformly
+  # random, and each crash is placed uniformly on the edges within a network
+  # radius of its cluster's center.
+  # @param graph A NetworkGraph.
+  # @param numPoints The number of crashes.
+  # @param numClusters The number of clusters.
+  # @param radius The network distance that each cluster spans.
+  ###
+  def makeClusteredPoints(self, graph, numPoints, numClusters, radius):
+    rand      = self._rand
+    kernel    = BoundedShortestPath(graph.getAdjacency())
+    centers   = self.makeUniformPoints(graph, numClusters)
+    nodeEdges = {}
+    clusters  = []
+    points    = []
+
+    for edgeID in range(0, graph.getNumberOfEdges()):
+      fromNode, toNode, length, vertices = graph.getEdge(edgeID)
+      nodeEdges.setdefault(fromNode, set()).add(edgeID)
+      nodeEdges.setdefault(toNode,   set()).add(edgeID)
+
+    # Each cluster covers its center's edge and the edges that touch a node
+    # within the radius of the center.
+    for center in centers:
+      edgeIDs = set([center[0]])
+
+      for node in kernel.search(graph.getLocationSeeds(center), radius):
+        edgeIDs.update(nodeEdges.get(node, ()))
+
+      edgeIDs = sorted(edgeIDs)
+      lengths = [graph.getEdgeLength(edgeID) for edgeID in edgeIDs]
+      clusters.append((edgeIDs, RandomPointSampler(lengths, None, rand)))
+
+    for i in range(0, numPoints):
+      edgeIDs, sampler = clusters[rand.randrange(0, len(clusters))]
+      edgeID           = edgeIDs[sampler.findEdge(rand.random() * sampler.getTotalWeight())]
+      points.append((edgeID, rand.random() * graph.getEdgeLength(edgeID)))
+
+    return points
+
+  ###
+  # Make a NetworkGraph from lines.
+  # @param lines An array of lines.
+  ###
+  def makeGraph(self, lines):
+    return NetworkGraph.fromLines(lines)
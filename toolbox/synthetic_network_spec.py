@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from synthetic_network import SyntheticNetwork
+from bounded_shortest_path import BoundedShortestPath
+
+class SyntheticNetworkSuite(unittest.TestCase):
+  # A grid has rows * (cols - 1) + cols * (rows - 1) blocks.
+  def test_grid(self):
+    synNet = SyntheticNetwork(1)
+    graph  = synNet.makeGraph(synNet.makeGrid(4, 5, 10))
+
+    self.assertEqual(graph.getNumberOfNodes(), 20)
+    self.assertEqual(graph.getNumberOfEdges(), 4 * 4 + 5 * 3)
+    self.assertEqual(graph.getTotalLength(), 310)
+
+  # Random planar networks are reproducible and have no more than the grid's
+  # streets plus one diagonal per block.
+  def test_random_planar(self):
+    lines = SyntheticNetwork(7).makeRandomPlanar(10, 10)
+
+    self.assertEqual(lines, SyntheticNetwork(7).makeRandomPlanar(10, 10))
+    self.assertNotEqual(lines, SyntheticNetwork(8).makeRandomPlanar(10, 10))
+    self.assertTrue(100 < len(lines) <= 180 + 81)
+
+  # Edge lists round trip through CSV.
+  def test_csv(self):
+    tmpDir = tempfile.mkdtemp()
+
+    try:
+      synNet = SyntheticNetwork(2)
+      lines  = synNet.makeRandomPlanar(5, 5)
+      path   = os.path.join(tmpDir, "lines.csv")
+      synNet.writeLines(lines, path)
+
+      for line, readLine in zip(lines, synNet.readLines(path)):
+        for (x1, y1), (x2, y2) in zip(line, readLine):
+          self.assertAlmostEqual(x1, x2)
+          self.assertAlmostEqual(y1, y2)
+    finally:
+      shutil.rmtree(tmpDir)
+
+  # Clustered points are on edges that touch the cluster's radius, so with one
+  # cluster no two points are more than two radii and two blocks apart.
+  def test_clustered(self):
+    synNet    = SyntheticNetwork(4)
+    graph     = synNet.makeGraph(synNet.makeGrid(20, 20, 100))
+    kernel    = BoundedShortestPath(graph.getAdjacency())
+    clustered = synNet.makeClusteredPoints(graph, 200, 1, 200)
+    uniform   = synNet.makeUniformPoints(graph, 200)
+
+    def getMaxDistance(points):
+      nodeDists = kernel.search(graph.getLocationSeeds(points[0]))
+      return max(min(nodeDists[node] + dist for node, dist in graph.getLocationSeeds(point))
+        for point in points)
+
+    self.assertEqual(len(clustered), 200)
+    self.assertTrue(getMaxDistance(clustered) <= 2 * (200 + 100))
+    self.assertTrue(getMaxDistance(uniform) > 2 * (200 + 100))
@@ -0,0 +1,116 @@
+import os
+import threading
+import uuid
+
+###
+# Run-scoped names for temporary datasets and layers.
+#
+# Every temporary name of a run starts with TEMP_ and the run's ID, so two
+# runs (or parallel workers) in the same workspace never overwrite each
+# other's random points, ODCM layers, and so on.  The names that are handed
+# out are tracked so that whatever is left at the end of the run, e.g. after
+# a failure, can be deleted.
+#
+# This class doesn't use arcpy: the functions that check for and delete
+# datasets are passed to cleanUp (see KFunctionHelper.deleteTempDatasets).
+###
+class TempNamespace(object):
+  # The prefix of all temporary names.
+  PREFIX = "TEMP"
+
+  ###
+  # Initialize the namespace.
+  # @param runID The run's ID (optional).  Defaults to a new random ID.  Only
+  #        letters, digits, and underscores should be used, so that the names
+  #        are valid table names.
+  ###
+  def __init__(self, runID=None):
+    self._runID   = runID if runID is not None else TempNamespace.createRunID()
+    self._names   = []
+    self._counter = 0
+    self._lock    = threading.Lock()
+
+  ###
+  # Create a new run ID: the process ID and a random suffix.
+  ###
+  @staticmethod
+  def createRunID():
+    return "{0}_{1}".format(os.getpid(), uuid.uuid4().hex[:8])
+
+  # Get the run ID.
+  def getRunID(self):
+    return self._runID
+
+  # Get the names (and paths) that have been handed out and not released, in
+  # order.
+  def getNames(self):
+    with self._lock:
+      return list(self._names)
+
+  # Track a name for clean up.
+  def _track(self, name):
+    with self._lock:
+      if name not in self._names:
+        self._names.append(name)
+    return name
+
+  ###
+  # Get the run's name for a temporary dataset, e.g. TEMP_1234_1a2b3c4d_LINES.
+  # The same base always gives the same name within the run.
+  # @param base The base name (e.g. RANDOM_POINTS_Streets_ND).
+  ###
+  def getName(self, base):
+    return self._track("{0}_{1}_{2}".format(self.PREFIX, self._runID, base))
+
+  ###
+  # Get the full path of a temporary dataset in a workspace (e.g. a scratch
+  # workspace, see ScratchWorkspace).  The path is tracked rather than the
+  # name, so it can be cleaned up wherever it is.
+  # @param workspace The workspace.
+  # @param base The base name.
+  ###
+  def getPath(self, workspace, base):
+    return self._track(os.path.join(workspace, "{0}_{1}_{2}".format(self.PREFIX, self._runID, base)))
+
+  ###
+  # Get a name that hasn't been handed out before in this run, e.g. for the
+  # ODCM layers of concurrent permutations.
+  # @param base The base name.
+  ###
+  def getUniqueName(self, base):
+    with self._lock:
+      self._counter += 1
+      counter = self._counter
+
+    return self.getName("{0}_{1}".format(base, counter))
+
+  ###
+  # Stop tracking a name, e.g. once its dataset has been deleted.
+  # @param name The name (or a path ending in the name).
+  ###
+  def release(self, name):
+    name = os.path.basename(str(name))
+
+    with self._lock:
+      self._names = [tracked for tracked in self._names if os.path.basename(tracked) != name]
+
+  ###
+  # Delete everything that the run created and that still exists, newest
+  # first (layers before the datasets they're made from).  Errors are not
+  # raised, so that cleaning up after a failure doesn't hide the failure.
+  # Returns the names that couldn't be deleted.
+  # @param exists A function(name) that checks if a dataset exists.
+  # @param delete A function(name) that deletes a dataset.
+  ###
+  def cleanUp(self, exists, delete):
+    failed = []
+
+    for name in reversed(self.getNames()):
+      try:
+        if exists(name):
+          delete(name)
+        self.release(name)
+      except Exception:
+        failed.append(name)
+
+    return failed
@@ -0,0 +1,73 @@
+import os
+import threading
+import unittest
+
+from temp_namespace import TempNamespace
+
+class TempNamespaceSuite(unittest.TestCase):
+  # Names are scoped to the run, and each run gets its own ID.
+  def test_names(self):
+    tempNS = TempNamespace("1_abc")
+
+    self.assertEqual(tempNS.getName("LINES_Streets"), "TEMP_1_abc_LINES_Streets")
+    self.assertEqual(tempNS.getName("LINES_Streets"), "TEMP_1_abc_LINES_Streets")
+    self.assertEqual(tempNS.getNames(), ["TEMP_1_abc_LINES_Streets"])
+    self.assertNotEqual(TempNamespace().getRunID(), TempNamespace().getRunID())
+    self.assertNotEqual(TempNamespace().getName("ODCM"), TempNamespace().getName("ODCM"))
+
+  # Paths in other workspaces are tracked with the workspace, and released by
+  # name or path.
+  def test_paths(self):
+    tempNS = TempNamespace("run")
+    path   = tempNS.getPath("in_memory", "POINTS")
+
+    self.assertEqual(path, os.path.join("in_memory", "TEMP_run_POINTS"))
+    self.assertEqual(tempNS.getNames(), [path])
+
+    tempNS.release("TEMP_run_POINTS")
+    self.assertEqual(tempNS.getNames(), [])
+
+  # Unique names don't repeat, even from several threads.
+  def test_unique_names(self):
+    tempNS  = TempNamespace()
+    names   = []
+    lock    = threading.Lock()
+
+    def getNames():
+      for i in range(0, 100):
+        name = tempNS.getUniqueName("ODCM_NETWORK_K")
+        with lock:
+          names.append(name)
+
+    threads = [threading.Thread(target=getNames) for i in range(0, 4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(len(set(names)), 400)
+    self.assertEqual(sorted(tempNS.getNames()), sorted(names))
+
+  # Clean up deletes what exists, newest first, and keeps going past errors.
+  def test_clean_up(self):
+    tempNS   = TempNamespace("run")
+    existing = set([tempNS.getName("A"), tempNS.getName("B"), tempNS.getName("C")])
+    deleted  = []
+    released = tempNS.getName("D")
+
+    tempNS.release("/some/workspace/{0}".format(released))
+
+    def delete(name):
+      if name.endswith("B"):
+        raise RuntimeError("Locked.")
+      deleted.append(name)
+      existing.discard(name)
+
+    failed = tempNS.cleanUp(lambda name: name in existing, delete)
+
+    self.assertEqual(deleted, ["TEMP_run_C", "TEMP_run_A"])
+    self.assertEqual(failed, ["TEMP_run_B"])
+    self.assertEqual(tempNS.getNames(), ["TEMP_run_B"])
+
+if __name__ == "__main__":
+  unittest.main()